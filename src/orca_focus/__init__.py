@@ -1,33 +1,113 @@
-"""Astigmatic autofocus toolkit for ORCA + MCL systems."""
-
-from .autofocus import (
-    AstigmaticAutofocusController,
-    AutofocusConfig,
-    AutofocusSample,
-    AutofocusWorker,
-)
-from .calibration import (
-    CalibrationFitReport,
-    CalibrationSample,
-    FocusCalibration,
-    auto_calibrate,
-    fit_linear_calibration,
-    fit_linear_calibration_with_report,
-    load_calibration_samples_csv,
-    save_calibration_samples_csv,
-    validate_calibration_sign,
-)
-from .dcam import DcamFrameSource
-from .focus_metric import Roi, centroid_near_edge
-from .pylablib_camera import PylablibFrameSource, create_pylablib_frame_source
-from .interfaces import CameraFrame, CameraInterface, StageInterface
+"""Astigmatic autofocus toolkit for ORCA + MCL systems.
+
+Public names are loaded on first access, so `import orca_focus` (and the
+headless CLI) does not pay for GUI, recorder or camera-backend modules it
+never uses.
+"""
+
+from __future__ import annotations
+
+import importlib
+from typing import TYPE_CHECKING, Any
+
+if TYPE_CHECKING:
+    from .autofocus import (
+        AstigmaticAutofocusController,
+        AutofocusConfig,
+        AutofocusSample,
+        AutofocusWorker,
+    )
+    from .broadcast import FrameBroadcaster, FrameSubscription
+    from .calibration import (
+        CalibrationFitReport,
+        CalibrationSample,
+        FocusCalibration,
+        auto_calibrate,
+        fit_linear_calibration,
+        fit_linear_calibration_with_report,
+        load_calibration_samples_csv,
+        save_calibration_samples_csv,
+        validate_calibration_sign,
+        waveform_calibrate,
+    )
+    from .dcam import DcamFrameSource
+    from .focus_metric import Roi, centroid_near_edge
+    from .pylablib_camera import PylablibFrameSource, create_pylablib_frame_source
+    from .interfaces import CameraFrame, CameraInterface, StageInterface
+    from .isolated import IsolatedAutofocus, IsolatedSample
+    from .sample_ring import RingSample, SampleRing
+    from .recorder import FrameRecorder, Recording
+    from .registry import CalibrationKey, CalibrationRecord, CalibrationRegistry
+    from .server import FocusClient, FocusServer
+    from .telemetry import TelemetryRing
+    from .zsampler import SampledStage, StageZSampler, ZSnapshot
+    from .zhuang import (
+        ZhuangFitReport,
+        ZhuangFocusCalibration,
+        fit_zhuang_calibration,
+        fit_zhuang_calibration_with_report,
+        zhuang_quality_issues,
+    )
+
+# Public name -> submodule that defines it.
+_EXPORTS = {
+    "AstigmaticAutofocusController": "autofocus",
+    "AutofocusConfig": "autofocus",
+    "AutofocusSample": "autofocus",
+    "AutofocusWorker": "autofocus",
+    "FrameBroadcaster": "broadcast",
+    "FrameSubscription": "broadcast",
+    "CalibrationFitReport": "calibration",
+    "CalibrationKey": "registry",
+    "CalibrationRecord": "registry",
+    "CalibrationRegistry": "registry",
+    "CalibrationSample": "calibration",
+    "FocusCalibration": "calibration",
+    "auto_calibrate": "calibration",
+    "fit_linear_calibration": "calibration",
+    "fit_linear_calibration_with_report": "calibration",
+    "save_calibration_samples_csv": "calibration",
+    "load_calibration_samples_csv": "calibration",
+    "validate_calibration_sign": "calibration",
+    "waveform_calibrate": "calibration",
+    "DcamFrameSource": "dcam",
+    "Roi": "focus_metric",
+    "centroid_near_edge": "focus_metric",
+    "PylablibFrameSource": "pylablib_camera",
+    "create_pylablib_frame_source": "pylablib_camera",
+    "CameraFrame": "interfaces",
+    "CameraInterface": "interfaces",
+    "StageInterface": "interfaces",
+    "ZhuangFitReport": "zhuang",
+    "ZhuangFocusCalibration": "zhuang",
+    "fit_zhuang_calibration": "zhuang",
+    "fit_zhuang_calibration_with_report": "zhuang",
+    "zhuang_quality_issues": "zhuang",
+    "SampledStage": "zsampler",
+    "StageZSampler": "zsampler",
+    "ZSnapshot": "zsampler",
+    "TelemetryRing": "telemetry",
+    "FrameRecorder": "recorder",
+    "Recording": "recorder",
+    "IsolatedAutofocus": "isolated",
+    "IsolatedSample": "isolated",
+    "RingSample": "sample_ring",
+    "SampleRing": "sample_ring",
+    "FocusServer": "server",
+    "FocusClient": "server",
+}
 
 __all__ = [
     "AstigmaticAutofocusController",
     "AutofocusConfig",
     "AutofocusSample",
     "AutofocusWorker",
+    "FrameBroadcaster",
+    "FrameSubscription",
     "CalibrationFitReport",
+    "CalibrationKey",
+    "CalibrationRecord",
+    "CalibrationRegistry",
     "CalibrationSample",
     "FocusCalibration",
     "auto_calibrate",
@@ -36,6 +116,7 @@ __all__ = [
     "save_calibration_samples_csv",
     "load_calibration_samples_csv",
     "validate_calibration_sign",
+    "waveform_calibrate",
     "DcamFrameSource",
     "Roi",
     "centroid_near_edge",
@@ -44,4 +125,34 @@ __all__ = [
     "CameraFrame",
     "CameraInterface",
     "StageInterface",
+    "ZhuangFitReport",
+    "ZhuangFocusCalibration",
+    "fit_zhuang_calibration",
+    "fit_zhuang_calibration_with_report",
+    "zhuang_quality_issues",
+    "SampledStage",
+    "StageZSampler",
+    "ZSnapshot",
+    "TelemetryRing",
+    "FrameRecorder",
+    "Recording",
+    "IsolatedAutofocus",
+    "IsolatedSample",
+    "RingSample",
+    "SampleRing",
+    "FocusServer",
+    "FocusClient",
 ]
+
+
+def __getattr__(name: str) -> Any:
+    module = _EXPORTS.get(name)
+    if module is None:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    value = getattr(importlib.import_module(f".{module}", __name__), name)
+    globals()[name] = value
+    return value
+
+
+def __dir__() -> list[str]:
+    return sorted(set(globals()) | set(__all__))
@@ -4,11 +4,15 @@ import math
 import threading
 import time
 from dataclasses import dataclass
-from typing import Callable
+from typing import TYPE_CHECKING, Callable
 
+from . import tracing
 from .calibration import FocusCalibration
-from .focus_metric import Roi, astigmatic_error_signal, centroid_near_edge, roi_total_intensity
-from .interfaces import CameraInterface, StageInterface
+from .focus_metric import Roi, astigmatic_error_signal, centroid_near_edge, roi_centroid, roi_total_intensity
+from .interfaces import CameraFrame, CameraInterface, StageInterface
+
+if TYPE_CHECKING:
+    from .telemetry import TelemetryRing
 
 
 @dataclass(slots=True)
@@ -38,6 +42,28 @@ class AutofocusConfig:
     # Do not issue stage moves smaller than this threshold (um) to reduce
     # high-frequency dithering/oscillation near focus.
     command_deadband_um: float = 0.02
+    # Adaptive loop rate: while |error_um| stays within command_deadband_um
+    # and no correction is applied, the rate is multiplied by
+    # adaptive_backoff every adaptive_settle_steps steps, down to
+    # min_loop_hz. An error outside the deadband, a stage move, a frozen step
+    # or a relative ROI intensity change above adaptive_intensity_jump
+    # restores loop_hz at once.
+    adaptive_rate: bool = False
+    min_loop_hz: float = 5.0
+    adaptive_settle_steps: int = 10
+    adaptive_backoff: float = 0.5
+    adaptive_intensity_jump: float = 0.2
+    # Also retune the camera (if it exposes set_frame_rate_hz) on rate changes.
+    adaptive_camera_rate: bool = False
+    # ROI tracking: keep the ROI centred on the PSF centroid as it drifts in
+    # xy. The centroid must sit more than roi_track_threshold_px off centre
+    # for roi_track_settle_steps consecutive steps (hysteresis); the ROI then
+    # moves by the mean offset, in whole pixels, at most once every
+    # roi_track_min_interval_s so camera subarray reprogramming stays rare.
+    roi_tracking: bool = False
+    roi_track_threshold_px: float = 2.0
+    roi_track_settle_steps: int = 5
+    roi_track_min_interval_s: float = 1.0
 
 
 @dataclass(slots=True)
@@ -49,6 +75,120 @@ class AutofocusSample:
     commanded_z_um: float
     roi_total_intensity: float
     control_applied: bool
+    frame_index: int | None = None
+    # Loop rate this step was scheduled at (varies with adaptive_rate).
+    loop_hz: float = 0.0
+
+
+class AdaptiveLoopRate:
+    """Loop-rate schedule for `AutofocusConfig.adaptive_rate`.
+
+    Backs the rate off geometrically while the loop sits in the deadband and
+    jumps back to `loop_hz` on the first sign of a disturbance.
+    """
+
+    # EMA weight of the intensity reference the jump test compares against.
+    _INTENSITY_ALPHA = 0.2
+
+    def __init__(self, config: AutofocusConfig) -> None:
+        self._max_hz = float(config.loop_hz)
+        self._min_hz = min(float(config.min_loop_hz), self._max_hz)
+        self._deadband_um = float(config.command_deadband_um)
+        self._settle_steps = int(config.adaptive_settle_steps)
+        self._backoff = float(config.adaptive_backoff)
+        self._intensity_jump = float(config.adaptive_intensity_jump)
+        self._quiet_steps = 0
+        self._ref_intensity: float | None = None
+        self.hz = self._max_hz
+        self.rate_changes = 0
+
+    def update(self, sample: AutofocusSample, *, measured: bool = True) -> float:
+        """Feed one step's sample; returns the rate for the next step.
+
+        `measured` is False for steps frozen by a guard before the error was
+        computed; stale frames (no intensity) leave the schedule untouched.
+        """
+        intensity = sample.roi_total_intensity
+        if not measured and intensity <= 0.0:
+            return self.hz
+        ref = self._ref_intensity
+        jumped = ref is not None and abs(intensity - ref) > self._intensity_jump * abs(ref)
+        if ref is None or jumped:
+            self._ref_intensity = intensity
+        else:
+            self._ref_intensity = ref + self._INTENSITY_ALPHA * (intensity - ref)
+
+        # A step that moved the stage is not quiet even inside the deadband:
+        # the integrator is still pulling the loop in.
+        if jumped or not measured or sample.control_applied or abs(sample.error_um) > self._deadband_um:
+            self._quiet_steps = 0
+            hz = self._max_hz
+        else:
+            self._quiet_steps += 1
+            hz = self.hz
+            if self._quiet_steps >= self._settle_steps:
+                self._quiet_steps = 0
+                hz = max(self._min_hz, hz * self._backoff)
+        if hz != self.hz:
+            self.hz = hz
+            self.rate_changes += 1
+        return hz
+
+
+class RoiTracker:
+    """Batched, hysteretic ROI re-centring for `AutofocusConfig.roi_tracking`."""
+
+    def __init__(self, config: AutofocusConfig, roi: Roi) -> None:
+        self.roi = roi
+        self._threshold_px = float(config.roi_track_threshold_px)
+        self._settle_steps = int(config.roi_track_settle_steps)
+        self._min_interval_s = float(config.roi_track_min_interval_s)
+        self._sum_dx = 0.0
+        self._sum_dy = 0.0
+        self._n_off = 0
+        self._last_move_s: float | None = None
+        self.moves = 0
+
+    def update(self, cx: float, cy: float, frame_shape: tuple[int, int], now_s: float) -> Roi | None:
+        """Feed one centroid (image coordinates); returns the new ROI when it moves."""
+        roi = self.roi
+        dx = cx - (roi.x + 0.5 * (roi.width - 1))
+        dy = cy - (roi.y + 0.5 * (roi.height - 1))
+        if max(abs(dx), abs(dy)) <= self._threshold_px:
+            self._sum_dx = self._sum_dy = 0.0
+            self._n_off = 0
+            return None
+        self._sum_dx += dx
+        self._sum_dy += dy
+        self._n_off += 1
+        if self._n_off < self._settle_steps:
+            return None
+        if self._last_move_s is not None and now_s - self._last_move_s < self._min_interval_s:
+            return None
+        shift_x = round(self._sum_dx / self._n_off)
+        shift_y = round(self._sum_dy / self._n_off)
+        self._sum_dx = self._sum_dy = 0.0
+        self._n_off = 0
+        h, w = frame_shape
+        moved = Roi(
+            x=min(max(0, roi.x + shift_x), max(0, w - roi.width)),
+            y=min(max(0, roi.y + shift_y), max(0, h - roi.height)),
+            width=roi.width,
+            height=roi.height,
+        )
+        if moved == roi:
+            return None
+        self.roi = moved
+        self._last_move_s = now_s
+        self.moves += 1
+        return moved
+
+
+def _frame_shape(image) -> tuple[int, int]:
+    shape = getattr(image, "shape", None)
+    if shape is not None:
+        return int(shape[0]), int(shape[1])
+    return len(image), len(image[0]) if image else 0
 
 
 class AstigmaticAutofocusController:
@@ -67,8 +207,16 @@ class AstigmaticAutofocusController:
         config: AutofocusConfig,
         calibration: FocusCalibration,
         initial_integral_um: float = 0.0,
+        on_step: Callable[[CameraFrame, AutofocusSample, Roi], None] | None = None,
+        on_roi_change: Callable[[Roi], None] | None = None,
     ) -> None:
         self._camera = camera
+        # Called with every step's frame, sample and ROI (recorders); must not block.
+        self._on_step = on_step
+        # Called from the control thread when ROI tracking moves the ROI
+        # (e.g. to reprogram a camera subarray); must not block.
+        self._on_roi_change = on_roi_change
+        self._last_frame: CameraFrame | None = None
         self._stage = stage
         self._config = config
         self._validate_config()
@@ -76,12 +224,43 @@ class AstigmaticAutofocusController:
         self._integral_um = initial_integral_um
         self._filtered_error_um: float | None = None
         self._last_frame_ts: float | None = None
+        self._last_frame_index: int | None = None
+        self._frames_dropped = 0
         self._z_lock_center_um: float | None = None
+        # Stages exposing a combined write + readback (MCL MonitorN) let a
+        # control step cost one round trip: the setpoint commanded last step
+        # stands in for the separate get_z_um read on the next one.
+        move_and_read = getattr(stage, "move_and_read_z_um", None)
+        self._move_and_read: Callable[[float], float] | None = move_and_read if callable(move_and_read) else None
+        self._setpoint_z_um: float | None = None
+        self._measured = False
+        self._roi = config.roi
+        self._tracker = RoiTracker(config, config.roi) if config.roi_tracking else None
+        self._rate = AdaptiveLoopRate(config) if config.adaptive_rate else None
+        set_frame_rate = getattr(camera, "set_frame_rate_hz", None) if config.adaptive_camera_rate else None
+        self._set_frame_rate: Callable[[float], None] | None = set_frame_rate if callable(set_frame_rate) else None
 
     @property
     def loop_hz(self) -> float:
+        """Rate the next step should run at (below `config.loop_hz` when backed off)."""
+        if self._rate is not None:
+            return self._rate.hz
         return self._config.loop_hz
 
+    @property
+    def roi(self) -> Roi:
+        """ROI the next step measures (follows the bead with `roi_tracking`)."""
+        return self._roi
+
+    @property
+    def roi_moves(self) -> int:
+        return self._tracker.moves if self._tracker is not None else 0
+
+    @property
+    def frames_dropped(self) -> int:
+        """Frames the camera numbered but the loop never saw (index gaps)."""
+        return self._frames_dropped
+
     @property
     def calibration(self) -> FocusCalibration:
         return self._calibration
@@ -107,6 +286,23 @@ class AstigmaticAutofocusController:
             raise ValueError("max_abs_excursion_um must be >= 0 when provided")
         if self._config.command_deadband_um < 0:
             raise ValueError("command_deadband_um must be >= 0")
+        if self._config.adaptive_rate:
+            if self._config.min_loop_hz <= 0:
+                raise ValueError("min_loop_hz must be > 0")
+            if self._config.adaptive_settle_steps < 1:
+                raise ValueError("adaptive_settle_steps must be >= 1")
+            if not 0.0 < self._config.adaptive_backoff < 1.0:
+                raise ValueError("adaptive_backoff must be in (0.0, 1.0)")
+            if self._config.adaptive_intensity_jump <= 0:
+                raise ValueError("adaptive_intensity_jump must be > 0")
+        if self._config.roi_tracking:
+            # Moves are whole pixels; a smaller threshold could re-centre forever.
+            if self._config.roi_track_threshold_px < 1.0:
+                raise ValueError("roi_track_threshold_px must be >= 1")
+            if self._config.roi_track_settle_steps < 1:
+                raise ValueError("roi_track_settle_steps must be >= 1")
+            if self._config.roi_track_min_interval_s < 0:
+                raise ValueError("roi_track_min_interval_s must be >= 0")
 
     def _apply_limits(self, target_z_um: float) -> float:
         if self._z_lock_center_um is not None and self._config.max_abs_excursion_um is not None:
@@ -118,16 +314,49 @@ class AstigmaticAutofocusController:
             target_z_um = min(self._config.stage_max_um, target_z_um)
         return target_z_um
 
+    @tracing.traced("autofocus.step", "control")
     def run_step(self, dt_s: float | None = None) -> AutofocusSample:
+        roi = self._roi
+        sample = self._step(dt_s)
+        sample.loop_hz = self.loop_hz
+        if self._rate is not None:
+            hz = sample.loop_hz
+            if self._rate.update(sample, measured=self._measured) != hz and self._set_frame_rate is not None:
+                self._set_frame_rate(self._rate.hz)
+        if self._on_step is not None:
+            with tracing.span("autofocus.on_step", "control"):
+                self._on_step(self._last_frame, sample, roi)
+        return sample
+
+    def _step(self, dt_s: float | None) -> AutofocusSample:
         frame = self._camera.get_frame()
-        current_z = self._stage.get_z_um()
+        self._last_frame = frame
+        self._measured = False
+        # The cached setpoint is only trusted for the step right after a
+        # combined move; any step that does not move re-reads the stage.
+        current_z = self._setpoint_z_um
+        self._setpoint_z_um = None
+        if current_z is None:
+            current_z = self._stage.get_z_um()
         if self._z_lock_center_um is None:
             self._z_lock_center_um = float(current_z)
 
-        # Guard: skip duplicate frames (same timestamp as previous).
+        # Guard: skip duplicate frames (same timestamp/index as previous).
         # This prevents acting on stale data when the camera buffer stalls,
         # which is common with Micro-Manager circular buffer acquisition.
-        if self._last_frame_ts is not None and frame.timestamp_s == self._last_frame_ts:
+        # Cameras that number their frames are checked by index, which also
+        # reveals frames lost between two reads. An index that goes backwards
+        # means the source restarted its numbering (a restarted sequence
+        # acquisition): resync to it instead of treating every later frame
+        # as stale.
+        if frame.frame_index is not None:
+            last = self._last_frame_index
+            stale = last is not None and frame.frame_index == last
+            if last is not None and frame.frame_index > last:
+                self._frames_dropped += frame.frame_index - last - 1
+        else:
+            stale = self._last_frame_ts is not None and frame.timestamp_s == self._last_frame_ts
+        if stale:
             return AutofocusSample(
                 timestamp_s=frame.timestamp_s,
                 error=0.0,
@@ -136,10 +365,14 @@ class AstigmaticAutofocusController:
                 commanded_z_um=current_z,
                 roi_total_intensity=0.0,
                 control_applied=False,
+                frame_index=frame.frame_index,
             )
         self._last_frame_ts = frame.timestamp_s
+        self._last_frame_index = frame.frame_index
 
-        total_intensity = roi_total_intensity(frame.image, self._config.roi)
+        roi = self._roi
+        with tracing.span("metric.intensity", "metric"):
+            total_intensity = roi_total_intensity(frame.image, roi)
 
         # Guard: freeze if ROI intensity is too low (bead lost).
         if self._config.min_roi_intensity is not None and total_intensity < self._config.min_roi_intensity:
@@ -151,11 +384,24 @@ class AstigmaticAutofocusController:
                 commanded_z_um=current_z,
                 roi_total_intensity=total_intensity,
                 control_applied=False,
+                frame_index=frame.frame_index,
             )
 
+        # Track before the edge guard so a bead that reached the border is
+        # re-centred rather than frozen for good. The move applies from the
+        # next step; this frame is still measured in the old ROI.
+        if self._tracker is not None:
+            with tracing.span("metric.centroid", "metric"):
+                cx, cy = roi_centroid(frame.image, roi)
+            moved = self._tracker.update(cx, cy, _frame_shape(frame.image), time.monotonic())
+            if moved is not None:
+                self._roi = moved
+                if self._on_roi_change is not None:
+                    self._on_roi_change(moved)
+
         # Guard: freeze if PSF centroid is near the ROI boundary (truncated PSF).
         if self._config.edge_margin_px > 0 and centroid_near_edge(
-            frame.image, self._config.roi, self._config.edge_margin_px
+            frame.image, roi, self._config.edge_margin_px
         ):
             return AutofocusSample(
                 timestamp_s=frame.timestamp_s,
@@ -165,12 +411,15 @@ class AstigmaticAutofocusController:
                 commanded_z_um=current_z,
                 roi_total_intensity=total_intensity,
                 control_applied=False,
+                frame_index=frame.frame_index,
             )
 
-        error = astigmatic_error_signal(frame.image, self._config.roi)
+        with tracing.span("metric.error", "metric"):
+            error = astigmatic_error_signal(frame.image, roi)
         error_um = self._calibration.error_to_z_offset_um(error)
         if not math.isfinite(float(error_um)):
             raise RuntimeError("Non-finite autofocus error encountered; check ROI/calibration")
+        self._measured = True
 
         # Optional exponential moving average on the error signal.
         alpha = self._config.error_alpha
@@ -179,7 +428,7 @@ class AstigmaticAutofocusController:
         self._filtered_error_um = error_um
 
         if dt_s is None:
-            dt_s = 1.0 / self._config.loop_hz
+            dt_s = 1.0 / self.loop_hz
         dt_s = max(0.0, min(float(dt_s), self._config.max_dt_s))
 
         self._integral_um += error_um * dt_s
@@ -207,6 +456,7 @@ class AstigmaticAutofocusController:
                 commanded_z_um=current_z,
                 roi_total_intensity=total_intensity,
                 control_applied=False,
+                frame_index=frame.frame_index,
             )
 
         raw_target = current_z + correction
@@ -222,24 +472,30 @@ class AstigmaticAutofocusController:
                 min(self._config.integral_limit_um, self._integral_um),
             )
 
-        self._stage.move_z_um(commanded_z)
+        if self._move_and_read is not None:
+            measured_z = float(self._move_and_read(commanded_z))
+            self._setpoint_z_um = commanded_z
+        else:
+            self._stage.move_z_um(commanded_z)
+            measured_z = current_z
 
         return AutofocusSample(
             timestamp_s=frame.timestamp_s,
             error=error,
             error_um=error_um,
-            stage_z_um=current_z,
+            stage_z_um=measured_z,
             commanded_z_um=commanded_z,
             roi_total_intensity=total_intensity,
             control_applied=True,
+            frame_index=frame.frame_index,
         )
 
     def run(self, duration_s: float) -> list[AutofocusSample]:
         samples: list[AutofocusSample] = []
-        loop_dt = 1.0 / self._config.loop_hz
         end = time.monotonic() + duration_s
         last_step_start: float | None = None
         while time.monotonic() < end:
+            loop_dt = 1.0 / self.loop_hz
             step_start = time.monotonic()
             dt_s = loop_dt if last_step_start is None else max(0.0, step_start - last_step_start)
             samples.append(self.run_step(dt_s=dt_s))
@@ -257,9 +513,11 @@ class AutofocusWorker:
         self,
         controller: AstigmaticAutofocusController,
         on_sample: Callable[[AutofocusSample], None] | None = None,
+        telemetry: TelemetryRing | None = None,
     ) -> None:
         self._controller = controller
         self._on_sample = on_sample
+        self._telemetry = telemetry
         self._stop_evt = threading.Event()
         self._thread: threading.Thread | None = None
         self._lock = threading.Lock()
@@ -288,11 +546,14 @@ class AutofocusWorker:
             thread.join(timeout=2.0)
 
     def _run_loop(self) -> None:
-        dt = 1.0 / self._controller.loop_hz
         while not self._stop_evt.is_set():
+            # Re-read every step: an adaptive controller changes its rate.
+            dt = 1.0 / self._controller.loop_hz
             t0 = time.monotonic()
             try:
                 sample = self._controller.run_step(dt_s=dt)
+                if self._telemetry is not None:
+                    self._telemetry.append(sample, time.monotonic() - t0)
                 if self._on_sample is not None:
                     self._on_sample(sample)
             except Exception as exc:  # pragma: no cover - exercised by tests indirectly
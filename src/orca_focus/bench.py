@@ -0,0 +1,609 @@
+"""Micro-benchmarks for hot-path hardware calls.
+
+These run without hardware: the stage talks to an in-process mock wrapper, so
+the numbers isolate adapter overhead (attribute lookups, argument binding,
+exception handling) from device latency.
+
+`orca-focus bench` runs the standard suite (`SUITE`) and writes JSON; with
+`--baseline` it compares against an earlier run and exits non-zero when a
+metric regressed past its threshold (see `compare_to_baseline`).
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+import platform
+import sys
+import time
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Any, Callable
+
+from .fake_mcl import FakeMadlib, FakeNanoDrive
+from .hardware import _WRAPPER_READ_NAMES, MclNanoZStage
+
+
+class _MockNanoDrive:
+    """Minimal Madlib-style wrapper whose calls cost next to nothing."""
+
+    def __init__(self) -> None:
+        self._z = 0.0
+
+    def init_handle(self) -> int:
+        return 1
+
+    def single_read_n(self, axis: int, handle: int) -> float:
+        return self._z
+
+    def single_write_n(self, position: float, axis: int, handle: int) -> int:
+        self._z = position
+        return 0
+
+
+def _time_per_call_ns(fn: Callable[[], Any], n_calls: int) -> float:
+    t0 = time.perf_counter_ns()
+    for _ in range(n_calls):
+        fn()
+    return (time.perf_counter_ns() - t0) / n_calls
+
+
+def _per_call_probe_read(wrapper: Any, axis: int, handle: int) -> float:
+    """Reference for the old behaviour: probe names and signatures on every call."""
+
+    for name, _ in _WRAPPER_READ_NAMES:
+        fn = getattr(wrapper, name, None)
+        if not callable(fn):
+            continue
+        for args in ((axis, handle), (axis,), (handle,), ()):
+            try:
+                return float(fn(*args))
+            except TypeError:
+                continue
+    raise RuntimeError("no read method")
+
+
+def bench_mcl_wrapper_overhead(n_calls: int = 100_000) -> dict[str, float]:
+    """Mean nanoseconds per Z read/write through `MclNanoZStage` vs. direct calls.
+
+    `probe_read_ns` times the per-call name/signature probing the stage used to
+    do, for comparison with the connect-time binding in `stage_read_ns`.
+    """
+
+    if n_calls <= 0:
+        raise ValueError("n_calls must be > 0")
+    wrapper = _MockNanoDrive()
+    stage = MclNanoZStage(wrapper_module=wrapper)
+    axis, handle = 3, 1
+
+    return {
+        "n_calls": float(n_calls),
+        "direct_read_ns": _time_per_call_ns(lambda: wrapper.single_read_n(axis, handle), n_calls),
+        "stage_read_ns": _time_per_call_ns(stage.get_z_um, n_calls),
+        "probe_read_ns": _time_per_call_ns(lambda: _per_call_probe_read(wrapper, axis, handle), n_calls),
+        "direct_write_ns": _time_per_call_ns(lambda: wrapper.single_write_n(1.0, axis, handle), n_calls),
+        "stage_write_ns": _time_per_call_ns(lambda: stage.move_z_um(1.0), n_calls),
+    }
+
+
+def bench_mcl_stage_path(
+    n_calls: int = 200,
+    *,
+    latency_s: float = 0.0005,
+    noise_um: float = 0.0,
+    seed: int | None = 0,
+) -> dict[str, float]:
+    """Mean microseconds per stage operation through the ctypes and wrapper paths.
+
+    Both paths talk to a `FakeNanoDrive` with `latency_s` of simulated USB
+    latency per device call, so `*_step_us` shows what one control step costs
+    as a separate read + write versus a single MonitorN round trip.
+    """
+
+    if n_calls <= 0:
+        raise ValueError("n_calls must be > 0")
+    out: dict[str, float] = {"n_calls": float(n_calls), "latency_us": latency_s * 1e6}
+    stages = {
+        "dll": MclNanoZStage(dll=FakeMadlib(latency_s=latency_s, noise_um=noise_um, seed=seed)),
+        "wrapper": MclNanoZStage(
+            wrapper_module=FakeNanoDrive(latency_s=latency_s, noise_um=noise_um, seed=seed)
+        ),
+    }
+    for name, stage in stages.items():
+        stage.move_z_um(10.0)
+
+        def _read_write() -> None:
+            stage.move_z_um(stage.get_z_um())
+
+        out[f"{name}_read_us"] = _time_per_call_ns(stage.get_z_um, n_calls) / 1e3
+        out[f"{name}_write_us"] = _time_per_call_ns(lambda: stage.move_z_um(10.0), n_calls) / 1e3
+        out[f"{name}_read_write_step_us"] = _time_per_call_ns(_read_write, n_calls) / 1e3
+        out[f"{name}_monitor_step_us"] = _time_per_call_ns(lambda: stage.move_and_read_z_um(10.0), n_calls) / 1e3
+        stage.close()
+    return out
+
+
+def bench_simulated_loop(n_steps: int = 2000, *, size: int = 64) -> dict[str, float]:
+    """Closed-loop steps per second against `SimulatedCamera` + in-memory stage.
+
+    Also reports the bare render rate and the batched `render_stack` rate so
+    renderer and controller costs can be told apart.
+    """
+
+    from .autofocus import AstigmaticAutofocusController, AutofocusConfig
+    from .calibration import FocusCalibration
+    from .focus_metric import Roi
+    from .hardware import SimulatedCamera, SimulatedScene
+
+    if n_steps <= 0:
+        raise ValueError("n_steps must be > 0")
+    scene = SimulatedScene(size=size, poisson_noise=True, read_noise_counts=2.0, seed=0)
+    stage = MclNanoZStage()
+    stage.move_z_um(1.0)
+    camera = SimulatedCamera(stage=stage, scene=scene)
+    camera.start()
+    half = min(12, size // 2)
+    controller = AstigmaticAutofocusController(
+        camera=camera,
+        stage=stage,
+        config=AutofocusConfig(
+            roi=Roi(x=size // 2 - half, y=size // 2 - half, width=2 * half, height=2 * half),
+            loop_hz=1000.0,
+            kp=0.5,
+            ki=0.0,
+            max_step_um=0.1,
+        ),
+        calibration=FocusCalibration(error_at_focus=0.0, error_to_um=2.8),
+    )
+
+    render_ns = _time_per_call_ns(lambda: scene.render_frame(0.3), n_steps)
+    zs = [0.001 * i for i in range(n_steps)]
+    t0 = time.perf_counter_ns()
+    scene.render_stack(zs)
+    stack_ns = (time.perf_counter_ns() - t0) / n_steps
+    step_ns = _time_per_call_ns(lambda: controller.run_step(dt_s=0.001), n_steps)
+    camera.stop()
+    return {
+        "n_steps": float(n_steps),
+        "render_hz": 1e9 / render_ns,
+        "render_stack_hz": 1e9 / stack_ns,
+        "loop_hz": 1e9 / step_ns,
+        "final_z_um": stage.get_z_um(),
+    }
+
+
+def bench_mm_frame_source(
+    n_reads: int = 200,
+    *,
+    frames_per_read: int = 4,
+    size: int = 64,
+) -> dict[str, float]:
+    """Compare `MicroManagerFrameSource` live vs drain reads on `FakeMMCore`.
+
+    Before each read the fake camera pushes `frames_per_read` frames, i.e. the
+    camera runs that many times faster than the loop. Live mode sees only the
+    newest of them; drain mode hands all of them to a recorder callback.
+    Bridge calls per read come from the fake core's call counter.
+    """
+
+    from .fake_mmcore import FakeMMCore
+    from .micromanager import MicroManagerFrameSource
+
+    if n_reads <= 0:
+        raise ValueError("n_reads must be > 0")
+    out: dict[str, float] = {"n_reads": float(n_reads), "frames_produced": float(n_reads * frames_per_read)}
+    for mode in ("live", "drain"):
+        core = FakeMMCore(width=size, height=size, buffer_capacity=max(32, 2 * frames_per_read))
+        recorded: list[int] = []
+        on_frames = (lambda batch: recorded.extend(f[2] for f in batch)) if mode == "drain" else None
+        source = MicroManagerFrameSource(core, mode=mode, on_frames=on_frames)
+        seen: set[int] = set()
+        elapsed_ns = 0
+        calls = 0
+        for _ in range(n_reads):
+            core.produce(frames_per_read)
+            core.calls.clear()
+            t0 = time.perf_counter_ns()
+            source()
+            elapsed_ns += time.perf_counter_ns() - t0
+            calls += sum(core.calls.values())
+            seen.add(core._next_index - 1)
+        out[f"{mode}_read_us"] = elapsed_ns / n_reads / 1e3
+        out[f"{mode}_frames_processed"] = float(len(recorded) if mode == "drain" else len(seen))
+        out[f"{mode}_bridge_calls_per_read"] = calls / n_reads
+    return out
+
+
+def bench_mm_step_round_trips(
+    n_steps: int = 100,
+    *,
+    call_latency_s: float = 0.0005,
+    steps_per_frame: int = 2,
+    size: int = 64,
+) -> dict[str, float]:
+    """Bridge round trips and wall time per Micro-Manager control step.
+
+    A step is one live frame read plus a stage read and move, as in
+    `AstigmaticAutofocusController.run_step`. `FakeMMCore` charges
+    `call_latency_s` per API call (a pycromanager ZMQ round trip) and
+    delivers a new frame every `steps_per_frame` steps, so both stale and
+    fresh reads are exercised. Reported for the default token path and for
+    `combined_read=True`.
+    """
+
+    from .fake_mmcore import FakeMMCore
+    from .micromanager import MicroManagerFrameSource, MicroManagerStage
+
+    if n_steps <= 0:
+        raise ValueError("n_steps must be > 0")
+    out: dict[str, float] = {"n_steps": float(n_steps), "call_latency_us": call_latency_s * 1e6}
+    for name, combined in (("token", False), ("combined", True)):
+        core = FakeMMCore(width=size, height=size, call_latency_s=call_latency_s)
+        source = MicroManagerFrameSource(core, combined_read=combined)
+        stage = MicroManagerStage(core)
+        core.produce(1)
+        core.calls.clear()
+        t0 = time.perf_counter_ns()
+        for i in range(n_steps):
+            if i % steps_per_frame == 0:
+                core.produce(1)
+            source()
+            stage.move_z_um(stage.get_z_um() + 0.01)
+        elapsed_ns = time.perf_counter_ns() - t0
+        out[f"{name}_calls_per_step"] = sum(core.calls.values()) / n_steps
+        out[f"{name}_step_us"] = elapsed_ns / n_steps / 1e3
+    return out
+
+
+def _simulated_hardware() -> tuple[Any, Any]:
+    """Picklable hardware factory for isolated-process benchmarks and tests."""
+
+    from .hardware import SimulatedCamera
+
+    stage = MclNanoZStage()
+    stage.move_z_um(1.0)
+    return SimulatedCamera(stage=stage), stage
+
+
+def _gui_load(stop_at: float, burst_s: float = 0.02, idle_s: float = 0.005) -> None:
+    """Synthetic GUI work: pure-Python bursts that hold the GIL, plus GC."""
+
+    import gc
+
+    while time.monotonic() < stop_at:
+        t_end = time.monotonic() + burst_s
+        junk = []
+        while time.monotonic() < t_end:
+            junk.append([float(i) for i in range(200)])
+        del junk
+        gc.collect()
+        time.sleep(idle_s)
+
+
+def _jitter_stats(step_times: list[float], period_s: float) -> dict[str, float]:
+    intervals = sorted(b - a for a, b in zip(step_times, step_times[1:]))
+    if not intervals:
+        return {"steps": float(len(step_times)), "jitter_rms_ms": 0.0, "jitter_p99_ms": 0.0, "max_interval_ms": 0.0}
+    dev = [abs(x - period_s) for x in intervals]
+    dev.sort()
+    rms = (sum(d * d for d in dev) / len(dev)) ** 0.5
+    return {
+        "steps": float(len(step_times)),
+        "jitter_rms_ms": rms * 1e3,
+        "jitter_p99_ms": dev[min(len(dev) - 1, int(0.99 * len(dev)))] * 1e3,
+        "max_interval_ms": intervals[-1] * 1e3,
+    }
+
+
+def bench_loop_jitter(duration_s: float = 2.0, *, loop_hz: float = 200.0, gui_load: bool = True) -> dict[str, float]:
+    """Control-step timing jitter, in-process thread vs `IsolatedAutofocus`.
+
+    Both modes run the same simulated camera/stage loop at `loop_hz` while
+    the main thread optionally runs `_gui_load` (GIL-holding bursts and
+    garbage collection, standing in for napari/Qt). Jitter is the deviation
+    of step-to-step intervals from the nominal period.
+    """
+
+    from .autofocus import AstigmaticAutofocusController, AutofocusConfig, AutofocusWorker
+    from .calibration import FocusCalibration
+    from .focus_metric import Roi
+    from .isolated import IsolatedAutofocus
+
+    if duration_s <= 0:
+        raise ValueError("duration_s must be > 0")
+    config = AutofocusConfig(roi=Roi(x=20, y=20, width=24, height=24), loop_hz=loop_hz, kp=0.5, ki=0.0)
+    calibration = FocusCalibration(error_at_focus=0.0, error_to_um=2.8)
+    period = 1.0 / loop_hz
+    out: dict[str, float] = {"loop_hz": loop_hz, "gui_load": float(gui_load)}
+
+    # In-process: controller on a worker thread next to the load.
+    camera, stage = _simulated_hardware()
+    camera.start()
+    controller = AstigmaticAutofocusController(camera=camera, stage=stage, config=config, calibration=calibration)
+    # Step completion times; the isolated loop reports start + latency to match.
+    ends: list[float] = []
+    worker = AutofocusWorker(controller, on_sample=lambda _s: ends.append(time.monotonic()))
+    worker.start()
+    stop_at = time.monotonic() + duration_s
+    if gui_load:
+        _gui_load(stop_at)
+    else:
+        time.sleep(duration_s)
+    worker.stop()
+    camera.stop()
+    for key, value in _jitter_stats(ends, period).items():
+        out[f"thread_{key}"] = value
+
+    # Isolated: same loop in a child process; the parent only observes.
+    with IsolatedAutofocus(_simulated_hardware, config=config, calibration=calibration) as iso:
+        stop_at = time.monotonic() + duration_s
+        if gui_load:
+            _gui_load(stop_at)
+        else:
+            time.sleep(duration_s)
+        samples = iso.read_samples()
+    for key, value in _jitter_stats([s.step_start_s + s.loop_latency_s for s in samples], period).items():
+        out[f"process_{key}"] = value
+    return out
+
+
+def bench_frame_conversion(n_calls: int = 500, *, size: int = 64) -> dict[str, float]:
+    """Microseconds per `_to_image_2d` call for the frame containers seen in practice."""
+
+    from .dcam import _to_image_2d
+
+    if n_calls <= 0:
+        raise ValueError("n_calls must be > 0")
+    rows = [[float((x * 7 + y * 3) % 251) for x in range(size)] for y in range(size)]
+    out: dict[str, float] = {"n_calls": float(n_calls), "size": float(size)}
+    tuples = tuple(tuple(row) for row in rows)
+    out["nested_list_us"] = _time_per_call_ns(lambda: _to_image_2d(rows), n_calls) / 1e3
+    out["nested_tuple_us"] = _time_per_call_ns(lambda: _to_image_2d(tuples), n_calls) / 1e3
+    try:
+        import numpy as np
+    except Exception:  # pragma: no cover
+        return out
+    array = np.asarray(rows, dtype=np.uint16)
+    out["ndarray_uint16_us"] = _time_per_call_ns(lambda: _to_image_2d(array), n_calls) / 1e3
+    return out
+
+
+def bench_roi_metrics(n_calls: int = 500, *, roi_sizes: tuple[int, ...] = (16, 32, 64)) -> dict[str, float]:
+    """Microseconds per ROI metric call on a simulated frame, per ROI edge length."""
+
+    from .focus_metric import Roi, astigmatic_error_signal, centroid_near_edge, roi_total_intensity
+    from .hardware import SimulatedScene
+
+    if n_calls <= 0:
+        raise ValueError("n_calls must be > 0")
+    size = max(roi_sizes) + 16
+    image = SimulatedScene(size=size, seed=0).render_frame(0.3)
+    out: dict[str, float] = {"n_calls": float(n_calls)}
+    for edge in roi_sizes:
+        roi = Roi(x=(size - edge) // 2, y=(size - edge) // 2, width=edge, height=edge)
+        out[f"error_{edge}px_us"] = _time_per_call_ns(lambda: astigmatic_error_signal(image, roi), n_calls) / 1e3
+        out[f"intensity_{edge}px_us"] = _time_per_call_ns(lambda: roi_total_intensity(image, roi), n_calls) / 1e3
+        out[f"edge_guard_{edge}px_us"] = _time_per_call_ns(lambda: centroid_near_edge(image, roi, 2.0), n_calls) / 1e3
+    return out
+
+
+def bench_calibration_fits(n_fits: int = 5, *, sample_counts: tuple[int, ...] = (11, 41, 161)) -> dict[str, float]:
+    """Milliseconds per linear and Zhuang calibration fit, per sweep length."""
+
+    from .calibration import CalibrationSample, fit_linear_calibration_with_report
+    from .zhuang import fit_zhuang_calibration_with_report, zhuang_error
+
+    if n_fits <= 0:
+        raise ValueError("n_fits must be > 0")
+    q = (1.05, 0.1, 0.4, 0.1, 0.05, 0.5, -0.1, 0.02, 0.55)
+    out: dict[str, float] = {"n_fits": float(n_fits)}
+    for n in sample_counts:
+        zs = [-1.0 + 2.0 * i / (n - 1) for i in range(n)]
+        samples = [CalibrationSample(z_um=25.0 + z, error=zhuang_error(z, q)) for z in zs]
+        out[f"linear_{n}_ms"] = _time_per_call_ns(lambda: fit_linear_calibration_with_report(samples), n_fits) / 1e6
+        out[f"linear_robust_{n}_ms"] = (
+            _time_per_call_ns(lambda: fit_linear_calibration_with_report(samples, robust=True), n_fits) / 1e6
+        )
+        out[f"zhuang_{n}_ms"] = _time_per_call_ns(lambda: fit_zhuang_calibration_with_report(samples), n_fits) / 1e6
+    return out
+
+
+# name -> (benchmark, kwargs for the full run, kwargs for --quick). Adapter
+# overhead runs against zero-latency mocks so it measures our code, not sleeps.
+SUITE: dict[str, tuple[Callable[..., dict[str, float]], dict[str, Any], dict[str, Any]]] = {
+    "frame_conversion": (bench_frame_conversion, {"n_calls": 500}, {"n_calls": 50}),
+    "roi_metrics": (bench_roi_metrics, {"n_calls": 500}, {"n_calls": 50}),
+    "calibration_fits": (
+        bench_calibration_fits,
+        {"n_fits": 3, "sample_counts": (11, 41, 101)},
+        {"n_fits": 1, "sample_counts": (11, 41)},
+    ),
+    "simulated_loop": (bench_simulated_loop, {"n_steps": 1000}, {"n_steps": 100}),
+    "mcl_wrapper_overhead": (bench_mcl_wrapper_overhead, {"n_calls": 50_000}, {"n_calls": 2_000}),
+    "mcl_stage_path": (bench_mcl_stage_path, {"n_calls": 2_000, "latency_s": 0.0}, {"n_calls": 200, "latency_s": 0.0}),
+    "mm_frame_source": (bench_mm_frame_source, {"n_reads": 500}, {"n_reads": 50}),
+    "mm_step_round_trips": (
+        bench_mm_step_round_trips,
+        {"n_steps": 1_000, "call_latency_s": 0.0},
+        {"n_steps": 100, "call_latency_s": 0.0},
+    ),
+}
+
+SCHEMA_VERSION = 1
+DEFAULT_THRESHOLD = 0.25
+
+_LOWER_IS_BETTER = ("_ns", "_us", "_ms", "_calls_per_step", "_calls_per_read")
+_HIGHER_IS_BETTER = ("_hz",)
+
+
+def metric_direction(metric: str) -> int:
+    """-1 if smaller values are better, +1 if larger are, 0 if informational."""
+    if metric.endswith(_LOWER_IS_BETTER):
+        return -1
+    if metric.endswith(_HIGHER_IS_BETTER):
+        return 1
+    return 0
+
+
+def run_suite(*, quick: bool = False, only: list[str] | None = None, repeats: int = 3) -> dict[str, Any]:
+    """Run the standard suite; each metric keeps its best value over `repeats` runs.
+
+    Best-of-N (min for times, max for rates) filters scheduler noise so runs
+    on one machine are comparable.
+    """
+
+    if repeats < 1:
+        raise ValueError("repeats must be >= 1")
+    names = list(SUITE) if not only else only
+    unknown = [n for n in names if n not in SUITE]
+    if unknown:
+        raise ValueError(f"Unknown benchmark(s): {', '.join(unknown)}. Choose from: {', '.join(SUITE)}")
+    results: dict[str, dict[str, float]] = {}
+    for name in names:
+        fn, full_kwargs, quick_kwargs = SUITE[name]
+        best: dict[str, float] = {}
+        for _ in range(repeats):
+            for metric, value in fn(**(quick_kwargs if quick else full_kwargs)).items():
+                direction = metric_direction(metric)
+                if metric not in best or direction == 0:
+                    best[metric] = value
+                elif direction < 0:
+                    best[metric] = min(best[metric], value)
+                else:
+                    best[metric] = max(best[metric], value)
+        results[name] = best
+    return {
+        "schema": SCHEMA_VERSION,
+        "quick": quick,
+        "repeats": repeats,
+        "environment": _environment(),
+        "results": results,
+    }
+
+
+def _environment() -> dict[str, str]:
+    env = {
+        "python": platform.python_version(),
+        "implementation": platform.python_implementation(),
+        "platform": platform.platform(),
+        "machine": platform.machine(),
+    }
+    try:
+        import numpy as np
+    except Exception:
+        env["numpy"] = ""
+    else:
+        env["numpy"] = np.__version__
+    return env
+
+
+@dataclass(slots=True)
+class MetricChange:
+    benchmark: str
+    metric: str
+    baseline: float
+    current: float
+    # Fractional change in the "worse" direction: +0.3 means 30 % worse.
+    worse_by: float
+    threshold: float
+
+    @property
+    def regressed(self) -> bool:
+        return self.worse_by > self.threshold
+
+    @property
+    def key(self) -> str:
+        return f"{self.benchmark}.{self.metric}"
+
+
+def compare_to_baseline(
+    current: dict[str, Any],
+    baseline: dict[str, Any],
+    *,
+    threshold: float = DEFAULT_THRESHOLD,
+) -> list[MetricChange]:
+    """Compare directional metrics present in both runs.
+
+    A baseline may carry a `"thresholds"` map of `"benchmark.metric"` (or
+    just `"benchmark"`) to a fractional tolerance overriding `threshold`
+    for noisy metrics. Quick and full runs use different iteration counts
+    and are refused (ValueError).
+    """
+    if "quick" in current and "quick" in baseline and bool(current["quick"]) != bool(baseline["quick"]):
+        mode = {True: "--quick", False: "full"}
+        raise ValueError(
+            f"baseline is a {mode[bool(baseline['quick'])]} run but this is a {mode[bool(current['quick'])]} run; "
+            "iteration counts differ, so record a matching baseline"
+        )
+    overrides: dict[str, float] = baseline.get("thresholds", {})
+    changes: list[MetricChange] = []
+    for bench_name, metrics in current.get("results", {}).items():
+        base_metrics = baseline.get("results", {}).get(bench_name)
+        if not base_metrics:
+            continue
+        for metric, value in metrics.items():
+            direction = metric_direction(metric)
+            base = base_metrics.get(metric)
+            if direction == 0 or base is None or base <= 0:
+                continue
+            worse_by = (value - base) / base if direction < 0 else (base - value) / base
+            limit = overrides.get(f"{bench_name}.{metric}", overrides.get(bench_name, threshold))
+            changes.append(MetricChange(bench_name, metric, float(base), float(value), worse_by, float(limit)))
+    return changes
+
+
+def build_parser() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(
+        prog="orca-focus bench",
+        description="Run the simulated-hardware performance suite and compare against a baseline",
+    )
+    parser.add_argument("--out", default=None, metavar="FILE", help="Write results JSON here (default: stdout)")
+    parser.add_argument("--baseline", default=None, metavar="FILE", help="Earlier results JSON to compare against")
+    parser.add_argument(
+        "--threshold",
+        type=float,
+        default=DEFAULT_THRESHOLD,
+        help="Fractional slowdown that counts as a regression (0.25 = 25%% worse)",
+    )
+    parser.add_argument("--only", nargs="+", default=None, metavar="NAME", choices=list(SUITE), help="Benchmarks to run")
+    parser.add_argument("--quick", action="store_true", help="Small iteration counts (smoke test, not for baselines)")
+    parser.add_argument("--repeats", type=int, default=3, help="Runs per benchmark; the best value is kept")
+    return parser
+
+
+def main(argv: list[str] | None = None) -> int:
+    args = build_parser().parse_args(argv)
+    baseline = json.loads(Path(args.baseline).read_text(encoding="utf-8")) if args.baseline else None
+    if baseline is not None and "quick" in baseline and bool(baseline["quick"]) != args.quick:
+        # Checked before running so a mismatched baseline fails fast.
+        print(f"Error: baseline quick={baseline['quick']} does not match this run's quick={args.quick}", file=sys.stderr)
+        return 2
+    report = run_suite(quick=args.quick, only=args.only, repeats=args.repeats)
+
+    regressions: list[MetricChange] = []
+    if baseline is not None:
+        if baseline.get("schema") != SCHEMA_VERSION:
+            print(f"Warning: baseline schema {baseline.get('schema')} != {SCHEMA_VERSION}", file=sys.stderr)
+        if baseline.get("environment", {}).get("platform") != report["environment"]["platform"]:
+            print("Warning: baseline was recorded on a different platform; compare with care.", file=sys.stderr)
+        changes = compare_to_baseline(report, baseline, threshold=args.threshold)
+        regressions = [c for c in changes if c.regressed]
+        report["comparison"] = {
+            "baseline": str(args.baseline),
+            "threshold": args.threshold,
+            "regressions": [c.key for c in regressions],
+            "changes": {c.key: round(c.worse_by, 4) for c in changes},
+        }
+        for c in sorted(changes, key=lambda c: -c.worse_by):
+            flag = "REGRESSED" if c.regressed else "ok"
+            print(
+                f"{flag:>9}  {c.key:<45} {c.baseline:>12.4g} -> {c.current:<12.4g} ({c.worse_by:+.1%} worse)",
+                file=sys.stderr,
+            )
+
+    text = json.dumps(report, indent=2, sort_keys=True)
+    if args.out:
+        Path(args.out).write_text(text + "\n", encoding="utf-8")
+    else:
+        print(text)
+    return 1 if regressions else 0
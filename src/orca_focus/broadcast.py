@@ -0,0 +1,197 @@
+"""Single-reader frame fan-out for the controller, viewer and recorders.
+
+`FrameBroadcaster` owns the only thread that calls `camera.get_frame()`.
+Each new frame is published once to every `FrameSubscription`; a
+subscription is itself a `CameraInterface`, so it can be handed to the
+controller, `auto_calibrate` or `run_live_monitor` unchanged.
+
+Subscribers pick their delivery:
+
+- `"newest"`: a one-slot mailbox. Frames that arrive before the previous one
+  was taken replace it and count as `frames_dropped` (viewer, controller).
+- `"queue"`: a bounded FIFO of `maxlen` frames; the oldest is evicted and
+  counted when the reader falls behind (recorder, waveform calibration).
+
+Frames are shared, not copied: NumPy images are marked read-only before
+publication and list images must be treated as read-only by convention.
+"""
+
+from __future__ import annotations
+
+import collections
+import threading
+
+from . import tracing
+from .interfaces import CameraFrame, CameraInterface
+
+
+class FrameSubscription:
+    """One subscriber's view of the broadcast stream."""
+
+    def __init__(self, broadcaster: "FrameBroadcaster", name: str, mode: str, maxlen: int, timeout_s: float) -> None:
+        if mode not in ("newest", "queue"):
+            raise ValueError("mode must be 'newest' or 'queue'")
+        if maxlen < 1:
+            raise ValueError("maxlen must be >= 1")
+        self._broadcaster = broadcaster
+        self.name = name
+        self.mode = mode
+        self._timeout_s = float(timeout_s)
+        self._frames: collections.deque[CameraFrame] = collections.deque(maxlen=1 if mode == "newest" else maxlen)
+        self._cond = threading.Condition()
+        self._last: CameraFrame | None = None
+        self.frames_delivered = 0
+        self.frames_dropped = 0
+
+    def _publish(self, frame: CameraFrame) -> None:
+        with self._cond:
+            if len(self._frames) == self._frames.maxlen:
+                self.frames_dropped += 1
+            self._frames.append(frame)
+            self._cond.notify_all()
+
+    def start(self) -> None:
+        # The broadcaster owns acquisition; subscriptions only read.
+        return None
+
+    def stop(self) -> None:
+        return None
+
+    def poll(self) -> CameraFrame | None:
+        """Next undelivered frame, or None without waiting."""
+        with self._cond:
+            if not self._frames:
+                return None
+            return self._take()
+
+    def get_frame(self) -> CameraFrame:
+        """Wait up to the subscription timeout for an undelivered frame.
+
+        On timeout the previously delivered frame is returned again, which the
+        controller's stale-frame guard skips.
+        """
+        with self._cond:
+            if not self._frames:
+                self._cond.wait_for(lambda: bool(self._frames), timeout=self._timeout_s)
+            if self._frames:
+                return self._take()
+            if self._last is not None:
+                return self._last
+        error = self._broadcaster.last_error
+        raise TimeoutError(f"No frame from broadcaster within {self._timeout_s:.3f} s") from error
+
+    def _take(self) -> CameraFrame:
+        frame = self._frames.popleft()
+        self._last = frame
+        self.frames_delivered += 1
+        return frame
+
+    def close(self) -> None:
+        self._broadcaster.unsubscribe(self)
+
+
+class FrameBroadcaster:
+    """Read `camera` on one thread and fan each new frame out to subscribers.
+
+    A frame is "new" when its `frame_index` (or, without one, its timestamp)
+    differs from the previous read, so cameras that return the latest frame
+    repeatedly are only published once per exposure. When a read returns a
+    repeat the thread sleeps `idle_sleep_s` before polling again.
+    """
+
+    def __init__(self, camera: CameraInterface, *, idle_sleep_s: float = 0.001) -> None:
+        self._camera = camera
+        self._idle_sleep_s = float(idle_sleep_s)
+        self._subs: tuple[FrameSubscription, ...] = ()
+        self._subs_lock = threading.Lock()
+        self._stop_evt = threading.Event()
+        self._thread: threading.Thread | None = None
+        self._last_key: object = None
+        self.frames_published = 0
+        self.n_errors = 0
+        self.last_error: Exception | None = None
+
+    @property
+    def camera(self) -> CameraInterface:
+        return self._camera
+
+    def subscribe(
+        self,
+        name: str,
+        *,
+        mode: str = "newest",
+        maxlen: int = 64,
+        timeout_s: float = 1.0,
+    ) -> FrameSubscription:
+        sub = FrameSubscription(self, name, mode, maxlen, timeout_s)
+        with self._subs_lock:
+            self._subs = self._subs + (sub,)
+        return sub
+
+    def unsubscribe(self, sub: FrameSubscription) -> None:
+        with self._subs_lock:
+            self._subs = tuple(s for s in self._subs if s is not sub)
+
+    def subscriptions(self) -> tuple[FrameSubscription, ...]:
+        return self._subs
+
+    def stats(self) -> dict[str, dict[str, int]]:
+        """Per-subscriber delivered/dropped counters, keyed by name."""
+        return {
+            s.name: {"delivered": s.frames_delivered, "dropped": s.frames_dropped} for s in self._subs
+        }
+
+    def start(self) -> None:
+        if self._thread is not None and self._thread.is_alive():
+            return
+        self._stop_evt.clear()
+        self._thread = threading.Thread(target=self._run, daemon=True)
+        self._thread.start()
+
+    def stop(self, *, wait: bool = True) -> None:
+        self._stop_evt.set()
+        if wait and self._thread is not None:
+            self._thread.join(timeout=2.0)
+
+    def __enter__(self) -> "FrameBroadcaster":
+        self.start()
+        return self
+
+    def __exit__(self, _exc_type, _exc, _tb) -> None:
+        self.stop()
+
+    @tracing.traced("broadcast.poll", "acquisition")
+    def poll_once(self) -> bool:
+        """Read one frame and publish it if new; returns whether it was."""
+        frame = self._camera.get_frame()
+        key = frame.frame_index if frame.frame_index is not None else frame.timestamp_s
+        if self.frames_published and key == self._last_key:
+            return False
+        self._last_key = key
+        _freeze(frame.image)
+        self.frames_published += 1
+        # Subscribers are snapshotted; (un)subscribing never blocks publication.
+        for sub in self._subs:
+            sub._publish(frame)
+        return True
+
+    def _run(self) -> None:
+        while not self._stop_evt.is_set():
+            try:
+                published = self.poll_once()
+            except Exception as exc:  # keep serving through transient read errors
+                self.last_error = exc
+                self.n_errors += 1
+                published = False
+            if not published:
+                self._stop_evt.wait(self._idle_sleep_s)
+
+
+def _freeze(image: object) -> None:
+    flags = getattr(image, "flags", None)
+    if flags is not None and type(image).__module__ == "numpy":
+        try:
+            flags.writeable = False
+        except ValueError:
+            pass
+
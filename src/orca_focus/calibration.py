@@ -2,12 +2,15 @@ from __future__ import annotations
 
 import csv
 import math
+import threading
+import time
 from dataclasses import dataclass
 from pathlib import Path
 from typing import Callable
 
+from . import tracing
 from .focus_metric import Roi, astigmatic_error_signal, roi_total_intensity
-from .interfaces import CameraInterface, StageInterface
+from .interfaces import CameraFrame, CameraInterface, StageInterface
 
 
 @dataclass(slots=True)
@@ -258,6 +261,7 @@ def fit_linear_calibration(
     return report.calibration
 
 
+@tracing.traced("calibration.step_sweep", "calibration")
 def auto_calibrate(
     camera: CameraInterface,
     stage: StageInterface,
@@ -285,6 +289,9 @@ def auto_calibrate(
 
     out: list[CalibrationSample] = []
     failed_moves: list[tuple[float, Exception]] = []
+    wait_until_settled = getattr(stage, "wait_until_settled", None)
+    if not callable(wait_until_settled):
+        wait_until_settled = None
     total_steps = len(targets)
     for i, target_z in enumerate(targets):
         if should_stop is not None and should_stop():
@@ -293,6 +300,9 @@ def auto_calibrate(
         step_index = i + 1
         try:
             stage.move_z_um(target_z)
+            # Stages with non-blocking moves must settle before the frame.
+            if wait_until_settled is not None:
+                wait_until_settled()
         except Exception as exc:
             failed_moves.append((target_z, exc))
             if on_step is not None:
@@ -331,6 +341,142 @@ def auto_calibrate(
     return out
 
 
+@tracing.traced("calibration.waveform_sweep", "calibration")
+def waveform_calibrate(
+    camera: CameraInterface,
+    stage: StageInterface,
+    roi: Roi,
+    *,
+    z_min_um: float,
+    z_max_um: float,
+    n_steps: int,
+    point_interval_ms: float = 5.0,
+    bidirectional: bool = True,
+    match: str = "timestamp",
+    frame_clock: int = 3,
+    settle_fraction: float = 0.3,
+    frame_latency_s: float = 0.0,
+    should_stop: Callable[[], bool] | None = None,
+) -> list[CalibrationSample]:
+    """Collect calibration samples from a hardware-timed stage waveform.
+
+    The Z sweep is uploaded to the stage (`run_z_waveform`) while a grabber
+    thread reads the camera continuously. Frames are then assigned to sweep
+    points either by host arrival time (`match="timestamp"`, discarding the
+    first `settle_fraction` of each dwell) or by order when the camera is
+    triggered from the stage ISS clock (`match="clock"`). Frames belonging to
+    the same point are pooled into one intensity-weighted sample.
+    `point_interval_ms` is passed through; the stage enforces its own dwell
+    limits.
+    """
+
+    run_waveform = getattr(stage, "run_z_waveform", None)
+    if not callable(run_waveform):
+        raise ValueError("Stage does not support hardware-timed waveforms (run_z_waveform)")
+    if n_steps < 2:
+        raise ValueError("n_steps must be at least 2")
+    if z_max_um <= z_min_um:
+        raise ValueError("z_max_um must be greater than z_min_um")
+    if point_interval_ms <= 0:
+        raise ValueError("point_interval_ms must be > 0")
+    if match not in ("timestamp", "clock"):
+        raise ValueError("match must be 'timestamp' or 'clock'")
+    if not 0.0 <= settle_fraction < 1.0:
+        raise ValueError("settle_fraction must be in [0.0, 1.0)")
+
+    step = (z_max_um - z_min_um) / float(n_steps - 1)
+    targets = [z_min_um + i * step for i in range(n_steps)]
+    if bidirectional:
+        targets = targets + list(reversed(targets))
+    n_points = len(targets)
+    dwell_s = point_interval_ms / 1000.0
+
+    if should_stop is not None and should_stop():
+        raise RuntimeError("Calibration cancelled by user")
+
+    # Park on the first point so the waveform does not start with a jump.
+    stage.move_z_um(targets[0])
+    time.sleep(dwell_s)
+
+    frames: list[tuple[float, CameraFrame]] = []
+    grab_error: list[Exception] = []
+    stop_evt = threading.Event()
+
+    def _grab() -> None:
+        last_ts: float | None = None
+        while not stop_evt.is_set():
+            try:
+                frame = camera.get_frame()
+            except Exception as exc:
+                grab_error.append(exc)
+                return
+            arrived = time.monotonic()
+            if last_ts is not None and frame.timestamp_s == last_ts:
+                time.sleep(0.0005)
+                continue
+            last_ts = frame.timestamp_s
+            frames.append((arrived, frame))
+
+    grabber = threading.Thread(target=_grab, daemon=True)
+    grabber.start()
+    try:
+        t_call = time.monotonic()
+        readback = run_waveform(
+            targets,
+            point_interval_ms,
+            frame_clock=frame_clock if match == "clock" else None,
+        )
+        t_return = time.monotonic()
+    finally:
+        stop_evt.set()
+        grabber.join(timeout=2.0)
+
+    if grab_error and not frames:
+        raise RuntimeError(f"Camera failed during waveform calibration: {grab_error[0]}") from grab_error[0]
+    if len(readback) < n_points:
+        readback = list(readback) + targets[len(readback):]
+
+    # Prefer the trigger time the stage recorded: the return time can be late
+    # when other threads hold the GIL. Otherwise the synchronous trigger
+    # returns once the last point has played, so return minus the nominal
+    # duration is the best start estimate.
+    t_trigger = getattr(stage, "last_waveform_start_s", None)
+    if isinstance(t_trigger, float) and t_call <= t_trigger <= t_return:
+        t_start = t_trigger
+    else:
+        t_start = max(t_call, t_return - n_points * dwell_s)
+
+    assigned: list[tuple[int, CameraFrame]] = []
+    if match == "clock":
+        in_window = [f for arrived, f in frames if arrived >= t_call]
+        assigned = list(enumerate(in_window[:n_points]))
+    else:
+        for arrived, frame in frames:
+            phase = (arrived - frame_latency_s - t_start) / dwell_s
+            k = int(math.floor(phase))
+            if 0 <= k < n_points and (phase - k) >= settle_fraction:
+                assigned.append((k, frame))
+
+    pooled: dict[int, tuple[float, float]] = {}
+    for k, frame in assigned:
+        err = astigmatic_error_signal(frame.image, roi)
+        weight = max(0.0, roi_total_intensity(frame.image, roi))
+        err_sum, w_sum = pooled.get(k, (0.0, 0.0))
+        pooled[k] = (err_sum + err * max(weight, 1e-12), w_sum + max(weight, 1e-12))
+
+    out = [
+        CalibrationSample(z_um=float(readback[k]), error=err_sum / w_sum, weight=w_sum)
+        for k, (err_sum, w_sum) in sorted(pooled.items())
+    ]
+    if len(out) < 2:
+        raise RuntimeError(
+            "Waveform calibration matched too few frames to sweep points "
+            f"({len(out)}/{n_points} points, {len(frames)} frames grabbed); "
+            "increase point_interval_ms or camera frame rate."
+        )
+    return out
+
+
 def save_calibration_samples_csv(path: str | Path, samples: list[CalibrationSample]) -> None:
     """Write calibration sweep samples for later GUI/model reuse."""
 
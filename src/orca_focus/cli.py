@@ -1,8 +1,11 @@
 from __future__ import annotations
 
 import argparse
+import functools
 import sys
+import time
 from pathlib import Path
+from typing import TYPE_CHECKING
 
 from .autofocus import AstigmaticAutofocusController, AutofocusConfig
 from .calibration import (
@@ -12,11 +15,23 @@ from .calibration import (
     load_calibration_samples_csv,
     validate_calibration_sign,
 )
+from . import tracing
 from .focus_metric import Roi
 from .hardware import HamamatsuOrcaCamera, MclNanoZStage, NotConnectedError, SimulatedCamera
 from .interfaces import StageInterface
-from .interactive import launch_autofocus_viewer
-from .pylablib_camera import create_pylablib_frame_source
+from .zhuang import (
+    ZhuangFitReport,
+    ZhuangFocusCalibration,
+    fit_zhuang_calibration_with_report,
+    zhuang_quality_issues,
+)
+
+# GUI, recording, registry and camera-backend modules are imported where
+# they are used so a headless run does not load them.
+if TYPE_CHECKING:
+    from .recorder import FrameRecorder
+    from .registry import CalibrationKey, CalibrationRegistry
+    from .zsampler import StageZSampler
 
 
 def build_parser() -> argparse.ArgumentParser:
@@ -29,6 +44,18 @@ def build_parser() -> argparse.ArgumentParser:
         action="store_true",
         help="Open interactive live image viewer with ROI selection",
     )
+    parser.add_argument(
+        "--display-fps",
+        type=float,
+        default=30.0,
+        help="Maximum live-view refresh rate, independent of --loop-hz",
+    )
+    parser.add_argument(
+        "--display-downsample",
+        type=int,
+        default=1,
+        help="Show every Nth pixel in the live view (raised automatically for slow displays)",
+    )
     parser.add_argument(
         "--camera",
         choices=["simulate", "orca", "andor", "micromanager"],
@@ -48,6 +75,31 @@ def build_parser() -> argparse.ArgumentParser:
             "Use only when intentionally running without attaching to MM GUI."
         ),
     )
+    parser.add_argument(
+        "--mm-stage-async",
+        action="store_true",
+        help=(
+            "With --stage micromanager, return from moves without waitForDevice; "
+            "the previous move is busy-checked before the next one"
+        ),
+    )
+    parser.add_argument(
+        "--mm-read-mode",
+        choices=["live", "drain"],
+        default="live",
+        help=(
+            "live: read MM's newest frame (MM live view keeps running). "
+            "drain: consume every frame from the sequence buffer (starts a sequence if needed)"
+        ),
+    )
+    parser.add_argument(
+        "--mm-combined-read",
+        action="store_true",
+        help=(
+            "Live mode: read each frame with a single getLastTaggedImage call instead of a "
+            "timestamp check plus a fetch (one bridge round trip per step, one pixel transfer)"
+        ),
+    )
     parser.add_argument(
         "--stage",
         choices=["mcl", "simulate", "micromanager"],
@@ -61,10 +113,37 @@ def build_parser() -> argparse.ArgumentParser:
     parser.add_argument(
         "--stage-wrapper", default=None, help="Python module path for MCL wrapper"
     )
+    parser.add_argument(
+        "--stage-encoder",
+        action="store_true",
+        help="Read Z from the MCL encoder for --z-sampler-hz (encoder-equipped Nano-Drives only)",
+    )
     parser.add_argument("--kp", type=float, default=0.8, help="Proportional gain")
     parser.add_argument("--ki", type=float, default=0.2, help="Integral gain")
     parser.add_argument("--max-step", type=float, default=0.2, help="Max correction step in µm")
     parser.add_argument("--command-deadband-um", type=float, default=0.02, help="Ignore stage corrections smaller than this magnitude (µm) to reduce oscillation")
+    parser.add_argument(
+        "--adaptive-rate",
+        action="store_true",
+        help="Lower the loop rate while the error stays inside the deadband; return to --loop-hz on disturbance",
+    )
+    parser.add_argument("--min-loop-hz", type=float, default=5.0, help="Slowest loop rate with --adaptive-rate")
+    parser.add_argument(
+        "--adaptive-camera-rate",
+        action="store_true",
+        help="With --adaptive-rate, also cap the camera frame rate at the loop rate (cameras that support it)",
+    )
+    parser.add_argument(
+        "--roi-tracking",
+        action="store_true",
+        help="Re-centre the autofocus ROI on the bead as it drifts laterally",
+    )
+    parser.add_argument(
+        "--roi-track-threshold-px",
+        type=float,
+        default=2.0,
+        help="Centroid offset from the ROI centre (px) that triggers a re-centre with --roi-tracking",
+    )
     parser.add_argument("--stage-min-um", type=float, default=None, help="Lower clamp for commanded stage Z (µm)")
     parser.add_argument("--stage-max-um", type=float, default=None, help="Upper clamp for commanded stage Z (µm)")
     parser.add_argument("--af-max-excursion-um", type=float, default=5.0, help="Max allowed autofocus excursion from initial Z lock point (µm); set negative to disable")
@@ -76,6 +155,27 @@ def build_parser() -> argparse.ArgumentParser:
             "focus calibration automatically; GUI calibration sweeps also write to this path."
         ),
     )
+    parser.add_argument(
+        "--calibration-model",
+        choices=["linear", "zhuang"],
+        default="linear",
+        help=(
+            "Calibration model: 'linear' uses the slope around focus; 'zhuang' fits the "
+            "nonlinear astigmatic defocus model for a wider capture range"
+        ),
+    )
+    parser.add_argument(
+        "--calibration-registry",
+        default=None,
+        help=(
+            "Directory of stored calibrations keyed by setup. When set, a fitted model is "
+            "loaded directly at startup and the CSV is only refitted when its samples change. "
+            "Viewer sweeps are stored there too, and the viewer and serve can switch between "
+            "stored calibrations at runtime."
+        ),
+    )
+    parser.add_argument("--objective", default="", help="Objective name for the calibration registry key")
+    parser.add_argument("--cylinder-lens", default="", help="Cylinder lens name for the calibration registry key")
     parser.add_argument(
         "--calibration-half-range-um",
         type=float,
@@ -88,10 +188,78 @@ def build_parser() -> argparse.ArgumentParser:
         default=21,
         help="Number of Z points for napari calibration sweep",
     )
+    parser.add_argument(
+        "--calibration-mode",
+        choices=["step", "waveform"],
+        default="step",
+        help=(
+            "Calibration sweep mode: 'step' moves/grabs/reads per point; 'waveform' uploads the "
+            "sweep as a hardware-timed MCL waveform while the camera streams"
+        ),
+    )
+    parser.add_argument(
+        "--calibration-point-ms",
+        type=float,
+        default=5.0,
+        help="Dwell per sweep point (ms) for --calibration-mode waveform; the Nano-Drive accepts 1/30 to 5 ms",
+    )
+    parser.add_argument(
+        "--record",
+        default=None,
+        metavar="DIR",
+        help="Record ROI crops and per-step telemetry to DIR (chunked .npy, written in the background)",
+    )
+    parser.add_argument(
+        "--z-sampler-hz",
+        type=float,
+        default=0.0,
+        help=(
+            "Poll the stage Z sensor on a background thread at this rate and feed the "
+            "controller the filtered position (0 disables; headless loop only)"
+        ),
+    )
+    parser.add_argument(
+        "--isolated",
+        action="store_true",
+        help=(
+            "Run the headless control loop in a child process that opens the camera and "
+            "stage itself, so the main process cannot stall it"
+        ),
+    )
+    parser.add_argument(
+        "--isolated-nice",
+        type=int,
+        default=None,
+        help="Niceness for the --isolated control process (negative raises priority; needs privileges)",
+    )
+    parser.add_argument(
+        "--trace",
+        default=None,
+        metavar="PATH",
+        help=(
+            "Record timing spans (acquisition, metric, stage calls, viewer refresh) and write them "
+            "on exit: speedscope for *.speedscope.json, Chrome trace JSON otherwise"
+        ),
+    )
     return parser
 
 
-def _load_startup_calibration(samples_csv: str | None) -> FocusCalibration:
+def _runtime_calibration(
+    calibration: FocusCalibration | ZhuangFocusCalibration,
+) -> FocusCalibration | ZhuangFocusCalibration:
+    if isinstance(calibration, ZhuangFocusCalibration):
+        return calibration
+    return FocusCalibration(error_at_focus=0.0, error_to_um=calibration.error_to_um)
+
+
+def _load_startup_calibration(
+    samples_csv: str | None,
+    model: str = "linear",
+    *,
+    registry: CalibrationRegistry | None = None,
+    key: CalibrationKey | None = None,
+) -> FocusCalibration | ZhuangFocusCalibration:
+    use_registry = registry is not None and key is not None
     if not samples_csv:
         raise ValueError(
             "Calibration CSV path is required. Provide --calibration-csv to reuse a saved sweep."
@@ -99,19 +267,52 @@ def _load_startup_calibration(samples_csv: str | None) -> FocusCalibration:
 
     csv_path = Path(samples_csv)
     if not csv_path.exists():
+        if use_registry:
+            record = registry.load(key, model)
+            if record is not None:
+                print(
+                    f"Loaded stored {model} calibration from registry {registry.root} "
+                    f"(CSV {csv_path} not found)",
+                    file=sys.stderr,
+                )
+                return record.runtime_calibration()
         raise ValueError(
             f"Calibration CSV not found: {csv_path}. Run GUI calibration first to generate it."
         )
 
     samples = load_calibration_samples_csv(csv_path)
+    if not use_registry:
+        return _runtime_calibration(_fit_startup_calibration(csv_path, samples, model).calibration)
+
+    from .registry import record_from_linear_report, record_from_zhuang_report
+
+    def _fit_record(key: CalibrationKey, samples: list, *, model: str):
+        report = _fit_startup_calibration(csv_path, samples, model)
+        if model == "zhuang":
+            return record_from_zhuang_report(key, samples, report)
+        return record_from_linear_report(key, samples, report)
+
+    record, refitted = registry.fit_or_load(key, samples, model=model, fit=_fit_record)
+    if not refitted:
+        print(
+            f"Loaded stored {model} calibration ({csv_path} unchanged, no refit): "
+            f"slope={record.calibration.error_to_um:+0.4f} um/error, "
+            f"R^2={record.stats.get('r2', float('nan')):0.4f}",
+            file=sys.stderr,
+        )
+    return record.runtime_calibration()
+
+
+def _fit_startup_calibration(csv_path: Path, samples: list, model: str):
+    """Fit *samples* with *model*, report the fit and reject unusable sweeps."""
+
+    if model == "zhuang":
+        return _fit_zhuang_startup_calibration(csv_path, samples)
+
     report = fit_linear_calibration_with_report(samples, robust=True)
-    calibration = FocusCalibration(
-        error_at_focus=0.0,
-        error_to_um=report.calibration.error_to_um,
-    )
     print(
         "Loaded calibration "
-        f"({csv_path}): slope={calibration.error_to_um:+0.4f} um/error, "
+        f"({csv_path}): slope={report.calibration.error_to_um:+0.4f} um/error, "
         f"fitted_error_at_focus={report.calibration.error_at_focus:+0.4f}, "
         "using_control_error_at_focus=+0.0000, "
         f"R^2={report.r2:0.4f}, inliers={report.n_inliers}/{report.n_samples}",
@@ -142,8 +343,26 @@ def _load_startup_calibration(samples_csv: str | None) -> FocusCalibration:
             "lens orientation.",
             file=sys.stderr,
         )
+    return report
 
-    return calibration
+
+def _fit_zhuang_startup_calibration(csv_path: Path, samples: list) -> ZhuangFitReport:
+    try:
+        report = fit_zhuang_calibration_with_report(samples)
+    except ValueError as exc:
+        raise ValueError(f"Calibration CSV could not be fitted with the Zhuang model: {exc}") from exc
+    calibration = report.calibration
+    z_lo, z_hi = calibration.z_range_um
+    print(
+        "Loaded Zhuang calibration "
+        f"({csv_path}): local slope={calibration.error_to_um:+0.4f} um/error, "
+        f"capture range={z_hi - z_lo:0.3f} um, "
+        f"R^2={report.r2:0.4f}, samples={report.n_samples}",
+        file=sys.stderr,
+    )
+    for issue in zhuang_quality_issues(samples, report):
+        print(f"Warning: Zhuang calibration {issue}", file=sys.stderr)
+    return report
 
 
 def _build_stage(args, *, mm_core=None) -> StageInterface:
@@ -170,10 +389,12 @@ def _build_stage(args, *, mm_core=None) -> StageInterface:
             )
         from .micromanager import MicroManagerStage
 
-        return MicroManagerStage(core=mm_core)
+        return MicroManagerStage(core=mm_core, async_moves=args.mm_stage_async)
 
     try:
-        stage = MclNanoZStage(dll_path=args.stage_dll, wrapper_module=args.stage_wrapper)
+        stage = MclNanoZStage(
+            dll_path=args.stage_dll, wrapper_module=args.stage_wrapper, use_encoder=args.stage_encoder
+        )
     except (NotConnectedError, OSError, FileNotFoundError) as exc:
         raise RuntimeError(
             f"Failed to initialize MCL stage: {exc}. "
@@ -204,45 +425,206 @@ def _build_camera_and_stage(args):
             host=args.mm_host,
             port=args.mm_port,
             allow_standalone_core=args.mm_allow_standalone_core,
+            mode=args.mm_read_mode,
+            combined_read=args.mm_combined_read,
         )
         stage = _build_stage(args, mm_core=mm_source.core)
+        # Drain mode owns the sequence acquisition it starts; live mode leaves
+        # acquisition to the MM GUI.
         camera = HamamatsuOrcaCamera(
             frame_source=mm_source,
-            control_source_lifecycle=False,
+            control_source_lifecycle=args.mm_read_mode == "drain",
         )
         return camera, stage
 
     # pylablib camera (orca / andor) + package-controlled stage
     stage = _build_stage(args)
+    from .pylablib_camera import create_pylablib_frame_source
+
     frame_source = create_pylablib_frame_source(args.camera, idx=args.camera_index)
     camera = HamamatsuOrcaCamera(frame_source=frame_source, control_source_lifecycle=True)
     return camera, stage
 
 
-def main() -> int:
-    args = build_parser().parse_args()
+def _run_isolated(args, config: AutofocusConfig, calibration) -> list:
+    from .isolated import IsolatedAutofocus
+
+    # The child rebuilds the hardware from the parsed arguments; device
+    # handles cannot cross the process boundary.
+    factory = functools.partial(_build_camera_and_stage, args)
+    samples: list = []
+    with IsolatedAutofocus(
+        factory, config=config, calibration=calibration, priority=args.isolated_nice
+    ) as loop:
+        if args.isolated_nice is not None and not loop.priority_applied:
+            print(f"Warning: could not set control process niceness to {args.isolated_nice}.", file=sys.stderr)
+        deadline = time.monotonic() + args.duration
+        while time.monotonic() < deadline:
+            time.sleep(min(0.1, max(0.0, deadline - time.monotonic())))
+            samples.extend(loop.read_samples())
+        samples.extend(loop.read_samples())
+        _state, _prio, n_errors, last_error = loop.status()
+    if n_errors:
+        print(f"Warning: {n_errors} control step(s) failed; last: {last_error}", file=sys.stderr)
+    return samples
+
+
+def _config_from_args(args) -> AutofocusConfig:
+    return AutofocusConfig(
+        roi=Roi(x=20, y=20, width=24, height=24),
+        loop_hz=args.loop_hz,
+        max_dt_s=args.max_dt_s,
+        kp=args.kp,
+        ki=args.ki,
+        max_step_um=args.max_step,
+        stage_min_um=args.stage_min_um,
+        stage_max_um=args.stage_max_um,
+        max_abs_excursion_um=(None if args.af_max_excursion_um < 0 else args.af_max_excursion_um),
+        command_deadband_um=args.command_deadband_um,
+        adaptive_rate=args.adaptive_rate,
+        min_loop_hz=args.min_loop_hz,
+        adaptive_camera_rate=args.adaptive_camera_rate,
+        roi_tracking=args.roi_tracking,
+        roi_track_threshold_px=args.roi_track_threshold_px,
+    )
+
+
+def _registry_from_args(
+    args, config: AutofocusConfig
+) -> tuple[CalibrationRegistry | None, CalibrationKey | None]:
+    if not args.calibration_registry:
+        return None, None
+    from .registry import CalibrationKey, CalibrationRegistry
+
+    key = CalibrationKey(
+        objective=args.objective,
+        camera=args.camera,
+        roi_width=config.roi.width,
+        roi_height=config.roi.height,
+        cylinder_lens=args.cylinder_lens,
+    )
+    return CalibrationRegistry(args.calibration_registry), key
+
+
+def _startup_calibration_from_args(
+    args,
+    config: AutofocusConfig,
+    registry: CalibrationRegistry | None = None,
+    registry_key: CalibrationKey | None = None,
+) -> FocusCalibration | ZhuangFocusCalibration:
+    return _load_startup_calibration(
+        args.calibration_csv,
+        model=args.calibration_model,
+        registry=registry,
+        key=registry_key,
+    )
+
+
+# Options of the one-shot/viewer modes that have no meaning for the daemon;
+# `serve` rejects them rather than silently ignoring them.
+_SERVE_UNSUPPORTED = (
+    "duration",
+    "show_live",
+    "display_fps",
+    "display_downsample",
+    "calibration_half_range_um",
+    "calibration_steps",
+    "calibration_mode",
+    "calibration_point_ms",
+    "record",
+    "z_sampler_hz",
+    "isolated",
+    "isolated_nice",
+)
+
+
+def _serve(argv: list[str]) -> int:
+    from .server import DEFAULT_ADDRESS, FocusServer
+
+    parser = build_parser()
+    parser.prog = "orca-focus serve"
+    parser.description = "Run the focus lock as a daemon controlled over a local socket"
+    parser.add_argument(
+        "--listen",
+        default=DEFAULT_ADDRESS,
+        help="Unix socket ('unix:/path/af.sock') or loopback 'host:port' to listen on",
+    )
+    parser.add_argument("--start-locked", action="store_true", help="Start the focus lock immediately")
+    args = parser.parse_args(argv)
+    given = [
+        "--" + dest.replace("_", "-")
+        for dest in _SERVE_UNSUPPORTED
+        if getattr(args, dest) != parser.get_default(dest)
+    ]
+    if given:
+        parser.error(f"not supported with serve: {', '.join(given)}")
+    if args.trace:
+        tracing.enable()
+
+    config = _config_from_args(args)
+    registry, registry_key = _registry_from_args(args, config)
+    try:
+        calibration = _startup_calibration_from_args(args, config, registry, registry_key)
+    except ValueError as exc:
+        print(f"Warning: {exc}", file=sys.stderr)
+        print("Warning: using default calibration until a client sends one.", file=sys.stderr)
+        calibration = FocusCalibration(error_at_focus=0.0, error_to_um=1.0)
 
     camera, stage = _build_camera_and_stage(args)
+    camera.start()
+    server = None
+    try:
+        server = FocusServer(
+            camera, stage, config=config, calibration=calibration, address=args.listen, registry=registry
+        )
+        if args.start_locked:
+            server.start_lock()
+        print(f"orca-focus serving on {server.address}", file=sys.stderr)
+        try:
+            server.serve_forever()
+        except KeyboardInterrupt:
+            pass
+        return 0
+    finally:
+        if server is not None:
+            server.close()
+        camera.stop()
+        if args.trace:
+            tracing.disable()
+            print(f"wrote trace to {tracing.export(args.trace)}", file=sys.stderr)
+
+
+def main(argv: list[str] | None = None) -> int:
+    argv = sys.argv[1:] if argv is None else list(argv)
+    if argv[:1] == ["bench"]:
+        from .bench import main as bench_main
+
+        return bench_main(argv[1:])
+    if argv[:1] == ["serve"]:
+        return _serve(argv[1:])
+
+    args = build_parser().parse_args(argv)
+    if args.trace:
+        tracing.enable()
+
+    isolated = args.isolated and not args.show_live
+    if args.isolated and args.show_live:
+        print("Warning: --isolated applies to the headless loop only; ignoring it with --show-live.", file=sys.stderr)
+    # In isolated mode the child process owns the hardware.
+    camera, stage = (None, None) if isolated else _build_camera_and_stage(args)
     camera_started = False
+    z_sampler: StageZSampler | None = None
+    recorder: FrameRecorder | None = None
 
     try:
-        camera.start()
-        camera_started = True
-
-        config = AutofocusConfig(
-            roi=Roi(x=20, y=20, width=24, height=24),
-            loop_hz=args.loop_hz,
-            max_dt_s=args.max_dt_s,
-            kp=args.kp,
-            ki=args.ki,
-            max_step_um=args.max_step,
-            stage_min_um=args.stage_min_um,
-            stage_max_um=args.stage_max_um,
-            max_abs_excursion_um=(None if args.af_max_excursion_um < 0 else args.af_max_excursion_um),
-            command_deadband_um=args.command_deadband_um,
-        )
+        if camera is not None:
+            camera.start()
+            camera_started = True
+
+        config = _config_from_args(args)
+        registry, registry_key = _registry_from_args(args, config)
         try:
-            calibration = _load_startup_calibration(args.calibration_csv)
+            calibration = _startup_calibration_from_args(args, config, registry, registry_key)
         except ValueError as exc:
             if not args.show_live:
                 raise
@@ -254,7 +636,16 @@ def main() -> int:
             )
             calibration = FocusCalibration(error_at_focus=0.0, error_to_um=1.0)
 
+        if args.record and isolated:
+            print("Warning: --record is not supported with --isolated; not recording.", file=sys.stderr)
+        elif args.record:
+            from .recorder import FrameRecorder
+
+            recorder = FrameRecorder(args.record)
+
         if args.show_live:
+            from .interactive import launch_autofocus_viewer
+
             launch_autofocus_viewer(
                 camera,
                 stage,
@@ -263,14 +654,41 @@ def main() -> int:
                 calibration_output_path=args.calibration_csv,
                 calibration_half_range_um=args.calibration_half_range_um,
                 calibration_steps=args.calibration_steps,
+                calibration_mode=args.calibration_mode,
+                calibration_model=args.calibration_model,
+                calibration_point_ms=args.calibration_point_ms,
+                calibration_registry=registry,
+                calibration_key=registry_key,
+                display_max_fps=args.display_fps,
+                display_downsample=args.display_downsample,
+                recorder=recorder,
             )
             return 0
 
+        if isolated:
+            samples = _run_isolated(args, config, calibration)
+            if samples:
+                final = samples[-1]
+                print(
+                    f"camera={args.camera} isolated steps={len(samples)} final_error={final.error:+0.4f} "
+                    f"final_error_um={final.error_um:+0.3f} stage={final.commanded_z_um:+0.3f} um"
+                )
+            return 0
+
+        control_stage: StageInterface = stage
+        if args.z_sampler_hz > 0:
+            from .zsampler import SampledStage, StageZSampler
+
+            z_sampler = StageZSampler(stage, rate_hz=args.z_sampler_hz)
+            z_sampler.start()
+            control_stage = SampledStage(stage, z_sampler)
+
         controller = AstigmaticAutofocusController(
             camera=camera,
-            stage=stage,
+            stage=control_stage,
             config=config,
             calibration=calibration,
+            on_step=recorder.record if recorder is not None else None,
         )
 
         samples = controller.run(duration_s=args.duration)
@@ -283,8 +701,21 @@ def main() -> int:
             )
         return 0
     finally:
+        if recorder is not None:
+            recorder.close()
+            stats = recorder.stats()
+            print(
+                f"recorded {stats.frames_written} steps to {recorder.directory} "
+                f"(dropped {stats.frames_dropped})",
+                file=sys.stderr,
+            )
+        if z_sampler is not None:
+            z_sampler.stop()
         if camera_started:
             camera.stop()
+        if args.trace:
+            tracing.disable()
+            print(f"wrote trace to {tracing.export(args.trace)}", file=sys.stderr)
 
 
 if __name__ == "__main__":
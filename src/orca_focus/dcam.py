@@ -3,6 +3,7 @@ from __future__ import annotations
 import time
 from typing import Any, Protocol
 
+from . import tracing
 from .interfaces import Image2D
 
 
@@ -37,6 +38,7 @@ class DcamFrameSource:
         if callable(stop):
             stop()
 
+    @tracing.traced("dcam.read_frame", "acquisition")
     def __call__(self) -> tuple[Image2D, float]:
         frame = self._camera.get_latest_frame()
         image = _to_image_2d(frame)
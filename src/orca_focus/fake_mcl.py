@@ -0,0 +1,396 @@
+"""Local stand-ins for the Mad City Labs Nano-Drive wrapper and Madlib DLL.
+
+`FakeNanoDrive` mirrors the method names and argument order of
+`MCL_Madlib_Wrapper.MCL_Nanodrive` closely enough to be passed to
+`MclNanoZStage(wrapper_module=...)`. Positions are modelled in wall-clock
+time, so a waveform played on one thread is visible to camera/readback
+threads exactly as it would be on hardware.
+
+`FakeMadlib` exposes the same device through the raw `MCL_*` C functions
+(ctypes arguments in, status codes out) and can be injected with
+`MclNanoZStage(dll=FakeMadlib())` to exercise the ctypes path off the
+microscope PC.
+
+Both accept the same non-ideal behaviour for benchmarking: per-call latency,
+first-order settling towards each commanded position, Gaussian sensor noise
+and failure injection (random or queued).
+
+The module also exposes `MCL_Nanodrive` as an alias so that
+`--stage-wrapper orca_focus.fake_mcl` works from the CLI.
+"""
+
+from __future__ import annotations
+
+import ctypes
+import math
+import random
+import threading
+import time
+from typing import Any, Callable
+
+MCL_GENERAL_ERROR = -1
+MCL_USAGE_ERROR = -4
+MCL_ARGUMENT_ERROR = -6
+# Waveform rate range of the real device: 1/30 ms to 5 ms per point.
+WAVEFORM_MIN_MS = 1.0 / 30.0
+WAVEFORM_MAX_MS = 5.0
+
+
+class FakeMclError(RuntimeError):
+    """Error raised by the fake wrapper, carrying the MCL status code."""
+
+    def __init__(self, code: int) -> None:
+        super().__init__(f"MCL error {code}")
+        self.code = code
+
+
+class FakeNanoDrive:
+    """Single-device Nano-Drive fake with waveform and ISS clock support.
+
+    `latency_s` is slept on every device call, `settle_tau_s` is the time
+    constant of the exponential approach to a new position (0 = instant),
+    `noise_um` is the standard deviation added to every sensor read and
+    `fail_probability` makes any device call fail with `fail_code`. Failures
+    can also be queued deterministically with `inject_failures`.
+
+    `has_encoder` models the encoder-equipped products; like the real
+    wrapper, `read_encoder_z` always exists but fails on other devices.
+    """
+
+    def __init__(
+        self,
+        *,
+        z_range_um: float = 200.0,
+        initial_z_um: float = 0.0,
+        latency_s: float = 0.0,
+        settle_tau_s: float = 0.0,
+        noise_um: float = 0.0,
+        fail_probability: float = 0.0,
+        fail_code: int = MCL_GENERAL_ERROR,
+        seed: int | None = None,
+        has_encoder: bool = False,
+    ) -> None:
+        if latency_s < 0 or settle_tau_s < 0 or noise_um < 0:
+            raise ValueError("latency_s, settle_tau_s and noise_um must be >= 0")
+        if not 0.0 <= fail_probability <= 1.0:
+            raise ValueError("fail_probability must be in [0.0, 1.0]")
+        self.z_range_um = float(z_range_um)
+        self.latency_s = float(latency_s)
+        self.settle_tau_s = float(settle_tau_s)
+        self.noise_um = float(noise_um)
+        self.fail_probability = float(fail_probability)
+        self.fail_code = int(fail_code)
+        self.has_encoder = bool(has_encoder)
+        self._rng = random.Random(seed)
+        self._queued_failures: list[int] = []
+        self._handle = 1
+        self._handle_open = False
+        self._lock = threading.Lock()
+        self._static_z_um = float(initial_z_um)
+        self._settle_from_um = float(initial_z_um)
+        self._settle_t0 = 0.0
+        self._load_setup: tuple[list[float], float] | None = None
+        self._read_setup: tuple[int, float] | None = None
+        self._playing: tuple[list[float], float, float] | None = None
+        self._clock_bindings: dict[int, tuple[int, int]] = {}
+        self.clock_pulses = 0
+        self.waveforms_played = 0
+        self.calls = 0
+        self.failures = 0
+
+    # Fault and latency model
+
+    def inject_failures(self, n: int = 1, code: int = MCL_GENERAL_ERROR) -> None:
+        """Make the next *n* device calls fail with *code*."""
+        self._queued_failures.extend([int(code)] * int(n))
+
+    def _device_call(self) -> None:
+        self.calls += 1
+        if self.latency_s > 0:
+            time.sleep(self.latency_s)
+        if self._queued_failures:
+            self.failures += 1
+            raise FakeMclError(self._queued_failures.pop(0))
+        if self.fail_probability > 0 and self._rng.random() < self.fail_probability:
+            self.failures += 1
+            raise FakeMclError(self.fail_code)
+
+    # Handle management
+
+    def init_handle(self) -> int:
+        self._handle_open = True
+        return self._handle
+
+    def release_handle(self, handle: int) -> None:
+        self._check_handle(handle)
+        self._handle_open = False
+
+    def _check_handle(self, handle: int | None) -> None:
+        if handle != self._handle or not self._handle_open:
+            raise FakeMclError(-8)
+
+    def _check_axis(self, axis: int) -> None:
+        if axis not in (1, 2, 3, 4):
+            raise FakeMclError(-7)
+
+    def _check_position(self, position: float) -> None:
+        if not 0.0 <= float(position) <= self.z_range_um:
+            raise FakeMclError(-6)
+
+    # Position model
+
+    def _position_at(self, t: float) -> float:
+        with self._lock:
+            playing = self._playing
+            static = self._static_z_um
+            settle_from = self._settle_from_um
+            settle_t0 = self._settle_t0
+        if playing is not None:
+            points, interval_s, t0 = playing
+            k = int((t - t0) / interval_s)
+            if k >= 0:
+                return points[min(k, len(points) - 1)]
+        if self.settle_tau_s <= 0:
+            return static
+        if t <= settle_t0:
+            return settle_from
+        return static + (settle_from - static) * math.exp(-(t - settle_t0) / self.settle_tau_s)
+
+    def position_um(self) -> float:
+        """Noise-free position at the current time."""
+        return self._position_at(time.monotonic())
+
+    def _sensor_read(self) -> float:
+        z = self.position_um()
+        if self.noise_um > 0:
+            z += self._rng.gauss(0.0, self.noise_um)
+        return z
+
+    def _command(self, position: float) -> None:
+        now = time.monotonic()
+        current = self._position_at(now)
+        with self._lock:
+            self._playing = None
+            self._settle_from_um = current
+            self._settle_t0 = now
+            self._static_z_um = float(position)
+
+    # Standard device movement
+
+    def single_read_n(self, axis: int, handle: int) -> float:
+        self._check_axis(axis)
+        self._check_handle(handle)
+        self._device_call()
+        return self._sensor_read()
+
+    def single_write_n(self, position: float, axis: int, handle: int) -> None:
+        self._check_axis(axis)
+        self._check_handle(handle)
+        self._check_position(position)
+        self._device_call()
+        self._command(position)
+
+    def monitor_n(self, position: float, axis: int, handle: int) -> float:
+        # Like MCL_MonitorN: the returned position is sampled as the command
+        # is issued, before the stage responds to it. One device round trip.
+        self._check_axis(axis)
+        self._check_handle(handle)
+        self._check_position(position)
+        self._device_call()
+        measured = self._sensor_read()
+        self._command(position)
+        return measured
+
+    def read_encoder_z(self, handle: int) -> float:
+        self._check_handle(handle)
+        if not self.has_encoder:
+            raise FakeMclError(MCL_USAGE_ERROR)
+        self._device_call()
+        return self._sensor_read()
+
+    # Waveform acquisition
+
+    def setup_load_waveform_n(
+        self, axis: int, datapoints: int, milliseconds: float, waveform: list[float], handle: int
+    ) -> None:
+        self._check_axis(axis)
+        self._check_handle(handle)
+        points = [float(v) for v in waveform][: int(datapoints)]
+        if not points or not WAVEFORM_MIN_MS <= milliseconds <= WAVEFORM_MAX_MS:
+            raise FakeMclError(MCL_ARGUMENT_ERROR)
+        for p in points:
+            self._check_position(p)
+        self._device_call()
+        self._load_setup = (points, float(milliseconds))
+
+    def setup_read_waveform_n(self, axis: int, datapoints: int, milliseconds: float, handle: int) -> None:
+        self._check_axis(axis)
+        self._check_handle(handle)
+        if datapoints <= 0 or not WAVEFORM_MIN_MS <= milliseconds <= WAVEFORM_MAX_MS:
+            raise FakeMclError(MCL_ARGUMENT_ERROR)
+        self._device_call()
+        self._read_setup = (int(datapoints), float(milliseconds))
+
+    def trigger_load_waveform_n(self, axis: int, handle: int) -> None:
+        self._check_axis(axis)
+        self._check_handle(handle)
+        if self._load_setup is None:
+            raise FakeMclError(-5)
+        self._device_call()
+        points, milliseconds = self._load_setup
+        self._play(points, milliseconds / 1000.0)
+
+    def load_waveform_n(
+        self, axis: int, datapoints: int, milliseconds: float, waveform: list[float], handle: int
+    ) -> None:
+        self.setup_load_waveform_n(axis, datapoints, milliseconds, waveform, handle)
+        self.trigger_load_waveform_n(axis, handle)
+
+    def trigger_waveform_acquisition(self, axis: int, datapoints: int, handle: int) -> list[float]:
+        self._check_axis(axis)
+        self._check_handle(handle)
+        if self._load_setup is None or self._read_setup is None:
+            raise FakeMclError(-5)
+        if self._read_setup[0] != int(datapoints):
+            raise FakeMclError(-6)
+        self._device_call()
+        points, milliseconds = self._load_setup
+        self._play(points, milliseconds / 1000.0)
+        readback = list(points[: int(datapoints)])
+        if self.noise_um > 0:
+            readback = [z + self._rng.gauss(0.0, self.noise_um) for z in readback]
+        return readback
+
+    def iss_bind_clock_to_axis(self, clock: int, mode: int, axis: int, handle: int) -> None:
+        self._check_handle(handle)
+        if clock not in (1, 2, 3, 4) or mode not in (2, 3, 4):
+            raise FakeMclError(-6)
+        if mode == 4:
+            self._clock_bindings.pop(axis, None)
+        else:
+            self._clock_bindings[axis] = (clock, mode)
+
+    def _play(self, points: list[float], interval_s: float) -> None:
+        """Block for the waveform duration, like the synchronous DLL calls."""
+        t0 = time.monotonic()
+        with self._lock:
+            self._playing = (points, interval_s, t0)
+        time.sleep(len(points) * interval_s)
+        with self._lock:
+            self._playing = None
+            self._static_z_um = points[-1]
+            self._settle_from_um = points[-1]
+            self._settle_t0 = time.monotonic()
+        self.waveforms_played += 1
+        # Waveform Read event (axis id 5) pulses its bound clock once per point.
+        if 5 in self._clock_bindings:
+            self.clock_pulses += len(points)
+
+
+MCL_Nanodrive = FakeNanoDrive
+
+
+def _arg(value: Any) -> Any:
+    """Unwrap a ctypes scalar (`c_int(3)` -> 3); pass plain values through."""
+    return getattr(value, "value", value)
+
+
+class _FakeCFunction:
+    """Callable with settable `restype`/`argtypes`, like a ctypes function."""
+
+    def __init__(self, fn: Callable[..., Any]) -> None:
+        self._fn = fn
+        self.restype: Any = ctypes.c_int
+        self.argtypes: Any = None
+
+    def __call__(self, *args: Any) -> Any:
+        return self._fn(*args)
+
+
+class FakeMadlib:
+    """In-process stand-in for the Madlib shared library.
+
+    Exposes the `MCL_*` entry points used by `MclNanoZStage` with the C
+    calling convention: ctypes arguments in, `0` or a negative MCL status out
+    (read calls return the status as a double). All device behaviour comes
+    from the wrapped `FakeNanoDrive`; keyword arguments are forwarded to it.
+    """
+
+    def __init__(self, device: FakeNanoDrive | None = None, **device_kwargs: Any) -> None:
+        self.device = device if device is not None else FakeNanoDrive(**device_kwargs)
+        self.MCL_InitHandle = _FakeCFunction(self._init_handle)
+        self.MCL_ReleaseHandle = _FakeCFunction(self._release_handle)
+        self.MCL_SingleReadN = _FakeCFunction(self._single_read_n)
+        self.MCL_SingleWriteN = _FakeCFunction(self._single_write_n)
+        self.MCL_MonitorN = _FakeCFunction(self._monitor_n)
+        self.MCL_ReadEncoderZ = _FakeCFunction(self._read_encoder_z)
+        self.MCL_Setup_LoadWaveFormN = _FakeCFunction(self._setup_load_waveform_n)
+        self.MCL_Setup_ReadWaveFormN = _FakeCFunction(self._setup_read_waveform_n)
+        self.MCL_TriggerWaveformAcquisition = _FakeCFunction(self._trigger_waveform_acquisition)
+        self.MCL_IssBindClockToAxis = _FakeCFunction(self._iss_bind_clock_to_axis)
+
+    @staticmethod
+    def _status(call: Callable[[], Any]) -> int:
+        try:
+            call()
+        except FakeMclError as exc:
+            return exc.code
+        return 0
+
+    def _init_handle(self) -> int:
+        return self.device.init_handle()
+
+    def _release_handle(self, handle: Any) -> None:
+        try:
+            self.device.release_handle(_arg(handle))
+        except FakeMclError:
+            pass
+
+    def _single_read_n(self, axis: Any, handle: Any) -> float:
+        try:
+            return self.device.single_read_n(_arg(axis), _arg(handle))
+        except FakeMclError as exc:
+            return float(exc.code)
+
+    def _single_write_n(self, position: Any, axis: Any, handle: Any) -> int:
+        return self._status(lambda: self.device.single_write_n(_arg(position), _arg(axis), _arg(handle)))
+
+    def _monitor_n(self, position: Any, axis: Any, handle: Any) -> float:
+        try:
+            return self.device.monitor_n(_arg(position), _arg(axis), _arg(handle))
+        except FakeMclError as exc:
+            return float(exc.code)
+
+    def _read_encoder_z(self, handle: Any) -> float:
+        try:
+            return self.device.read_encoder_z(_arg(handle))
+        except FakeMclError as exc:
+            return float(exc.code)
+
+    def _setup_load_waveform_n(self, axis: Any, points: Any, ms: Any, waveform: Any, handle: Any) -> int:
+        n = int(_arg(points))
+        values = [float(waveform[i]) for i in range(n)]
+        return self._status(
+            lambda: self.device.setup_load_waveform_n(_arg(axis), n, _arg(ms), values, _arg(handle))
+        )
+
+    def _setup_read_waveform_n(self, axis: Any, points: Any, ms: Any, handle: Any) -> int:
+        return self._status(
+            lambda: self.device.setup_read_waveform_n(_arg(axis), int(_arg(points)), _arg(ms), _arg(handle))
+        )
+
+    def _trigger_waveform_acquisition(self, axis: Any, points: Any, out: Any, handle: Any) -> int:
+        n = int(_arg(points))
+        try:
+            readback = self.device.trigger_waveform_acquisition(_arg(axis), n, _arg(handle))
+        except FakeMclError as exc:
+            return exc.code
+        target = out.contents if hasattr(out, "contents") else out
+        for i, z in enumerate(readback[:n]):
+            target[i] = z
+        return 0
+
+    def _iss_bind_clock_to_axis(self, clock: Any, mode: Any, axis: Any, handle: Any) -> int:
+        return self._status(
+            lambda: self.device.iss_bind_clock_to_axis(_arg(clock), _arg(mode), _arg(axis), _arg(handle))
+        )
@@ -0,0 +1,211 @@
+"""Local stand-in for a Micro-Manager `CMMCore` with a live circular buffer.
+
+`FakeMMCore` implements the subset of the MMCore API that
+`orca_focus.micromanager` uses: sequence acquisition into a bounded circular
+buffer (`popNextTaggedImage`, `getRemainingImageCount`, overflow flag),
+newest-frame reads (`getLastTaggedImage`, `getLastImageTimeStamp`) and a
+focus stage that stays `deviceBusy` for `stage_settle_s` after each move.
+Frames come from a `frame_producer(index, z_um)` callable, on a background
+thread once a sequence is started or synchronously via `produce(n)` for
+deterministic tests. Every API call is counted in `calls`
+and can be given a `call_latency_s` delay, so bridge round trips can be
+compared offline.
+"""
+
+from __future__ import annotations
+
+import collections
+import threading
+import time
+from types import SimpleNamespace
+from typing import Any, Callable
+
+
+def _default_producer(width: int, height: int) -> Callable[[int, float], Any]:
+    def _produce(index: int, z_um: float) -> Any:
+        try:
+            import numpy as np
+        except Exception:
+            return [(index + i) % 65536 for i in range(width * height)]
+        return np.full(width * height, index % 65536, dtype=np.uint16)
+
+    return _produce
+
+
+class FakeMMCore:
+    """Single-camera, single-focus-stage MMCore fake."""
+
+    def __init__(
+        self,
+        *,
+        width: int = 64,
+        height: int = 64,
+        buffer_capacity: int = 32,
+        frame_producer: Callable[[int, float], Any] | None = None,
+        focus_device: str = "Z",
+        call_latency_s: float = 0.0,
+        stage_settle_s: float = 0.0,
+    ) -> None:
+        if buffer_capacity < 1:
+            raise ValueError("buffer_capacity must be >= 1")
+        self.width = int(width)
+        self.height = int(height)
+        self.buffer_capacity = int(buffer_capacity)
+        self._producer = frame_producer or _default_producer(self.width, self.height)
+        self._focus_device = focus_device
+        self._z_um = 0.0
+        self._buffer: collections.deque[SimpleNamespace] = collections.deque()
+        self._last: SimpleNamespace | None = None
+        self._lock = threading.Lock()
+        self._overflowed = False
+        self._next_index = 0
+        self._t0 = time.monotonic()
+        self._stop_evt = threading.Event()
+        self._thread: threading.Thread | None = None
+        self.call_latency_s = float(call_latency_s)
+        self.stage_settle_s = float(stage_settle_s)
+        self._settled_at = 0.0
+        self.frames_overflowed = 0
+        self.calls: collections.Counter[str] = collections.Counter()
+
+    def _api(self, name: str) -> None:
+        """Count one API call and pay the simulated bridge round trip."""
+        self.calls[name] += 1
+        if self.call_latency_s > 0:
+            time.sleep(self.call_latency_s)
+
+    # Frame production
+
+    def produce(self, n: int = 1) -> None:
+        """Push *n* frames into the circular buffer immediately."""
+        for _ in range(int(n)):
+            with self._lock:
+                index = self._next_index
+                self._next_index += 1
+                z = self._z_um
+            pix = self._producer(index, z)
+            elapsed_ms = (time.monotonic() - self._t0) * 1000.0
+            tagged = SimpleNamespace(
+                pix=pix,
+                tags={
+                    "ImageNumber": str(index),
+                    "ElapsedTime-ms": elapsed_ms,
+                    "Width": self.width,
+                    "Height": self.height,
+                },
+            )
+            with self._lock:
+                if len(self._buffer) >= self.buffer_capacity:
+                    self._buffer.popleft()
+                    self._overflowed = True
+                    self.frames_overflowed += 1
+                self._buffer.append(tagged)
+                self._last = tagged
+
+    def _sequence_loop(self, interval_s: float) -> None:
+        next_t = time.monotonic()
+        while not self._stop_evt.is_set():
+            self.produce(1)
+            next_t += interval_s
+            delay = next_t - time.monotonic()
+            if delay > 0:
+                self._stop_evt.wait(delay)
+            else:
+                next_t = time.monotonic()
+
+    # MMCore API: sequence acquisition and circular buffer
+
+    def getVersionInfo(self) -> str:
+        self._api("getVersionInfo")
+        return "FakeMMCore"
+
+    def startContinuousSequenceAcquisition(self, interval_ms: float) -> None:
+        self._api("startContinuousSequenceAcquisition")
+        if self._thread is not None and self._thread.is_alive():
+            raise RuntimeError("Sequence acquisition already running")
+        self._stop_evt.clear()
+        interval_s = max(float(interval_ms), 0.1) / 1000.0
+        self._thread = threading.Thread(target=self._sequence_loop, args=(interval_s,), daemon=True)
+        self._thread.start()
+
+    def stopSequenceAcquisition(self) -> None:
+        self._api("stopSequenceAcquisition")
+        self._stop_evt.set()
+        if self._thread is not None:
+            self._thread.join(timeout=2.0)
+        self._thread = None
+
+    def isSequenceRunning(self) -> bool:
+        self._api("isSequenceRunning")
+        return self._thread is not None and self._thread.is_alive()
+
+    def getRemainingImageCount(self) -> int:
+        self._api("getRemainingImageCount")
+        with self._lock:
+            return len(self._buffer)
+
+    def getBufferTotalCapacity(self) -> int:
+        self._api("getBufferTotalCapacity")
+        return self.buffer_capacity
+
+    def isBufferOverflowed(self) -> bool:
+        self._api("isBufferOverflowed")
+        return self._overflowed
+
+    def clearCircularBuffer(self) -> None:
+        self._api("clearCircularBuffer")
+        with self._lock:
+            self._buffer.clear()
+            self._overflowed = False
+
+    def popNextTaggedImage(self) -> SimpleNamespace:
+        self._api("popNextTaggedImage")
+        with self._lock:
+            if not self._buffer:
+                raise RuntimeError("Circular buffer is empty")
+            return self._buffer.popleft()
+
+    def getLastTaggedImage(self) -> SimpleNamespace:
+        self._api("getLastTaggedImage")
+        with self._lock:
+            if self._last is None:
+                raise RuntimeError("Circular buffer is empty")
+            return self._last
+
+    def getLastImageTimeStamp(self) -> float:
+        self._api("getLastImageTimeStamp")
+        with self._lock:
+            return -1.0 if self._last is None else float(self._last.tags["ElapsedTime-ms"])
+
+    def getImageWidth(self) -> int:
+        self._api("getImageWidth")
+        return self.width
+
+    def getImageHeight(self) -> int:
+        self._api("getImageHeight")
+        return self.height
+
+    # MMCore API: focus stage
+
+    def getFocusDevice(self) -> str:
+        self._api("getFocusDevice")
+        return self._focus_device
+
+    def getPosition(self, label: str) -> float:
+        self._api("getPosition")
+        return self._z_um
+
+    def setPosition(self, label: str, z_um: float) -> None:
+        self._api("setPosition")
+        self._z_um = float(z_um)
+        self._settled_at = time.monotonic() + self.stage_settle_s
+
+    def deviceBusy(self, label: str) -> bool:
+        self._api("deviceBusy")
+        return time.monotonic() < self._settled_at
+
+    def waitForDevice(self, label: str) -> None:
+        self._api("waitForDevice")
+        delay = self._settled_at - time.monotonic()
+        if delay > 0:
+            time.sleep(delay)
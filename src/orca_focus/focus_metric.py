@@ -54,6 +54,17 @@ def _coerce_image_2d(image: Any) -> Image2D:
     return out
 
 
+def _ndarray_2d(image: Any) -> Any | None:
+    """Return *image* if it is a 2D NumPy array (no copy), else None."""
+    if type(image).__module__ != "numpy":
+        return None
+    if getattr(image, "ndim", None) != 2:
+        return None
+    if image.size == 0:
+        raise ValueError("Empty image")
+    return image
+
+
 def _image_shape(image: Image2D) -> tuple[int, int]:
     if not image or not image[0]:
         raise ValueError("Empty image")
@@ -61,6 +72,16 @@ def _image_shape(image: Image2D) -> tuple[int, int]:
 
 
 def extract_roi(image: Image2D, roi: Roi) -> Image2D:
+    """Crop *roi* from *image*.
+
+    2D NumPy arrays are sliced in place and returned as an ndarray view, so
+    camera frames are never copied or converted to lists; other inputs are
+    coerced to nested float lists first.
+    """
+    arr = _ndarray_2d(image)
+    if arr is not None:
+        safe_roi = roi.clamp(arr.shape)
+        return arr[safe_roi.y : safe_roi.y + safe_roi.height, safe_roi.x : safe_roi.x + safe_roi.width]
     safe_image = _coerce_image_2d(image)
     h, w = _image_shape(safe_image)
     safe_roi = roi.clamp((h, w))
@@ -81,12 +102,16 @@ def _astigmatic_error_signal_numpy(patch: Image2D) -> float:
     if total <= 0:
         return 0.0
 
-    y_idx, x_idx = np.indices(arr.shape, dtype=float)
-    cx = float((x_idx * arr).sum() / total)
-    cy = float((y_idx * arr).sum() / total)
+    # Second moments only need the row/column projections.
+    px = arr.sum(axis=0)
+    py = arr.sum(axis=1)
+    x_idx = np.arange(px.shape[0], dtype=float)
+    y_idx = np.arange(py.shape[0], dtype=float)
+    cx = float(x_idx @ px) / total
+    cy = float(y_idx @ py) / total
 
-    var_x = float((((x_idx - cx) ** 2) * arr).sum() / total)
-    var_y = float((((y_idx - cy) ** 2) * arr).sum() / total)
+    var_x = float(((x_idx - cx) ** 2) @ px) / total
+    var_y = float(((y_idx - cy) ** 2) @ py) / total
 
     denom = var_x + var_y
     if denom == 0:
@@ -141,6 +166,18 @@ def _centroid_python(patch: Image2D) -> tuple[float, float]:
     return sum_x / total, sum_y / total
 
 
+def _centroid_numpy(patch: Any) -> tuple[float, float]:
+    import numpy as np
+
+    h, w = patch.shape
+    px = patch.sum(axis=0, dtype=float)
+    py = patch.sum(axis=1, dtype=float)
+    total = float(px.sum())
+    if total <= 0:
+        return (w - 1) / 2.0, (h - 1) / 2.0
+    return float(np.arange(w, dtype=float) @ px) / total, float(np.arange(h, dtype=float) @ py) / total
+
+
 def centroid_near_edge(image: Image2D, roi: Roi, margin_px: float) -> bool:
     """Return True if the intensity centroid is within *margin_px* of the ROI boundary.
 
@@ -151,11 +188,15 @@ def centroid_near_edge(image: Image2D, roi: Roi, margin_px: float) -> bool:
     if margin_px <= 0:
         return False
     patch = extract_roi(image, roi)
-    h = len(patch)
-    w = len(patch[0]) if patch else 0
-    if h == 0 or w == 0:
-        return True
-    cx, cy = _centroid_python(patch)
+    if _ndarray_2d(patch) is not None:
+        h, w = patch.shape
+        cx, cy = _centroid_numpy(patch)
+    else:
+        h = len(patch)
+        w = len(patch[0]) if patch else 0
+        if h == 0 or w == 0:
+            return True
+        cx, cy = _centroid_python(patch)
     if cx < margin_px or cx > (w - 1) - margin_px:
         return True
     if cy < margin_px or cy > (h - 1) - margin_px:
@@ -163,8 +204,23 @@ def centroid_near_edge(image: Image2D, roi: Roi, margin_px: float) -> bool:
     return False
 
 
+def roi_centroid(image: Image2D, roi: Roi) -> tuple[float, float]:
+    """Return the (x, y) intensity-weighted centroid of *roi* in image coordinates."""
+    arr = _ndarray_2d(image)
+    if arr is not None:
+        safe_roi = roi.clamp(arr.shape)
+        cx, cy = _centroid_numpy(extract_roi(arr, safe_roi))
+    else:
+        safe_image = _coerce_image_2d(image)
+        safe_roi = roi.clamp(_image_shape(safe_image))
+        cx, cy = _centroid_python(extract_roi(safe_image, safe_roi))
+    return safe_roi.x + cx, safe_roi.y + cy
+
+
 def roi_total_intensity(image: Image2D, roi: Roi) -> float:
     patch = extract_roi(image, roi)
+    if _ndarray_2d(patch) is not None:
+        return float(patch.sum(dtype=float))
     return float(sum(sum(row) for row in patch))
 
 
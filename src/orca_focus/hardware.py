@@ -1,14 +1,20 @@
 from __future__ import annotations
 
+import collections
 import ctypes
+import functools
 import importlib
+import inspect
 import math
+import random
+import threading
 import time
-from dataclasses import dataclass
+from dataclasses import dataclass, field
 from pathlib import Path
 from types import ModuleType
 from typing import Any, Callable
 
+from . import tracing
 from .interfaces import CameraFrame, CameraInterface, Image2D, StageInterface
 
 
@@ -21,12 +27,13 @@ class HamamatsuOrcaCamera(CameraInterface):
 
     Pass a callable returning `(image_2d, timestamp_s)` where image_2d is a
     2D list of pixel intensities. This makes it straightforward to connect to
-    Micro-Manager, DCAM Python bindings, or custom SDK wrappers.
+    Micro-Manager, DCAM Python bindings, or custom SDK wrappers. Sources that
+    number their frames may return `(image_2d, timestamp_s, frame_index)`.
     """
 
     def __init__(
         self,
-        frame_source: Callable[[], tuple[Image2D, float]] | None = None,
+        frame_source: Callable[[], tuple[Image2D, float] | tuple[Image2D, float, int]] | None = None,
         control_source_lifecycle: bool = False,
     ) -> None:
         self._running = False
@@ -54,6 +61,7 @@ class HamamatsuOrcaCamera(CameraInterface):
     def __exit__(self, _exc_type, _exc, _tb) -> None:
         self.stop()
 
+    @tracing.traced("camera.get_frame", "acquisition")
     def get_frame(self) -> CameraFrame:
         if not self._running:
             raise NotConnectedError("Camera not started")
@@ -62,18 +70,115 @@ class HamamatsuOrcaCamera(CameraInterface):
                 "No frame source configured. Provide a callable that returns"
                 " (image_2d, timestamp_s) from ORCA live acquisition."
             )
-        image, ts = self._frame_source()
+        result = self._frame_source()
+        if len(result) > 2:
+            return CameraFrame(image=result[0], timestamp_s=result[1], frame_index=result[2])
+        image, ts = result
         return CameraFrame(image=image, timestamp_s=ts)
 
 
+# Wrapper method names with the argument layout that follows the (optional)
+# position value. `MCL_Nanodrive` takes the handle last and its `*_z`
+# variants have no axis argument, so probing by argument count alone would
+# pass the axis as the handle. `None` marks names of unknown wrappers, whose
+# layout is found by probing the generic tails.
+_WrapperNames = tuple[tuple[str, tuple[str, ...] | None], ...]
+
+_WRAPPER_READ_NAMES: _WrapperNames = (
+    ("single_read_n", ("axis", "handle")),
+    ("MCL_SingleReadN", ("axis", "handle")),
+    ("single_read_z", ("handle",)),
+    ("get_z_um", None),
+    ("read_z", None),
+)
+_WRAPPER_WRITE_NAMES: _WrapperNames = (
+    ("single_write_n", ("axis", "handle")),
+    ("MCL_SingleWriteN", ("axis", "handle")),
+    ("single_write_z", ("handle",)),
+    ("move_z_um", None),
+    ("write_z", None),
+)
+_WRAPPER_MONITOR_NAMES: _WrapperNames = (
+    ("monitor_n", ("axis", "handle")),
+    ("MCL_MonitorN", ("axis", "handle")),
+    ("monitor_z", ("handle",)),
+)
+_WRAPPER_ENCODER_NAMES: _WrapperNames = (
+    ("read_encoder_z", ("handle",)),
+    ("MCL_ReadEncoderZ", ("handle",)),
+)
+
+
+def _bind_tail(fn: Callable[..., Any], tail: tuple[Any, ...], with_value: bool) -> Callable[..., Any]:
+    if not tail:
+        return fn
+    if not with_value:
+        return functools.partial(fn, *tail)
+
+    def _write(value: float) -> Any:
+        return fn(value, *tail)
+
+    return _write
+
+
+def _probing_call(
+    fn: Callable[..., Any],
+    tails: list[tuple[Any, ...]],
+    with_value: bool,
+    names: tuple[str, ...],
+) -> Callable[..., Any]:
+    """Callable that finds a working argument tail on first use, then caches it."""
+    resolved: list[Callable[..., Any]] = []
+
+    def _call(*value: Any) -> Any:
+        if resolved:
+            return resolved[0](*value)
+        last_type_error: TypeError | None = None
+        for tail in tails:
+            try:
+                out = fn(*(value + tail))
+            except TypeError as exc:
+                last_type_error = exc
+                continue
+            resolved.append(_bind_tail(fn, tail, with_value))
+            return out
+        raise RuntimeError(
+            f"Wrapper call failed for {list(names)}; last TypeError: {last_type_error}"
+        ) from last_type_error
+
+    return _call
+
+
+# Waveform point interval accepted by the Nano-Drive (MCL_Setup_LoadWaveFormN):
+# 1/30 ms (30 kHz) to 5 ms per point.
+MCL_WAVEFORM_MIN_MS = 1.0 / 30.0
+MCL_WAVEFORM_MAX_MS = 5.0
+
+
+def _mcl_error_code(value: float) -> int | None:
+    """Return the MCL error code when a double-returning call reported one.
+
+    Read calls return errors as small negative integers (-1..-8); genuine
+    positions near zero can read slightly negative from sensor noise, so only
+    exact integer codes count.
+    """
+    if -8.0 <= value <= -1.0 and value == int(value):
+        return int(value)
+    return None
+
+
 class MclNanoZStage(StageInterface):
     """Mad City Labs Nano-Z stage adapter.
 
     Supports 3 integration modes:
-    1) ctypes DLL path (`dll_path=...`)
+    1) ctypes DLL path (`dll_path=...`, or an already loaded `dll=...`)
     2) Python wrapper module (`wrapper_module=...`), including
        `MCL_Madlib_Wrapper.MCL_Nanodrive`
     3) in-memory simulated fallback (default)
+
+    `use_encoder=True` makes `read_sensor_z_um` use the encoder readback
+    (`MCL_ReadEncoderZ`), which only encoder-equipped products support; the
+    first failed encoder read falls back to `MCL_SingleReadN` for good.
     """
 
     def __init__(
@@ -82,6 +187,8 @@ class MclNanoZStage(StageInterface):
         wrapper_module: str | ModuleType | Any | None = None,
         axis_index: int = 3,
         wrapper_handle: int | None = None,
+        dll: Any | None = None,
+        use_encoder: bool = False,
     ) -> None:
         self._z_um = 0.0
         self._dll = None
@@ -89,11 +196,19 @@ class MclNanoZStage(StageInterface):
         self._axis = axis_index
         self._wrapper: Any | None = None
         self._wrapper_handle: int | None = wrapper_handle
+        self._wrapper_read_z: Callable[[], Any] | None = None
+        self._wrapper_write_z: Callable[[float], Any] | None = None
+        self._wrapper_monitor_z: Callable[[float], Any] | None = None
+        self._wrapper_encoder_z: Callable[[], Any] | None = None
+        self._use_encoder = bool(use_encoder)
+        self._waveform_start_s: float | None = None
 
         if wrapper_module is not None:
             self._connect_wrapper(wrapper_module)
         if dll_path:
             self._connect_sdk(dll_path)
+        elif dll is not None:
+            self._attach_dll(dll)
 
     def _connect_wrapper(self, wrapper_module: str | ModuleType | Any) -> None:
         module_or_obj = importlib.import_module(wrapper_module) if isinstance(wrapper_module, str) else wrapper_module
@@ -111,68 +226,194 @@ class MclNanoZStage(StageInterface):
             if callable(init_handle):
                 self._wrapper_handle = int(init_handle())
 
+        # Resolve method names and signatures once; the control loop then calls
+        # plain bound callables with no attribute probing or TypeError retries.
+        self._wrapper_read_z = self._bind_wrapper_call(_WRAPPER_READ_NAMES, with_value=False)
+        self._wrapper_write_z = self._bind_wrapper_call(_WRAPPER_WRITE_NAMES, with_value=True)
+        try:
+            self._wrapper_monitor_z = self._bind_wrapper_call(_WRAPPER_MONITOR_NAMES, with_value=True)
+        except NotConnectedError:
+            # Older wrappers lack MonitorN; move_and_read_z_um falls back to write + read.
+            self._wrapper_monitor_z = None
+        if self._use_encoder:
+            try:
+                # The encoder readback is per device, not per axis: MCL_ReadEncoderZ(handle).
+                self._wrapper_encoder_z = self._bind_wrapper_call(_WRAPPER_ENCODER_NAMES, with_value=False)
+            except NotConnectedError:
+                self._use_encoder = False
+
+    def _bind_wrapper_call(self, names: _WrapperNames, *, with_value: bool) -> Callable[..., Any]:
+        """Return a fast-path callable for the first compatible wrapper method.
+
+        Known Madlib names are bound with their documented argument layout.
+        Other names are matched with `inspect.signature(...).bind` so nothing
+        is called (and the stage does not move) at connect time; methods whose
+        signature cannot be introspected (C extensions) are probed on first
+        use and then cached.
+        """
+        handle = self._wrapper_handle
+        values = {"axis": self._axis, "handle": handle}
+        generic = [(self._axis, handle), (self._axis,), (handle,), ()]
+        opaque: list[tuple[Callable[..., Any], list[tuple[Any, ...]]]] = []
+        for name, layout in names:
+            fn = getattr(self._wrapper, name, None)
+            if not callable(fn):
+                continue
+            if layout is None:
+                tails = generic
+            else:
+                # Without a handle the wrapper is assumed to track its own.
+                tails = [tuple(values[arg] for arg in layout if not (arg == "handle" and handle is None))]
+            try:
+                sig = inspect.signature(fn)
+            except (TypeError, ValueError):
+                opaque.append((fn, tails))
+                continue
+            for tail in tails:
+                try:
+                    sig.bind(*(((0.0,) if with_value else ()) + tail))
+                except TypeError:
+                    continue
+                return _bind_tail(fn, tail, with_value)
+        if opaque:
+            fn, tails = opaque[0]
+            if len(tails) == 1:
+                return _bind_tail(fn, tails[0], with_value)
+            return _probing_call(fn, tails, with_value, tuple(name for name, _ in names))
+        raise NotConnectedError(
+            f"MCL wrapper {type(self._wrapper).__name__} has no compatible "
+            f"{'write' if with_value else 'read'} method; tried: {', '.join(name for name, _ in names)}"
+        )
+
     def _connect_sdk(self, dll_path: str) -> None:
         path = Path(dll_path)
         if not path.exists():
             raise FileNotFoundError(f"MCL DLL not found: {dll_path}")
 
-        self._dll = ctypes.CDLL(str(path))
+        self._attach_dll(ctypes.CDLL(str(path)))
+
+    def _attach_dll(self, dll: Any) -> None:
+        """Use an already loaded Madlib (a `ctypes.CDLL` or a stand-in such as
+        `orca_focus.fake_mcl.FakeMadlib`)."""
+        self._dll = dll
         self._dll.MCL_InitHandle.restype = ctypes.c_int
         self._dll.MCL_SingleReadN.restype = ctypes.c_double
         self._dll.MCL_SingleWriteN.restype = ctypes.c_int
+        for name in ("MCL_MonitorN", "MCL_ReadEncoderZ"):
+            fn = getattr(self._dll, name, None)
+            if fn is not None:
+                fn.restype = ctypes.c_double
+        if getattr(self._dll, "MCL_ReadEncoderZ", None) is None:
+            self._use_encoder = False
 
         handle = int(self._dll.MCL_InitHandle())
         if handle <= 0:
             raise NotConnectedError("Failed to initialize MCL handle")
         self._handle = handle
 
-    def _call_wrapper_first(self, names: list[str], arg_options: list[tuple[Any, ...]]) -> Any:
-        if self._wrapper is None:
-            raise NotConnectedError("No MCL wrapper configured")
+    @property
+    def last_waveform_start_s(self) -> float | None:
+        """Host `time.monotonic()` just before the last waveform was triggered."""
+        return self._waveform_start_s
 
-        last_type_error: TypeError | None = None
-        attempted_callable = False
-        for name in names:
-            fn = getattr(self._wrapper, name, None)
-            if not callable(fn):
-                continue
-            attempted_callable = True
-            for args in arg_options:
-                try:
-                    return fn(*args)
-                except TypeError as exc:
-                    last_type_error = exc
-                    continue
-        if attempted_callable and last_type_error is not None:
-            raise RuntimeError(
-                f"Wrapper call failed for {names}; last TypeError: {last_type_error}"
-            ) from last_type_error
-        raise AttributeError(f"No compatible wrapper method/signature found for: {names}")
-
-    def _wrapper_read_z(self) -> float:
-        handle = self._wrapper_handle
-        value = self._call_wrapper_first(
-            ["get_z_um", "read_z", "single_read_z", "single_read_n", "MCL_SingleReadN"],
-            [
-                (self._axis, handle),
-                (self._axis,),
-                (handle,),
-                (),
-            ],
-        )
-        return float(value)
+    def run_z_waveform(
+        self,
+        targets_um: list[float],
+        point_interval_ms: float,
+        *,
+        frame_clock: int | None = None,
+    ) -> list[float]:
+        """Play *targets_um* as a hardware-timed Z waveform and return readback.
+
+        The Nano-Drive clocks every point itself (setup load + setup read, then
+        one synchronous trigger), so a whole sweep costs a single round trip
+        instead of one write/read pair per point. Returns one measured position
+        per target; wrapper/DLL builds without a read waveform return targets.
+
+        `frame_clock` (1=Pixel, 2=Line, 3=Frame, 4=Aux) binds that ISS clock to
+        the waveform read event so an externally triggered camera exposes one
+        frame per point.
+        """
+        targets = [float(z) for z in targets_um]
+        if not targets:
+            raise ValueError("Waveform needs at least one target")
+        if not MCL_WAVEFORM_MIN_MS <= point_interval_ms <= MCL_WAVEFORM_MAX_MS:
+            raise ValueError(
+                f"point_interval_ms must be in [{MCL_WAVEFORM_MIN_MS:.4f}, {MCL_WAVEFORM_MAX_MS:g}] ms"
+            )
+        n = len(targets)
 
-    def _wrapper_write_z(self, target_z_um: float) -> None:
+        if self._wrapper is not None:
+            readback = self._wrapper_run_waveform(targets, point_interval_ms, frame_clock)
+        elif self._dll is not None and self._handle is not None:
+            readback = self._dll_run_waveform(targets, point_interval_ms, frame_clock)
+        else:
+            # In-memory stage: step through the points on the host clock.
+            self._waveform_start_s = time.monotonic()
+            for z in targets:
+                self._z_um = z
+                time.sleep(point_interval_ms / 1000.0)
+            readback = list(targets)
+
+        self._z_um = targets[-1]
+        return [float(v) for v in readback[:n]]
+
+    def _wrapper_run_waveform(
+        self, targets: list[float], point_interval_ms: float, frame_clock: int | None
+    ) -> list[float]:
+        wrapper = self._wrapper
         handle = self._wrapper_handle
-        self._call_wrapper_first(
-            ["move_z_um", "write_z", "single_write_z", "single_write_n", "MCL_SingleWriteN"],
-            [
-                (target_z_um, self._axis, handle),
-                (target_z_um, self._axis),
-                (target_z_um, handle),
-                (target_z_um,),
-            ],
-        )
+        n = len(targets)
+        if frame_clock is not None:
+            wrapper.iss_bind_clock_to_axis(frame_clock, 2, 5, handle)
+        try:
+            acquire = getattr(wrapper, "trigger_waveform_acquisition", None)
+            setup_read = getattr(wrapper, "setup_read_waveform_n", None)
+            if callable(acquire) and callable(setup_read):
+                wrapper.setup_load_waveform_n(self._axis, n, point_interval_ms, targets, handle)
+                setup_read(self._axis, n, point_interval_ms, handle)
+                self._waveform_start_s = time.monotonic()
+                return list(acquire(self._axis, n, handle))
+            load = getattr(wrapper, "load_waveform_n", None)
+            if not callable(load):
+                raise AttributeError("MCL wrapper does not expose waveform load functions")
+            self._waveform_start_s = time.monotonic()
+            load(self._axis, n, point_interval_ms, targets, handle)
+            return list(targets)
+        finally:
+            if frame_clock is not None:
+                wrapper.iss_bind_clock_to_axis(frame_clock, 4, 5, handle)
+
+    def _dll_run_waveform(
+        self, targets: list[float], point_interval_ms: float, frame_clock: int | None
+    ) -> list[float]:
+        dll = self._dll
+        handle = ctypes.c_int(self._handle)
+        axis = ctypes.c_uint(self._axis)
+        n = len(targets)
+        points = ctypes.c_uint(n)
+        ms = ctypes.c_double(point_interval_ms)
+        load_array = (ctypes.c_double * n)(*targets)
+        read_array = (ctypes.c_double * n)()
+
+        def _check(name: str, status: int) -> None:
+            if int(status) != 0:
+                raise RuntimeError(f"{name} failed with status {int(status)}")
+
+        if frame_clock is not None:
+            _check("MCL_IssBindClockToAxis", dll.MCL_IssBindClockToAxis(frame_clock, 2, 5, handle))
+        try:
+            _check("MCL_Setup_LoadWaveFormN", dll.MCL_Setup_LoadWaveFormN(axis, points, ms, load_array, handle))
+            _check("MCL_Setup_ReadWaveFormN", dll.MCL_Setup_ReadWaveFormN(axis, points, ms, handle))
+            self._waveform_start_s = time.monotonic()
+            _check(
+                "MCL_TriggerWaveformAcquisition",
+                dll.MCL_TriggerWaveformAcquisition(axis, points, ctypes.pointer(read_array), handle),
+            )
+        finally:
+            if frame_clock is not None:
+                dll.MCL_IssBindClockToAxis(frame_clock, 4, 5, handle)
+        return list(read_array)
 
     def close(self) -> None:
         if self._wrapper is not None and self._wrapper_handle is not None:
@@ -205,18 +446,57 @@ class MclNanoZStage(StageInterface):
         except Exception:
             pass
 
+    @tracing.traced("mcl.read_z", "stage")
     def get_z_um(self) -> float:
-        if self._wrapper is not None:
-            self._z_um = self._wrapper_read_z()
+        if self._wrapper is None and (self._dll is None or self._handle is None):
             return self._z_um
+        self._z_um = self._single_read()
+        return self._z_um
 
-        if self._dll is None or self._handle is None:
-            return self._z_um
-        axis = ctypes.c_uint(self._axis)
-        value = float(self._dll.MCL_SingleReadN(axis, ctypes.c_int(self._handle)))
-        self._z_um = value
+    def _single_read(self) -> float:
+        """`MCL_SingleReadN` through the wrapper or DLL; raises on an MCL error code."""
+        if self._wrapper is not None:
+            value = float(self._wrapper_read_z())
+        else:
+            value = float(self._dll.MCL_SingleReadN(ctypes.c_uint(self._axis), ctypes.c_int(self._handle)))
+        code = _mcl_error_code(value)
+        if code is not None:
+            raise RuntimeError(f"MCL_SingleReadN failed with status {code}, axis={self._axis}.")
         return value
 
+    def _encoder_read(self) -> float | None:
+        """Encoder Z, or None once the device has shown it has no encoder."""
+        try:
+            if self._wrapper is not None:
+                value = float(self._wrapper_encoder_z())
+            else:
+                value = float(self._dll.MCL_ReadEncoderZ(ctypes.c_int(self._handle)))
+        except Exception:
+            value = None
+        if value is not None and _mcl_error_code(value) is None:
+            return value
+        # MCL_ReadEncoderZ is exported for every product but only works on
+        # encoder-equipped ones; stop trying after the first failure.
+        self._use_encoder = False
+        return None
+
+    @tracing.traced("mcl.read_sensor_z", "stage")
+    def read_sensor_z_um(self) -> float:
+        """Read the position sensor without updating the commanded-Z cache.
+
+        Uses `MCL_SingleReadN`, or the encoder readback when the stage was
+        created with `use_encoder=True` and the device supports it. Intended
+        for high-rate polling from `orca_focus.zsampler.StageZSampler`.
+        """
+        if self._wrapper is None and (self._dll is None or self._handle is None):
+            return self._z_um
+        if self._use_encoder:
+            value = self._encoder_read()
+            if value is not None:
+                return value
+        return self._single_read()
+
+    @tracing.traced("mcl.write_z", "stage")
     def move_z_um(self, target_z_um: float) -> None:
         if self._wrapper is not None:
             self._wrapper_write_z(target_z_um)
@@ -240,39 +520,260 @@ class MclNanoZStage(StageInterface):
             )
         self._z_um = target_z_um
 
+    @tracing.traced("mcl.monitor_z", "stage")
+    def move_and_read_z_um(self, target_z_um: float) -> float:
+        """Command *target_z_um* and return the position read at command time.
+
+        Uses MCL_MonitorN, so a control step costs one stage round trip instead
+        of a SingleReadN + SingleWriteN pair. The returned position is the one
+        measured as the command is issued, i.e. before the stage responds.
+        """
+        if self._wrapper is not None:
+            if self._wrapper_monitor_z is None:
+                measured = self._single_read()
+                self._wrapper_write_z(target_z_um)
+            else:
+                measured = float(self._wrapper_monitor_z(target_z_um))
+                code = _mcl_error_code(measured)
+                if code is not None:
+                    raise RuntimeError(
+                        f"MCL_MonitorN failed with status {code} for target_z_um={target_z_um:+0.6f}, axis={self._axis}."
+                    )
+            self._z_um = target_z_um
+            return measured
+
+        if self._dll is None or self._handle is None:
+            measured = self._z_um
+            self._z_um = target_z_um
+            return measured
+        monitor = getattr(self._dll, "MCL_MonitorN", None)
+        if monitor is None:
+            measured = self.get_z_um()
+            self.move_z_um(target_z_um)
+            return measured
+        value = float(monitor(ctypes.c_double(target_z_um), ctypes.c_uint(self._axis), ctypes.c_int(self._handle)))
+        code = _mcl_error_code(value)
+        if code is not None:
+            raise RuntimeError(
+                f"MCL_MonitorN failed with status {code} for target_z_um={target_z_um:+0.6f}, axis={self._axis}."
+            )
+        self._z_um = target_z_um
+        return value
+
+
+@functools.lru_cache(maxsize=16)
+def _pixel_axis(size: int) -> Any:
+    """Cached read-only pixel index axis; NumPy only."""
+    import numpy as np
+
+    axis = np.arange(size, dtype=float)
+    axis.setflags(write=False)
+    return axis
+
+
+def _gaussian_profile(size: int, center: float, sigma: float) -> Any:
+    """1D Gaussian along one image axis (ndarray, or list without NumPy).
+
+    Centres and widths change with every Z, so only the index axis is cached.
+    """
+    scale = -1.0 / (2 * sigma**2)
+    try:
+        import numpy as np
+    except Exception:
+        return [math.exp(scale * (i - center) ** 2) for i in range(size)]
+    d = _pixel_axis(size) - center
+    d *= d
+    d *= scale
+    return np.exp(d, out=d)
+
+
+def _poisson_python(rng: random.Random, lam: float) -> int:
+    if lam <= 0:
+        return 0
+    if lam > 30.0:
+        return max(0, int(round(rng.gauss(lam, math.sqrt(lam)))))
+    # Knuth's method is fine for the small means left over.
+    limit = math.exp(-lam)
+    k = 0
+    p = rng.random()
+    while p > limit:
+        k += 1
+        p *= rng.random()
+    return k
+
+
+@dataclass(slots=True)
+class SimulatedBead:
+    """One emitter in a `SimulatedScene`; `None` coordinates mean frame centre."""
+
+    x_px: float | None = None
+    y_px: float | None = None
+    brightness: float = 1.0
+    z_offset_um: float = 0.0
+
 
 @dataclass(slots=True)
 class SimulatedScene:
+    """Astigmatic bead scene for demos, tuning and benchmarks.
+
+    Each bead is a separable elliptical Gaussian whose x/y widths change
+    linearly (and oppositely) with defocus. Images are built as outer products
+    of 1D profiles over a cached pixel axis; with NumPy a 64x64 frame costs
+    about 40-50 us, or 150-250 us with Poisson noise. `render_frame`/`render_stack` return uint16 counts with optional
+    Poisson shot noise and Gaussian read noise from a seeded RNG;
+    `render_dot` keeps the noise-free float output used by the tests.
+    """
+
     focal_plane_um: float = 0.0
     sigma0_px: float = 1.2
     alpha_px_per_um: float = 0.25
+    size: int = 64
+    peak_counts: float = 4095.0
+    background_counts: float = 0.0
+    beads: list[SimulatedBead] = field(default_factory=list)
+    drift_px_per_s: tuple[float, float] = (0.0, 0.0)
+    poisson_noise: bool = False
+    read_noise_counts: float = 0.0
+    seed: int | None = None
+    _rng: Any = field(init=False, default=None, repr=False)
+
+    def __post_init__(self) -> None:
+        if self.size <= 0:
+            raise ValueError("size must be > 0")
+        if self.read_noise_counts < 0:
+            raise ValueError("read_noise_counts must be >= 0")
+        try:
+            import numpy as np
 
-    def render_dot(self, z_um: float, size: int = 64) -> Image2D:
-        # Pure-Python O(size^2) simulation for test/demo use; real acquisition paths
-        # should use hardware camera frames rather than this renderer.
-        cx = cy = (size - 1) / 2
+            self._rng = np.random.default_rng(self.seed)
+        except Exception:
+            self._rng = random.Random(self.seed)
+
+    def _bead_params(self, z_um: float, size: int, t_s: float) -> list[tuple[float, float, float, float, float]]:
+        """(cx, cy, sigma_x, sigma_y, amplitude) for every bead."""
+        centre = (size - 1) / 2
+        vx, vy = self.drift_px_per_s
+        out = []
+        for bead in self.beads or [SimulatedBead()]:
+            dz = z_um - self.focal_plane_um - bead.z_offset_um
+            sigma_x = max(0.6, self.sigma0_px + self.alpha_px_per_um * dz)
+            sigma_y = max(0.6, self.sigma0_px - self.alpha_px_per_um * dz)
+            cx = (centre if bead.x_px is None else bead.x_px) + vx * t_s
+            cy = (centre if bead.y_px is None else bead.y_px) + vy * t_s
+            out.append((cx, cy, sigma_x, sigma_y, self.peak_counts * bead.brightness))
+        return out
+
+    def render_expected(self, z_um: float, *, size: int | None = None, t_s: float = 0.0) -> Any:
+        """Noise-free float image (ndarray, or nested lists without NumPy)."""
+        size = self.size if size is None else int(size)
+        beads = self._bead_params(z_um, size, t_s)
+        try:
+            import numpy as np
+        except Exception:
+            image = [[self.background_counts] * size for _ in range(size)]
+            for cx, cy, sx, sy, amp in beads:
+                gx = _gaussian_profile(size, cx, sx)
+                gy = _gaussian_profile(size, cy, sy)
+                for y in range(size):
+                    row = image[y]
+                    ay = amp * gy[y]
+                    for x in range(size):
+                        row[x] += ay * gx[x]
+            return image
 
-        dz = z_um - self.focal_plane_um
-        sigma_x = max(0.6, self.sigma0_px + self.alpha_px_per_um * dz)
-        sigma_y = max(0.6, self.sigma0_px - self.alpha_px_per_um * dz)
+        image = np.full((size, size), float(self.background_counts))
+        for cx, cy, sx, sy, amp in beads:
+            gx = _gaussian_profile(size, cx, sx)
+            gy = _gaussian_profile(size, cy, sy)
+            image += np.multiply.outer(amp * gy, gx)
+        return image
 
+    def _to_counts(self, expected: Any) -> Any:
         try:
             import numpy as np
-
-            y, x = np.mgrid[0:size, 0:size]
-            x_term = ((x - cx) ** 2) / (2 * sigma_x**2)
-            y_term = ((y - cy) ** 2) / (2 * sigma_y**2)
-            return (np.exp(-(x_term + y_term)) * 4095.0).tolist()
         except Exception:
-            image: Image2D = []
-            for y in range(size):
-                row: list[float] = []
-                for x in range(size):
-                    x_term = ((x - cx) ** 2) / (2 * sigma_x**2)
-                    y_term = ((y - cy) ** 2) / (2 * sigma_y**2)
-                    row.append(math.exp(-(x_term + y_term)) * 4095.0)
-                image.append(row)
-            return image
+            rng = self._rng
+            out = []
+            for row in expected:
+                counts = []
+                for v in row:
+                    if self.poisson_noise:
+                        v = _poisson_python(rng, v)
+                    if self.read_noise_counts > 0:
+                        v += rng.gauss(0.0, self.read_noise_counts)
+                    counts.append(min(65535, max(0, int(round(v)))))
+                out.append(counts)
+            return out
+
+        counts = expected
+        if self.poisson_noise:
+            counts = self._rng.poisson(np.clip(counts, 0.0, None)).astype(float)
+        if self.read_noise_counts > 0:
+            counts += self._rng.normal(0.0, self.read_noise_counts, size=counts.shape)
+        # In place: stacks can be large, so avoid extra full-size temporaries.
+        np.clip(counts, 0, 65535, out=counts)
+        np.rint(counts, out=counts)
+        return counts.astype(np.uint16)
+
+    def render_frame(self, z_um: float, *, t_s: float = 0.0) -> Any:
+        """One uint16 camera frame at stage position *z_um* and time *t_s*."""
+        return self._to_counts(self.render_expected(z_um, t_s=t_s))
+
+    def render_exposure(self, z_values: Any, *, t_s: float = 0.0) -> Any:
+        """One uint16 frame integrated over the stage positions seen during an
+        exposure (motion blur along Z), with noise applied once."""
+        zs = [float(z) for z in z_values]
+        if not zs:
+            raise ValueError("Need at least one Z value per exposure")
+        if len(zs) == 1:
+            return self.render_frame(zs[0], t_s=t_s)
+        expected = self.render_expected(zs[0], t_s=t_s)
+        try:
+            import numpy as np  # noqa: F401
+        except Exception:
+            for z in zs[1:]:
+                other = self.render_expected(z, t_s=t_s)
+                expected = [[a + b for a, b in zip(ra, rb)] for ra, rb in zip(expected, other)]
+            expected = [[v / len(zs) for v in row] for row in expected]
+            return self._to_counts(expected)
+        for z in zs[1:]:
+            expected += self.render_expected(z, t_s=t_s)
+        expected /= len(zs)
+        return self._to_counts(expected)
+
+    def render_stack(self, z_values: Any, *, t_s: float | Any = 0.0) -> Any:
+        """Render a `(n, size, size)` uint16 stack, one frame per Z value.
+
+        *t_s* may be a scalar or one time per frame (for drift). Single-bead
+        scenes without drift are computed in one broadcast over all frames.
+        """
+        zs = [float(z) for z in z_values]
+        times = [float(t) for t in t_s] if hasattr(t_s, "__iter__") else [float(t_s)] * len(zs)
+        if len(times) != len(zs):
+            raise ValueError("t_s must be a scalar or match the number of Z values")
+        try:
+            import numpy as np
+        except Exception:
+            return [self.render_frame(z, t_s=t) for z, t in zip(zs, times)]
+
+        if not zs:
+            return np.zeros((0, self.size, self.size), dtype=np.uint16)
+        size = self.size
+        axis = np.arange(size, dtype=float)
+        expected = np.full((len(zs), size, size), float(self.background_counts))
+        per_frame = [self._bead_params(z, size, t) for z, t in zip(zs, times)]
+        for b in range(len(per_frame[0])):
+            params = np.array([frame[b] for frame in per_frame])
+            cx, cy, sx, sy, amp = (params[:, i, None] for i in range(5))
+            gx = np.exp(-((axis[None, :] - cx) ** 2) / (2 * sx**2))
+            gy = amp * np.exp(-((axis[None, :] - cy) ** 2) / (2 * sy**2))
+            expected += np.einsum("ny,nx->nyx", gy, gx)
+        return self._to_counts(expected)
+
+    def render_dot(self, z_um: float, size: int = 64) -> Image2D:
+        """Noise-free float image as nested lists."""
+        image = self.render_expected(z_um, size=size)
+        return image.tolist() if hasattr(image, "tolist") else image
 
 
 class SimulatedCamera(CameraInterface):
@@ -280,16 +781,186 @@ class SimulatedCamera(CameraInterface):
         self._stage = stage
         self._scene = scene or SimulatedScene()
         self._running = False
+        self._t0 = time.monotonic()
 
     def start(self) -> None:
+        self._t0 = time.monotonic()
         self._running = True
 
     def stop(self) -> None:
         self._running = False
 
+    @tracing.traced("camera.get_frame", "acquisition")
     def get_frame(self) -> CameraFrame:
         if not self._running:
             raise NotConnectedError("Simulated camera not started")
         z = self._stage.get_z_um()
-        image = self._scene.render_dot(z_um=z)
+        image = self._scene.render_frame(z, t_s=time.monotonic() - self._t0)
         return CameraFrame(image=image, timestamp_s=time.time())
+
+
+class StreamingSimulatedCamera(CameraInterface):
+    """Free-running simulated camera with realistic acquisition timing.
+
+    An acquisition thread exposes for `exposure_s` (sampling the stage
+    `exposure_samples` times and integrating the PSF over that motion), waits
+    `readout_s`, then pushes the frame with its index into a bounded circular
+    buffer. Frames overwritten before being read count as `frames_dropped`.
+
+    `read_mode="newest"` returns the most recent unread frame and discards
+    older ones (`frames_skipped`), like `getLastImage`; `read_mode="oldest"`
+    pops frames in order, like a sequence-buffer drain. Both block up to
+    `timeout_s` for a frame newer than the last one returned. Timestamps are
+    taken at mid-exposure.
+    """
+
+    def __init__(
+        self,
+        stage: StageInterface,
+        scene: SimulatedScene | None = None,
+        *,
+        exposure_s: float = 0.01,
+        readout_s: float = 0.005,
+        buffer_size: int = 16,
+        read_mode: str = "newest",
+        exposure_samples: int = 3,
+        timeout_s: float = 1.0,
+    ) -> None:
+        if exposure_s <= 0 or readout_s < 0:
+            raise ValueError("exposure_s must be > 0 and readout_s >= 0")
+        if buffer_size < 1:
+            raise ValueError("buffer_size must be >= 1")
+        if read_mode not in ("newest", "oldest"):
+            raise ValueError("read_mode must be 'newest' or 'oldest'")
+        if exposure_samples < 1:
+            raise ValueError("exposure_samples must be >= 1")
+        self._stage = stage
+        self._scene = scene or SimulatedScene()
+        self.exposure_s = float(exposure_s)
+        self.readout_s = float(readout_s)
+        self.read_mode = read_mode
+        self.exposure_samples = int(exposure_samples)
+        self.timeout_s = float(timeout_s)
+        # Frame-rate cap set through set_frame_rate_hz; None free-runs.
+        self.frame_rate_hz: float | None = None
+        self._buffer: collections.deque[CameraFrame] = collections.deque(maxlen=int(buffer_size))
+        self._cond = threading.Condition()
+        self._stop_evt = threading.Event()
+        self._thread: threading.Thread | None = None
+        self._next_index = 0
+        self._t0 = time.monotonic()
+        self._error: Exception | None = None
+        self.frames_acquired = 0
+        self.frames_dropped = 0
+        self.frames_skipped = 0
+
+    @property
+    def frame_period_s(self) -> float:
+        period = self.exposure_s + self.readout_s
+        if self.frame_rate_hz is not None:
+            period = max(period, 1.0 / self.frame_rate_hz)
+        return period
+
+    def set_frame_rate_hz(self, hz: float | None) -> None:
+        """Cap the acquisition rate (None restores free-running); takes effect next frame."""
+        if hz is not None and hz <= 0:
+            raise ValueError("hz must be > 0")
+        self.frame_rate_hz = None if hz is None else float(hz)
+
+    @property
+    def buffered(self) -> int:
+        with self._cond:
+            return len(self._buffer)
+
+    def start(self) -> None:
+        if self._thread is not None and self._thread.is_alive():
+            return
+        self._stop_evt.clear()
+        self._error = None
+        self._t0 = time.monotonic()
+        self._thread = threading.Thread(target=self._acquire_loop, daemon=True)
+        self._thread.start()
+
+    def stop(self) -> None:
+        self._stop_evt.set()
+        thread = self._thread
+        if thread is not None:
+            thread.join(timeout=2.0)
+        self._thread = None
+        with self._cond:
+            self._buffer.clear()
+            self._cond.notify_all()
+
+    def __enter__(self) -> "StreamingSimulatedCamera":
+        self.start()
+        return self
+
+    def __exit__(self, _exc_type, _exc, _tb) -> None:
+        self.stop()
+
+    def _acquire_loop(self) -> None:
+        n = self.exposure_samples
+        dt = self.exposure_s / n
+        next_start = time.monotonic()
+        while not self._stop_evt.is_set():
+            t_start_wall = time.time()
+            t_start = time.monotonic()
+            zs: list[float] = []
+            try:
+                for k in range(n):
+                    # Sample mid-way through each sub-interval of the exposure.
+                    target = t_start + (k + 0.5) * dt
+                    delay = target - time.monotonic()
+                    if delay > 0 and self._stop_evt.wait(delay):
+                        return
+                    zs.append(float(self._stage.get_z_um()))
+                image = self._scene.render_exposure(zs, t_s=t_start + 0.5 * self.exposure_s - self._t0)
+            except Exception as exc:
+                with self._cond:
+                    self._error = exc
+                    self._cond.notify_all()
+                return
+            end_of_exposure = t_start + self.exposure_s + self.readout_s
+            delay = end_of_exposure - time.monotonic()
+            if delay > 0 and self._stop_evt.wait(delay):
+                return
+            frame = CameraFrame(
+                image=image,
+                timestamp_s=t_start_wall + 0.5 * self.exposure_s,
+                frame_index=self._next_index,
+            )
+            self._next_index += 1
+            with self._cond:
+                if len(self._buffer) == self._buffer.maxlen:
+                    self.frames_dropped += 1
+                self._buffer.append(frame)
+                self.frames_acquired += 1
+                self._cond.notify_all()
+            # Free-running: the next exposure starts one frame period after
+            # the previous one, or immediately if rendering fell behind.
+            next_start = max(next_start + self.frame_period_s, time.monotonic())
+            delay = next_start - time.monotonic()
+            if delay > 0 and self._stop_evt.wait(delay):
+                return
+
+    @tracing.traced("camera.get_frame", "acquisition")
+    def get_frame(self) -> CameraFrame:
+        if self._thread is None:
+            raise NotConnectedError("Simulated camera not started")
+        deadline = time.monotonic() + self.timeout_s
+        with self._cond:
+            while True:
+                if self._error is not None:
+                    raise RuntimeError(f"Simulated acquisition failed: {self._error}") from self._error
+                if self._buffer:
+                    if self.read_mode == "oldest":
+                        frame = self._buffer.popleft()
+                    else:
+                        frame = self._buffer.pop()
+                        self.frames_skipped += len(self._buffer)
+                        self._buffer.clear()
+                    return frame
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    raise TimeoutError(f"No new frame within {self.timeout_s:0.3f} s")
+                self._cond.wait(remaining)
@@ -1,25 +1,46 @@
 from __future__ import annotations
 
+import dataclasses
 import math
 import os
+import sys
 import threading
 from pathlib import Path
 
+from . import tracing
 from .autofocus import (
     AstigmaticAutofocusController,
     AutofocusConfig,
     AutofocusSample,
     AutofocusWorker,
 )
+from .broadcast import FrameBroadcaster
 from .calibration import (
+    CalibrationFitReport,
     FocusCalibration,
     auto_calibrate,
     calibration_quality_issues,
     fit_linear_calibration_with_report,
     save_calibration_samples_csv,
+    waveform_calibrate,
 )
 from .focus_metric import Roi, astigmatic_error_signal
 from .interfaces import CameraInterface, StageInterface
+from .recorder import FrameRecorder
+from .registry import (
+    CalibrationKey,
+    CalibrationRegistry,
+    record_from_linear_report,
+    record_from_zhuang_report,
+)
+from .telemetry import TelemetryRing
+from .viewer import DisplayThrottle
+from .zhuang import (
+    ZhuangFitReport,
+    ZhuangFocusCalibration,
+    fit_zhuang_calibration_with_report,
+    zhuang_quality_issues,
+)
 
 
 def _prepare_napari_environment() -> None:
@@ -52,38 +73,152 @@ def _calibration_plan_from_nm(center_z_um: float, half_range_nm: float, step_nm:
 
 
 
-def _build_runtime_calibration(base_calibration: FocusCalibration) -> FocusCalibration:
+def _build_runtime_calibration(
+    base_calibration: FocusCalibration | ZhuangFocusCalibration,
+) -> FocusCalibration | ZhuangFocusCalibration:
     """Return runtime calibration used by control loop.
 
     Runtime autofocus uses calibration as a relative move model (slope + sign).
     Target error is always zero for astigmatic focus lock, so we intentionally
     force error_at_focus to 0.0 to keep behavior reproducible across restarts
-    and ROI retargets.
+    and ROI retargets. Zhuang calibrations already target the zero-error
+    crossing and are used unchanged.
     """
 
+    if isinstance(base_calibration, ZhuangFocusCalibration):
+        return base_calibration
     return FocusCalibration(
         error_at_focus=0.0,
         error_to_um=base_calibration.error_to_um,
     )
 
 
+def _save_sweep_record(
+    registry: CalibrationRegistry,
+    key: CalibrationKey,
+    roi: Roi,
+    samples: list,
+    report: CalibrationFitReport | ZhuangFitReport,
+) -> Path:
+    """Store a viewer sweep's fit under *key* with the sweep ROI's size."""
+
+    key = dataclasses.replace(key, roi_width=roi.width, roi_height=roi.height)
+    if isinstance(report, ZhuangFitReport):
+        return registry.save(record_from_zhuang_report(key, samples, report))
+    return registry.save(record_from_linear_report(key, samples, report))
+
+
+def _stored_calibration_choices(registry: CalibrationRegistry) -> list[tuple[str, CalibrationKey, str]]:
+    """`(label, key, model)` for every calibration in *registry*, for the viewer's picker."""
+
+    choices = []
+    for record in registry.records():
+        key = record.key
+        label = (
+            f"{record.model}: {key.objective or '-'} / {key.camera or '-'} / "
+            f"ROI {key.roi_width}x{key.roi_height}"
+        )
+        if key.cylinder_lens:
+            label += f" / {key.cylinder_lens}"
+        choices.append((label, key, record.model))
+    return choices
+
+
+_TELEMETRY_PLOTS = (
+    ("error_um", "error (um)"),
+    ("stage_z_um", "stage Z (um)"),
+    ("commanded_z_um", "commanded Z (um)"),
+    ("roi_total_intensity", "ROI intensity"),
+    ("loop_latency_s", "loop latency (s)"),
+    ("loop_hz", "loop rate (Hz)"),
+)
+
+
+def _add_telemetry_dock(viewer, telemetry: TelemetryRing, *, window: int, interval_ms: int):
+    """Dock stacked pyqtgraph plots fed from *telemetry*; None without pyqtgraph.
+
+    Each tick hands the ring's zero-copy window views to `setData`, which
+    redraws only the curve items, never the whole figure.
+    """
+    try:
+        import pyqtgraph as pg
+        from qtpy.QtCore import QTimer
+    except Exception as exc:
+        print(f"Warning: telemetry dock disabled ({exc}); install pyqtgraph to enable it.", file=sys.stderr)
+        return None
+
+    plots = pg.GraphicsLayoutWidget()
+    curves = {}
+    first = None
+    for row, (channel, label) in enumerate(_TELEMETRY_PLOTS):
+        plot = plots.addPlot(row=row, col=0)
+        plot.setLabel("left", label)
+        plot.showGrid(x=True, y=True, alpha=0.3)
+        if first is None:
+            first = plot
+        else:
+            plot.setXLink(first)
+        curves[channel] = plot.plot(pen=pg.mkPen(width=1))
+    first.setLabel("top", "time (s)")
+    viewer.window.add_dock_widget(plots, area="bottom", name="Autofocus Telemetry")
+
+    def _update() -> None:
+        cols = telemetry.window(window)
+        t = cols["timestamp_s"]
+        if len(t) < 2:
+            return
+        for channel, curve in curves.items():
+            curve.setData(t, cols[channel])
+
+    timer = QTimer()
+    timer.timeout.connect(_update)
+    timer.start(max(1, int(interval_ms)))
+    return timer
+
+
 def launch_autofocus_viewer(
     camera: CameraInterface,
     stage: StageInterface,
     *,
-    calibration: FocusCalibration,
+    calibration: FocusCalibration | ZhuangFocusCalibration,
     default_config: AutofocusConfig,
     interval_ms: int = 20,
     calibration_output_path: str | None = None,
     calibration_half_range_um: float = 0.75,
     calibration_steps: int = 21,
+    calibration_mode: str = "step",
+    calibration_point_ms: float = 5.0,
+    calibration_model: str = "linear",
+    calibration_registry: CalibrationRegistry | None = None,
+    calibration_key: CalibrationKey | None = None,
+    display_max_fps: float = 30.0,
+    display_downsample: int = 1,
+    telemetry_window: int = 1000,
+    telemetry_hz: float = 20.0,
+    recorder: FrameRecorder | None = None,
 ) -> None:
     """Live napari viewer with interactive ROI selection and background autofocus.
 
     Controls:
     - Draw ROI rectangle on the "ROI" layer to start/re-target autofocus.
     - Click the "Run Calibration Sweep" button (or press `c`) to sweep Z and save CSV.
+      With `calibration_mode="waveform"` the sweep is played as a hardware-timed
+      stage waveform (`calibration_point_ms` per point) instead of stepwise moves.
+      With `calibration_model="zhuang"` the sweep is fitted with the nonlinear
+      defocus model instead of a straight line. With a `calibration_registry`
+      and `calibration_key`, accepted fits are also stored in the registry.
+    - With a `calibration_registry`, "Use Stored Calibration" switches the
+      running lock to the calibration picked in the list, without refitting.
+    - Press `z` to toggle a zoomed view of the area around the autofocus ROI.
     - Press `Escape` to stop and close.
+
+    The display shows at most `display_max_fps` new frames per second,
+    strided by `display_downsample` (raised automatically when preparing a
+    frame overruns its budget), independent of the control loop rate.
+
+    With pyqtgraph installed, an "Autofocus Telemetry" dock plots the last
+    `telemetry_window` control steps at `telemetry_hz`. A `recorder` receives
+    every control step's ROI crop and telemetry.
     """
 
     _prepare_napari_environment()
@@ -92,7 +227,7 @@ def launch_autofocus_viewer(
         import napari
         import numpy as np
         from qtpy.QtCore import QTimer
-        from qtpy.QtWidgets import QDoubleSpinBox, QLabel, QPushButton, QWidget, QVBoxLayout
+        from qtpy.QtWidgets import QComboBox, QDoubleSpinBox, QLabel, QPushButton, QWidget, QVBoxLayout
     except Exception as exc:  # pragma: no cover
         raise RuntimeError(
             "napari is required for the live viewer. Install with: pip install napari"
@@ -101,6 +236,14 @@ def launch_autofocus_viewer(
     current_calibration = calibration
 
     initial = np.asarray(camera.get_frame().image)
+    # One acquisition thread feeds the controller, the display and
+    # calibration sweeps; none of them call camera.get_frame() directly.
+    broadcaster = FrameBroadcaster(camera)
+    display_frames = broadcaster.subscribe("viewer")
+    display = DisplayThrottle(max_fps=display_max_fps, downsample=display_downsample)
+    # Kept across ROI changes / worker restarts so plots stay continuous.
+    telemetry = TelemetryRing(capacity=max(2, 2 * int(telemetry_window)))
+    broadcaster.start()
     viewer = napari.Viewer(title="Autofocus â€” draw ROI to start")
     image_layer = viewer.add_image(initial, name="camera", blending="opaque")
 
@@ -147,6 +290,9 @@ def launch_autofocus_viewer(
         if worker is not None:
             worker.stop(wait=wait)
             state["worker"] = None
+        frames = state.pop("controller_frames", None)
+        if frames is not None:
+            frames.close()
 
     def _on_sample(sample: AutofocusSample) -> None:
         state["last_sample"] = sample
@@ -156,29 +302,20 @@ def launch_autofocus_viewer(
             state["last_roi"] = roi
             return
         _stop_worker(wait=False)
-        config = AutofocusConfig(
-            roi=roi,
-            loop_hz=default_config.loop_hz,
-            kp=default_config.kp,
-            ki=default_config.ki,
-            max_step_um=default_config.max_step_um,
-            integral_limit_um=default_config.integral_limit_um,
-            stage_min_um=default_config.stage_min_um,
-            stage_max_um=default_config.stage_max_um,
-            max_abs_excursion_um=default_config.max_abs_excursion_um,
-            min_roi_intensity=default_config.min_roi_intensity,
-            error_alpha=default_config.error_alpha,
-            edge_margin_px=default_config.edge_margin_px,
-        )
+        config = dataclasses.replace(default_config, roi=roi)
         runtime_calibration = _build_runtime_calibration(current_calibration)
+        controller_frames = broadcaster.subscribe("controller")
         controller = AstigmaticAutofocusController(
-            camera=camera,
+            camera=controller_frames,
             stage=stage,
             config=config,
             calibration=runtime_calibration,
+            on_step=recorder.record if recorder is not None else None,
         )
-        worker = AutofocusWorker(controller=controller, on_sample=_on_sample)
+        worker = AutofocusWorker(controller=controller, on_sample=_on_sample, telemetry=telemetry)
         state["worker"] = worker
+        state["controller"] = controller
+        state["controller_frames"] = controller_frames
         state["last_roi"] = roi
         worker.start()
 
@@ -195,6 +332,8 @@ def launch_autofocus_viewer(
                 return
             rect = shapes[-1]
             roi = _roi_from_rectangle(rect)
+            if roi == state.get("tracked_roi"):
+                return  # our own redraw of a tracking move
             state["pending_roi"] = roi
             roi_apply_timer.start(200)
         except Exception as exc:
@@ -215,6 +354,11 @@ def launch_autofocus_viewer(
                     f"target={target_z:+0.3f} um (move failed, continuing)"
                 )
 
+        # Waveform sweeps need every frame in order; step sweeps only the
+        # newest frame after each move.
+        sweep_frames = broadcaster.subscribe(
+            "calibration", mode="queue" if calibration_mode == "waveform" else "newest"
+        )
         try:
             state["calibration_busy"] = True
             state["calibration_progress"] = ""
@@ -223,16 +367,31 @@ def launch_autofocus_viewer(
             z_min, z_max, dynamic_steps, _ = _calibration_plan_from_nm(
                 center_z, range_spin_nm.value(), step_spin_nm.value()
             )
-            samples = auto_calibrate(
-                camera,
-                stage,
-                roi,
-                z_min_um=z_min,
-                z_max_um=z_max,
-                n_steps=dynamic_steps,
-                should_stop=state["calibration_cancel_evt"].is_set,
-                on_step=_on_calibration_step,
-            )
+            if calibration_mode == "waveform":
+                state["calibration_progress"] = (
+                    f"Waveform sweep: {2 * dynamic_steps} points at {calibration_point_ms:0.1f} ms/point"
+                )
+                samples = waveform_calibrate(
+                    sweep_frames,
+                    stage,
+                    roi,
+                    z_min_um=z_min,
+                    z_max_um=z_max,
+                    n_steps=dynamic_steps,
+                    point_interval_ms=calibration_point_ms,
+                    should_stop=state["calibration_cancel_evt"].is_set,
+                )
+            else:
+                samples = auto_calibrate(
+                    sweep_frames,
+                    stage,
+                    roi,
+                    z_min_um=z_min,
+                    z_max_um=z_max,
+                    n_steps=dynamic_steps,
+                    should_stop=state["calibration_cancel_evt"].is_set,
+                    on_step=_on_calibration_step,
+                )
             stage.move_z_um(center_z)
 
             if calibration_output_path:
@@ -241,25 +400,49 @@ def launch_autofocus_viewer(
                 out_path = Path.cwd() / "calibration_sweep.csv"
             save_calibration_samples_csv(out_path, samples)
 
-            report = fit_linear_calibration_with_report(samples, robust=True)
-            issues = calibration_quality_issues(samples, report)
-            if issues:
-                raise RuntimeError(
-                    " ; ".join(["Calibration quality check failed"] + issues)
+            if calibration_model == "zhuang":
+                zhuang_report = fit_zhuang_calibration_with_report(samples)
+                issues = zhuang_quality_issues(samples, zhuang_report)
+                if issues:
+                    raise RuntimeError(
+                        " ; ".join(["Calibration quality check failed"] + issues)
+                    )
+
+                current_calibration = zhuang_report.calibration
+                fit_report: CalibrationFitReport | ZhuangFitReport = zhuang_report
+                z_lo, z_hi = current_calibration.z_range_um
+                state["calibration_message"] = (
+                    "Calibration complete (Zhuang): "
+                    f"{len(samples)} samples saved to {out_path} | "
+                    f"local slope={current_calibration.error_to_um:+0.4f} um/error, "
+                    f"capture range={z_hi - z_lo:0.3f} um, R²={zhuang_report.r2:0.4f}"
                 )
-
-            current_calibration = FocusCalibration(error_at_focus=0.0, error_to_um=report.calibration.error_to_um)
-            state["calibration_message"] = (
-                "Calibration complete: "
-                f"{len(samples)} samples saved to {out_path} | "
-                f"slope={report.calibration.error_to_um:+0.4f} um/error, "
-                f"fitted_error_at_focus={report.calibration.error_at_focus:+0.4f}, "
-                "control_error_at_focus=+0.0000, "
-                f"R²={report.r2:0.4f}"
-            )
+            else:
+                report = fit_linear_calibration_with_report(samples, robust=True)
+                issues = calibration_quality_issues(samples, report)
+                if issues:
+                    raise RuntimeError(
+                        " ; ".join(["Calibration quality check failed"] + issues)
+                    )
+
+                current_calibration = FocusCalibration(error_at_focus=0.0, error_to_um=report.calibration.error_to_um)
+                fit_report = report
+                state["calibration_message"] = (
+                    "Calibration complete: "
+                    f"{len(samples)} samples saved to {out_path} | "
+                    f"slope={report.calibration.error_to_um:+0.4f} um/error, "
+                    f"fitted_error_at_focus={report.calibration.error_at_focus:+0.4f}, "
+                    "control_error_at_focus=+0.0000, "
+                    f"R²={report.r2:0.4f}"
+                )
+            if calibration_registry is not None and calibration_key is not None:
+                stored = _save_sweep_record(calibration_registry, calibration_key, roi, samples, fit_report)
+                state["calibration_message"] += f" | stored in registry as {stored.name}"
+                state["registry_changed"] = True
         except Exception as exc:  # pragma: no cover
             state["calibration_message"] = f"Calibration failed: {exc}"
         finally:
+            sweep_frames.close()
             state["calibration_busy"] = False
             state["calibration_progress"] = ""
             # Use the latest ROI (user may have redrawn during the sweep).
@@ -306,6 +489,34 @@ def launch_autofocus_viewer(
         state["calibration_message"] = "Autofocus running"
         _start_autofocus(roi)
 
+    def _reload_stored_calibrations() -> None:
+        choices = _stored_calibration_choices(calibration_registry)
+        state["stored_choices"] = choices
+        stored_combo.clear()
+        stored_combo.addItems([label for label, _, _ in choices])
+
+    def _use_stored_calibration() -> None:
+        nonlocal current_calibration
+        if state.get("calibration_busy"):
+            state["calibration_message"] = "Wait for the calibration sweep to finish"
+            return
+        choices = state.get("stored_choices") or []
+        idx = stored_combo.currentIndex()
+        if not 0 <= idx < len(choices):
+            state["calibration_message"] = "No stored calibration selected"
+            return
+        label, key, model = choices[idx]
+        try:
+            record = calibration_registry.select(key, model)
+        except (KeyError, ValueError) as exc:
+            state["calibration_message"] = f"Could not load stored calibration: {exc}"
+            return
+        current_calibration = record.runtime_calibration()
+        state["calibration_message"] = f"Using stored calibration {label} (no refit)"
+        roi = state.get("last_roi")
+        if roi is not None and state.get("worker") is not None:
+            _start_autofocus(roi)
+
     autofocus_button = QPushButton("Stop Autofocus")
     autofocus_button.setToolTip("Start/stop autofocus control without closing the viewer")
     autofocus_button.clicked.connect(_toggle_autofocus)
@@ -330,6 +541,15 @@ def launch_autofocus_viewer(
     )
     calibrate_button.clicked.connect(_trigger_calibration)
 
+    stored_combo = None
+    if calibration_registry is not None:
+        stored_combo = QComboBox()
+        stored_combo.setToolTip(f"Calibrations stored in {calibration_registry.root}")
+        use_stored_button = QPushButton("Use Stored Calibration")
+        use_stored_button.setToolTip("Switch the running lock to the selected calibration without refitting")
+        use_stored_button.clicked.connect(_use_stored_calibration)
+        _reload_stored_calibrations()
+
     control_widget = QWidget()
     control_layout = QVBoxLayout(control_widget)
     control_layout.setContentsMargins(8, 8, 8, 8)
@@ -339,6 +559,10 @@ def launch_autofocus_viewer(
     control_layout.addWidget(step_label)
     control_layout.addWidget(step_spin_nm)
     control_layout.addWidget(calibrate_button)
+    if stored_combo is not None:
+        control_layout.addWidget(QLabel("Stored calibrations"))
+        control_layout.addWidget(stored_combo)
+        control_layout.addWidget(use_stored_button)
     viewer.window.add_dock_widget(control_widget, area="right", name="Autofocus Controls")
 
     @viewer.bind_key("c")
@@ -353,17 +577,45 @@ def launch_autofocus_viewer(
 
     timer = QTimer()
 
+    @tracing.traced("viewer.refresh", "viewer")
     def _refresh() -> None:
         autofocus_button.setText("Stop Autofocus" if state.get("autofocus_enabled", True) else "Start Autofocus")
         calibrate_button.setText("Stop Calibration Sweep" if state.get("calibration_busy") else "Run Calibration Sweep")
-
-        try:
-            frame = camera.get_frame()
-            image_layer.data = np.asarray(frame.image)
-        except Exception as exc:
-            status_text.text = f"Live frame error: {exc}"
+        if stored_combo is not None and state.pop("registry_changed", False):
+            _reload_stored_calibrations()
+
+        frame = display_frames.poll()
+        prepared = display.prepare(frame) if frame is not None else None
+        if prepared is not None:
+            data, (y0, x0), step = prepared
+            if image_layer.data is data:
+                # Same buffer refilled in place: redraw without re-binding data.
+                image_layer.refresh()
+            else:
+                image_layer.data = data
+            image_layer.translate = (y0, x0)
+            image_layer.scale = (step, step)
+        elif frame is None and broadcaster.last_error is not None and broadcaster.frames_published == 0:
+            status_text.text = f"Live frame error: {broadcaster.last_error}"
             return
 
+        controller = state.get("controller")
+        if controller is not None and state.get("worker") is not None and controller.roi != state.get("last_roi"):
+            # ROI tracking moved the ROI: redraw it without restarting the loop.
+            roi = controller.roi
+            state["last_roi"] = state["tracked_roi"] = roi
+            roi_layer.data = [
+                np.array(
+                    [
+                        [roi.y, roi.x],
+                        [roi.y, roi.x + roi.width],
+                        [roi.y + roi.height, roi.x + roi.width],
+                        [roi.y + roi.height, roi.x],
+                    ],
+                    dtype=float,
+                )
+            ]
+
         current_z = None
         try:
             current_z = float(stage.get_z_um())
@@ -399,15 +651,35 @@ def launch_autofocus_viewer(
     timer.timeout.connect(_refresh)
     timer.start(max(1, int(interval_ms)))
 
+    @viewer.bind_key("z")
+    def _toggle_zoom(_viewer_ref):  # noqa: ARG001
+        roi = state.get("last_roi")
+        if display.zoom_roi is not None or roi is None:
+            display.zoom_roi = None
+            return
+        # Show the ROI with one ROI-size of context on each side.
+        display.zoom_roi = Roi(
+            x=max(0, roi.x - roi.width),
+            y=max(0, roi.y - roi.height),
+            width=3 * roi.width,
+            height=3 * roi.height,
+        )
+
     @viewer.bind_key("Escape")
     def _quit(viewer_ref):  # noqa: ARG001
         _stop_worker()
         viewer_ref.close()
 
+    telemetry_timer = _add_telemetry_dock(
+        viewer, telemetry, window=telemetry_window, interval_ms=int(1000.0 / max(1e-3, telemetry_hz))
+    )
+
     viewer.window._orca_focus_timer = timer  # type: ignore[attr-defined]
+    viewer.window._orca_focus_telemetry_timer = telemetry_timer  # type: ignore[attr-defined]
     viewer.window._orca_focus_roi_timer = roi_apply_timer  # type: ignore[attr-defined]
     napari.run()
     _stop_worker()
+    broadcaster.stop()
 
 
 def launch_napari_viewer(camera: CameraInterface, interval_ms: int = 20) -> None:
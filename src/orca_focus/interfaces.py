@@ -13,6 +13,7 @@ class CameraFrame:
 
     image: Image2D
     timestamp_s: float
+    frame_index: int | None = None
 
 
 class CameraInterface(Protocol):
@@ -29,10 +30,21 @@ class CameraInterface(Protocol):
 
 
 class StageInterface(Protocol):
-    """Interface for an absolute Z stage controller."""
+    """Interface for an absolute Z stage controller.
+
+    Stages may additionally implement `move_and_read_z_um` (see
+    `MonitoringStageInterface`); the autofocus loop uses it when present.
+    """
 
     def get_z_um(self) -> float:
         """Read current stage Z in microns."""
 
     def move_z_um(self, target_z_um: float) -> None:
         """Command stage to a new absolute Z position in microns."""
+
+
+class MonitoringStageInterface(StageInterface, Protocol):
+    """Stage that can command a move and read back position in one call."""
+
+    def move_and_read_z_um(self, target_z_um: float) -> float:
+        """Command a new absolute Z and return the Z measured at command time."""
@@ -0,0 +1,323 @@
+"""Run the autofocus controller in a child process.
+
+GUI work (napari, Qt, matplotlib) and garbage collection in the main
+process hold the GIL and show up as control-loop jitter. `IsolatedAutofocus`
+moves `AstigmaticAutofocusController` into its own process, where it builds
+its camera and stage from a picklable `hardware_factory` (device handles do
+not survive a process boundary) and paces itself at `loop_hz`.
+
+Two shared-memory blocks connect the processes; neither side ever waits on
+the other:
+
+- control block (parent -> child): ROI, gains, loop rate, enable and stop
+  flags, published under a sequence counter (seqlock). The child applies a
+  change at the start of its next step.
+- sample ring (child -> parent): an `orca_focus.sample_ring.SampleRing`,
+  one fixed-size record per step plus a write counter. The parent copies
+  new records out and discards any that were overwritten while it was
+  reading.
+
+A small status block reports child state, whether the requested
+scheduling priority was applied, and the last error.
+"""
+
+from __future__ import annotations
+
+import dataclasses
+import multiprocessing
+import os
+import struct
+import time
+from multiprocessing import shared_memory
+from typing import Any, Callable
+
+from .autofocus import AstigmaticAutofocusController, AutofocusConfig
+from .calibration import FocusCalibration
+from .focus_metric import Roi
+from .interfaces import CameraInterface, StageInterface
+from .sample_ring import RingSample, SampleRing, sample_record
+
+
+# seq, stop, enabled, roi x/y/w/h, kp, ki, max_step_um, loop_hz
+_CONTROL = struct.Struct("<Q2i4i4d")
+# status, priority_applied, n_errors, error message
+_STATUS = struct.Struct("<3i256s")
+
+STATUS_STARTING, STATUS_RUNNING, STATUS_STOPPED, STATUS_FAILED = range(4)
+
+
+# The sample type predates `orca_focus.sample_ring`; kept under its old name.
+IsolatedSample = RingSample
+
+
+class _ControlBlock:
+    def __init__(self, buf: memoryview) -> None:
+        self._buf = buf
+
+    def write(self, *, stop: bool, enabled: bool, roi: Roi, kp: float, ki: float, max_step_um: float, loop_hz: float) -> None:
+        seq = _CONTROL.unpack_from(self._buf)[0]
+        struct.pack_into("<Q", self._buf, 0, seq + 1)  # odd: write in progress
+        _CONTROL.pack_into(
+            self._buf, 0, seq + 1, int(stop), int(enabled), roi.x, roi.y, roi.width, roi.height,
+            kp, ki, max_step_um, loop_hz,
+        )
+        struct.pack_into("<Q", self._buf, 0, seq + 2)
+
+    def read(self) -> tuple[Any, ...] | None:
+        """Consistent snapshot, or None if a write is in progress."""
+        values = _CONTROL.unpack_from(self._buf)
+        if values[0] % 2 or struct.unpack_from("<Q", self._buf, 0)[0] != values[0]:
+            return None
+        return values
+
+
+def _apply_priority(priority: int | None) -> bool:
+    if priority is None:
+        return False
+    try:
+        os.setpriority(os.PRIO_PROCESS, 0, int(priority))
+    except (AttributeError, OSError):
+        # Raising priority (negative niceness) needs privileges; run anyway.
+        return False
+    return True
+
+
+def _child_main(
+    control_name: str,
+    status_name: str,
+    ring_name: str,
+    ring_capacity: int,
+    hardware_factory: Callable[[], tuple[CameraInterface, StageInterface]],
+    config: AutofocusConfig,
+    calibration: FocusCalibration,
+    priority: int | None,
+) -> None:
+    control_shm = shared_memory.SharedMemory(name=control_name)
+    status_shm = shared_memory.SharedMemory(name=status_name)
+    ring_shm = shared_memory.SharedMemory(name=ring_name)
+    control = _ControlBlock(control_shm.buf)
+    ring = SampleRing(ring_shm.buf, ring_capacity)
+    n_errors = 0
+
+    def _status(state: int, message: str = "") -> None:
+        _STATUS.pack_into(status_shm.buf, 0, state, int(priority_applied), n_errors, message.encode()[:255])
+
+    priority_applied = _apply_priority(priority)
+    camera = None
+    try:
+        camera, stage = hardware_factory()
+        camera.start()
+        controller = AstigmaticAutofocusController(camera=camera, stage=stage, config=config, calibration=calibration)
+        applied_seq = -1
+        enabled = True
+        _status(STATUS_RUNNING)
+        next_t = time.monotonic()
+        while True:
+            snap = control.read()
+            if snap is not None and snap[0] != applied_seq:
+                applied_seq = snap[0]
+                _seq, stop, enabled_flag, x, y, w, h, kp, ki, max_step_um, loop_hz = snap
+                if stop:
+                    break
+                enabled = bool(enabled_flag)
+                new_roi = Roi(x=x, y=y, width=w, height=h)
+                new_config = dataclasses.replace(
+                    config, roi=new_roi, kp=kp, ki=ki, max_step_um=max_step_um, loop_hz=loop_hz
+                )
+                if new_config != config:
+                    # Same ROI keeps the integrator; a new ROI is a new target.
+                    integral = controller._integral_um if new_roi == config.roi else 0.0
+                    config = new_config
+                    controller = AstigmaticAutofocusController(
+                        camera=camera,
+                        stage=stage,
+                        config=config,
+                        calibration=calibration,
+                        initial_integral_um=integral,
+                    )
+            period = 1.0 / controller.loop_hz
+            t0 = time.monotonic()
+            if enabled:
+                try:
+                    s = controller.run_step(dt_s=period)
+                except Exception as exc:  # keep the loop alive; report the latest error
+                    n_errors += 1
+                    _status(STATUS_RUNNING, f"{type(exc).__name__}: {exc}")
+                else:
+                    ring.append(sample_record(s, t0, time.monotonic() - t0))
+            next_t += period
+            delay = next_t - time.monotonic()
+            if delay > 0:
+                time.sleep(delay)
+            else:
+                next_t = time.monotonic()
+        _status(STATUS_STOPPED)
+    except Exception as exc:
+        _status(STATUS_FAILED, f"{type(exc).__name__}: {exc}")
+    finally:
+        if camera is not None:
+            try:
+                camera.stop()
+            except Exception:
+                pass
+        for shm in (control_shm, status_shm, ring_shm):
+            shm.close()
+
+
+class IsolatedAutofocus:
+    """Parent-side handle for an autofocus loop running in a child process.
+
+    `hardware_factory` runs in the child and must be picklable (a module-level
+    function or `functools.partial` of one). `priority` is a niceness passed
+    to `os.setpriority` in the child; negative values usually need elevated
+    privileges and are skipped (see `priority_applied`) when refused.
+    """
+
+    def __init__(
+        self,
+        hardware_factory: Callable[[], tuple[CameraInterface, StageInterface]],
+        *,
+        config: AutofocusConfig,
+        calibration: FocusCalibration,
+        ring_capacity: int = 4096,
+        priority: int | None = None,
+        start_method: str = "spawn",
+    ) -> None:
+        if ring_capacity < 2:
+            raise ValueError("ring_capacity must be >= 2")
+        self._factory = hardware_factory
+        self._config = config
+        self._calibration = calibration
+        self._ring_capacity = int(ring_capacity)
+        self._priority = priority
+        self._ctx = multiprocessing.get_context(start_method)
+        self._process: Any = None
+        self._shms: list[shared_memory.SharedMemory] = []
+        self._control: _ControlBlock | None = None
+        self._ring: SampleRing | None = None
+        self._status_buf: memoryview | None = None
+        self._read_pos = 0
+        self._enabled = True
+        self.samples_lost = 0
+
+    @property
+    def config(self) -> AutofocusConfig:
+        return self._config
+
+    def start(self, timeout_s: float = 10.0) -> None:
+        if self._process is not None:
+            return
+        control = shared_memory.SharedMemory(create=True, size=_CONTROL.size)
+        status = shared_memory.SharedMemory(create=True, size=_STATUS.size)
+        ring = shared_memory.SharedMemory(create=True, size=SampleRing.nbytes(self._ring_capacity))
+        self._shms = [control, status, ring]
+        for shm in self._shms:
+            shm.buf[:] = bytes(len(shm.buf))
+        self._control = _ControlBlock(control.buf)
+        self._ring = SampleRing(ring.buf, self._ring_capacity)
+        self._status_buf = status.buf
+        self._publish(stop=False)
+        self._process = self._ctx.Process(
+            target=_child_main,
+            args=(
+                control.name,
+                status.name,
+                ring.name,
+                self._ring_capacity,
+                self._factory,
+                self._config,
+                self._calibration,
+                self._priority,
+            ),
+            daemon=True,
+        )
+        self._process.start()
+        deadline = time.monotonic() + timeout_s
+        while self.status()[0] == STATUS_STARTING:
+            if not self._process.is_alive() or time.monotonic() > deadline:
+                self.stop()
+                raise RuntimeError("Isolated autofocus process failed to start")
+            time.sleep(0.005)
+        state, _prio, _n, message = self.status()
+        if state == STATUS_FAILED:
+            self.stop()
+            raise RuntimeError(f"Isolated autofocus process failed: {message}")
+
+    def status(self) -> tuple[int, bool, int, str]:
+        """(state, priority_applied, n_errors, last_error) reported by the child."""
+        if self._status_buf is None:
+            return STATUS_STOPPED, False, 0, ""
+        state, prio, n_errors, raw = _STATUS.unpack_from(self._status_buf)
+        return state, bool(prio), n_errors, raw.split(b"\0", 1)[0].decode(errors="replace")
+
+    @property
+    def priority_applied(self) -> bool:
+        return self.status()[1]
+
+    def update(
+        self,
+        *,
+        roi: Roi | None = None,
+        kp: float | None = None,
+        ki: float | None = None,
+        max_step_um: float | None = None,
+        loop_hz: float | None = None,
+        enabled: bool | None = None,
+    ) -> None:
+        """Publish new settings; the child picks them up on its next step."""
+        changes = {
+            k: v
+            for k, v in (("roi", roi), ("kp", kp), ("ki", ki), ("max_step_um", max_step_um), ("loop_hz", loop_hz))
+            if v is not None
+        }
+        self._config = dataclasses.replace(self._config, **changes)
+        if enabled is not None:
+            self._enabled = bool(enabled)
+        self._publish(stop=False)
+
+    def _publish(self, *, stop: bool) -> None:
+        if self._control is None:
+            return
+        c = self._config
+        self._control.write(
+            stop=stop,
+            enabled=self._enabled,
+            roi=c.roi,
+            kp=c.kp,
+            ki=c.ki,
+            max_step_um=c.max_step_um,
+            loop_hz=c.loop_hz,
+        )
+
+    def read_samples(self) -> list[IsolatedSample]:
+        """Samples published since the previous call (oldest first)."""
+        if self._ring is None:
+            return []
+        records, end = self._ring.read_since(self._read_pos)
+        expected = end - self._read_pos
+        self.samples_lost += expected - len(records)
+        self._read_pos = end
+        return [IsolatedSample.from_record(r) for r in records]
+
+    def stop(self, timeout_s: float = 5.0) -> None:
+        if self._process is not None:
+            self._publish(stop=True)
+            self._process.join(timeout=timeout_s)
+            if self._process.is_alive():
+                self._process.terminate()
+                self._process.join(timeout=1.0)
+            self._process = None
+        self._control = None
+        self._ring = None
+        self._status_buf = None
+        for shm in self._shms:
+            shm.close()
+            shm.unlink()
+        self._shms = []
+
+    def __enter__(self) -> "IsolatedAutofocus":
+        self.start()
+        return self
+
+    def __exit__(self, _exc_type, _exc, _tb) -> None:
+        self.stop()
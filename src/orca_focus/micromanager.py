@@ -6,11 +6,13 @@ Micro-Manager GUI) and optionally controls the Z stage through MMCore.
 
 from __future__ import annotations
 
+import collections
 import sys
 import threading
 import time
-from typing import Any
+from typing import Any, Callable
 
+from . import tracing
 from .dcam import _to_image_2d
 from .interfaces import Image2D, StageInterface
 
@@ -30,90 +32,270 @@ def _call_core(core: Any, names: tuple[str, ...], *args: Any) -> Any:
     return fn(*args)
 
 
+def _bind_core(core: Any, *names: str) -> Callable[..., Any]:
+    """Resolve a core method once; missing methods raise when called, as `_call_core` does.
+
+    Every `getattr` on a pycromanager `Core` goes through the bridge's Python
+    shadow object, so hot paths resolve their methods at construction time.
+    """
+    fn = _get_core_callable(core, *names)
+    if fn is not None:
+        return fn
+
+    def _missing(*_args: Any) -> Any:
+        raise AttributeError(f"Core method not found (tried: {', '.join(names)})")
+
+    return _missing
+
+
 class MicroManagerFrameSource:
     """Frame source that reads from Micro-Manager's live circular buffer.
 
-    This does NOT control the camera — Micro-Manager handles acquisition,
-    exposure, ROI cropping, etc. We just grab the latest frame.
+    In the default `mode="live"` this does NOT control the camera —
+    Micro-Manager handles acquisition, exposure, ROI cropping, etc. We just
+    grab the latest frame and use `getLastImageTimeStamp` plus frame identity
+    to detect stale reads.
+
+    `mode="drain"` consumes the sequence buffer instead: every call pops all
+    frames waiting (`getRemainingImageCount`/`popNextTaggedImage`), returns
+    the newest as `(image, timestamp_s, frame_index)` and, when `on_frames` is
+    given, hands every popped frame to it in batches of up to `max_batch`.
+    No frame is skipped silently: gaps in `ImageNumber` count as
+    `frames_lost` and rising edges of `isBufferOverflowed` as `overflows`.
+    Draining takes frames away from the MM live window, so `start()` starts a
+    continuous sequence acquisition if none is running (and `stop()` stops
+    only what it started).
+
+    Live reads cost one `getLastImageTimeStamp` round trip per stale step and
+    one more `getLastTaggedImage` per new frame. The image is only fetched to
+    confirm a duplicate until the timestamp token has been seen to advance;
+    backends with a stuck token keep that identity check. With
+    `combined_read=True` every step is a single `getLastTaggedImage` call and
+    staleness comes from its tags, trading a pixel transfer per step for one
+    fewer bridge round trip.
     """
 
-    def __init__(self, core: Any, *, allow_snap_fallback: bool = False) -> None:
+    def __init__(
+        self,
+        core: Any,
+        *,
+        allow_snap_fallback: bool = False,
+        mode: str = "live",
+        on_frames: Callable[[list[tuple[Image2D, float, int]]], None] | None = None,
+        max_batch: int = 64,
+        first_frame_timeout_s: float = 1.0,
+        combined_read: bool = False,
+    ) -> None:
+        if mode not in ("live", "drain"):
+            raise ValueError("mode must be 'live' or 'drain'")
+        if max_batch < 1:
+            raise ValueError("max_batch must be >= 1")
         self._core = core
         self._allow_snap_fallback = allow_snap_fallback
+        self._mode = mode
+        self._on_frames = on_frames
+        self._max_batch = int(max_batch)
+        self._first_frame_timeout_s = float(first_frame_timeout_s)
         self._last_image: Image2D | None = None
         self._last_ts: float = 0.0
         self._last_frame_token: int | float | str | None = None
         self._last_frame_identity: int | float | str | None = None
+        self._last_frame_index: int | None = None
         self._lock = threading.Lock()
+        self._combined_read = combined_read
+        self._token_trusted = False
+        self._token_fn = None if combined_read else _get_core_callable(
+            core, "getLastImageTimeStamp", "get_last_image_time_stamp"
+        )
+        self._last_image_fns = tuple(
+            fn
+            for fn in (
+                _get_core_callable(core, "getLastTaggedImage", "get_last_tagged_image"),
+                _get_core_callable(core, "getLastImage", "get_last_image"),
+            )
+            if fn is not None
+        )
+        self._remaining_fn = _bind_core(core, "getRemainingImageCount", "get_remaining_image_count")
+        self._pop_fn = _bind_core(core, "popNextTaggedImage", "pop_next_tagged_image")
+        self._overflowed_fn = _get_core_callable(core, "isBufferOverflowed", "is_buffer_overflowed")
+        self._started_sequence = False
+        self._was_overflowed = False
+        self.frames_popped = 0
+        self.frames_lost = 0
+        self.overflows = 0
 
     @property
     def core(self) -> Any:
         return self._core
 
+    @property
+    def mode(self) -> str:
+        return self._mode
+
     def start(self) -> None:
-        # No-op: Micro-Manager controls acquisition
-        pass
+        # Live mode is a no-op: Micro-Manager controls acquisition.
+        if self._mode != "drain":
+            return
+        running = _get_core_callable(self._core, "isSequenceRunning", "is_sequence_running")
+        if running is not None and not running():
+            _call_core(
+                self._core,
+                ("startContinuousSequenceAcquisition", "start_continuous_sequence_acquisition"),
+                0.0,
+            )
+            self._started_sequence = True
 
     def stop(self) -> None:
-        # No-op: Micro-Manager controls acquisition
-        pass
-
-    def __call__(self) -> tuple[Image2D, float]:
-        with self._lock:
-            core = self._core
-            token = _get_frame_token(core)
-
-            # Fast path: if token is unchanged, verify identity before deciding stale.
-            if self._last_image is not None and token is not None and token == self._last_frame_token:
-                probe_frame = _try_get_last_image(core)
-                if probe_frame is None:
-                    return self._last_image, self._last_ts
-                probe_identity = _frame_identity(probe_frame)
-                if probe_identity is None or probe_identity == self._last_frame_identity:
-                    return self._last_image, self._last_ts
-                frame = probe_frame
-            else:
-                frame = _try_get_last_image(core)
-
-            if frame is None:
-                if self._last_image is not None:
-                    return self._last_image, self._last_ts
-                if not self._allow_snap_fallback:
-                    raise RuntimeError(
-                        "Micro-Manager sequence/live mode is not running. Enable Live mode in "
-                        "Micro-Manager or construct the frame source with allow_snap_fallback=True."
-                    )
-                _call_core(core, ("snapImage", "snap_image"))
-                frame = _call_core(core, ("getImage", "get_image"))
+        if self._started_sequence:
+            _call_core(self._core, ("stopSequenceAcquisition", "stop_sequence_acquisition"))
+            self._started_sequence = False
+
+    @tracing.traced("mm.read_frame", "acquisition")
+    def __call__(self) -> tuple[Image2D, float] | tuple[Image2D, float, int]:
+        if self._mode == "drain":
+            return self._drain()
+        # Only the cached-state bookkeeping is locked; core calls and pixel
+        # handling run outside so a slow bridge call never blocks readers of
+        # the last frame.
+        with tracing.traced_lock(self._lock, "mm.frame_lock"):
+            last_image = self._last_image
+            last_ts = self._last_ts
+            last_token = self._last_frame_token
+            last_identity = self._last_frame_identity
+
+        core = self._core
+        token = _read_token(self._token_fn)
+
+        if token is not None and last_token is not None and token != last_token:
+            self._token_trusted = True
+
+        if last_image is not None and token is not None and token == last_token:
+            if self._token_trusted:
+                return last_image, last_ts
+            # Token not yet seen to advance: verify identity before deciding stale.
+            probe_frame = _try_get_last_image(self._last_image_fns)
+            if probe_frame is None:
+                return last_image, last_ts
+            probe_identity = _frame_identity(probe_frame)
+            if probe_identity is None or probe_identity == last_identity:
+                return last_image, last_ts
+            frame = probe_frame
+        else:
+            frame = _try_get_last_image(self._last_image_fns)
+            if frame is not None and self._combined_read and last_image is not None:
+                identity = _frame_identity(frame)
+                if identity is not None and identity == last_identity:
+                    return last_image, last_ts
+
+        if frame is None:
+            if last_image is not None:
+                return last_image, last_ts
+            if not self._allow_snap_fallback:
+                raise RuntimeError(
+                    "Micro-Manager sequence/live mode is not running. Enable Live mode in "
+                    "Micro-Manager or construct the frame source with allow_snap_fallback=True."
+                )
+            _call_core(core, ("snapImage", "snap_image"))
+            frame = _call_core(core, ("getImage", "get_image"))
+            ts_for_sample = time.monotonic()
+            token = None
+            frame_identity = None
+        else:
+            ts_for_sample = _extract_frame_timestamp_s(frame)
+            if ts_for_sample is None:
                 ts_for_sample = time.monotonic()
-                token = None
-                frame_identity = None
-            else:
-                ts_for_sample = _extract_frame_timestamp_s(frame)
-                if ts_for_sample is None:
-                    ts_for_sample = time.monotonic()
-                frame_identity = _frame_identity(frame)
-
-        payload = _extract_image_payload(frame)
-        payload = _reshape_payload_if_needed(payload, frame)
-        image = _to_image_2d(payload)
-
-        with self._lock:
+            frame_identity = _frame_identity(frame)
+
+        image = _frame_to_image(frame, core)
+
+        with tracing.traced_lock(self._lock, "mm.frame_lock"):
             self._last_image = image
             self._last_ts = ts_for_sample
             self._last_frame_token = token
             self._last_frame_identity = frame_identity
-            return image, ts_for_sample
+        return image, ts_for_sample
+
+
+    def _drain(self) -> tuple[Image2D, float, int]:
+        core = self._core
+        remaining = int(self._remaining_fn())
+        if remaining == 0:
+            with tracing.traced_lock(self._lock, "mm.frame_lock"):
+                if self._last_image is not None:
+                    return self._last_image, self._last_ts, self._last_frame_index
+            deadline = time.monotonic() + self._first_frame_timeout_s
+            while remaining == 0:
+                if time.monotonic() >= deadline:
+                    raise RuntimeError(
+                        "No frames in the Micro-Manager sequence buffer; is sequence acquisition running?"
+                    )
+                time.sleep(0.001)
+                remaining = int(self._remaining_fn())
+
+        if self._overflowed_fn is not None:
+            now_overflowed = bool(self._overflowed_fn())
+            if now_overflowed and not self._was_overflowed:
+                self.overflows += 1
+            self._was_overflowed = now_overflowed
+
+        batch: list[tuple[Image2D, float, int]] = []
+        newest: tuple[Image2D, float, int] | None = None
+        newest_frame: Any = None
+        last_index = self._last_frame_index
+        for _ in range(remaining):
+            frame = self._pop_fn()
+            self.frames_popped += 1
+            index = _frame_number(frame)
+            if index is None:
+                index = 0 if last_index is None else last_index + 1
+            elif last_index is not None and index > last_index + 1:
+                self.frames_lost += index - last_index - 1
+            last_index = index
+            newest_frame = frame
+            if self._on_frames is not None:
+                ts = _extract_frame_timestamp_s(frame)
+                newest = (_frame_to_image(frame, core), time.monotonic() if ts is None else ts, index)
+                batch.append(newest)
+                if len(batch) >= self._max_batch:
+                    self._on_frames(batch)
+                    batch = []
+        if batch:
+            self._on_frames(batch)
+
+        if newest is None:
+            # Only the frame the controller will see is converted.
+            ts = _extract_frame_timestamp_s(newest_frame)
+            newest = (_frame_to_image(newest_frame, core), time.monotonic() if ts is None else ts, last_index)
+
+        with tracing.traced_lock(self._lock, "mm.frame_lock"):
+            self._last_image, self._last_ts, self._last_frame_index = newest
+        return newest
 
 
 class MicroManagerStage(StageInterface):
-    """Z stage adapter that goes through Micro-Manager's device layer."""
+    """Z stage adapter that goes through Micro-Manager's device layer.
+
+    By default every move blocks in `waitForDevice` for the full settle time.
+    With `async_moves=True`, `move_z_um` issues `setPosition` and returns at
+    once so the control loop keeps processing frames while the piezo moves;
+    the previous move is checked with `deviceBusy` only when the next one is
+    issued (waiting only if it is still busy). `poll_settled()` does the same
+    check without blocking and `wait_until_settled()` blocks, for callers
+    that need a settled stage (calibration sweeps).
+
+    Settle times land in `settle_times_s`. They are measured up to the check
+    that first sees the device idle, so in async mode they are upper bounds
+    with the resolution of the caller's check rate.
+    """
 
     def __init__(
         self,
         core: Any,
         z_stage_name: str | None = None,
         wait_for_device: bool = True,
+        *,
+        async_moves: bool = False,
+        settle_history: int = 256,
     ) -> None:
         self._core = core
         self._wait_for_device = wait_for_device
@@ -121,25 +303,81 @@ class MicroManagerStage(StageInterface):
             self._z_name = z_stage_name
         else:
             self._z_name = str(_call_core(core, ("getFocusDevice", "get_focus_device")))
+        self._get_position = _bind_core(core, "getPosition", "get_position")
+        self._set_position = _bind_core(core, "setPosition", "set_position")
+        self._wait = _bind_core(core, "waitForDevice", "wait_for_device")
+        self._device_busy = _get_core_callable(core, "deviceBusy", "device_busy")
+        self._async_moves = async_moves
+        self._pending_since: float | None = None
+        self.settle_times_s: collections.deque[float] = collections.deque(maxlen=settle_history)
+        self.moves_waited = 0
 
-    def get_z_um(self) -> float:
-        return float(_call_core(self._core, ("getPosition", "get_position"), self._z_name))
+    @property
+    def async_moves(self) -> bool:
+        return self._async_moves
 
-    def move_z_um(self, target_z_um: float) -> None:
-        _call_core(self._core, ("setPosition", "set_position"), self._z_name, target_z_um)
-        if self._wait_for_device:
-            _call_core(self._core, ("waitForDevice", "wait_for_device"), self._z_name)
+    @property
+    def is_moving(self) -> bool:
+        """True while a move has been issued but not yet seen to settle."""
+        return self._pending_since is not None
 
+    @property
+    def last_settle_s(self) -> float | None:
+        return self.settle_times_s[-1] if self.settle_times_s else None
+
+    @tracing.traced("mm.get_position", "stage")
+    def get_z_um(self) -> float:
+        return float(self._get_position(self._z_name))
 
-def _get_frame_token(core: Any) -> int | float | str | None:
+    @tracing.traced("mm.set_position", "stage")
+    def move_z_um(self, target_z_um: float) -> None:
+        if not self._async_moves:
+            t0 = time.monotonic()
+            self._set_position(self._z_name, target_z_um)
+            if self._wait_for_device:
+                self._wait(self._z_name)
+                self.settle_times_s.append(time.monotonic() - t0)
+            return
+        if self._pending_since is not None and not self.poll_settled():
+            # Previous move still running: finish it before retargeting so
+            # device adapters that reject commands while busy stay happy.
+            self.moves_waited += 1
+            self.wait_until_settled()
+        self._set_position(self._z_name, target_z_um)
+        self._pending_since = time.monotonic()
+
+    def poll_settled(self) -> bool:
+        """Non-blocking settle check; records the settle time when it completes."""
+        if self._pending_since is None:
+            return True
+        if self._device_busy is None:
+            # No deviceBusy on this core: settle is only known by waiting.
+            return False
+        if self._device_busy(self._z_name):
+            return False
+        self._finish_move()
+        return True
+
+    @tracing.traced("mm.wait_for_device", "stage")
+    def wait_until_settled(self) -> None:
+        if self._pending_since is None:
+            return
+        self._wait(self._z_name)
+        self._finish_move()
+
+    def _finish_move(self) -> None:
+        self.settle_times_s.append(time.monotonic() - self._pending_since)
+        self._pending_since = None
+
+
+def _read_token(fn: Callable[[], Any] | None) -> int | float | str | None:
     """Return acquisition token for duplicate detection in live mode.
 
     `getLastImageTimeStamp` is preferred because it is acquisition-coupled in
     most MM backends. If unavailable, token-based duplicate detection is
     disabled and callers always process newest frame.
     """
-    fn = _get_core_callable(core, "getLastImageTimeStamp", "get_last_image_time_stamp")
-    if callable(fn):
+    if fn is not None:
         try:
             return fn()
         except Exception:
@@ -204,6 +442,43 @@ def _frame_dimensions(frame: Any) -> tuple[int, int] | None:
     return None
 
 
+def _ndarray_view(payload: Any, frame: Any, core: Any = None) -> Any | None:
+    """Return *payload* as a 2D NumPy view, or None if it is not an ndarray.
+
+    pycromanager/pymmcore hand back `pix` as a NumPy array (flat or 2D), so
+    the frame can be used as-is: 1D buffers are reshaped with the width and
+    height metadata, which is a view for the contiguous arrays MM returns.
+    """
+    if type(payload).__module__ != "numpy" or not hasattr(payload, "ndim"):
+        return None
+    if payload.ndim == 2:
+        return payload if payload.size else None
+    if payload.ndim != 1:
+        return None
+    dims = _frame_dimensions(frame)
+    if dims is None and core is not None:
+        # Bare `getLastImage` buffers carry no tags; ask the core instead.
+        try:
+            dims = (
+                int(_call_core(core, ("getImageHeight", "get_image_height"))),
+                int(_call_core(core, ("getImageWidth", "get_image_width"))),
+            )
+        except Exception:
+            dims = None
+    if dims is None or payload.size != dims[0] * dims[1] or payload.size == 0:
+        return None
+    return payload.reshape(dims)
+
+
+def _frame_to_image(frame: Any, core: Any = None) -> Image2D:
+    payload = _extract_image_payload(frame)
+    arr = _ndarray_view(payload, frame, core)
+    if arr is not None:
+        return arr
+    payload = _reshape_payload_if_needed(payload, frame)
+    return _to_image_2d(payload)
+
+
 def _reshape_payload_if_needed(payload: Any, frame: Any) -> Any:
     if hasattr(payload, "tolist") and callable(payload.tolist):
         payload = payload.tolist()
@@ -255,6 +530,18 @@ def _extract_frame_timestamp_s(frame: Any) -> float | None:
     return None
 
 
+def _frame_number(frame: Any) -> int | None:
+    md = _frame_metadata_dict(frame)
+    if md:
+        for key in ("ImageNumber", "FrameIndex"):
+            if key in md:
+                try:
+                    return int(md[key])
+                except Exception:
+                    return None
+    return None
+
+
 def _frame_identity(frame: Any) -> int | float | str | None:
     """Best-effort per-frame identity to supplement stale token detection."""
     md = _frame_metadata_dict(frame)
@@ -267,15 +554,13 @@ def _frame_identity(frame: Any) -> int | float | str | None:
     return id(pix)
 
 
-def _try_get_last_image(core: Any) -> Any | None:
+def _try_get_last_image(fns: tuple[Callable[[], Any], ...]) -> Any | None:
     """Grab most recent frame from the circular buffer, or None if unavailable."""
-    for names in (("getLastTaggedImage", "get_last_tagged_image"), ("getLastImage", "get_last_image")):
-        fn = _get_core_callable(core, *names)
-        if fn is not None:
-            try:
-                return fn()
-            except Exception:
-                continue
+    for fn in fns:
+        try:
+            return fn()
+        except Exception:
+            continue
     return None
 
 
@@ -328,14 +613,22 @@ def create_micromanager_frame_source(
     core: Any | None = None,
     allow_snap_fallback: bool = False,
     allow_standalone_core: bool = False,
+    mode: str = "live",
+    combined_read: bool = False,
 ) -> MicroManagerFrameSource:
     """Connect to a running Micro-Manager instance."""
+
+    def _source(mm_core: Any) -> MicroManagerFrameSource:
+        return MicroManagerFrameSource(
+            core=mm_core, allow_snap_fallback=allow_snap_fallback, mode=mode, combined_read=combined_read
+        )
+
     if core is not None:
-        return MicroManagerFrameSource(core=core, allow_snap_fallback=allow_snap_fallback)
+        return _source(core)
 
     mm_core = _try_create_pycromanager_core(host=host, port=port)
     if mm_core is not None:
-        return MicroManagerFrameSource(core=mm_core, allow_snap_fallback=allow_snap_fallback)
+        return _source(mm_core)
 
     if allow_standalone_core:
         mm_core = _try_create_pymmcore_core()
@@ -345,7 +638,7 @@ def create_micromanager_frame_source(
                 "Micro-Manager GUI session and may require loading a hardware config.",
                 file=sys.stderr,
             )
-            return MicroManagerFrameSource(core=mm_core, allow_snap_fallback=allow_snap_fallback)
+            return _source(mm_core)
 
     raise RuntimeError(
         "Could not connect to Micro-Manager. Make sure one of these is true:\n"
@@ -1,21 +1,51 @@
 from __future__ import annotations
 
 import time
-from dataclasses import dataclass
+from dataclasses import dataclass, field
 from typing import Any, Callable
 
+from . import tracing
 from .dcam import _to_image_2d
 from .interfaces import Image2D
 
 
+_READ_METHOD_NAMES = (
+    "read_newest_image",
+    "read_oldest_image",
+    "get_latest_frame",
+    "read_multiple_images",
+    "snap",
+)
+
+
 @dataclass(slots=True)
 class PylablibFrameSource:
-    """Generic frame-source wrapper for pylablib camera objects."""
+    """Generic frame-source wrapper for pylablib camera objects.
+
+    Without an explicit `read_frame`, cameras that implement pylablib's
+    buffered acquisition API are read through it: `start()` sizes the frame
+    buffer with `setup_acquisition(nframes=...)`, and each call waits for a
+    frame newer than the last one read (`wait_for_frame`) and takes the
+    newest with `read_newest_image(return_info=True)`. The result is
+    `(image, timestamp_s, frame_index)` using the camera's frame index and,
+    when reported, its `timestamp_us`. NumPy frames are returned as-is.
+    If no new frame arrives within `wait_timeout_s`, the previous frame is
+    returned again so the controller treats the step as stale.
+
+    Other cameras fall back to the first available read method, resolved once.
+    """
 
     camera: Any
-    read_frame: Callable[[Any], Any]
+    read_frame: Callable[[Any], Any] | None = None
+    nframes: int = 100
+    wait_timeout_s: float = 1.0
+    _read: Callable[[], tuple[Any, Any]] | None = field(default=None, init=False, repr=False)
+    _last: tuple[Image2D, float] | tuple[Image2D, float, int] | None = field(default=None, init=False, repr=False)
 
     def start(self) -> None:
+        setup = getattr(self.camera, "setup_acquisition", None)
+        if self.read_frame is None and callable(setup):
+            setup(nframes=self.nframes)
         start = getattr(self.camera, "start_acquisition", None)
         if callable(start):
             start()
@@ -25,30 +55,107 @@ class PylablibFrameSource:
         if callable(stop):
             stop()
 
-    def __call__(self) -> tuple[Image2D, float]:
-        frame = self.read_frame(self.camera)
-        image = _to_image_2d(frame)
-        return image, time.time()
-
-
-def _default_read_frame(camera: Any) -> Any:
-    candidates = [
-        "read_newest_image",
-        "read_oldest_image",
-        "get_latest_frame",
-        "read_multiple_images",
-        "snap",
-    ]
-    for name in candidates:
+    def frames_status(self) -> dict[str, int] | None:
+        """pylablib `get_frames_status()` counters, or None if unsupported.
+
+        `skipped` counts frames overwritten in the buffer before they were
+        read, i.e. frames the camera delivered that the loop never saw.
+        """
+        fn = getattr(self.camera, "get_frames_status", None)
+        if not callable(fn):
+            return None
+        status = fn()
+        keys = ("acquired", "unread", "skipped", "buffer_size")
+        return {
+            key: int(getattr(status, key) if hasattr(status, key) else status[i]) for i, key in enumerate(keys)
+        }
+
+    @tracing.traced("pylablib.read_frame", "acquisition")
+    def __call__(self) -> tuple[Image2D, float] | tuple[Image2D, float, int]:
+        read = self._read
+        if read is None:
+            read = self._read = self._bind_read()
+        frame, info = read()
+        if frame is None:
+            if self._last is None:
+                raise RuntimeError("pylablib camera returned no frame; is acquisition running?")
+            return self._last
+
+        image = _as_image(frame)
+        if info is None:
+            self._last = (image, time.monotonic())
+            return self._last
+        index = _info_field(info, "frame_index", 0)
+        timestamp_us = _info_field(info, "timestamp_us", None)
+        ts = time.monotonic() if timestamp_us is None else float(timestamp_us) / 1e6
+        self._last = (image, ts, int(index))
+        return self._last
+
+    def _bind_read(self) -> Callable[[], tuple[Any, Any]]:
+        camera = self.camera
+        if self.read_frame is not None:
+            read_frame = self.read_frame
+            return lambda: (read_frame(camera), None)
+
+        wait = getattr(camera, "wait_for_frame", None)
+        newest = getattr(camera, "read_newest_image", None)
+        if callable(wait) and callable(newest):
+            timeout = self.wait_timeout_s
+
+            def _buffered() -> tuple[Any, Any]:
+                try:
+                    wait(since="lastread", nframes=1, timeout=timeout)
+                except Exception as exc:
+                    if not _is_timeout(exc):
+                        raise
+                    return None, None
+                result = newest(return_info=True)
+                if result is None:
+                    return None, None
+                return result
+
+            return _buffered
+
+        fn = _resolve_read_frame(camera)
+        return lambda: (fn(), None)
+
+
+def _is_timeout(exc: Exception) -> bool:
+    # pylablib raises backend-specific timeout classes (e.g. DCAMTimeoutError).
+    return isinstance(exc, TimeoutError) or "timeout" in type(exc).__name__.lower()
+
+
+def _info_field(info: Any, name: str, default: Any) -> Any:
+    value = getattr(info, name, None)
+    if value is not None:
+        return value
+    if name == "frame_index" and isinstance(info, (tuple, list)) and info:
+        return info[0]
+    return default
+
+
+def _as_image(frame: Any) -> Image2D:
+    if type(frame).__module__ == "numpy" and getattr(frame, "ndim", 0) == 2 and frame.size:
+        return frame
+    return _to_image_2d(frame)
+
+
+def _resolve_read_frame(camera: Any) -> Callable[[], Any]:
+    for name in _READ_METHOD_NAMES:
         fn = getattr(camera, name, None)
         if callable(fn):
-            value = fn()
-            if name == "read_multiple_images" and isinstance(value, list) and value:
-                return value[-1]
-            return value
+            if name == "read_multiple_images":
+                return lambda fn=fn: _newest_of(fn())
+            return fn
     raise AttributeError("Could not find a compatible pylablib frame-read method")
 
 
+def _newest_of(value: Any) -> Any:
+    if isinstance(value, list) and value:
+        return value[-1]
+    return value
+
+
 def create_pylablib_frame_source(camera_kind: str, **camera_kwargs: Any) -> PylablibFrameSource:
     """Create a frame source for either ORCA or Andor iXon via pylablib.
 
@@ -73,4 +180,4 @@ def create_pylablib_frame_source(camera_kind: str, **camera_kwargs: Any) -> Pyla
             " vendor drivers are installed on the microscope PC."
         ) from exc
 
-    return PylablibFrameSource(camera=camera, read_frame=_default_read_frame)
+    return PylablibFrameSource(camera=camera)
@@ -0,0 +1,271 @@
+"""Append-only recording of what the autofocus loop saw.
+
+`FrameRecorder` stores, per control step, the ROI crop (uint16), frame
+index, timestamp, error signal and stage command. The control thread only
+crops and enqueues (`record`, usable directly as the controller's
+`on_step`); a writer thread groups steps into chunks and writes each as two
+plain `.npy` files plus an entry in `index.json`:
+
+    <dir>/chunk_00000_pixels.npy   (n, h, w) uint16
+    <dir>/chunk_00000_meta.npy     (n,) structured, fields in META_FIELDS
+    <dir>/index.json               {"chunks": [{"name", "n", "roi"}, ...]}
+
+The index is rewritten atomically after each chunk, so a recording is
+readable (and memory-mappable with `np.load(..., mmap_mode="r")`) while it
+grows and survives a crash up to the last complete chunk. Chunks never mix
+ROIs; an ROI change (including a tracking move) starts a new chunk.
+
+The queue holds at most `max_queued` steps. When the writer falls behind,
+new steps are dropped (never waited for) and counted in `frames_dropped`.
+"""
+
+from __future__ import annotations
+
+import collections
+import json
+import os
+import threading
+import time
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Any
+
+from . import tracing
+from .autofocus import AutofocusSample
+from .focus_metric import Roi
+from .interfaces import CameraFrame
+
+
+META_FIELDS = (
+    ("frame_index", "<i8"),
+    ("timestamp_s", "<f8"),
+    ("error", "<f8"),
+    ("error_um", "<f8"),
+    ("stage_z_um", "<f8"),
+    ("commanded_z_um", "<f8"),
+    ("roi_total_intensity", "<f8"),
+    ("control_applied", "u1"),
+)
+
+
+def _numpy():
+    try:
+        import numpy as np
+    except Exception as exc:  # pragma: no cover
+        raise RuntimeError("numpy is required for recording. Install with: pip install numpy") from exc
+    return np
+
+
+@dataclass(slots=True)
+class RecorderStats:
+    frames_recorded: int
+    frames_written: int
+    frames_dropped: int
+    chunks_written: int
+    bytes_written: int
+    queue_depth: int
+    queue_high_water: int
+    write_s: float
+
+
+class FrameRecorder:
+    """Background chunked writer for ROI crops and per-step telemetry."""
+
+    def __init__(self, directory: str | Path, *, chunk_frames: int = 256, max_queued: int = 2048) -> None:
+        if chunk_frames < 1:
+            raise ValueError("chunk_frames must be >= 1")
+        if max_queued < chunk_frames:
+            raise ValueError("max_queued must be >= chunk_frames")
+        self._np = _numpy()
+        self._dtype = self._np.dtype(list(META_FIELDS))
+        self._dir = Path(directory)
+        self._dir.mkdir(parents=True, exist_ok=True)
+        self._chunk_frames = int(chunk_frames)
+        self._max_queued = int(max_queued)
+        self._queue: collections.deque[tuple[Any, tuple, Roi]] = collections.deque()
+        self._cond = threading.Condition()
+        self._closing = False
+        self._flush_requested = False
+        self._writing = False
+        self._index: list[dict[str, Any]] = []
+        self._last_key: object = None
+        self._frames_recorded = 0
+        self._frames_written = 0
+        self._frames_dropped = 0
+        self._bytes_written = 0
+        self._high_water = 0
+        self._write_s = 0.0
+        self.last_error: Exception | None = None
+        self._thread = threading.Thread(target=self._run, daemon=True)
+        self._thread.start()
+
+    @property
+    def directory(self) -> Path:
+        return self._dir
+
+    def stats(self) -> RecorderStats:
+        with self._cond:
+            depth = len(self._queue)
+        return RecorderStats(
+            frames_recorded=self._frames_recorded,
+            frames_written=self._frames_written,
+            frames_dropped=self._frames_dropped,
+            chunks_written=len(self._index),
+            bytes_written=self._bytes_written,
+            queue_depth=depth,
+            queue_high_water=self._high_water,
+            write_s=self._write_s,
+        )
+
+    def record(self, frame: CameraFrame, sample: AutofocusSample, roi: Roi) -> bool:
+        """Enqueue one step; returns False if it was a repeat or dropped. Never blocks on I/O."""
+        key = frame.frame_index if frame.frame_index is not None else frame.timestamp_s
+        if self._frames_recorded and key == self._last_key:
+            return False
+        self._last_key = key
+        np = self._np
+        image = frame.image
+        h = len(image)
+        w = len(image[0]) if h else 0
+        roi = roi.clamp((h, w))
+        if hasattr(image, "ndim"):
+            crop = image[roi.y : roi.y + roi.height, roi.x : roi.x + roi.width]
+        else:
+            crop = [row[roi.x : roi.x + roi.width] for row in image[roi.y : roi.y + roi.height]]
+        # Copy now: the frame buffer may be reused once this step returns.
+        if getattr(crop, "dtype", None) == np.uint16:
+            pixels = crop.copy()
+        else:
+            pixels = np.clip(np.rint(np.asarray(crop, dtype=np.float64)), 0, 65535).astype(np.uint16)
+        meta = (
+            -1 if frame.frame_index is None else int(frame.frame_index),
+            float(frame.timestamp_s),
+            float(sample.error),
+            float(sample.error_um),
+            float(sample.stage_z_um),
+            float(sample.commanded_z_um),
+            float(sample.roi_total_intensity),
+            1 if sample.control_applied else 0,
+        )
+        self._frames_recorded += 1
+        with self._cond:
+            if self._closing or len(self._queue) >= self._max_queued:
+                self._frames_dropped += 1
+                return False
+            self._queue.append((pixels, meta, roi))
+            depth = len(self._queue)
+            if depth > self._high_water:
+                self._high_water = depth
+            if depth >= self._chunk_frames:
+                self._cond.notify()
+        return True
+
+    def flush(self, timeout_s: float = 5.0) -> None:
+        """Ask the writer to write everything queued now (partial chunk included)."""
+        with self._cond:
+            self._flush_requested = True
+            self._cond.notify()
+            self._cond.wait_for(lambda: not self._queue and not self._writing, timeout=timeout_s)
+
+    def close(self, timeout_s: float = 5.0) -> None:
+        with self._cond:
+            self._closing = True
+            self._cond.notify()
+        self._thread.join(timeout=timeout_s)
+
+    def __enter__(self) -> "FrameRecorder":
+        return self
+
+    def __exit__(self, _exc_type, _exc, _tb) -> None:
+        self.close()
+
+    def _run(self) -> None:
+        while True:
+            with self._cond:
+                ready = self._cond.wait_for(
+                    lambda: self._closing or self._flush_requested or len(self._queue) >= self._chunk_frames,
+                    timeout=1.0,
+                )
+                if not ready:
+                    continue
+                if not self._queue:
+                    self._flush_requested = False
+                    self._cond.notify_all()
+                    if self._closing:
+                        return
+                    continue
+                batch = self._take_batch()
+                self._writing = True
+            try:
+                self._write_chunk(batch)
+            except Exception as exc:  # keep the loop alive; the error is reported
+                self.last_error = exc
+                failed = len(batch)
+            else:
+                failed = 0
+            with self._cond:
+                self._frames_dropped += failed
+                self._writing = False
+                self._cond.notify_all()
+
+    def _take_batch(self) -> list[tuple[Any, tuple, Roi]]:
+        first = self._queue.popleft()
+        batch = [first]
+        roi = first[2]
+        # One ROI per chunk: tracked ROIs move without changing crop shape.
+        while self._queue and len(batch) < self._chunk_frames and self._queue[0][2] == roi:
+            batch.append(self._queue.popleft())
+        return batch
+
+    @tracing.traced("recorder.write_chunk", "io")
+    def _write_chunk(self, batch: list[tuple[Any, tuple, Roi]]) -> None:
+        np = self._np
+        t0 = time.perf_counter()
+        name = f"chunk_{len(self._index):05d}"
+        pixels = np.stack([item[0] for item in batch])
+        meta = np.array([item[1] for item in batch], dtype=self._dtype)
+        np.save(self._dir / f"{name}_pixels.npy", pixels)
+        np.save(self._dir / f"{name}_meta.npy", meta)
+        roi = batch[-1][2]
+        self._index.append(
+            {"name": name, "n": len(batch), "roi": [roi.x, roi.y, roi.width, roi.height]}
+        )
+        tmp = self._dir / "index.json.tmp"
+        tmp.write_text(json.dumps({"version": 1, "chunks": self._index}, indent=1))
+        os.replace(tmp, self._dir / "index.json")
+        self._frames_written += len(batch)
+        self._bytes_written += pixels.nbytes + meta.nbytes
+        self._write_s += time.perf_counter() - t0
+
+
+class Recording:
+    """Read side of a `FrameRecorder` directory; pixel chunks are memory-mapped."""
+
+    def __init__(self, directory: str | Path) -> None:
+        self._np = _numpy()
+        self._dir = Path(directory)
+        index = json.loads((self._dir / "index.json").read_text())
+        self.chunks: list[dict[str, Any]] = index["chunks"]
+
+    def __len__(self) -> int:
+        return sum(int(c["n"]) for c in self.chunks)
+
+    def pixels(self, chunk: int) -> Any:
+        return self._np.load(self._dir / f"{self.chunks[chunk]['name']}_pixels.npy", mmap_mode="r")
+
+    def meta(self, chunk: int) -> Any:
+        return self._np.load(self._dir / f"{self.chunks[chunk]['name']}_meta.npy", mmap_mode="r")
+
+    def all_meta(self) -> Any:
+        """All per-step metadata concatenated in recording order."""
+        if not self.chunks:
+            return self._np.zeros(0, dtype=self._np.dtype(list(META_FIELDS)))
+        return self._np.concatenate([self.meta(i) for i in range(len(self.chunks))])
+
+    def iter_steps(self):
+        """Yield `(pixels_2d, meta_record)` for every recorded step."""
+        for i in range(len(self.chunks)):
+            pixels = self.pixels(i)
+            meta = self.meta(i)
+            for k in range(len(meta)):
+                yield pixels[k], meta[k]
@@ -0,0 +1,352 @@
+"""Persistent calibration registry keyed by optical setup.
+
+Each record holds the fitted model, its fit statistics and the raw sweep
+samples in a compact struct-packed file (`*.ofcal`). Two SHA-256 digests are
+stored: one over the packed samples, used to decide whether a sweep needs to
+be refitted, and one over the whole file, used to reject truncated or
+corrupted records. Loading a record never refits.
+"""
+
+from __future__ import annotations
+
+import hashlib
+import struct
+import time
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Callable
+
+from .calibration import (
+    CalibrationFitReport,
+    CalibrationSample,
+    FocusCalibration,
+    fit_linear_calibration_with_report,
+)
+from .zhuang import ZhuangFitReport, ZhuangFocusCalibration, fit_zhuang_calibration_with_report
+
+_MAGIC = b"OFCAL\x01"
+_MODEL_IDS = {"linear": 0, "zhuang": 1}
+_MODEL_NAMES = {v: k for k, v in _MODEL_IDS.items()}
+_SAMPLE = struct.Struct("<ddd")
+_DIGEST_LEN = 32
+
+
+@dataclass(frozen=True, slots=True)
+class CalibrationKey:
+    """Optical setup a calibration belongs to."""
+
+    objective: str = ""
+    camera: str = ""
+    roi_width: int = 0
+    roi_height: int = 0
+    cylinder_lens: str = ""
+
+    def slug(self) -> str:
+        text = "\x1f".join(
+            [self.objective, self.camera, str(self.roi_width), str(self.roi_height), self.cylinder_lens]
+        )
+        return hashlib.sha256(text.encode("utf-8")).hexdigest()[:16]
+
+
+@dataclass(slots=True)
+class CalibrationRecord:
+    key: CalibrationKey
+    model: str
+    calibration: FocusCalibration | ZhuangFocusCalibration
+    samples: list[CalibrationSample]
+    stats: dict[str, float] = field(default_factory=dict)
+    samples_digest: str = ""
+    created_s: float = 0.0
+
+    def runtime_calibration(self) -> FocusCalibration | ZhuangFocusCalibration:
+        """The calibration as the control loop uses it.
+
+        Linear fits keep their slope but target error 0, as calibrations fitted
+        at startup or in the viewer do; Zhuang models already do.
+        """
+        cal = self.calibration
+        if isinstance(cal, ZhuangFocusCalibration):
+            return cal
+        return FocusCalibration(error_at_focus=0.0, error_to_um=cal.error_to_um)
+
+
+def samples_digest(samples: list[CalibrationSample]) -> str:
+    """SHA-256 over the packed (z_um, error, weight) triplets."""
+
+    h = hashlib.sha256()
+    for s in samples:
+        h.update(_SAMPLE.pack(float(s.z_um), float(s.error), float(s.weight)))
+    return h.hexdigest()
+
+
+def _pack_str(text: str) -> bytes:
+    raw = text.encode("utf-8")
+    return struct.pack("<H", len(raw)) + raw
+
+
+class _Reader:
+    def __init__(self, data: bytes) -> None:
+        self._data = data
+        self._pos = 0
+
+    def unpack(self, fmt: str) -> tuple:
+        size = struct.calcsize(fmt)
+        if self._pos + size > len(self._data):
+            raise ValueError("Calibration record is truncated")
+        out = struct.unpack_from(fmt, self._data, self._pos)
+        self._pos += size
+        return out
+
+    def string(self) -> str:
+        (n,) = self.unpack("<H")
+        raw = self._data[self._pos : self._pos + n]
+        if len(raw) != n:
+            raise ValueError("Calibration record is truncated")
+        self._pos += n
+        return raw.decode("utf-8")
+
+    def raw(self, n: int) -> bytes:
+        out = self._data[self._pos : self._pos + n]
+        if len(out) != n:
+            raise ValueError("Calibration record is truncated")
+        self._pos += n
+        return out
+
+
+def _model_params(record: CalibrationRecord) -> list[float]:
+    cal = record.calibration
+    if isinstance(cal, ZhuangFocusCalibration):
+        return list(cal.params)
+    return [cal.error_at_focus, cal.error_to_um]
+
+
+def encode_record(record: CalibrationRecord) -> bytes:
+    if record.model not in _MODEL_IDS:
+        raise ValueError(f"Unknown calibration model: {record.model}")
+    key = record.key
+    params = _model_params(record)
+    digest = record.samples_digest or samples_digest(record.samples)
+
+    parts = [
+        _MAGIC,
+        struct.pack("<Bd", _MODEL_IDS[record.model], float(record.created_s)),
+        _pack_str(key.objective),
+        _pack_str(key.camera),
+        struct.pack("<II", int(key.roi_width), int(key.roi_height)),
+        _pack_str(key.cylinder_lens),
+        struct.pack(f"<H{len(params)}d", len(params), *params),
+        struct.pack("<H", len(record.stats)),
+    ]
+    for name, value in record.stats.items():
+        parts.append(_pack_str(name) + struct.pack("<d", float(value)))
+    parts.append(struct.pack("<I", len(record.samples)))
+    parts.extend(_SAMPLE.pack(float(s.z_um), float(s.error), float(s.weight)) for s in record.samples)
+    parts.append(bytes.fromhex(digest))
+    body = b"".join(parts)
+    return body + hashlib.sha256(body).digest()
+
+
+def decode_record(data: bytes) -> CalibrationRecord:
+    if len(data) < len(_MAGIC) + _DIGEST_LEN or not data.startswith(_MAGIC):
+        raise ValueError("Not a calibration record")
+    body, trailer = data[:-_DIGEST_LEN], data[-_DIGEST_LEN:]
+    if hashlib.sha256(body).digest() != trailer:
+        raise ValueError("Calibration record content hash mismatch")
+
+    r = _Reader(body)
+    r.raw(len(_MAGIC))
+    model_id, created_s = r.unpack("<Bd")
+    if model_id not in _MODEL_NAMES:
+        raise ValueError(f"Unknown calibration model id: {model_id}")
+    objective = r.string()
+    camera = r.string()
+    roi_width, roi_height = r.unpack("<II")
+    cylinder_lens = r.string()
+    (n_params,) = r.unpack("<H")
+    params = r.unpack(f"<{n_params}d")
+    (n_stats,) = r.unpack("<H")
+    stats: dict[str, float] = {}
+    for _ in range(n_stats):
+        name = r.string()
+        (stats[name],) = r.unpack("<d")
+    (n_samples,) = r.unpack("<I")
+    samples = [
+        CalibrationSample(z_um=z, error=e, weight=w)
+        for z, e, w in _SAMPLE.iter_unpack(r.raw(n_samples * _SAMPLE.size))
+    ]
+    digest = r.raw(_DIGEST_LEN).hex()
+
+    model = _MODEL_NAMES[model_id]
+    if model == "zhuang":
+        calibration: FocusCalibration | ZhuangFocusCalibration = ZhuangFocusCalibration(params=tuple(params))
+    else:
+        if n_params != 2:
+            raise ValueError("Linear calibration record needs 2 parameters")
+        calibration = FocusCalibration(error_at_focus=params[0], error_to_um=params[1])
+
+    return CalibrationRecord(
+        key=CalibrationKey(objective, camera, roi_width, roi_height, cylinder_lens),
+        model=model,
+        calibration=calibration,
+        samples=samples,
+        stats=stats,
+        samples_digest=digest,
+        created_s=created_s,
+    )
+
+
+def record_from_linear_report(
+    key: CalibrationKey,
+    samples: list[CalibrationSample],
+    report: CalibrationFitReport,
+) -> CalibrationRecord:
+    return CalibrationRecord(
+        key=key,
+        model="linear",
+        calibration=report.calibration,
+        samples=list(samples),
+        stats={
+            "r2": report.r2,
+            "rmse_um": report.rmse_um,
+            "intercept_um": report.intercept_um,
+            "n_samples": float(report.n_samples),
+            "n_inliers": float(report.n_inliers),
+        },
+        samples_digest=samples_digest(samples),
+        created_s=time.time(),
+    )
+
+
+def record_from_zhuang_report(
+    key: CalibrationKey,
+    samples: list[CalibrationSample],
+    report: ZhuangFitReport,
+) -> CalibrationRecord:
+    return CalibrationRecord(
+        key=key,
+        model="zhuang",
+        calibration=report.calibration,
+        samples=list(samples),
+        stats={
+            "r2": report.r2,
+            "rmse_error": report.rmse_error,
+            "n_samples": float(report.n_samples),
+            "z_reference_um": report.z_reference_um,
+        },
+        samples_digest=samples_digest(samples),
+        created_s=time.time(),
+    )
+
+
+def fit_record(
+    key: CalibrationKey,
+    samples: list[CalibrationSample],
+    *,
+    model: str = "linear",
+) -> CalibrationRecord:
+    """Fit *samples* with the requested model and wrap the result."""
+
+    if model == "zhuang":
+        return record_from_zhuang_report(key, samples, fit_zhuang_calibration_with_report(samples))
+    if model == "linear":
+        return record_from_linear_report(key, samples, fit_linear_calibration_with_report(samples, robust=True))
+    raise ValueError(f"Unknown calibration model: {model}")
+
+
+class CalibrationRegistry:
+    """Directory of calibration records, one file per (setup, model).
+
+    Records are cached in memory after first load, so `select` can switch the
+    active calibration at runtime without touching disk or refitting.
+    """
+
+    SUFFIX = ".ofcal"
+
+    def __init__(self, root: str | Path) -> None:
+        self._root = Path(root)
+        self._cache: dict[tuple[CalibrationKey, str], CalibrationRecord] = {}
+        self._active: CalibrationRecord | None = None
+
+    @property
+    def root(self) -> Path:
+        return self._root
+
+    @property
+    def active(self) -> CalibrationRecord | None:
+        return self._active
+
+    def path_for(self, key: CalibrationKey, model: str = "linear") -> Path:
+        return self._root / f"{key.slug()}-{model}{self.SUFFIX}"
+
+    def save(self, record: CalibrationRecord) -> Path:
+        path = self.path_for(record.key, record.model)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        tmp = path.with_suffix(path.suffix + ".tmp")
+        tmp.write_bytes(encode_record(record))
+        tmp.replace(path)
+        self._cache[(record.key, record.model)] = record
+        return path
+
+    def load(self, key: CalibrationKey, model: str = "linear") -> CalibrationRecord | None:
+        cached = self._cache.get((key, model))
+        if cached is not None:
+            return cached
+        path = self.path_for(key, model)
+        if not path.exists():
+            return None
+        record = decode_record(path.read_bytes())
+        self._cache[(key, model)] = record
+        return record
+
+    def records(self) -> list[CalibrationRecord]:
+        """Load (and cache) every readable record in the registry directory."""
+
+        out: list[CalibrationRecord] = []
+        if not self._root.exists():
+            return out
+        for path in sorted(self._root.glob(f"*{self.SUFFIX}")):
+            try:
+                record = decode_record(path.read_bytes())
+            except ValueError:
+                continue
+            self._cache.setdefault((record.key, record.model), record)
+            out.append(self._cache[(record.key, record.model)])
+        return out
+
+    def fit_or_load(
+        self,
+        key: CalibrationKey,
+        samples: list[CalibrationSample],
+        *,
+        model: str = "linear",
+        fit: Callable[..., CalibrationRecord] | None = None,
+    ) -> tuple[CalibrationRecord, bool]:
+        """Return the stored record when *samples* are unchanged, else refit.
+
+        *fit* replaces `fit_record` for the refit and is called with the same
+        arguments; it may raise to reject a sweep before anything is saved.
+        Returns `(record, refitted)`.
+        """
+
+        try:
+            stored = self.load(key, model)
+        except ValueError:
+            stored = None
+        if stored is not None and stored.samples_digest == samples_digest(samples):
+            return stored, False
+        record = (fit or fit_record)(key, samples, model=model)
+        self.save(record)
+        return record, True
+
+    def select(self, key: CalibrationKey, model: str = "linear") -> CalibrationRecord:
+        """Make a stored calibration active without refitting.
+
+        The viewer and `FocusServer.select_calibration` use this to swap the
+        running calibration; pass `record.runtime_calibration()` to the loop.
+        """
+
+        record = self.load(key, model)
+        if record is None:
+            raise KeyError(f"No {model} calibration stored for {key}")
+        self._active = record
+        return record
@@ -0,0 +1,126 @@
+"""Fixed-size per-step sample records and the lock-free ring that holds them.
+
+Each control step is packed into one `RECORD` (`RING_FIELDS`, all little-
+endian doubles). `SampleRing` lays records out in any writable buffer
+behind a single write counter: a shared-memory block between the
+`IsolatedAutofocus` child and its parent, or a plain bytearray between the
+`FocusServer` control thread and its subscriber threads. There is one
+writer; readers copy records out with `read_since` and never block it.
+The same record format is what `FocusServer` sends on the wire.
+"""
+
+from __future__ import annotations
+
+import struct
+from dataclasses import dataclass
+
+from .autofocus import AutofocusSample
+
+
+RING_FIELDS = (
+    "step_start_s",
+    "timestamp_s",
+    "error",
+    "error_um",
+    "stage_z_um",
+    "commanded_z_um",
+    "roi_total_intensity",
+    "control_applied",
+    "frame_index",
+    "loop_latency_s",
+    "loop_hz",
+)
+
+RECORD = struct.Struct("<" + "d" * len(RING_FIELDS))
+_HEADER = struct.Struct("<Q")
+
+
+@dataclass(frozen=True, slots=True)
+class RingSample:
+    """One control step as read back from a sample ring or stream."""
+
+    step_start_s: float
+    timestamp_s: float
+    error: float
+    error_um: float
+    stage_z_um: float
+    commanded_z_um: float
+    roi_total_intensity: float
+    control_applied: bool
+    frame_index: int | None
+    loop_latency_s: float
+    loop_hz: float
+
+    @classmethod
+    def from_record(cls, r: tuple[float, ...]) -> "RingSample":
+        return cls(
+            step_start_s=r[0],
+            timestamp_s=r[1],
+            error=r[2],
+            error_um=r[3],
+            stage_z_um=r[4],
+            commanded_z_um=r[5],
+            roi_total_intensity=r[6],
+            control_applied=r[7] != 0.0,
+            frame_index=None if r[8] < 0 else int(r[8]),
+            loop_latency_s=r[9],
+            loop_hz=r[10],
+        )
+
+
+def sample_record(sample: AutofocusSample, step_start_s: float, loop_latency_s: float) -> tuple[float, ...]:
+    """`sample` as a `RING_FIELDS` record."""
+    return (
+        step_start_s,
+        sample.timestamp_s,
+        sample.error,
+        sample.error_um,
+        sample.stage_z_um,
+        sample.commanded_z_um,
+        sample.roi_total_intensity,
+        1.0 if sample.control_applied else 0.0,
+        -1.0 if sample.frame_index is None else float(sample.frame_index),
+        loop_latency_s,
+        sample.loop_hz,
+    )
+
+
+class SampleRing:
+    """Single-writer ring of `RECORD`s in *buf* (at least `nbytes(capacity)` long)."""
+
+    def __init__(self, buf: memoryview, capacity: int) -> None:
+        self._buf = buf
+        self.capacity = capacity
+
+    @staticmethod
+    def nbytes(capacity: int) -> int:
+        return _HEADER.size + capacity * RECORD.size
+
+    def count(self) -> int:
+        return _HEADER.unpack_from(self._buf)[0]
+
+    def append(self, values: tuple[float, ...]) -> None:
+        count = self.count()
+        RECORD.pack_into(self._buf, _HEADER.size + (count % self.capacity) * RECORD.size, *values)
+        # Publish the record only once it is fully written.
+        _HEADER.pack_into(self._buf, 0, count + 1)
+
+    def read_since(self, start: int) -> tuple[list[tuple[float, ...]], int]:
+        """Records from index *start* on, and the count to resume from.
+
+        Records the writer may have overwritten are left out; callers count
+        `end - start - len(records)` as lost.
+        """
+        end = self.count()
+        start = max(start, end - self.capacity)
+        out = [
+            RECORD.unpack_from(self._buf, _HEADER.size + (i % self.capacity) * RECORD.size)
+            for i in range(start, end)
+        ]
+        # Records the writer lapped while we copied them are unreliable. The
+        # writer fills index `count` (the slot of `count - capacity`) before
+        # publishing it, so that record may be torn as well.
+        lapped = self.count() - self.capacity + 1 - start
+        if lapped > 0:
+            out = out[lapped:]
+        return out, end
@@ -0,0 +1,595 @@
+"""Headless focus-lock daemon with a local binary control protocol.
+
+`FocusServer` owns the camera, stage and `AutofocusWorker` and listens on a
+Unix domain socket (`unix:/path/to.sock`, created owner-only) or a
+loopback TCP port (`127.0.0.1:5557`). Clients use `FocusClient`. There is
+no authentication, which is why remote addresses are refused.
+
+Every message is `<I payload length><B type>` followed by the payload:
+
+=================  =====  ===========================================
+type               code   payload
+=================  =====  ===========================================
+START              1      -
+STOP               2      -
+SET_ROI            3      `<4i` x, y, width, height
+SET_CALIBRATION    4      `<B` kind, then `<2d` (linear: error_at_focus,
+                          error_to_um) or `<9d` (Zhuang params)
+STATUS             5      -
+SUBSCRIBE          6      -
+SHUTDOWN           7      -
+SELECT_CALIBRATION 8      `<B` kind, `<2I` ROI width, height, then
+                          objective, camera, cylinder lens (each
+                          `<H` length + UTF-8): a registry key
+OK                 0x80   -
+ERROR              0x81   UTF-8 message
+STATUS_REPLY       0x82   `_STATUS` fields, then UTF-8 last error
+SAMPLES            0x83   `<I` samples lost since the previous batch,
+                          then n x `RING_FIELDS` records (`<11d` each)
+=================  =====  ===========================================
+
+SELECT_CALIBRATION swaps in a calibration stored in the server's
+`CalibrationRegistry` without sending or refitting it.
+
+Each command gets exactly one OK/ERROR/STATUS_REPLY. SUBSCRIBE turns the
+connection into a one-way SAMPLES stream, so observers use their own
+connection.
+
+The control thread only packs each step into a preallocated
+`orca_focus.sample_ring.SampleRing`; it never touches a socket. Each
+subscriber has a sender thread that wakes every `publish_interval_s`,
+copies new records out of the ring and sends them as one SAMPLES message.
+A subscriber that falls more than the ring capacity behind loses the
+overwritten samples (reported in the next batch and summed in
+`SampleStream.samples_lost`) instead of slowing the loop or other clients.
+"""
+
+from __future__ import annotations
+
+import dataclasses
+import os
+import socket
+import socketserver
+import struct
+import threading
+import time
+from dataclasses import dataclass
+from typing import TYPE_CHECKING, Any
+
+from .autofocus import AstigmaticAutofocusController, AutofocusConfig, AutofocusSample, AutofocusWorker
+from .calibration import FocusCalibration
+from .focus_metric import Roi
+from .interfaces import CameraInterface, StageInterface
+from .registry import CalibrationKey
+from .sample_ring import RECORD, RingSample, SampleRing, sample_record
+from .zhuang import ZhuangFocusCalibration
+
+if TYPE_CHECKING:
+    from .registry import CalibrationRegistry
+
+DEFAULT_ADDRESS = "127.0.0.1:5557"
+
+MSG_START = 1
+MSG_STOP = 2
+MSG_SET_ROI = 3
+MSG_SET_CALIBRATION = 4
+MSG_STATUS = 5
+MSG_SUBSCRIBE = 6
+MSG_SHUTDOWN = 7
+MSG_SELECT_CALIBRATION = 8
+MSG_OK = 0x80
+MSG_ERROR = 0x81
+MSG_STATUS_REPLY = 0x82
+MSG_SAMPLES = 0x83
+
+CALIBRATION_LINEAR = 0
+CALIBRATION_ZHUANG = 1
+_MODEL_NAMES = {CALIBRATION_LINEAR: "linear", CALIBRATION_ZHUANG: "zhuang"}
+
+_HEADER = struct.Struct("<IB")
+_ROI = struct.Struct("<4i")
+_CAL_KIND = struct.Struct("<B")
+_LINEAR = struct.Struct("<2d")
+_ZHUANG = struct.Struct("<9d")
+_KEY_HEAD = struct.Struct("<B2I")
+_STR_LEN = struct.Struct("<H")
+# running, calibration kind, roi x/y/w/h, steps, subscribers
+_STATUS = struct.Struct("<2B4iQI")
+_LOST = struct.Struct("<I")
+_MAX_PAYLOAD = 1 << 24
+
+
+def parse_address(address: str) -> tuple[int, Any]:
+    """`(socket family, address)` for `unix:/path`, a `*.sock` path or `host:port`.
+
+    TCP is restricted to loopback hosts: the daemon moves a stage and has no
+    authentication.
+    """
+    if address.startswith("unix:"):
+        return socket.AF_UNIX, address[len("unix:") :]
+    if address.endswith(".sock") or address.startswith("/"):
+        return socket.AF_UNIX, address
+    host, sep, port = address.rpartition(":")
+    if not sep or not port.isdigit():
+        raise ValueError(f"Address must be 'unix:/path' or 'host:port', got {address!r}")
+    host = host.strip("[]") or "127.0.0.1"
+    if host not in ("127.0.0.1", "localhost", "::1"):
+        raise ValueError(f"Refusing to listen on non-loopback host {host!r}")
+    family = socket.AF_INET6 if ":" in host else socket.AF_INET
+    return family, (host, int(port))
+
+
+def _send(sock: socket.socket, kind: int, payload: bytes = b"") -> None:
+    sock.sendall(_HEADER.pack(len(payload), kind) + payload)
+
+
+def _recv_exact(sock: socket.socket, n: int) -> bytes | None:
+    buf = bytearray()
+    while len(buf) < n:
+        chunk = sock.recv(n - len(buf))
+        if not chunk:
+            return None
+        buf += chunk
+    return bytes(buf)
+
+
+def _recv(sock: socket.socket) -> tuple[int, bytes] | None:
+    header = _recv_exact(sock, _HEADER.size)
+    if header is None:
+        return None
+    length, kind = _HEADER.unpack(header)
+    if length > _MAX_PAYLOAD:
+        raise ValueError(f"Message payload too large ({length} bytes)")
+    payload = _recv_exact(sock, length) if length else b""
+    if payload is None:
+        return None
+    return kind, payload
+
+
+def encode_calibration(calibration: FocusCalibration | ZhuangFocusCalibration) -> bytes:
+    if isinstance(calibration, ZhuangFocusCalibration):
+        return _CAL_KIND.pack(CALIBRATION_ZHUANG) + _ZHUANG.pack(*calibration.params)
+    return _CAL_KIND.pack(CALIBRATION_LINEAR) + _LINEAR.pack(calibration.error_at_focus, calibration.error_to_um)
+
+
+def decode_calibration(payload: bytes) -> FocusCalibration | ZhuangFocusCalibration:
+    (kind,) = _CAL_KIND.unpack_from(payload)
+    body = payload[_CAL_KIND.size :]
+    if kind == CALIBRATION_LINEAR and len(body) == _LINEAR.size:
+        error_at_focus, error_to_um = _LINEAR.unpack(body)
+        return FocusCalibration(error_at_focus=error_at_focus, error_to_um=error_to_um)
+    if kind == CALIBRATION_ZHUANG and len(body) == _ZHUANG.size:
+        return ZhuangFocusCalibration(params=_ZHUANG.unpack(body))
+    raise ValueError(f"Malformed calibration payload (kind={kind}, {len(body)} bytes)")
+
+
+def encode_calibration_selection(key: CalibrationKey, model: str = "linear") -> bytes:
+    kinds = {name: kind for kind, name in _MODEL_NAMES.items()}
+    if model not in kinds:
+        raise ValueError(f"Unknown calibration model: {model}")
+    parts = [_KEY_HEAD.pack(kinds[model], key.roi_width, key.roi_height)]
+    for text in (key.objective, key.camera, key.cylinder_lens):
+        raw = text.encode("utf-8")
+        parts.append(_STR_LEN.pack(len(raw)) + raw)
+    return b"".join(parts)
+
+
+def decode_calibration_selection(payload: bytes) -> tuple[CalibrationKey, str]:
+    kind, roi_width, roi_height = _KEY_HEAD.unpack_from(payload)
+    if kind not in _MODEL_NAMES:
+        raise ValueError(f"Unknown calibration kind {kind}")
+    pos = _KEY_HEAD.size
+    texts = []
+    for _ in range(3):
+        (n,) = _STR_LEN.unpack_from(payload, pos)
+        pos += _STR_LEN.size
+        raw = payload[pos : pos + n]
+        if len(raw) != n:
+            raise ValueError("Malformed calibration selection payload")
+        texts.append(raw.decode("utf-8"))
+        pos += n
+    objective, camera, cylinder_lens = texts
+    key = CalibrationKey(objective, camera, roi_width, roi_height, cylinder_lens)
+    return key, _MODEL_NAMES[kind]
+
+
+@dataclass(slots=True)
+class ServerStatus:
+    running: bool
+    calibration_kind: int
+    roi: Roi
+    steps: int
+    subscribers: int
+    last_error: str
+
+
+class _RingSink:
+    """`AutofocusWorker` telemetry sink: packs each step into the sample ring."""
+
+    def __init__(self, capacity: int) -> None:
+        self.ring = SampleRing(memoryview(bytearray(SampleRing.nbytes(capacity))), capacity)
+
+    def append(self, sample: AutofocusSample, loop_latency_s: float) -> None:
+        self.ring.append(sample_record(sample, time.monotonic() - loop_latency_s, loop_latency_s))
+
+
+class _Handler(socketserver.BaseRequestHandler):
+    server: Any
+
+    def handle(self) -> None:
+        focus = self.server.focus
+        sock: socket.socket = self.request
+        while True:
+            try:
+                msg = _recv(sock)
+            except (OSError, ValueError):
+                return
+            if msg is None:
+                return
+            kind, payload = msg
+            if kind == MSG_SUBSCRIBE:
+                focus._stream_samples(sock)
+                return
+            try:
+                reply = focus._dispatch(kind, payload)
+            except Exception as exc:
+                reply = (MSG_ERROR, f"{type(exc).__name__}: {exc}".encode())
+            try:
+                _send(sock, *reply)
+            except OSError:
+                return
+            if kind == MSG_SHUTDOWN:
+                # shutdown() waits for serve_forever, which runs on another thread.
+                threading.Thread(target=self.server.shutdown, daemon=True).start()
+                return
+
+
+class _TCPServer(socketserver.ThreadingMixIn, socketserver.TCPServer):
+    daemon_threads = True
+    allow_reuse_address = True
+    focus: "FocusServer"
+
+
+class _TCP6Server(_TCPServer):
+    address_family = socket.AF_INET6
+
+
+if hasattr(socketserver, "UnixStreamServer"):
+
+    class _UnixServer(socketserver.ThreadingMixIn, socketserver.UnixStreamServer):
+        daemon_threads = True
+        focus: "FocusServer"
+
+
+def _make_server(family: int, address: Any) -> Any:
+    if family == socket.AF_UNIX:
+        if os.path.exists(address):
+            os.unlink(address)  # stale socket from a previous run
+        server = _UnixServer(address, _Handler)
+        # The protocol has no authentication: only the owner may connect.
+        os.chmod(address, 0o600)
+        return server
+    if family == socket.AF_INET6:
+        return _TCP6Server(address, _Handler)
+    return _TCPServer(address, _Handler)
+
+
+class FocusServer:
+    """Own the focus lock and serve it to local clients.
+
+    `start_lock()`/`stop_lock()`, `set_roi()` and `set_calibration()` are
+    what the START/STOP/SET_ROI/SET_CALIBRATION messages call; in-process
+    code may call them directly. ROI and calibration changes restart the
+    worker with a new controller, as the napari viewer does. With a
+    `registry`, `select_calibration()` (SELECT_CALIBRATION) switches to a
+    stored calibration without refitting.
+    """
+
+    def __init__(
+        self,
+        camera: CameraInterface,
+        stage: StageInterface,
+        *,
+        config: AutofocusConfig,
+        calibration: FocusCalibration | ZhuangFocusCalibration,
+        address: str = DEFAULT_ADDRESS,
+        ring_capacity: int = 4096,
+        publish_interval_s: float = 0.02,
+        registry: CalibrationRegistry | None = None,
+    ) -> None:
+        if ring_capacity < 2:
+            raise ValueError("ring_capacity must be >= 2")
+        if publish_interval_s <= 0:
+            raise ValueError("publish_interval_s must be > 0")
+        self._camera = camera
+        self._stage = stage
+        self._config = config
+        self._calibration = calibration
+        self._registry = registry
+        self._publish_interval_s = float(publish_interval_s)
+        self._sink = _RingSink(ring_capacity)
+        self._lock = threading.Lock()
+        self._worker: AutofocusWorker | None = None
+        self._subscribers = 0
+        self._closed = threading.Event()
+        family, bind_to = parse_address(address)
+        self._server = _make_server(family, bind_to)
+        self._server.focus = self
+        self._thread: threading.Thread | None = None
+
+    @property
+    def address(self) -> str:
+        """Bound address in `parse_address` form (resolves TCP port 0)."""
+        bound = self._server.server_address
+        if self._server.address_family == socket.AF_UNIX:
+            return f"unix:{bound}"
+        return f"{bound[0]}:{bound[1]}"
+
+    @property
+    def running(self) -> bool:
+        return self._worker is not None
+
+    # -- lock control -------------------------------------------------------
+
+    def start_lock(self) -> None:
+        with self._lock:
+            self._restart_worker()
+
+    def stop_lock(self) -> None:
+        with self._lock:
+            self._stop_worker()
+
+    def set_roi(self, roi: Roi) -> None:
+        if roi.width < 1 or roi.height < 1:
+            raise ValueError("ROI width and height must be >= 1")
+        with self._lock:
+            self._config = dataclasses.replace(self._config, roi=roi)
+            if self._worker is not None:
+                self._restart_worker()
+
+    def set_calibration(self, calibration: FocusCalibration | ZhuangFocusCalibration) -> None:
+        with self._lock:
+            self._calibration = calibration
+            if self._worker is not None:
+                self._restart_worker()
+
+    def select_calibration(self, key: CalibrationKey, model: str = "linear") -> None:
+        """Switch to the calibration stored in the registry for *key*/*model*."""
+        if self._registry is None:
+            raise RuntimeError("No calibration registry configured (start with --calibration-registry)")
+        record = self._registry.select(key, model)
+        self.set_calibration(record.runtime_calibration())
+
+    def status(self) -> ServerStatus:
+        worker = self._worker
+        error = worker.last_error if worker is not None else None
+        return ServerStatus(
+            running=worker is not None,
+            calibration_kind=CALIBRATION_ZHUANG if isinstance(self._calibration, ZhuangFocusCalibration) else CALIBRATION_LINEAR,
+            roi=self._config.roi,
+            steps=self._sink.ring.count(),
+            subscribers=self._subscribers,
+            last_error="" if error is None else f"{type(error).__name__}: {error}",
+        )
+
+    def _stop_worker(self) -> None:
+        if self._worker is not None:
+            self._worker.stop()
+            self._worker = None
+
+    def _restart_worker(self) -> None:
+        self._stop_worker()
+        controller = AstigmaticAutofocusController(
+            camera=self._camera,
+            stage=self._stage,
+            config=self._config,
+            calibration=self._calibration,
+        )
+        self._worker = AutofocusWorker(controller, telemetry=self._sink)
+        self._worker.start()
+
+    # -- serving ------------------------------------------------------------
+
+    def serve_forever(self) -> None:
+        """Serve until a SHUTDOWN message or `close()`."""
+        try:
+            self._server.serve_forever(poll_interval=0.1)
+        finally:
+            self._shutdown_lock()
+            # Also drops connections still waiting in the accept backlog.
+            self._server.server_close()
+
+    def start(self) -> None:
+        """Serve on a background thread."""
+        if self._thread is None:
+            self._thread = threading.Thread(target=self.serve_forever, daemon=True)
+            self._thread.start()
+
+    def close(self) -> None:
+        self._closed.set()
+        if self._thread is not None:
+            self._server.shutdown()
+            self._thread.join(timeout=2.0)
+            self._thread = None
+        self._shutdown_lock()
+        self._server.server_close()
+        if self._server.address_family == socket.AF_UNIX:
+            try:
+                os.unlink(self._server.server_address)
+            except OSError:
+                pass
+
+    def _shutdown_lock(self) -> None:
+        self._closed.set()
+        with self._lock:
+            self._stop_worker()
+
+    def __enter__(self) -> "FocusServer":
+        self.start()
+        return self
+
+    def __exit__(self, _exc_type, _exc, _tb) -> None:
+        self.close()
+
+    def _dispatch(self, kind: int, payload: bytes) -> tuple[int, bytes]:
+        if kind == MSG_START:
+            self.start_lock()
+        elif kind == MSG_STOP:
+            self.stop_lock()
+        elif kind == MSG_SET_ROI:
+            x, y, w, h = _ROI.unpack(payload)
+            self.set_roi(Roi(x=x, y=y, width=w, height=h))
+        elif kind == MSG_SET_CALIBRATION:
+            self.set_calibration(decode_calibration(payload))
+        elif kind == MSG_SELECT_CALIBRATION:
+            self.select_calibration(*decode_calibration_selection(payload))
+        elif kind == MSG_STATUS:
+            st = self.status()
+            roi = st.roi
+            body = _STATUS.pack(
+                int(st.running), st.calibration_kind, roi.x, roi.y, roi.width, roi.height, st.steps, st.subscribers
+            )
+            return MSG_STATUS_REPLY, body + st.last_error.encode()
+        elif kind == MSG_SHUTDOWN:
+            self._closed.set()
+        else:
+            raise ValueError(f"Unknown message type {kind}")
+        return MSG_OK, b""
+
+    def _stream_samples(self, sock: socket.socket) -> None:
+        ring = self._sink.ring
+        # Start from "now": subscribers see steps taken after they joined.
+        pos = ring.count()
+        with self._lock:
+            self._subscribers += 1
+        try:
+            while not self._closed.wait(self._publish_interval_s):
+                records, end = ring.read_since(pos)
+                lost = end - pos - len(records)
+                pos = end
+                if records or lost:
+                    body = b"".join(RECORD.pack(*r) for r in records)
+                    _send(sock, MSG_SAMPLES, _LOST.pack(lost) + body)
+        except OSError:
+            pass
+        finally:
+            with self._lock:
+                self._subscribers -= 1
+
+
+class SampleStream:
+    """A SUBSCRIBE connection; yields batches of samples as they arrive."""
+
+    def __init__(self, sock: socket.socket) -> None:
+        self._sock = sock
+        self.samples_received = 0
+        self.samples_lost = 0
+
+    def read(self) -> list[RingSample] | None:
+        """Block for the next batch (possibly empty if only losses were reported); None once closed."""
+        msg = _recv(self._sock)
+        if msg is None:
+            return None
+        kind, payload = msg
+        if kind != MSG_SAMPLES or (len(payload) - _LOST.size) % RECORD.size:
+            raise ValueError(f"Unexpected message {kind:#x} on sample stream")
+        (lost,) = _LOST.unpack_from(payload)
+        batch = [RingSample.from_record(r) for r in RECORD.iter_unpack(payload[_LOST.size :])]
+        self.samples_lost += lost
+        self.samples_received += len(batch)
+        return batch
+
+    def __iter__(self):
+        while True:
+            batch = self.read()
+            if batch is None:
+                return
+            yield from batch
+
+    def close(self) -> None:
+        try:
+            self._sock.close()
+        except OSError:
+            pass
+
+    def __enter__(self) -> "SampleStream":
+        return self
+
+    def __exit__(self, _exc_type, _exc, _tb) -> None:
+        self.close()
+
+
+class FocusClient:
+    """Command connection to a `FocusServer`; raises RuntimeError on ERROR replies."""
+
+    def __init__(self, address: str = DEFAULT_ADDRESS, *, timeout_s: float = 5.0) -> None:
+        self._address = address
+        self._timeout_s = float(timeout_s)
+        self._sock = self._connect()
+
+    def _connect(self) -> socket.socket:
+        family, target = parse_address(self._address)
+        sock = socket.socket(family, socket.SOCK_STREAM)
+        sock.settimeout(self._timeout_s)
+        sock.connect(target)
+        if family != socket.AF_UNIX:
+            sock.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+        return sock
+
+    def _request(self, kind: int, payload: bytes = b"") -> tuple[int, bytes]:
+        _send(self._sock, kind, payload)
+        reply = _recv(self._sock)
+        if reply is None:
+            raise ConnectionError("Focus server closed the connection")
+        if reply[0] == MSG_ERROR:
+            raise RuntimeError(f"Focus server error: {reply[1].decode(errors='replace')}")
+        return reply
+
+    def start(self) -> None:
+        self._request(MSG_START)
+
+    def stop(self) -> None:
+        self._request(MSG_STOP)
+
+    def set_roi(self, roi: Roi) -> None:
+        self._request(MSG_SET_ROI, _ROI.pack(roi.x, roi.y, roi.width, roi.height))
+
+    def set_calibration(self, calibration: FocusCalibration | ZhuangFocusCalibration) -> None:
+        self._request(MSG_SET_CALIBRATION, encode_calibration(calibration))
+
+    def select_calibration(self, key: CalibrationKey, model: str = "linear") -> None:
+        self._request(MSG_SELECT_CALIBRATION, encode_calibration_selection(key, model))
+
+    def status(self) -> ServerStatus:
+        _kind, payload = self._request(MSG_STATUS)
+        running, cal_kind, x, y, w, h, steps, subscribers = _STATUS.unpack_from(payload)
+        return ServerStatus(
+            running=bool(running),
+            calibration_kind=cal_kind,
+            roi=Roi(x=x, y=y, width=w, height=h),
+            steps=steps,
+            subscribers=subscribers,
+            last_error=payload[_STATUS.size :].decode(errors="replace"),
+        )
+
+    def shutdown(self) -> None:
+        self._request(MSG_SHUTDOWN)
+
+    def subscribe(self) -> SampleStream:
+        """Open a separate connection that streams samples."""
+        sock = self._connect()
+        sock.settimeout(None)
+        _send(sock, MSG_SUBSCRIBE)
+        return SampleStream(sock)
+
+    def close(self) -> None:
+        try:
+            self._sock.close()
+        except OSError:
+            pass
+
+    def __enter__(self) -> "FocusClient":
+        return self
+
+    def __exit__(self, _exc_type, _exc, _tb) -> None:
+        self.close()
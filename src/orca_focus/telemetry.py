@@ -0,0 +1,86 @@
+"""Fixed-size ring buffer of per-step autofocus telemetry.
+
+`TelemetryRing` preallocates one row per channel and stores every value
+twice, at `slot` and `slot + capacity`. Any window of the newest `n <=
+capacity` steps is then one contiguous slice, so `window()` hands out views
+without copying or reordering. There is a single writer (the autofocus
+worker); readers (plots) never block it.
+"""
+
+from __future__ import annotations
+
+from typing import Any
+
+from .autofocus import AutofocusSample
+
+
+TELEMETRY_CHANNELS = (
+    "timestamp_s",
+    "error_um",
+    "stage_z_um",
+    "commanded_z_um",
+    "roi_total_intensity",
+    "loop_latency_s",
+    "loop_hz",
+    "control_applied",
+)
+
+
+class TelemetryRing:
+    """Newest `capacity` autofocus steps, readable as zero-copy column views.
+
+    Views alias live storage: a view held across more than `capacity - n`
+    further appends sees its oldest entries overwritten, so copy anything
+    kept longer than a redraw.
+    """
+
+    def __init__(self, capacity: int = 4096) -> None:
+        if capacity < 2:
+            raise ValueError("capacity must be >= 2")
+        self._capacity = int(capacity)
+        try:
+            import numpy as np
+        except Exception:
+            self._data: Any = [[0.0] * (2 * self._capacity) for _ in TELEMETRY_CHANNELS]
+        else:
+            self._data = np.zeros((len(TELEMETRY_CHANNELS), 2 * self._capacity), dtype=np.float64)
+        self._count = 0
+
+    @property
+    def capacity(self) -> int:
+        return self._capacity
+
+    def __len__(self) -> int:
+        return min(self._count, self._capacity)
+
+    @property
+    def n_appended(self) -> int:
+        return self._count
+
+    def append(self, sample: AutofocusSample, loop_latency_s: float) -> None:
+        values = (
+            sample.timestamp_s,
+            sample.error_um,
+            sample.stage_z_um,
+            sample.commanded_z_um,
+            sample.roi_total_intensity,
+            loop_latency_s,
+            sample.loop_hz,
+            1.0 if sample.control_applied else 0.0,
+        )
+        slot = self._count % self._capacity
+        data = self._data
+        for row, value in zip(data, values):
+            row[slot] = value
+            row[slot + self._capacity] = value
+        # Publish after the row is complete so readers never see it half written.
+        self._count += 1
+
+    def window(self, n: int | None = None) -> dict[str, Any]:
+        """Newest *n* steps per channel, oldest first (views for NumPy storage)."""
+        count = self._count
+        n_avail = min(count, self._capacity)
+        n = n_avail if n is None else max(0, min(int(n), n_avail))
+        end = count % self._capacity + self._capacity
+        start = end - n
+        return {name: self._data[i][start:end] for i, name in enumerate(TELEMETRY_CHANNELS)}
@@ -0,0 +1,273 @@
+"""Lightweight span tracer for acquisition, metric and actuation timing.
+
+Tracing is off by default and costs one flag check per instrumented call.
+`enable()` turns it on at runtime; every span is then timed with
+`time.perf_counter_ns()` and appended to a buffer owned by the calling
+thread (no lock on the hot path). Buffers are bounded; the oldest spans of
+a thread are discarded once it has recorded `capacity` of them.
+
+Instrumented code uses `span()` as a context manager, the `traced()`
+decorator for whole calls, or `traced_lock()` to time how long a lock took
+to acquire. Collected spans export to:
+
+- Chrome trace JSON (`export_chrome_trace`), for chrome://tracing or
+  https://ui.perfetto.dev, with one track per thread;
+- speedscope (`export_speedscope`), one evented profile per thread.
+
+Only the current process is traced; the child of `IsolatedAutofocus` keeps
+its own (disabled) tracer.
+"""
+
+from __future__ import annotations
+
+import collections
+import functools
+import os
+import threading
+import time
+from pathlib import Path
+from typing import Any, Callable, TypeVar
+
+
+_F = TypeVar("_F", bound=Callable[..., Any])
+_now_ns = time.perf_counter_ns
+
+_enabled = False
+_capacity = 200_000
+_buffers: list["_ThreadBuffer"] = []
+_buffers_lock = threading.Lock()
+_local = threading.local()
+
+
+class _ThreadBuffer:
+    __slots__ = ("tid", "thread_name", "spans")
+
+    def __init__(self, capacity: int) -> None:
+        thread = threading.current_thread()
+        self.tid = threading.get_native_id()
+        self.thread_name = thread.name
+        # (name, category, start_ns, end_ns)
+        self.spans: collections.deque[tuple[str, str, int, int]] = collections.deque(maxlen=capacity)
+
+
+def _buffer() -> _ThreadBuffer:
+    buf = getattr(_local, "buffer", None)
+    if buf is None:
+        buf = _local.buffer = _ThreadBuffer(_capacity)
+        with _buffers_lock:
+            _buffers.append(buf)
+    return buf
+
+
+def enable(*, capacity: int | None = None) -> None:
+    """Start recording spans.
+
+    `capacity` bounds the spans kept per thread, for threads that record
+    their first span after this call.
+    """
+    global _enabled, _capacity
+    if capacity is not None:
+        if capacity < 1:
+            raise ValueError("capacity must be >= 1")
+        _capacity = int(capacity)
+    _enabled = True
+
+
+def disable() -> None:
+    """Stop recording; spans collected so far are kept for export."""
+    global _enabled
+    _enabled = False
+
+
+def is_enabled() -> bool:
+    return _enabled
+
+
+def reset() -> None:
+    """Discard every recorded span (tracing stays on or off as it was)."""
+    with _buffers_lock:
+        for buf in _buffers:
+            buf.spans.clear()
+
+
+def record(name: str, category: str, start_ns: int, end_ns: int) -> None:
+    """Append a finished span measured by the caller."""
+    buf = getattr(_local, "buffer", None)
+    if buf is None:
+        buf = _buffer()
+    buf.spans.append((name, category, start_ns, end_ns))
+
+
+class _Span:
+    __slots__ = ("_name", "_category", "_start")
+
+    def __init__(self, name: str, category: str) -> None:
+        self._name = name
+        self._category = category
+
+    def __enter__(self) -> "_Span":
+        self._start = _now_ns()
+        return self
+
+    def __exit__(self, _exc_type, _exc, _tb) -> None:
+        record(self._name, self._category, self._start, _now_ns())
+
+
+class _NullSpan:
+    __slots__ = ()
+
+    def __enter__(self) -> None:
+        return None
+
+    def __exit__(self, _exc_type, _exc, _tb) -> None:
+        return None
+
+
+_NULL_SPAN = _NullSpan()
+
+
+def span(name: str, category: str = "") -> Any:
+    """Context manager timing its block as one span (a no-op when disabled)."""
+    if not _enabled:
+        return _NULL_SPAN
+    return _Span(name, category)
+
+
+def traced(name: str, category: str = "") -> Callable[[_F], _F]:
+    """Decorator recording each call of the wrapped function as a span."""
+
+    def decorate(fn: _F) -> _F:
+        @functools.wraps(fn)
+        def wrapper(*args: Any, **kwargs: Any) -> Any:
+            if not _enabled:
+                return fn(*args, **kwargs)
+            start = _now_ns()
+            try:
+                return fn(*args, **kwargs)
+            finally:
+                record(name, category, start, _now_ns())
+
+        return wrapper  # type: ignore[return-value]
+
+    return decorate
+
+
+class _TracedLock:
+    __slots__ = ("_lock", "_name")
+
+    def __init__(self, lock: Any, name: str) -> None:
+        self._lock = lock
+        self._name = name
+
+    def __enter__(self) -> None:
+        start = _now_ns()
+        self._lock.acquire()
+        record(self._name, "lock", start, _now_ns())
+
+    def __exit__(self, _exc_type, _exc, _tb) -> None:
+        self._lock.release()
+
+
+def traced_lock(lock: Any, name: str) -> Any:
+    """`with traced_lock(lock, name):` holds *lock*, recording the wait to acquire it."""
+    if not _enabled:
+        return lock
+    return _TracedLock(lock, name)
+
+
+def spans() -> dict[tuple[int, str], list[tuple[str, str, int, int]]]:
+    """Snapshot of recorded spans per `(thread_id, thread_name)`, in start order."""
+    with _buffers_lock:
+        buffers = list(_buffers)
+    out: dict[tuple[int, str], list[tuple[str, str, int, int]]] = {}
+    for buf in buffers:
+        items = sorted(buf.spans, key=lambda s: (s[2], -s[3]))
+        if items:
+            out.setdefault((buf.tid, buf.thread_name), []).extend(items)
+    return out
+
+
+def chrome_trace() -> dict[str, Any]:
+    """Spans as a Chrome trace-event document (complete "X" events, microseconds)."""
+    pid = os.getpid()
+    events: list[dict[str, Any]] = []
+    for (tid, thread_name), items in spans().items():
+        events.append({"name": "thread_name", "ph": "M", "pid": pid, "tid": tid, "args": {"name": thread_name}})
+        for name, category, start, end in items:
+            events.append(
+                {
+                    "name": name,
+                    "cat": category or "orca_focus",
+                    "ph": "X",
+                    "ts": start / 1000.0,
+                    "dur": (end - start) / 1000.0,
+                    "pid": pid,
+                    "tid": tid,
+                }
+            )
+    return {"traceEvents": events, "displayTimeUnit": "ns"}
+
+
+def speedscope() -> dict[str, Any]:
+    """Spans as a speedscope file: one evented profile per thread, in nanoseconds."""
+    frames: list[dict[str, str]] = []
+    frame_ids: dict[str, int] = {}
+    profiles: list[dict[str, Any]] = []
+    for (tid, thread_name), items in spans().items():
+        events: list[dict[str, Any]] = []
+        stack: list[tuple[int, int]] = []  # (frame id, end_ns)
+        for name, _category, start, end in items:
+            while stack and stack[-1][1] <= start:
+                frame, stop = stack.pop()
+                events.append({"type": "C", "frame": frame, "at": stop})
+            frame = frame_ids.get(name)
+            if frame is None:
+                frame = frame_ids[name] = len(frames)
+                frames.append({"name": name})
+            # Spans from one thread nest; clip any overlap so the stack stays valid.
+            end = min(end, stack[-1][1]) if stack else end
+            events.append({"type": "O", "frame": frame, "at": start})
+            stack.append((frame, end))
+        while stack:
+            frame, stop = stack.pop()
+            events.append({"type": "C", "frame": frame, "at": stop})
+        profiles.append(
+            {
+                "type": "evented",
+                "name": f"{thread_name} ({tid})",
+                "unit": "nanoseconds",
+                "startValue": items[0][2],
+                "endValue": events[-1]["at"],
+                "events": events,
+            }
+        )
+    return {
+        "$schema": "https://www.speedscope.app/file-format-schema.json",
+        "name": "orca_focus trace",
+        "exporter": "orca_focus.tracing",
+        "shared": {"frames": frames},
+        "profiles": profiles,
+    }
+
+
+def export_chrome_trace(path: str | Path) -> Path:
+    import json
+
+    path = Path(path)
+    path.write_text(json.dumps(chrome_trace()), encoding="utf-8")
+    return path
+
+
+def export_speedscope(path: str | Path) -> Path:
+    import json
+
+    path = Path(path)
+    path.write_text(json.dumps(speedscope()), encoding="utf-8")
+    return path
+
+
+def export(path: str | Path) -> Path:
+    """Write speedscope for `*.speedscope.json`, Chrome trace JSON otherwise."""
+    if str(path).endswith(".speedscope.json"):
+        return export_speedscope(path)
+    return export_chrome_trace(path)
@@ -1,9 +1,12 @@
 from __future__ import annotations
 
-from dataclasses import dataclass
+import time
+from dataclasses import dataclass, field
+from typing import Any, Callable
 
+from . import tracing
 from .focus_metric import Roi
-from .interfaces import Image2D
+from .interfaces import CameraFrame, Image2D
 
 
 @dataclass(slots=True)
@@ -40,3 +43,115 @@ class RoiSelector:
         self._x0 = None
         self._y0 = None
         return self.roi
+
+
+@dataclass(slots=True)
+class DisplayThrottle:
+    """Decide which frames reach the screen and prepare them cheaply.
+
+    `prepare` returns None for frames already shown (same `frame_index`, or
+    timestamp when unindexed) and for frames arriving sooner than
+    `1 / max_fps` after the last displayed one. Otherwise it crops to
+    `zoom_roi` (if set), strides by `downsample` and copies the result into a
+    reused buffer, returning `(buffer, (y0, x0), step)`; the offset and step
+    let a viewer map the buffer back to sensor pixels (napari layer
+    `translate`/`scale`). The buffer is the same object while its shape is
+    unchanged, so viewers can refresh the existing layer data in place.
+
+    Preparation is timed: with `auto_downsample`, `overrun_frames`
+    consecutive frames over `budget_s` double `downsample` (up to
+    `max_downsample`) so large sensors cannot monopolise the interpreter the
+    control thread shares. `recover_frames` consecutive frames under a
+    quarter of the budget halve it again, down to the initial `downsample`.
+    Frames that (re)allocate the buffer are not judged, so the first frame
+    and stride changes do not count as overruns; neither does one GC pause.
+    """
+
+    max_fps: float = 30.0
+    downsample: int = 1
+    zoom_roi: Roi | None = None
+    budget_s: float = 0.002
+    auto_downsample: bool = True
+    max_downsample: int = 16
+    overrun_frames: int = 3
+    recover_frames: int = 30
+    clock: Callable[[], float] = time.monotonic
+    frames_shown: int = 0
+    frames_skipped: int = 0
+    last_prepare_s: float = 0.0
+    _last_key: Any = field(default=None, repr=False)
+    _last_shown_t: float | None = field(default=None, repr=False)
+    _buffer: Any = field(default=None, repr=False)
+    _min_downsample: int = field(default=1, repr=False)
+    _n_over: int = field(default=0, repr=False)
+    _n_under: int = field(default=0, repr=False)
+
+    def __post_init__(self) -> None:
+        if self.max_fps <= 0:
+            raise ValueError("max_fps must be > 0")
+        if self.downsample < 1:
+            raise ValueError("downsample must be >= 1")
+        if self.overrun_frames < 1 or self.recover_frames < 1:
+            raise ValueError("overrun_frames and recover_frames must be >= 1")
+        self._min_downsample = self.downsample
+
+    @tracing.traced("viewer.prepare", "viewer")
+    def prepare(self, frame: CameraFrame) -> tuple[Any, tuple[int, int], int] | None:
+        key = frame.frame_index if frame.frame_index is not None else frame.timestamp_s
+        if self._last_shown_t is not None and key == self._last_key:
+            return None
+        now = self.clock()
+        if self._last_shown_t is not None and now - self._last_shown_t < 1.0 / self.max_fps:
+            self.frames_skipped += 1
+            return None
+
+        import numpy as np
+
+        t0 = time.perf_counter()
+        step = self.downsample
+        y0, x0, view = _crop_and_stride(frame.image, self.zoom_roi, step)
+        arr = np.asarray(view)
+        reused = self._buffer is not None and self._buffer.shape == arr.shape and self._buffer.dtype == arr.dtype
+        if reused:
+            np.copyto(self._buffer, arr)
+        else:
+            self._buffer = np.array(arr, copy=True)
+        elapsed = time.perf_counter() - t0
+
+        self.last_prepare_s = elapsed
+        if self.auto_downsample and reused:
+            self._adapt_downsample(elapsed)
+        self._last_key = key
+        self._last_shown_t = now
+        self.frames_shown += 1
+        return self._buffer, (y0, x0), step
+
+    def _adapt_downsample(self, elapsed: float) -> None:
+        if elapsed > self.budget_s:
+            self._n_over += 1
+            self._n_under = 0
+            if self._n_over >= self.overrun_frames and self.downsample < self.max_downsample:
+                self.downsample = min(self.max_downsample, self.downsample * 2)
+                self._n_over = 0
+        elif elapsed < 0.25 * self.budget_s:
+            self._n_under += 1
+            self._n_over = 0
+            if self._n_under >= self.recover_frames and self.downsample > self._min_downsample:
+                self.downsample = max(self._min_downsample, self.downsample // 2)
+                self._n_under = 0
+        else:
+            self._n_over = self._n_under = 0
+
+
+def _crop_and_stride(image: Any, roi: Roi | None, step: int) -> tuple[int, int, Any]:
+    """Crop/stride before any conversion: a view for ndarrays, small lists otherwise."""
+    h = len(image)
+    w = len(image[0]) if h else 0
+    if roi is not None:
+        roi = roi.clamp((h, w))
+        y0, y1, x0, x1 = roi.y, roi.y + roi.height, roi.x, roi.x + roi.width
+    else:
+        y0, y1, x0, x1 = 0, h, 0, w
+    if hasattr(image, "ndim"):
+        return y0, x0, image[y0:y1:step, x0:x1:step]
+    return y0, x0, [row[x0:x1:step] for row in image[y0:y1:step]]
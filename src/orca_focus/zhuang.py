@@ -0,0 +1,343 @@
+"""Nonlinear (Zhuang-model) focus calibration.
+
+The astigmatic PSF widths follow the defocus model of Huang/Zhuang (Science
+2008), already used by `focusfeedbackgui.cylinderlens.zhuangell`:
+
+    sx(z) ~ sqrt(1 + X**2 + Ax*X**3 + Bx*X**4),  X = (z - c - z0) / dx
+    sy(z) ~ sqrt(1 + Y**2 + Ay*Y**3 + By*Y**4),  Y = (z + c - z0) / dy
+    ell = e0 * sx / sy
+
+The second-moment error used by `focus_metric` is (sx**2 - sy**2) /
+(sx**2 + sy**2), i.e. (ell**2 - 1) / (ell**2 + 1) for a Gaussian spot, so
+the same parameter vector q = [e0, z0, c, Ax, Bx, dx, Ay, By, dy] describes
+it. Instead of solving a polynomial per frame (`cylinderlens.findz`), the
+fitted model is inverted once into a uniform error->z lookup table so
+`error_to_z_offset_um` is O(1) per frame.
+"""
+
+from __future__ import annotations
+
+import math
+from dataclasses import dataclass, field
+
+from .calibration import CalibrationSample, _sanitize_calibration_samples, fit_linear_calibration_with_report
+
+ZHUANG_PARAM_NAMES = ("e0", "z0", "c", "Ax", "Bx", "dx", "Ay", "By", "dy")
+
+
+def zhuang_ellipticity(z_um: float, q: tuple[float, ...] | list[float]) -> float:
+    """Ellipticity sx/sy at *z_um*; NaN where the model is not defined."""
+    x = (z_um - q[2] - q[1]) / q[5]
+    y = (z_um + q[2] - q[1]) / q[8]
+    num = 1.0 + x * x + q[3] * x**3 + q[4] * x**4
+    den = 1.0 + y * y + q[6] * y**3 + q[7] * y**4
+    if num <= 0.0 or den <= 0.0:
+        return math.nan
+    return q[0] * math.sqrt(num / den)
+
+
+def zhuang_error(z_um: float, q: tuple[float, ...] | list[float]) -> float:
+    """Second-moment astigmatic error predicted by the Zhuang model."""
+    ell = zhuang_ellipticity(z_um, q)
+    if not math.isfinite(ell):
+        return math.nan
+    r2 = ell * ell
+    return (r2 - 1.0) / (r2 + 1.0)
+
+
+@dataclass(slots=True)
+class ZhuangFocusCalibration:
+    """Zhuang-model calibration with a precomputed inversion table.
+
+    `params` are in the (centered) Z frame of the calibration sweep. Focus is
+    the zero-error crossing of the model, matching the runtime convention that
+    the lock always targets error 0. Outside the monotonic capture range the
+    returned offset saturates at the range ends.
+    """
+
+    params: tuple[float, ...]
+    table_size: int = 4096
+    z_focus_um: float = field(init=False, default=0.0)
+    z_range_um: tuple[float, float] = field(init=False, default=(0.0, 0.0))
+    error_range: tuple[float, float] = field(init=False, default=(0.0, 0.0))
+    _z_table: list[float] = field(init=False, repr=False, default_factory=list)
+    _inv_de: float = field(init=False, repr=False, default=0.0)
+
+    def __post_init__(self) -> None:
+        self.params = tuple(float(v) for v in self.params)
+        if len(self.params) != len(ZHUANG_PARAM_NAMES):
+            raise ValueError(f"Zhuang calibration needs {len(ZHUANG_PARAM_NAMES)} parameters")
+        if self.table_size < 2:
+            raise ValueError("table_size must be >= 2")
+        self._build_table()
+
+    @property
+    def error_at_focus(self) -> float:
+        return 0.0
+
+    @property
+    def error_to_um(self) -> float:
+        """Local slope dz/derror at focus, comparable to the linear model."""
+        z_lo, z_hi = self.z_range_um
+        h = max(1e-6, (z_hi - z_lo) * 1e-4)
+        de = zhuang_error(self.z_focus_um + h, self.params) - zhuang_error(self.z_focus_um - h, self.params)
+        if de == 0.0 or not math.isfinite(de):
+            return 0.0
+        return (2.0 * h) / de
+
+    def _build_table(self) -> None:
+        q = self.params
+        scale = max(abs(q[5]), abs(q[8]), abs(q[2]), 1e-3)
+        n_dense = max(4 * self.table_size, 2048)
+        z_lo_scan = q[1] - 6.0 * scale
+        dz = 12.0 * scale / (n_dense - 1)
+        zs = [z_lo_scan + i * dz for i in range(n_dense)]
+        es = [zhuang_error(z, q) for z in zs]
+
+        # Start from the zero crossing nearest z0 and grow the strictly
+        # monotonic segment around it: that is the usable capture range.
+        crossings = [
+            i
+            for i in range(n_dense - 1)
+            if math.isfinite(es[i]) and math.isfinite(es[i + 1]) and (es[i] <= 0.0 <= es[i + 1] or es[i + 1] <= 0.0 <= es[i])
+            and es[i] != es[i + 1]
+        ]
+        if not crossings:
+            raise ValueError("Zhuang model has no zero-error crossing; focus is not bracketed")
+        i0 = min(crossings, key=lambda i: abs(zs[i] - q[1]))
+        sign = 1.0 if es[i0 + 1] > es[i0] else -1.0
+        lo = i0
+        while lo > 0 and math.isfinite(es[lo - 1]) and sign * (es[lo] - es[lo - 1]) > 0.0:
+            lo -= 1
+        hi = i0 + 1
+        while hi < n_dense - 1 and math.isfinite(es[hi + 1]) and sign * (es[hi + 1] - es[hi]) > 0.0:
+            hi += 1
+
+        frac = es[i0] / (es[i0] - es[i0 + 1])
+        self.z_focus_um = zs[i0] + frac * dz
+        self.z_range_um = (zs[lo], zs[hi])
+
+        seg_z = zs[lo : hi + 1]
+        seg_e = es[lo : hi + 1]
+        if sign < 0:
+            seg_z.reverse()
+            seg_e.reverse()
+        e_min, e_max = seg_e[0], seg_e[-1]
+        self.error_range = (e_min, e_max)
+
+        n = self.table_size
+        step = (e_max - e_min) / (n - 1)
+        table: list[float] = []
+        j = 0
+        for k in range(n):
+            e = e_min + k * step
+            while j < len(seg_e) - 2 and seg_e[j + 1] < e:
+                j += 1
+            e_a, e_b = seg_e[j], seg_e[j + 1]
+            t = 0.0 if e_b == e_a else (e - e_a) / (e_b - e_a)
+            table.append(seg_z[j] + min(1.0, max(0.0, t)) * (seg_z[j + 1] - seg_z[j]))
+        self._z_table = table
+        self._inv_de = 1.0 / step
+
+    def error_to_z(self, error: float) -> float:
+        """Model Z (sweep frame) for *error*, via O(1) table interpolation."""
+        table = self._z_table
+        pos = (error - self.error_range[0]) * self._inv_de
+        if pos <= 0.0:
+            return table[0]
+        last = len(table) - 1
+        if pos >= last:
+            return table[last]
+        i = int(pos)
+        a = table[i]
+        return a + (pos - i) * (table[i + 1] - a)
+
+    def error_to_z_offset_um(self, error: float) -> float:
+        return self.error_to_z(error) - self.z_focus_um
+
+
+@dataclass(slots=True)
+class ZhuangFitReport:
+    calibration: ZhuangFocusCalibration
+    z_reference_um: float
+    r2: float
+    rmse_error: float
+    n_samples: int
+    iterations: int
+
+
+def _solve_linear(a: list[list[float]], b: list[float]) -> list[float]:
+    n = len(b)
+    m = [row[:] + [b[i]] for i, row in enumerate(a)]
+    for col in range(n):
+        pivot = max(range(col, n), key=lambda r: abs(m[r][col]))
+        if abs(m[pivot][col]) < 1e-300:
+            raise ValueError("Singular normal equations")
+        m[col], m[pivot] = m[pivot], m[col]
+        inv = 1.0 / m[col][col]
+        for r in range(col + 1, n):
+            f = m[r][col] * inv
+            if f != 0.0:
+                row_r, row_c = m[r], m[col]
+                for k in range(col, n + 1):
+                    row_r[k] -= f * row_c[k]
+    x = [0.0] * n
+    for i in range(n - 1, -1, -1):
+        s = m[i][n] - sum(m[i][k] * x[k] for k in range(i + 1, n))
+        x[i] = s / m[i][i]
+    return x
+
+
+def _levenberg_marquardt(
+    zs: list[float],
+    es: list[float],
+    ws: list[float],
+    q0: list[float],
+    free: list[int],
+    max_iter: int,
+) -> tuple[list[float], float, int]:
+    def cost(q: list[float]) -> float:
+        total = 0.0
+        for z, e, w in zip(zs, es, ws):
+            r = e - zhuang_error(z, q)
+            if not math.isfinite(r):
+                return math.inf
+            total += w * r * r
+        return total
+
+    q = list(q0)
+    c = cost(q)
+    lam = 1e-3
+    it = 0
+    for it in range(1, max_iter + 1):
+        base = [zhuang_error(z, q) for z in zs]
+        jac: list[list[float]] = []
+        for j in free:
+            h = 1e-6 * max(1.0, abs(q[j]))
+            qh = list(q)
+            qh[j] += h
+            jac.append([(zhuang_error(z, qh) - b) / h for z, b in zip(zs, base)])
+        resid = [e - b for e, b in zip(es, base)]
+        if not all(math.isfinite(v) for col in jac for v in col):
+            break
+        nf = len(free)
+        jtj = [[sum(w * ja * jb for w, ja, jb in zip(ws, jac[a], jac[b])) for b in range(nf)] for a in range(nf)]
+        jtr = [sum(w * ja * r for w, ja, r in zip(ws, jac[a], resid)) for a in range(nf)]
+
+        improved = False
+        while lam < 1e12:
+            damped = [row[:] for row in jtj]
+            for a in range(nf):
+                damped[a][a] += lam * max(jtj[a][a], 1e-12)
+            try:
+                delta = _solve_linear(damped, jtr)
+            except ValueError:
+                lam *= 10.0
+                continue
+            trial = list(q)
+            for a, j in enumerate(free):
+                trial[j] += delta[a]
+            c_trial = cost(trial)
+            if c_trial < c:
+                rel = (c - c_trial) / max(c, 1e-300)
+                q, c = trial, c_trial
+                lam = max(lam / 10.0, 1e-12)
+                improved = True
+                break
+            lam *= 10.0
+        if not improved or rel < 1e-12:
+            break
+    return q, c, it
+
+
+def fit_zhuang_calibration_with_report(
+    samples: list[CalibrationSample],
+    *,
+    max_iter: int = 200,
+    table_size: int = 4096,
+) -> ZhuangFitReport:
+    """Fit the Zhuang error model to a calibration sweep.
+
+    The linear fit seeds focus position and depth; the symmetric model
+    (Ax=Bx=Ay=By=0) is fitted first and the higher-order terms are released
+    only when there are enough samples to constrain them.
+    """
+
+    samples = _sanitize_calibration_samples(samples)
+    linear = fit_linear_calibration_with_report(samples, robust=True)
+
+    w_sum = sum(max(0.0, s.weight) for s in samples)
+    z_ref = sum(max(0.0, s.weight) * s.z_um for s in samples) / w_sum
+    w_mean = w_sum / len(samples)
+    zs = [s.z_um - z_ref for s in samples]
+    es = [s.error for s in samples]
+    ws = [max(0.0, s.weight) / w_mean for s in samples]
+
+    slope = linear.calibration.error_to_um
+    depth = max(abs(slope), 1e-3)
+    c0 = -math.copysign(depth, slope)
+    q = [1.0, linear.intercept_um, c0, 0.0, 0.0, depth, 0.0, 0.0, depth]
+
+    q, _, it1 = _levenberg_marquardt(zs, es, ws, q, [0, 1, 2, 5, 8], max_iter)
+    iterations = it1
+    if len(samples) > len(ZHUANG_PARAM_NAMES) + 2:
+        q_full, _, it2 = _levenberg_marquardt(zs, es, ws, q, list(range(9)), max_iter)
+        iterations += it2
+        try:
+            ZhuangFocusCalibration(params=tuple(q_full), table_size=8)
+            q = q_full
+        except ValueError:
+            pass
+
+    calibration = ZhuangFocusCalibration(params=tuple(q), table_size=table_size)
+
+    e_mean = sum(w * e for w, e in zip(ws, es)) / sum(ws)
+    ss_res = sum(w * (e - zhuang_error(z, q)) ** 2 for z, e, w in zip(zs, es, ws))
+    ss_tot = sum(w * (e - e_mean) ** 2 for e, w in zip(es, ws))
+    return ZhuangFitReport(
+        calibration=calibration,
+        z_reference_um=z_ref,
+        r2=1.0 if ss_tot == 0 else 1.0 - ss_res / ss_tot,
+        rmse_error=(ss_res / sum(ws)) ** 0.5,
+        n_samples=len(samples),
+        iterations=iterations,
+    )
+
+
+def fit_zhuang_calibration(samples: list[CalibrationSample], **kwargs) -> ZhuangFocusCalibration:
+    """Fit the Zhuang model and return the table-backed calibration."""
+
+    return fit_zhuang_calibration_with_report(samples, **kwargs).calibration
+
+
+def zhuang_quality_issues(
+    samples: list[CalibrationSample],
+    report: ZhuangFitReport,
+    *,
+    min_r2: float = 0.9,
+    min_capture_fraction: float = 0.2,
+) -> list[str]:
+    """Return human-readable issues when a Zhuang fit is not safely usable for control."""
+
+    if len(samples) < 2:
+        return ["need at least 2 samples"]
+
+    z_vals = [s.z_um - report.z_reference_um for s in samples]
+    sweep_lo, sweep_hi = min(z_vals), max(z_vals)
+    sweep_span = sweep_hi - sweep_lo
+    cal = report.calibration
+    z_lo, z_hi = cal.z_range_um
+
+    issues: list[str] = []
+    if not math.isfinite(report.r2) or report.r2 < min_r2:
+        issues.append(
+            f"Zhuang fit R²={report.r2:0.4f} is below {min_r2:0.2f}; keep the fiducial in the ROI over the whole sweep"
+        )
+    capture = min(z_hi, sweep_hi) - max(z_lo, sweep_lo)
+    if capture < min_capture_fraction * sweep_span:
+        issues.append(
+            f"capture range inside the sweep too small ({max(0.0, capture):0.3f} um of {sweep_span:0.3f} um swept)"
+        )
+    if not sweep_lo <= cal.z_focus_um <= sweep_hi:
+        issues.append("fitted focus lies outside the sweep; recentre the sweep on focus")
+    return issues
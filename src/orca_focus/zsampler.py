@@ -0,0 +1,262 @@
+"""Background high-rate Z readback for piezo stages.
+
+`StageZSampler` polls the stage position sensor on its own thread at a fixed
+rate into a ring buffer and publishes a filtered `ZSnapshot` after every
+sample. The snapshot is an immutable object swapped in with a single
+attribute assignment, so readers never take a lock and never wait on the
+hardware.
+
+Position and velocity come from a least-squares line through the most recent
+`window` samples (evaluated at the newest sample time); the noise estimate is
+the RMS residual about that line.
+"""
+
+from __future__ import annotations
+
+import math
+import threading
+import time
+from dataclasses import dataclass
+from typing import Callable
+
+from .interfaces import StageInterface
+
+
+@dataclass(frozen=True, slots=True)
+class ZSnapshot:
+    """Filtered stage position at `timestamp_s` (host `time.monotonic()`)."""
+
+    timestamp_s: float
+    z_um: float
+    velocity_um_s: float
+    noise_um: float
+    raw_z_um: float
+    n_samples: int
+
+
+def _line_fit(ts: list[float], zs: list[float]) -> tuple[float, float, float]:
+    """Fit z = a + b*(t - t_last); return (a, b, rms residual)."""
+
+    n = len(ts)
+    t_last = ts[-1]
+    if n == 1:
+        return zs[0], 0.0, 0.0
+    mean_t = sum(t - t_last for t in ts) / n
+    mean_z = sum(zs) / n
+    sxx = 0.0
+    sxz = 0.0
+    for t, z in zip(ts, zs):
+        dt = (t - t_last) - mean_t
+        sxx += dt * dt
+        sxz += dt * (z - mean_z)
+    slope = sxz / sxx if sxx > 0 else 0.0
+    intercept = mean_z - slope * mean_t
+    ss = 0.0
+    for t, z in zip(ts, zs):
+        r = z - (intercept + slope * (t - t_last))
+        ss += r * r
+    dof = max(1, n - 2)
+    return intercept, slope, math.sqrt(ss / dof)
+
+
+class StageZSampler:
+    """Poll a stage position sensor at `rate_hz` on a background thread.
+
+    `read_z` defaults to the stage's `read_sensor_z_um` when it has one
+    (encoder / sensor readback on MCL stages), else `get_z_um`.
+    """
+
+    def __init__(
+        self,
+        stage: StageInterface | None = None,
+        *,
+        read_z: Callable[[], float] | None = None,
+        rate_hz: float = 500.0,
+        window: int = 50,
+        capacity: int = 4096,
+    ) -> None:
+        if read_z is None:
+            if stage is None:
+                raise ValueError("Provide a stage or a read_z callable")
+            sensor = getattr(stage, "read_sensor_z_um", None)
+            read_z = sensor if callable(sensor) else stage.get_z_um
+        if rate_hz <= 0:
+            raise ValueError("rate_hz must be > 0")
+        if window < 2:
+            raise ValueError("window must be >= 2")
+        if capacity < window:
+            raise ValueError("capacity must be >= window")
+        self._read_z = read_z
+        self._period_s = 1.0 / float(rate_hz)
+        self._window = int(window)
+        self._capacity = int(capacity)
+        self._ts = [0.0] * self._capacity
+        self._zs = [0.0] * self._capacity
+        self._count = 0
+        self._snapshot: ZSnapshot | None = None
+        self._stop_evt = threading.Event()
+        self._thread: threading.Thread | None = None
+        self._lock = threading.Lock()
+        self._io_lock = threading.RLock()
+        self._last_error: Exception | None = None
+        self._n_errors = 0
+
+    @property
+    def rate_hz(self) -> float:
+        return 1.0 / self._period_s
+
+    @property
+    def last_error(self) -> Exception | None:
+        return self._last_error
+
+    @property
+    def n_errors(self) -> int:
+        return self._n_errors
+
+    @property
+    def n_samples(self) -> int:
+        return self._count
+
+    def snapshot(self) -> ZSnapshot | None:
+        """Latest filtered estimate; never blocks. None until the first read."""
+        return self._snapshot
+
+    def history(self, n: int | None = None) -> list[tuple[float, float]]:
+        """Copy of the newest *n* raw `(timestamp_s, z_um)` samples, oldest first."""
+
+        count = self._count
+        n_avail = min(count, self._capacity)
+        n = n_avail if n is None else max(0, min(int(n), n_avail))
+        start = count - n
+        return [(self._ts[i % self._capacity], self._zs[i % self._capacity]) for i in range(start, count)]
+
+    @property
+    def io_lock(self) -> threading.RLock:
+        """Held around each sensor read; share it to serialise other stage calls."""
+        return self._io_lock
+
+    def sample_once(self) -> ZSnapshot:
+        """Read the sensor once, store it and publish a new snapshot."""
+
+        with self._io_lock:
+            return self.add_sample(float(self._read_z()))
+
+    def add_sample(self, z_um: float) -> ZSnapshot:
+        """Store a position read elsewhere (e.g. a MonitorN readback) as a sample."""
+
+        with self._io_lock:
+            return self._store(float(z_um))
+
+    def _store(self, z: float) -> ZSnapshot:
+        t = time.monotonic()
+        count = self._count
+        slot = count % self._capacity
+        self._ts[slot] = t
+        self._zs[slot] = z
+        count += 1
+        # Publish the count only after the slot is written so history() never
+        # sees a half-written entry.
+        self._count = count
+
+        n = min(count, self._window)
+        idx = [(count - n + i) % self._capacity for i in range(n)]
+        z_fit, velocity, noise = _line_fit([self._ts[i] for i in idx], [self._zs[i] for i in idx])
+        snap = ZSnapshot(
+            timestamp_s=t,
+            z_um=z_fit,
+            velocity_um_s=velocity,
+            noise_um=noise,
+            raw_z_um=z,
+            n_samples=n,
+        )
+        self._snapshot = snap
+        return snap
+
+    def start(self) -> None:
+        with self._lock:
+            if self._thread is not None and self._thread.is_alive():
+                return
+            self._stop_evt.clear()
+            self._last_error = None
+            self._thread = threading.Thread(target=self._run_loop, daemon=True)
+            self._thread.start()
+
+    def stop(self, *, wait: bool = True) -> None:
+        self._stop_evt.set()
+        if not wait:
+            return
+        with self._lock:
+            thread = self._thread
+        if thread is not None:
+            thread.join(timeout=2.0)
+
+    def __enter__(self) -> "StageZSampler":
+        self.start()
+        return self
+
+    def __exit__(self, _exc_type, _exc, _tb) -> None:
+        self.stop()
+
+    def _run_loop(self) -> None:
+        next_t = time.monotonic()
+        while not self._stop_evt.is_set():
+            try:
+                self.sample_once()
+            except Exception as exc:  # keep sampling through transient read errors
+                self._last_error = exc
+                self._n_errors += 1
+            next_t += self._period_s
+            delay = next_t - time.monotonic()
+            if delay > 0:
+                self._stop_evt.wait(delay)
+            else:
+                # Fell behind (slow read or scheduler hiccup): restart the grid
+                # instead of bursting to catch up.
+                next_t = time.monotonic()
+
+
+class SampledStage(StageInterface):
+    """Stage adapter whose `get_z_um` returns the sampler's filtered Z.
+
+    Moves go straight to the wrapped stage. Before the sampler has produced a
+    snapshot, reads fall through to the stage. When the wrapped stage has
+    `move_and_read_z_um` (MCL MonitorN) it is forwarded, and the position it
+    returns is fed to the sampler as an extra sample.
+
+    The sampler thread and the control thread drive the same device handle,
+    so every stage call made here holds the sampler's `io_lock`; a move waits
+    for at most one in-flight sensor read.
+    """
+
+    def __init__(self, stage: StageInterface, sampler: StageZSampler) -> None:
+        self._stage = stage
+        self._sampler = sampler
+
+    @property
+    def sampler(self) -> StageZSampler:
+        return self._sampler
+
+    @property
+    def move_and_read_z_um(self) -> Callable[[float], float] | None:
+        # None (rather than a method) when the wrapped stage cannot do it, so
+        # the controller's capability check sees the wrapped stage's answer.
+        if not callable(getattr(self._stage, "move_and_read_z_um", None)):
+            return None
+        return self._move_and_read_z_um
+
+    def _move_and_read_z_um(self, target_z_um: float) -> float:
+        with self._sampler.io_lock:
+            z = float(self._stage.move_and_read_z_um(target_z_um))
+            self._sampler.add_sample(z)
+        return z
+
+    def get_z_um(self) -> float:
+        snap = self._sampler.snapshot()
+        if snap is None:
+            with self._sampler.io_lock:
+                return self._stage.get_z_um()
+        return snap.z_um
+
+    def move_z_um(self, target_z_um: float) -> None:
+        with self._sampler.io_lock:
+            self._stage.move_z_um(target_z_um)
@@ -1,7 +1,14 @@
 import pytest
 import time
 
-from orca_focus.autofocus import AstigmaticAutofocusController, AutofocusConfig, AutofocusWorker
+from orca_focus.autofocus import (
+    AdaptiveLoopRate,
+    AstigmaticAutofocusController,
+    AutofocusConfig,
+    AutofocusSample,
+    AutofocusWorker,
+    RoiTracker,
+)
 from orca_focus.calibration import FocusCalibration
 from orca_focus.focus_metric import Roi
 from orca_focus.hardware import MclNanoZStage, SimulatedCamera, SimulatedScene
@@ -243,6 +250,33 @@ def test_controller_skips_duplicate_frames() -> None:
         assert s3.control_applied is True  # new timestamp → processed
 
 
+def test_controller_resyncs_when_frame_numbering_restarts() -> None:
+    """Indices 5, 6, 0, 1: a restarted acquisition must not freeze the loop."""
+
+    class _RestartingCamera:
+        def __init__(self) -> None:
+            self.indices = [5, 6, 6, 0, 1, 3]
+
+        def get_frame(self) -> CameraFrame:
+            index = self.indices.pop(0)
+            return CameraFrame(image=[[0.0] * 64 for _ in range(64)], timestamp_s=float(index), frame_index=index)
+
+    controller = AstigmaticAutofocusController(
+        camera=_RestartingCamera(),
+        stage=MclNanoZStage(),
+        config=AutofocusConfig(roi=Roi(x=20, y=20, width=24, height=24), kp=0.8, ki=0.0),
+        calibration=FocusCalibration(error_at_focus=0.0, error_to_um=2.8),
+    )
+
+    from unittest.mock import patch
+
+    with patch("orca_focus.autofocus.astigmatic_error_signal", return_value=0.2):
+        applied = [controller.run_step().control_applied for _ in range(6)]
+
+    assert applied == [True, True, False, True, True, True]
+    assert controller.frames_dropped == 1  # only the 1 -> 3 gap; the reset is not a loss
+
+
 def test_controller_rejects_invalid_loop_hz() -> None:
     stage = MclNanoZStage()
     camera = SimulatedCamera(stage=stage)
@@ -415,3 +449,205 @@ def test_controller_rejects_invalid_max_dt_s() -> None:
         )
 
     camera.stop()
+
+
+class _MonitoringStage:
+    def __init__(self, z_um: float) -> None:
+        self.z_um = z_um
+        self.reads = 0
+        self.writes = 0
+        self.monitors = 0
+
+    def get_z_um(self) -> float:
+        self.reads += 1
+        return self.z_um
+
+    def move_z_um(self, target_z_um: float) -> None:
+        self.writes += 1
+        self.z_um = target_z_um
+
+    def move_and_read_z_um(self, target_z_um: float) -> float:
+        self.monitors += 1
+        measured = self.z_um
+        self.z_um = target_z_um
+        return measured
+
+
+def test_controller_uses_combined_move_and_read_when_available() -> None:
+    stage = _MonitoringStage(z_um=2.0)
+    scene = SimulatedScene(focal_plane_um=0.0, alpha_px_per_um=0.25)
+    camera = SimulatedCamera(stage=stage, scene=scene)
+    camera.start()
+    controller = AstigmaticAutofocusController(
+        camera=camera,
+        stage=stage,
+        config=AutofocusConfig(roi=Roi(x=20, y=20, width=24, height=24), kp=0.8, ki=0.0, max_step_um=0.2),
+        calibration=FocusCalibration(error_at_focus=0.0, error_to_um=2.8),
+    )
+
+    samples = [controller.run_step() for _ in range(10)]
+    camera.stop()
+
+    assert all(s.control_applied for s in samples)
+    assert stage.monitors == 10
+    assert stage.writes == 0
+    # SimulatedCamera reads Z once per frame; the controller reads it once on
+    # the first step only and then reuses the commanded setpoint.
+    assert stage.reads == 10 + 1
+    assert samples[1].stage_z_um == pytest.approx(samples[0].commanded_z_um)
+    assert abs(stage.z_um) < 2.0
+
+
+def _quiet_sample(error_um: float = 0.0, intensity: float = 1000.0) -> AutofocusSample:
+    return AutofocusSample(
+        timestamp_s=0.0,
+        error=0.0,
+        error_um=error_um,
+        stage_z_um=0.0,
+        commanded_z_um=0.0,
+        roi_total_intensity=intensity,
+        control_applied=False,
+    )
+
+
+def test_adaptive_loop_rate_backs_off_in_deadband_and_recovers_on_disturbance() -> None:
+    rate = AdaptiveLoopRate(
+        AutofocusConfig(
+            roi=Roi(x=0, y=0, width=4, height=4),
+            loop_hz=40.0,
+            adaptive_rate=True,
+            min_loop_hz=10.0,
+            adaptive_settle_steps=3,
+            adaptive_backoff=0.5,
+        )
+    )
+    rates = [rate.update(_quiet_sample(0.01)) for _ in range(12)]
+    assert rates[:3] == [40.0, 40.0, 20.0]
+    assert rates[-1] == 10.0  # floored at min_loop_hz
+
+    assert rate.update(_quiet_sample(0.5)) == 40.0  # error left the deadband
+    for _ in range(6):
+        rate.update(_quiet_sample())
+    assert rate.hz == 10.0
+    assert rate.update(_quiet_sample(intensity=1500.0)) == 40.0  # sudden intensity change
+
+    for _ in range(6):
+        rate.update(_quiet_sample(intensity=1500.0))
+    assert rate.update(_quiet_sample(intensity=0.0), measured=False) == 10.0  # stale frame: hold
+    # Inside the deadband but the integrator still moved the stage: full rate.
+    moving = _quiet_sample(intensity=1500.0)
+    moving.control_applied = True
+    assert rate.update(moving) == 40.0
+    for _ in range(6):
+        rate.update(_quiet_sample(intensity=1500.0))
+    assert rate.update(_quiet_sample(intensity=200.0), measured=False) == 40.0  # frozen step: full rate
+
+
+def test_controller_adaptive_rate_reports_rate_and_retunes_camera() -> None:
+    class _RateCamera(SimulatedCamera):
+        def __init__(self, **kwargs) -> None:
+            super().__init__(**kwargs)
+            self.rates: list[float] = []
+
+        def set_frame_rate_hz(self, hz: float) -> None:
+            self.rates.append(hz)
+
+    stage = MclNanoZStage()
+    camera = _RateCamera(stage=stage, scene=SimulatedScene(focal_plane_um=0.0, alpha_px_per_um=0.25))
+    camera.start()
+    controller = AstigmaticAutofocusController(
+        camera=camera,
+        stage=stage,
+        config=AutofocusConfig(
+            roi=Roi(x=20, y=20, width=24, height=24),
+            loop_hz=50.0,
+            command_deadband_um=0.5,
+            adaptive_rate=True,
+            min_loop_hz=12.5,
+            adaptive_settle_steps=2,
+            adaptive_camera_rate=True,
+        ),
+        calibration=FocusCalibration(error_at_focus=0.0, error_to_um=2.8),
+    )
+    samples = [controller.run_step() for _ in range(8)]
+    camera.stop()
+
+    assert samples[0].loop_hz == 50.0
+    assert samples[-1].loop_hz == 12.5
+    assert controller.loop_hz == 12.5
+    assert camera.rates == [25.0, 12.5]
+
+    with pytest.raises(ValueError, match="adaptive_backoff"):
+        AstigmaticAutofocusController(
+            camera=camera,
+            stage=stage,
+            config=AutofocusConfig(roi=Roi(x=20, y=20, width=24, height=24), adaptive_rate=True, adaptive_backoff=1.0),
+            calibration=FocusCalibration(error_at_focus=0.0, error_to_um=2.8),
+        )
+
+
+def test_roi_tracker_applies_hysteresis_and_batches_moves() -> None:
+    config = AutofocusConfig(
+        roi=Roi(x=10, y=10, width=16, height=16),
+        roi_tracking=True,
+        roi_track_threshold_px=2.0,
+        roi_track_settle_steps=3,
+        roi_track_min_interval_s=5.0,
+    )
+    tracker = RoiTracker(config, config.roi)
+    centre = 10 + 7.5
+    shape = (64, 64)
+
+    # Jitter inside the threshold never moves the ROI.
+    assert all(tracker.update(centre + d, centre - d, shape, 0.0) is None for d in (1.5, -1.9, 2.0))
+    # An offset must persist for settle_steps before the ROI moves by its mean.
+    assert tracker.update(centre + 3.0, centre, shape, 1.0) is None
+    assert tracker.update(centre + 4.0, centre, shape, 1.1) is None
+    assert tracker.update(centre + 5.0, centre, shape, 1.2) == Roi(x=14, y=10, width=16, height=16)
+    # Further moves wait for min_interval_s, and stay inside the frame.
+    for t in (2.0, 3.0, 4.0, 5.0):
+        assert tracker.update(100.0, centre, shape, t) is None
+    assert tracker.update(100.0, centre, shape, 6.3) == Roi(x=48, y=10, width=16, height=16)
+    assert tracker.moves == 2
+
+
+def test_controller_roi_tracking_follows_drifting_bead() -> None:
+    np = pytest.importorskip("numpy")
+
+    class _DriftingBead:
+        def __init__(self) -> None:
+            self.x = 20.0
+            self.index = 0
+
+        def get_frame(self) -> CameraFrame:
+            yy, xx = np.mgrid[0:64, 0:64]
+            image = 1000.0 * np.exp(-((xx - self.x) ** 2 + (yy - 20.0) ** 2) / (2 * 1.5**2))
+            self.index += 1
+            self.x += 0.5
+            return CameraFrame(image=image, timestamp_s=float(self.index), frame_index=self.index)
+
+    moves: list[Roi] = []
+    recorded: list[Roi] = []
+    controller = AstigmaticAutofocusController(
+        camera=_DriftingBead(),
+        stage=MclNanoZStage(),
+        config=AutofocusConfig(
+            roi=Roi(x=12, y=12, width=17, height=17),
+            edge_margin_px=2.0,
+            roi_tracking=True,
+            roi_track_settle_steps=2,
+            roi_track_min_interval_s=0.0,
+        ),
+        calibration=FocusCalibration(error_at_focus=0.0, error_to_um=1.0),
+        on_step=lambda _frame, _sample, roi: recorded.append(roi),
+        on_roi_change=moves.append,
+    )
+    samples = [controller.run_step(dt_s=0.01) for _ in range(40)]
+
+    # The bead drifted 20 px; the ROI followed in a few batched moves and the
+    # edge guard never had to freeze the loop.
+    assert 2 <= controller.roi_moves == len(moves) <= 10
+    assert abs(controller.roi.x + 8 - 39.5) <= 3.0
+    assert all(roi in [Roi(x=12, y=12, width=17, height=17), *moves] for roi in recorded)
+    # Edge-frozen steps report error == 0.0; the first frame is exactly centred.
+    assert all(s.error != 0.0 for s in samples[1:])
@@ -0,0 +1,134 @@
+import pytest
+
+from orca_focus.bench import bench_mcl_wrapper_overhead
+
+
+def test_bench_mcl_wrapper_overhead_reports_per_call_times() -> None:
+    out = bench_mcl_wrapper_overhead(n_calls=200)
+
+    assert out["n_calls"] == 200.0
+    for key in ("direct_read_ns", "stage_read_ns", "probe_read_ns", "direct_write_ns", "stage_write_ns"):
+        assert out[key] > 0.0
+
+
+def test_bench_mcl_wrapper_overhead_rejects_non_positive_calls() -> None:
+    with pytest.raises(ValueError):
+        bench_mcl_wrapper_overhead(n_calls=0)
+
+
+def test_bench_mcl_stage_path_shows_monitor_saves_a_round_trip() -> None:
+    from orca_focus.bench import bench_mcl_stage_path
+
+    out = bench_mcl_stage_path(n_calls=10, latency_s=0.002)
+
+    for path in ("dll", "wrapper"):
+        assert out[f"{path}_monitor_step_us"] < out[f"{path}_read_write_step_us"]
+        assert out[f"{path}_read_us"] >= 2000.0
+
+
+def test_bench_simulated_loop_converges_and_reports_rates() -> None:
+    pytest.importorskip("numpy")
+    from orca_focus.bench import bench_simulated_loop
+
+    out = bench_simulated_loop(n_steps=200)
+
+    assert out["loop_hz"] > 0 and out["render_hz"] > 0 and out["render_stack_hz"] > 0
+    assert abs(out["final_z_um"]) < 0.2
+
+
+def test_bench_mm_frame_source_drain_processes_every_frame() -> None:
+    pytest.importorskip("numpy")
+    from orca_focus.bench import bench_mm_frame_source
+
+    out = bench_mm_frame_source(n_reads=20, frames_per_read=3, size=16)
+
+    assert out["drain_frames_processed"] == out["frames_produced"] == 60.0
+    assert out["live_frames_processed"] == 20.0
+    assert out["drain_bridge_calls_per_read"] > out["live_bridge_calls_per_read"]
+
+
+def test_bench_mm_step_round_trips_combined_read_saves_calls() -> None:
+    from orca_focus.bench import bench_mm_step_round_trips
+
+    out = bench_mm_step_round_trips(n_steps=20, call_latency_s=0.0, steps_per_frame=2, size=8)
+
+    assert out["token_calls_per_step"] == pytest.approx(4.5, abs=0.05)
+    assert out["combined_calls_per_step"] == 4.0
+
+
+def test_bench_loop_jitter_reports_thread_and_process_loops() -> None:
+    pytest.importorskip("numpy")
+    from orca_focus.bench import bench_loop_jitter
+
+    result = bench_loop_jitter(0.3, loop_hz=100.0, gui_load=False)
+
+    for prefix in ("thread_", "process_"):
+        assert result[prefix + "steps"] > 5
+        assert result[prefix + "jitter_rms_ms"] >= 0.0
+        assert result[prefix + "max_interval_ms"] >= result[prefix + "jitter_p99_ms"] >= 0.0
+
+
+def test_run_suite_quick_subset_reports_environment_and_results() -> None:
+    from orca_focus.bench import SCHEMA_VERSION, run_suite
+
+    report = run_suite(quick=True, only=["frame_conversion", "mcl_wrapper_overhead"], repeats=2)
+
+    assert report["schema"] == SCHEMA_VERSION
+    assert set(report["results"]) == {"frame_conversion", "mcl_wrapper_overhead"}
+    assert report["results"]["frame_conversion"]["nested_list_us"] > 0
+    assert report["environment"]["python"]
+
+
+def test_run_suite_rejects_unknown_benchmark() -> None:
+    from orca_focus.bench import run_suite
+
+    with pytest.raises(ValueError, match="Unknown benchmark"):
+        run_suite(only=["nope"])
+
+
+def test_compare_to_baseline_respects_direction_and_overrides() -> None:
+    from orca_focus.bench import compare_to_baseline
+
+    baseline = {
+        "results": {"loop": {"step_us": 10.0, "loop_hz": 100.0, "n_steps": 5.0, "read_us": 10.0}},
+        "thresholds": {"loop.read_us": 1.0},
+    }
+    current = {"results": {"loop": {"step_us": 14.0, "loop_hz": 120.0, "n_steps": 9.0, "read_us": 15.0}}}
+
+    changes = {c.metric: c for c in compare_to_baseline(current, baseline, threshold=0.25)}
+
+    assert set(changes) == {"step_us", "loop_hz", "read_us"}  # n_steps is informational
+    assert changes["step_us"].regressed and changes["step_us"].worse_by == pytest.approx(0.4)
+    assert not changes["loop_hz"].regressed and changes["loop_hz"].worse_by == pytest.approx(-0.2)
+    assert not changes["read_us"].regressed  # 50% worse but tolerance is 100%
+
+    with pytest.raises(ValueError, match="iteration counts differ"):
+        compare_to_baseline({**current, "quick": True}, {**baseline, "quick": False})
+
+
+def test_bench_main_writes_json_and_fails_on_regression(tmp_path) -> None:
+    import json
+
+    from orca_focus.cli import main
+
+    out = tmp_path / "run.json"
+    assert main(["bench", "--quick", "--repeats", "1", "--only", "frame_conversion", "--out", str(out)]) == 0
+    report = json.loads(out.read_text())
+    assert "frame_conversion" in report["results"]
+
+    # A baseline 100x faster than anything achievable must flag a regression.
+    fast = json.loads(out.read_text())
+    fast["results"]["frame_conversion"] = {
+        k: v / 100 for k, v in fast["results"]["frame_conversion"].items() if k.endswith("_us")
+    }
+    baseline = tmp_path / "baseline.json"
+    baseline.write_text(json.dumps(fast))
+    rerun = tmp_path / "rerun.json"
+    code = main(
+        ["bench", "--quick", "--repeats", "1", "--only", "frame_conversion", "--baseline", str(baseline), "--out", str(rerun)]
+    )
+    assert code == 1
+    assert "frame_conversion.nested_list_us" in json.loads(rerun.read_text())["comparison"]["regressions"]
+
+    # A full run must not be judged against a --quick baseline.
+    assert main(["bench", "--repeats", "1", "--only", "frame_conversion", "--baseline", str(baseline)]) == 2
@@ -0,0 +1,141 @@
+import threading
+import time
+
+import pytest
+
+from orca_focus.autofocus import AstigmaticAutofocusController, AutofocusConfig
+from orca_focus.broadcast import FrameBroadcaster
+from orca_focus.calibration import FocusCalibration
+from orca_focus.focus_metric import Roi
+from orca_focus.interfaces import CameraFrame
+
+
+class _CountingCamera:
+    """Returns the latest frame on every call; a new one after each `advance`."""
+
+    def __init__(self):
+        self.index = 0
+        self.calls = 0
+        self.lock = threading.Lock()
+
+    def advance(self, n=1):
+        with self.lock:
+            self.index += n
+
+    def get_frame(self):
+        with self.lock:
+            self.calls += 1
+            i = self.index
+        return CameraFrame(image=[[float(i), 1.0], [1.0, 1.0]], timestamp_s=float(i), frame_index=i)
+
+
+def test_broadcaster_publishes_each_new_frame_once_to_every_subscriber() -> None:
+    camera = _CountingCamera()
+    broadcaster = FrameBroadcaster(camera)
+    newest = broadcaster.subscribe("viewer")
+    queued = broadcaster.subscribe("recorder", mode="queue", maxlen=8)
+
+    assert broadcaster.poll_once() is True
+    assert broadcaster.poll_once() is False  # repeat of frame 0
+    for _ in range(3):
+        camera.advance()
+        broadcaster.poll_once()
+
+    assert broadcaster.frames_published == 4
+    assert newest.get_frame().frame_index == 3
+    assert newest.frames_dropped == 3
+    assert [queued.poll().frame_index for _ in range(4)] == [0, 1, 2, 3]
+    assert queued.poll() is None
+    assert broadcaster.stats() == {
+        "viewer": {"delivered": 1, "dropped": 3},
+        "recorder": {"delivered": 4, "dropped": 0},
+    }
+
+
+def test_broadcaster_queue_evicts_oldest_and_counts_drops() -> None:
+    camera = _CountingCamera()
+    broadcaster = FrameBroadcaster(camera)
+    queued = broadcaster.subscribe("recorder", mode="queue", maxlen=2)
+    for _ in range(5):
+        broadcaster.poll_once()
+        camera.advance()
+
+    assert queued.frames_dropped == 3
+    assert [queued.poll().frame_index, queued.poll().frame_index] == [3, 4]
+
+
+def test_subscription_shares_frames_without_copying_and_freezes_ndarrays() -> None:
+    np = pytest.importorskip("numpy")
+    image = np.ones((2, 2))
+
+    class _Camera:
+        def get_frame(self):
+            return CameraFrame(image=image, timestamp_s=1.0, frame_index=0)
+
+    broadcaster = FrameBroadcaster(_Camera())
+    a = broadcaster.subscribe("a")
+    b = broadcaster.subscribe("b")
+    broadcaster.poll_once()
+
+    frame_a, frame_b = a.get_frame(), b.get_frame()
+    assert frame_a.image is image and frame_b.image is image
+    with pytest.raises(ValueError):
+        frame_a.image[0, 0] = 5.0
+
+
+def test_subscription_get_frame_returns_last_frame_on_timeout_and_raises_before_first() -> None:
+    camera = _CountingCamera()
+    broadcaster = FrameBroadcaster(camera)
+    sub = broadcaster.subscribe("controller", timeout_s=0.01)
+
+    with pytest.raises(TimeoutError):
+        sub.get_frame()
+    broadcaster.poll_once()
+    first = sub.get_frame()
+    assert sub.get_frame() is first
+
+
+def test_unsubscribed_subscription_stops_receiving_frames() -> None:
+    camera = _CountingCamera()
+    broadcaster = FrameBroadcaster(camera)
+    sub = broadcaster.subscribe("calibration")
+    sub.close()
+    broadcaster.poll_once()
+
+    assert sub.poll() is None
+    assert broadcaster.subscriptions() == ()
+
+
+def test_controller_and_viewer_share_one_camera_reader_thread() -> None:
+    camera = _CountingCamera()
+    broadcaster = FrameBroadcaster(camera, idle_sleep_s=0.0005)
+    viewer = broadcaster.subscribe("viewer")
+    controller = AstigmaticAutofocusController(
+        camera=broadcaster.subscribe("controller", timeout_s=0.5),
+        stage=_Stage(),
+        config=AutofocusConfig(roi=Roi(x=0, y=0, width=2, height=2), kp=0.1, ki=0.0),
+        calibration=FocusCalibration(error_at_focus=0.0, error_to_um=1.0),
+    )
+    with broadcaster:
+        seen = []
+        for _ in range(5):
+            camera.advance()
+            sample = controller.run_step(dt_s=0.01)
+            seen.append(sample.frame_index)
+            time.sleep(0.002)
+
+    # Each step waited for a fresh frame; the viewer saw the same stream.
+    assert seen == sorted(set(seen)) and len(seen) == 5
+    assert viewer.poll() is not None
+    assert viewer.frames_delivered + viewer.frames_dropped == broadcaster.frames_published
+
+
+class _Stage:
+    def __init__(self):
+        self.z = 0.0
+
+    def get_z_um(self):
+        return self.z
+
+    def move_z_um(self, target_z_um):
+        self.z = target_z_um
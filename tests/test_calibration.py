@@ -1,3 +1,5 @@
+import time
+
 import pytest
 
 from orca_focus.calibration import (
@@ -8,6 +10,7 @@ from orca_focus.calibration import (
     fit_linear_calibration_with_report,
     load_calibration_samples_csv,
     save_calibration_samples_csv,
+    waveform_calibrate,
 )
 from orca_focus.focus_metric import Roi
 from orca_focus.interfaces import CameraFrame
@@ -272,3 +275,107 @@ def test_fit_linear_calibration_ignores_non_finite_samples() -> None:
 
     assert cal.error_to_um == pytest.approx(2.0)
     assert cal.error_at_focus == pytest.approx(0.0)
+
+
+def test_waveform_calibrate_with_fake_nanodrive_recovers_slope_sign() -> None:
+    from orca_focus.fake_mcl import FakeNanoDrive
+    from orca_focus.hardware import MclNanoZStage, SimulatedCamera, SimulatedScene
+
+    stage = MclNanoZStage(wrapper_module=FakeNanoDrive(initial_z_um=10.0))
+    camera = SimulatedCamera(stage=stage, scene=SimulatedScene(focal_plane_um=10.0))
+    camera.start()
+
+    samples = waveform_calibrate(
+        camera,
+        stage,
+        Roi(x=20, y=20, width=24, height=24),
+        z_min_um=9.0,
+        z_max_um=11.0,
+        n_steps=5,
+        point_interval_ms=5.0,
+    )
+    camera.stop()
+
+    assert len(samples) >= 6
+    assert {round(s.z_um, 6) for s in samples} <= {9.0, 9.5, 10.0, 10.5, 11.0}
+    report = fit_linear_calibration_with_report(samples, robust=True)
+    assert report.calibration.error_to_um > 0
+    assert stage.get_z_um() == pytest.approx(9.0)
+
+
+def test_waveform_calibrate_clock_mode_matches_frames_in_order() -> None:
+    from orca_focus.fake_mcl import FakeNanoDrive
+
+    class _ClockedCamera:
+        """Free-running stand-in for a camera triggered by the stage clock."""
+
+        def __init__(self) -> None:
+            self.i = 0
+
+        def get_frame(self) -> CameraFrame:
+            self.i += 1
+            time.sleep(0.002)
+            return CameraFrame(image=[[float(self.i)] * 8 for _ in range(8)], timestamp_s=float(self.i))
+
+    drive = FakeNanoDrive(initial_z_um=5.0)
+    from orca_focus.hardware import MclNanoZStage
+
+    stage = MclNanoZStage(wrapper_module=drive)
+    samples = waveform_calibrate(
+        _ClockedCamera(),
+        stage,
+        Roi(x=0, y=0, width=8, height=8),
+        z_min_um=4.0,
+        z_max_um=6.0,
+        n_steps=3,
+        point_interval_ms=5.0,
+        match="clock",
+    )
+
+    assert [s.z_um for s in samples] == pytest.approx([4.0, 5.0, 6.0, 6.0, 5.0, 4.0])
+    assert drive.clock_pulses == 6
+
+
+def test_waveform_calibrate_requires_waveform_stage() -> None:
+    class _Stage:
+        def move_z_um(self, target_z_um: float) -> None:
+            pass
+
+        def get_z_um(self) -> float:
+            return 0.0
+
+    with pytest.raises(ValueError, match="run_z_waveform"):
+        waveform_calibrate(
+            camera=None,
+            stage=_Stage(),
+            roi=Roi(x=0, y=0, width=4, height=4),
+            z_min_um=-0.2,
+            z_max_um=0.2,
+            n_steps=3,
+        )
+
+
+def test_waveform_calibrate_leaves_point_interval_range_to_the_stage() -> None:
+    from orca_focus.hardware import MclNanoZStage, SimulatedCamera
+
+    class _SlowWaveformStage(MclNanoZStage):
+        """A stage without the Nano-Drive's 5 ms dwell limit."""
+
+        def run_z_waveform(self, targets_um, point_interval_ms, *, frame_clock=None):
+            self.intervals = getattr(self, "intervals", []) + [point_interval_ms]
+            for z in targets_um:
+                self.move_z_um(z)
+                time.sleep(point_interval_ms / 1000.0)
+            return list(targets_um)
+
+    slow = _SlowWaveformStage()
+    camera = SimulatedCamera(stage=slow)
+    camera.start()
+    sweep = dict(z_min_um=-0.2, z_max_um=0.2, n_steps=3, point_interval_ms=10.0)
+    waveform_calibrate(camera, slow, Roi(x=20, y=20, width=24, height=24), **sweep)
+    assert slow.intervals == [10.0]
+
+    mcl = MclNanoZStage()
+    with pytest.raises(ValueError, match="point_interval_ms"):
+        waveform_calibrate(SimulatedCamera(stage=mcl), mcl, Roi(x=0, y=0, width=4, height=4), **sweep)
+    camera.stop()
\ No newline at end of file
@@ -1,3 +1,4 @@
+import json
 from pathlib import Path
 from unittest.mock import patch
 
@@ -61,7 +62,7 @@ def test_build_camera_and_stage_respects_simulate_stage_override(tmp_path: Path)
 
     args = build_parser().parse_args(["--camera", "orca", "--stage", "simulate"])
 
-    with patch("orca_focus.cli.create_pylablib_frame_source", return_value=lambda: ([[0.0]], 0.0)):
+    with patch("orca_focus.pylablib_camera.create_pylablib_frame_source", return_value=lambda: ([[0.0]], 0.0)):
         camera, stage = _build_camera_and_stage(args)
 
     # Simulate stage backend should stay in-memory even with hardware camera mode.
@@ -88,6 +89,38 @@ def test_build_camera_and_stage_forwards_mm_standalone_flag() -> None:
             _build_camera_and_stage(args)
 
     assert create_mm.call_args.kwargs["allow_standalone_core"] is True
+    assert create_mm.call_args.kwargs["mode"] == "live"
+    assert create_mm.call_args.kwargs["combined_read"] is False
+
+
+def test_build_camera_and_stage_forwards_mm_combined_read() -> None:
+    from orca_focus.cli import _build_camera_and_stage
+
+    args = build_parser().parse_args(["--camera", "micromanager", "--stage", "simulate", "--mm-combined-read"])
+
+    with patch("orca_focus.micromanager.create_micromanager_frame_source") as create_mm:
+        mm_source = lambda: ([[0.0]], 0.0)
+        mm_source.core = object()
+        create_mm.return_value = mm_source
+        _build_camera_and_stage(args)
+
+    assert create_mm.call_args.kwargs["combined_read"] is True
+
+
+def test_build_camera_and_stage_forwards_mm_drain_mode() -> None:
+    from orca_focus.cli import _build_camera_and_stage
+
+    args = build_parser().parse_args(["--camera", "micromanager", "--stage", "simulate", "--mm-read-mode", "drain"])
+
+    with patch("orca_focus.micromanager.create_micromanager_frame_source") as create_mm:
+        mm_source = lambda: ([[0.0]], 0.0)
+        mm_source.core = object()
+        create_mm.return_value = mm_source
+        camera, _stage = _build_camera_and_stage(args)
+
+    assert create_mm.call_args.kwargs["mode"] == "drain"
+    assert camera._control_source_lifecycle is True
+
 def test_build_camera_and_stage_defaults_to_mcl_stage_for_mm_camera() -> None:
     from orca_focus.cli import _build_camera_and_stage
 
@@ -103,7 +136,7 @@ def test_build_camera_and_stage_defaults_to_mcl_stage_for_mm_camera() -> None:
         camera, stage = _build_camera_and_stage(args)
 
     assert stage is mcl_stage
-    mcl_stage_cls.assert_called_once_with(dll_path="C:/path/Madlib.dll", wrapper_module=None)
+    mcl_stage_cls.assert_called_once_with(dll_path="C:/path/Madlib.dll", wrapper_module=None, use_encoder=False)
     assert camera is not None
 
 
@@ -126,7 +159,17 @@ def test_build_camera_and_stage_supports_explicit_micromanager_stage_for_mm_came
             _camera, stage = _build_camera_and_stage(args)
 
     assert stage is mm_stage
-    mm_stage_cls.assert_called_once_with(core=core)
+    mm_stage_cls.assert_called_once_with(core=core, async_moves=False)
+
+
+def test_build_stage_forwards_mm_stage_async_flag() -> None:
+    from orca_focus.cli import _build_stage
+
+    args = build_parser().parse_args(["--stage", "micromanager", "--mm-stage-async"])
+    with patch("orca_focus.micromanager.MicroManagerStage") as mm_stage_cls:
+        _build_stage(args, mm_core=object())
+
+    assert mm_stage_cls.call_args.kwargs["async_moves"] is True
 
 def test_build_stage_mcl_failure_has_actionable_message() -> None:
     from orca_focus.cli import _build_stage
@@ -158,7 +201,7 @@ def test_main_stops_camera_when_viewer_raises(tmp_path: Path) -> None:
 
     with patch("sys.argv", ["orca-focus", "--show-live", "--calibration-csv", str(csv_path)]), \
         patch("orca_focus.cli._build_camera_and_stage", return_value=(dummy_camera, object())), \
-        patch("orca_focus.cli.launch_autofocus_viewer", side_effect=RuntimeError("boom")):
+        patch("orca_focus.interactive.launch_autofocus_viewer", side_effect=RuntimeError("boom")):
         with pytest.raises(RuntimeError, match="boom"):
             main()
 
@@ -185,7 +228,7 @@ def test_main_starts_micromanager_camera_wrapper_for_get_frame(tmp_path: Path) -
 
     with patch("sys.argv", ["orca-focus", "--camera", "micromanager", "--show-live", "--calibration-csv", str(csv_path)]), \
         patch("orca_focus.cli._build_camera_and_stage", return_value=(dummy_camera, object())), \
-        patch("orca_focus.cli.launch_autofocus_viewer", side_effect=RuntimeError("boom")):
+        patch("orca_focus.interactive.launch_autofocus_viewer", side_effect=RuntimeError("boom")):
         with pytest.raises(RuntimeError, match="boom"):
             main()
 
@@ -287,3 +330,153 @@ def test_main_forwards_max_dt_s(tmp_path: Path) -> None:
 
     config = ctrl_cls.call_args.kwargs["config"]
     assert config.max_dt_s == 0.05
+
+
+def test_load_startup_calibration_zhuang_model(tmp_path: Path) -> None:
+    from orca_focus.zhuang import ZhuangFocusCalibration, zhuang_error
+
+    q = (1.0, 0.0, 0.4, 0.0, 0.0, 0.5, 0.0, 0.0, 0.5)
+    rows = ["z_um,error,weight"] + [f"{z:0.3f},{zhuang_error(z, q):0.8f},1" for z in [-0.8 + 0.08 * i for i in range(21)]]
+    csv_path = tmp_path / "calibration_sweep.csv"
+    csv_path.write_text("\n".join(rows) + "\n", encoding="utf-8")
+
+    calibration = _load_startup_calibration(str(csv_path), model="zhuang")
+
+    assert isinstance(calibration, ZhuangFocusCalibration)
+    assert calibration.error_to_z_offset_um(0.0) == pytest.approx(0.0, abs=1e-6)
+    assert build_parser().parse_args(["--calibration-model", "zhuang"]).calibration_model == "zhuang"
+
+
+def test_load_startup_calibration_uses_registry_without_refit(tmp_path: Path, monkeypatch) -> None:
+    from orca_focus import cli
+    from orca_focus.registry import CalibrationKey, CalibrationRegistry
+
+    csv_path = tmp_path / "calibration_sweep.csv"
+    csv_path.write_text("z_um,error,weight\n-1.0,-0.5,1\n0.0,0.0,1\n1.0,0.5,1\n", encoding="utf-8")
+    key = CalibrationKey(objective="100x", camera="simulate", roi_width=24, roi_height=24)
+
+    first = _load_startup_calibration(str(csv_path), registry=CalibrationRegistry(tmp_path / "reg"), key=key)
+
+    def _no_fit(*_args, **_kwargs):
+        raise AssertionError("unchanged calibration must not be refitted")
+
+    monkeypatch.setattr(cli, "fit_linear_calibration_with_report", _no_fit)
+    second = _load_startup_calibration(str(csv_path), registry=CalibrationRegistry(tmp_path / "reg"), key=key)
+
+    assert second.error_to_um == pytest.approx(first.error_to_um)
+    assert second.error_at_focus == 0.0
+
+
+def test_main_z_sampler_feeds_controller_filtered_stage(tmp_path: Path) -> None:
+    from orca_focus.zsampler import SampledStage
+
+    csv_path = tmp_path / "calibration_sweep.csv"
+    csv_path.write_text("z_um,error,weight\n-1.0,-0.5,1\n0.0,0.0,1\n1.0,0.5,1\n", encoding="utf-8")
+
+    with patch(
+        "sys.argv",
+        ["orca-focus", "--duration", "0.01", "--z-sampler-hz", "200", "--calibration-csv", str(csv_path)],
+    ), patch("orca_focus.cli.AstigmaticAutofocusController") as ctrl_cls:
+        ctrl_cls.return_value.run.return_value = []
+        assert main() == 0
+
+    stage = ctrl_cls.call_args.kwargs["stage"]
+    assert isinstance(stage, SampledStage)
+    assert not stage.sampler._thread.is_alive()
+
+
+def test_main_records_headless_loop(tmp_path: Path, capsys) -> None:
+    pytest.importorskip("numpy")
+    from orca_focus.recorder import Recording
+
+    csv_path = tmp_path / "calibration_sweep.csv"
+    csv_path.write_text("z_um,error,weight\n-1.0,-0.5,1\n0.0,0.0,1\n1.0,0.5,1\n", encoding="utf-8")
+    out_dir = tmp_path / "rec"
+
+    with patch(
+        "sys.argv",
+        ["orca-focus", "--duration", "0.05", "--loop-hz", "200", "--calibration-csv", str(csv_path), "--record", str(out_dir)],
+    ):
+        assert main() == 0
+
+    out, err = capsys.readouterr()
+    assert "recorded " in err and "recorded " not in out
+    recording = Recording(out_dir)
+    assert len(recording) > 0
+    assert recording.pixels(0).dtype.name == "uint16"
+
+
+def test_main_isolated_runs_loop_in_child_process(tmp_path: Path, capsys) -> None:
+    pytest.importorskip("numpy")
+    csv_path = tmp_path / "calibration_sweep.csv"
+    csv_path.write_text("z_um,error,weight\n-1.0,-0.5,1\n0.0,0.0,1\n1.0,0.5,1\n", encoding="utf-8")
+
+    with patch(
+        "sys.argv",
+        ["orca-focus", "--duration", "0.3", "--loop-hz", "100", "--calibration-csv", str(csv_path), "--isolated"],
+    ), patch("orca_focus.cli.SimulatedCamera") as camera_cls:
+        assert main() == 0
+
+    camera_cls.assert_not_called()  # only the child opens hardware
+    assert "isolated steps=" in capsys.readouterr().out
+
+
+def test_main_writes_trace_on_exit(tmp_path: Path, capsys) -> None:
+    from orca_focus import tracing
+
+    csv_path = tmp_path / "calibration_sweep.csv"
+    csv_path.write_text("z_um,error,weight\n-1.0,-0.5,1\n0.0,0.0,1\n1.0,0.5,1\n", encoding="utf-8")
+    trace_path = tmp_path / "run.json"
+
+    try:
+        with patch(
+            "sys.argv",
+            ["orca-focus", "--duration", "0.02", "--calibration-csv", str(csv_path), "--trace", str(trace_path)],
+        ):
+            assert main() == 0
+    finally:
+        tracing.disable()
+        tracing.reset()
+
+    events = json.loads(trace_path.read_text())["traceEvents"]
+    assert any(e["name"] == "autofocus.step" for e in events)
+    assert not tracing.is_enabled()
+    out, err = capsys.readouterr()
+    assert "wrote trace to" in err and "wrote trace" not in out
+    assert out.startswith("camera=")
+
+
+def test_main_serve_runs_daemon_until_client_shutdown(tmp_path: Path) -> None:
+    import threading
+    import time
+
+    from orca_focus.server import FocusClient
+
+    csv_path = tmp_path / "calibration_sweep.csv"
+    csv_path.write_text("z_um,error,weight\n-1.0,-0.5,1\n0.0,0.0,1\n1.0,0.5,1\n", encoding="utf-8")
+    address = f"unix:{tmp_path / 'af.sock'}"
+    result: list[int] = []
+    thread = threading.Thread(
+        target=lambda: result.append(
+            main(["serve", "--listen", address, "--start-locked", "--calibration-csv", str(csv_path)])
+        )
+    )
+    thread.start()
+
+    deadline = time.monotonic() + 5.0
+    while not (tmp_path / "af.sock").exists() and time.monotonic() < deadline:
+        time.sleep(0.01)
+    with FocusClient(address) as client:
+        assert client.status().running
+        client.shutdown()
+    thread.join(timeout=5.0)
+
+    assert result == [0]
+
+
+def test_main_serve_rejects_options_it_would_ignore(capsys) -> None:
+    with pytest.raises(SystemExit) as excinfo:
+        main(["serve", "--record", "out", "--duration", "5"])
+
+    assert excinfo.value.code == 2
+    assert "not supported with serve: --duration, --record" in capsys.readouterr().err
@@ -0,0 +1,130 @@
+import ctypes
+import time
+
+import pytest
+
+from orca_focus.fake_mcl import FakeMadlib, FakeMclError, FakeNanoDrive
+from orca_focus.hardware import MclNanoZStage
+
+
+def test_fake_nanodrive_settles_exponentially_towards_target() -> None:
+    drive = FakeNanoDrive(settle_tau_s=0.05)
+    handle = drive.init_handle()
+    drive.single_write_n(10.0, 3, handle)
+
+    early = drive.single_read_n(3, handle)
+    time.sleep(0.3)
+    late = drive.single_read_n(3, handle)
+
+    assert 0.0 <= early < 5.0
+    assert late == pytest.approx(10.0, abs=0.05)
+
+
+def test_fake_nanodrive_noise_is_seeded() -> None:
+    reads = []
+    for _ in range(2):
+        drive = FakeNanoDrive(initial_z_um=5.0, noise_um=0.01, seed=42)
+        handle = drive.init_handle()
+        reads.append([drive.single_read_n(3, handle) for _ in range(20)])
+
+    assert reads[0] == reads[1]
+    assert len(set(reads[0])) == 20
+    assert sum(reads[0]) / 20 == pytest.approx(5.0, abs=0.01)
+
+
+def test_fake_nanodrive_latency_is_applied_per_call() -> None:
+    drive = FakeNanoDrive(latency_s=0.01)
+    handle = drive.init_handle()
+
+    t0 = time.perf_counter()
+    for _ in range(5):
+        drive.single_read_n(3, handle)
+    elapsed = time.perf_counter() - t0
+
+    assert elapsed >= 0.05
+    assert drive.calls == 5
+
+
+def test_fake_nanodrive_failure_injection() -> None:
+    drive = FakeNanoDrive()
+    handle = drive.init_handle()
+    drive.inject_failures(2, code=-3)
+
+    for _ in range(2):
+        with pytest.raises(FakeMclError) as excinfo:
+            drive.single_read_n(3, handle)
+        assert excinfo.value.code == -3
+    assert drive.single_read_n(3, handle) == 0.0
+    assert drive.failures == 2
+
+    always = FakeNanoDrive(fail_probability=1.0, seed=1)
+    with pytest.raises(FakeMclError):
+        always.single_read_n(3, always.init_handle())
+
+
+def test_stage_dll_path_through_fake_madlib() -> None:
+    lib = FakeMadlib()
+    stage = MclNanoZStage(dll=lib)
+
+    stage.move_z_um(12.5)
+    assert stage.get_z_um() == pytest.approx(12.5)
+    assert stage.move_and_read_z_um(20.0) == pytest.approx(12.5)
+    assert stage.get_z_um() == pytest.approx(20.0)
+    assert lib.MCL_SingleReadN.restype is ctypes.c_double
+    assert lib.MCL_MonitorN.restype is ctypes.c_double
+
+    stage.close()
+    assert lib.device._handle_open is False
+
+
+def test_stage_dll_path_reports_injected_errors() -> None:
+    lib = FakeMadlib()
+    stage = MclNanoZStage(dll=lib)
+
+    lib.device.inject_failures(1, code=-6)
+    with pytest.raises(RuntimeError, match="status -6 often indicates"):
+        stage.move_z_um(1.0)
+    lib.device.inject_failures(1, code=-2)
+    with pytest.raises(RuntimeError, match="MCL_SingleReadN failed with status -2"):
+        stage.get_z_um()
+    lib.device.inject_failures(1, code=-1)
+    with pytest.raises(RuntimeError, match="MCL_MonitorN failed with status -1"):
+        stage.move_and_read_z_um(1.0)
+    with pytest.raises(RuntimeError, match="status -6"):
+        stage.move_z_um(500.0)
+
+
+def test_stage_dll_waveform_through_fake_madlib() -> None:
+    lib = FakeMadlib(initial_z_um=5.0)
+    stage = MclNanoZStage(dll=lib)
+
+    readback = stage.run_z_waveform([5.0, 6.0, 7.0], point_interval_ms=1.0, frame_clock=3)
+
+    assert readback == pytest.approx([5.0, 6.0, 7.0])
+    assert lib.device.waveforms_played == 1
+    assert lib.device.clock_pulses == 3
+    assert stage.get_z_um() == pytest.approx(7.0)
+
+
+def test_waveform_point_interval_outside_device_range_is_rejected() -> None:
+    drive = FakeNanoDrive()
+    handle = drive.init_handle()
+    with pytest.raises(FakeMclError) as excinfo:
+        drive.setup_load_waveform_n(3, 2, 10.0, [1.0, 2.0], handle)
+    assert excinfo.value.code == -6
+    with pytest.raises(FakeMclError):
+        drive.setup_read_waveform_n(3, 2, 0.01, handle)
+
+    stage = MclNanoZStage(dll=FakeMadlib())
+    for ms in (10.0, 0.01):
+        with pytest.raises(ValueError, match="point_interval_ms"):
+            stage.run_z_waveform([1.0, 2.0], point_interval_ms=ms)
+
+
+def test_noisy_sensor_reads_near_zero_are_not_mistaken_for_errors() -> None:
+    lib = FakeMadlib(noise_um=0.01, seed=5)
+    stage = MclNanoZStage(dll=lib)
+
+    values = [stage.get_z_um() for _ in range(50)]
+
+    assert min(values) < 0.0
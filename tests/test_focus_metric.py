@@ -1,6 +1,6 @@
 import pytest
 
-from orca_focus.focus_metric import Roi, astigmatic_error_signal, centroid_near_edge
+from orca_focus.focus_metric import Roi, astigmatic_error_signal, centroid_near_edge, roi_centroid
 from orca_focus.hardware import SimulatedScene
 
 
@@ -58,8 +58,37 @@ def test_centroid_near_edge_corner_dot() -> None:
     assert centroid_near_edge(image, Roi(x=0, y=0, width=5, height=5), margin_px=1.0) is True
 
 
+def test_roi_centroid_is_in_image_coordinates() -> None:
+    image = [[0.0] * 8 for _ in range(6)]
+    image[4][5] = 100.0
+    assert roi_centroid(image, Roi(x=3, y=2, width=4, height=4)) == pytest.approx((5.0, 4.0))
+    np = pytest.importorskip("numpy")
+    assert roi_centroid(np.asarray(image), Roi(x=3, y=2, width=4, height=4)) == pytest.approx((5.0, 4.0))
+
+
 def test_centroid_near_edge_zero_margin_never_triggers() -> None:
     """With margin_px=0, centroid_near_edge should always return False."""
     image = [[0.0] * 5 for _ in range(5)]
     image[0][0] = 100.0
     assert centroid_near_edge(image, Roi(x=0, y=0, width=5, height=5), margin_px=0) is False
+
+
+def test_metrics_accept_ndarray_frames_without_list_conversion() -> None:
+    np = pytest.importorskip("numpy")
+    from orca_focus.focus_metric import extract_roi, roi_total_intensity
+
+    scene = SimulatedScene(focal_plane_um=0.0, alpha_px_per_um=0.2)
+    roi = Roi(x=16, y=16, width=32, height=32)
+    as_list = scene.render_dot(z_um=0.7)
+    as_array = np.rint(as_list).astype(np.uint16)
+
+    patch = extract_roi(as_array, roi)
+    assert isinstance(patch, np.ndarray)
+    assert np.shares_memory(patch, as_array)
+    assert astigmatic_error_signal(as_array, roi) == pytest.approx(
+        astigmatic_error_signal(np.rint(as_list).tolist(), roi)
+    )
+    assert roi_total_intensity(as_array, roi) == pytest.approx(float(patch.astype(float).sum()))
+    assert centroid_near_edge(as_array, roi, 2.0) == centroid_near_edge(np.rint(as_list).tolist(), roi, 2.0)
+    with pytest.raises(ValueError, match="Empty image"):
+        astigmatic_error_signal(np.zeros((0, 4)), roi)
@@ -1,4 +1,6 @@
-from orca_focus.hardware import MclNanoZStage
+import pytest
+
+from orca_focus.hardware import MclNanoZStage, NotConnectedError
 
 
 class _MadlibStyleWrapper:
@@ -62,3 +64,180 @@ def test_stage_context_manager() -> None:
     with stage as managed:
         managed.move_z_um(1.0)
     assert stage.get_z_um() == 1.0
+
+
+def test_stage_run_z_waveform_through_fake_nanodrive() -> None:
+    from orca_focus.fake_mcl import FakeNanoDrive
+
+    drive = FakeNanoDrive(initial_z_um=1.0)
+    stage = MclNanoZStage(wrapper_module=drive)
+
+    readback = stage.run_z_waveform([1.0, 2.0, 3.0], 1.0, frame_clock=3)
+
+    assert readback == [1.0, 2.0, 3.0]
+    assert stage.get_z_um() == 3.0
+    assert drive.waveforms_played == 1
+    assert drive.clock_pulses == 3
+
+
+def test_stage_run_z_waveform_in_memory_fallback() -> None:
+    stage = MclNanoZStage()
+    assert stage.run_z_waveform([0.5, 0.75], 0.1) == [0.5, 0.75]
+    assert stage.get_z_um() == 0.75
+
+
+class _CountingWrapper:
+    def __init__(self) -> None:
+        self.z = 0.0
+        self.lookups: list[str] = []
+
+    def __getattribute__(self, name: str):
+        if not name.startswith("_") and name not in {"z", "lookups"}:
+            object.__getattribute__(self, "lookups").append(name)
+        return object.__getattribute__(self, name)
+
+    def single_read_n(self, axis: int, handle: int) -> float:
+        return self.z
+
+    def single_write_n(self, z_um: float, axis: int, handle: int) -> None:
+        self.z = z_um
+
+
+def test_stage_resolves_wrapper_methods_once_at_connect() -> None:
+    wrapper = _CountingWrapper()
+    stage = MclNanoZStage(wrapper_module=wrapper, wrapper_handle=7)
+    n_connect = len(wrapper.lookups)
+
+    for i in range(5):
+        stage.move_z_um(float(i))
+        assert stage.get_z_um() == float(i)
+
+    assert len(wrapper.lookups) == n_connect
+
+
+def test_stage_wrapper_without_compatible_methods_fails_at_connect() -> None:
+    class _Nothing:
+        def read_z(self, a: int, b: int, c: int, d: int) -> float:
+            return 0.0
+
+    with pytest.raises(NotConnectedError, match="no compatible read method"):
+        MclNanoZStage(wrapper_module=_Nothing())
+
+
+def test_stage_move_and_read_uses_wrapper_monitor_n() -> None:
+    from orca_focus.fake_mcl import FakeNanoDrive
+
+    wrapper = FakeNanoDrive()
+    stage = MclNanoZStage(wrapper_module=wrapper)
+    stage.move_z_um(10.0)
+
+    measured = stage.move_and_read_z_um(12.0)
+
+    assert measured == pytest.approx(10.0)
+    assert stage.get_z_um() == pytest.approx(12.0)
+
+
+def test_stage_move_and_read_falls_back_without_monitor() -> None:
+    wrapper = _SimpleWrapper()
+    stage = MclNanoZStage(wrapper_module=wrapper)
+    stage.move_z_um(1.0)
+
+    assert stage.move_and_read_z_um(2.0) == 1.0
+    assert wrapper.z == 2.0
+
+
+def test_in_memory_stage_move_and_read() -> None:
+    stage = MclNanoZStage()
+    assert stage.move_and_read_z_um(4.0) == 0.0
+    assert stage.get_z_um() == 4.0
+
+
+def test_stage_read_sensor_uses_wrapper_encoder_when_enabled() -> None:
+    class _EncoderWrapper(_SimpleWrapper):
+        def read_encoder_z(self, handle: int) -> float:
+            assert handle == 9
+            return self.z + 0.5
+
+    wrapper = _EncoderWrapper()
+    stage = MclNanoZStage(wrapper_module=wrapper, wrapper_handle=9, use_encoder=True)
+    stage.move_z_um(1.0)
+
+    assert stage.read_sensor_z_um() == 1.5
+    assert MclNanoZStage(wrapper_module=wrapper, wrapper_handle=9).read_sensor_z_um() == 1.0
+    assert MclNanoZStage(wrapper_module=_SimpleWrapper(), use_encoder=True).read_sensor_z_um() == 0.0
+
+
+def test_stage_read_sensor_falls_back_when_device_has_no_encoder() -> None:
+    from orca_focus.fake_mcl import FakeMadlib, FakeNanoDrive
+
+    device = FakeNanoDrive(initial_z_um=12.0)
+    wrapper_stage = MclNanoZStage(wrapper_module=device, use_encoder=True)
+    assert wrapper_stage.read_sensor_z_um() == 12.0
+    assert wrapper_stage.read_sensor_z_um() == 12.0
+
+    dll = FakeMadlib(initial_z_um=12.0)
+    dll_stage = MclNanoZStage(dll=dll, use_encoder=True)
+    # The encoder's error code (-4) must not come back as a position.
+    assert dll_stage.read_sensor_z_um() == 12.0
+    calls = dll.device.calls
+    assert dll_stage.read_sensor_z_um() == 12.0
+    assert dll.device.calls == calls + 1  # encoder not retried
+
+    dll.device.inject_failures(1, code=-6)
+    with pytest.raises(RuntimeError, match="status -6"):
+        dll_stage.read_sensor_z_um()
+
+
+class _NanodriveZSignatures:
+    """`*_z` methods with the parameter names and order of `MCL_Madlib_Wrapper.MCL_Nanodrive`."""
+
+    def __init__(self) -> None:
+        self.z = 0.0
+        self.calls: list[tuple] = []
+
+    def init_handle(self) -> int:
+        return 2
+
+    def single_read_z(self, handle):
+        self.calls.append(("read_z", handle))
+        return self.z
+
+    def single_write_z(self, position, handle):
+        self.calls.append(("write_z", position, handle))
+        self.z = position
+
+    def monitor_z(self, position, handle):
+        self.calls.append(("monitor_z", position, handle))
+        previous, self.z = self.z, position
+        return previous
+
+
+class _NanodriveSignatures(_NanodriveZSignatures):
+    def single_read_n(self, axis, handle):
+        self.calls.append(("read_n", axis, handle))
+        return self.z
+
+    def single_write_n(self, position, axis, handle):
+        self.calls.append(("write_n", position, axis, handle))
+        self.z = position
+
+
+def test_stage_prefers_nanodrive_n_methods_with_axis_and_handle() -> None:
+    wrapper = _NanodriveSignatures()
+    stage = MclNanoZStage(wrapper_module=wrapper)
+
+    stage.move_z_um(2.0)
+    assert stage.get_z_um() == 2.0
+    assert stage.move_and_read_z_um(3.0) == 2.0
+
+    assert wrapper.calls == [("write_n", 2.0, 3, 2), ("read_n", 3, 2), ("monitor_z", 3.0, 2)]
+
+
+def test_stage_passes_only_the_handle_to_nanodrive_z_methods() -> None:
+    wrapper = _NanodriveZSignatures()
+    stage = MclNanoZStage(wrapper_module=wrapper)
+
+    stage.move_z_um(2.0)
+    assert stage.get_z_um() == 2.0
+
+    assert wrapper.calls == [("write_z", 2.0, 2), ("read_z", 2)]
@@ -0,0 +1,86 @@
+import os
+import subprocess
+import sys
+from pathlib import Path
+
+import pytest
+
+import orca_focus
+
+_SRC = str(Path(__file__).resolve().parents[1] / "src")
+
+# Modules a headless `orca-focus --duration ...` run must not import.
+_HEADLESS_FORBIDDEN = {
+    "orca_focus.interactive",
+    "orca_focus.viewer",
+    "orca_focus.broadcast",
+    "orca_focus.telemetry",
+    "orca_focus.recorder",
+    "orca_focus.registry",
+    "orca_focus.zsampler",
+    "orca_focus.isolated",
+    "orca_focus.server",
+    "orca_focus.pylablib_camera",
+    "orca_focus.micromanager",
+    "orca_focus.bench",
+    "multiprocessing",
+    "numpy",
+    "napari",
+    "pylablib",
+}
+
+
+def _imported_modules(statement: str) -> dict[str, int]:
+    """Run *statement* under `python -X importtime`; module -> cumulative microseconds."""
+    env = dict(os.environ)
+    env["PYTHONPATH"] = _SRC + os.pathsep + env.get("PYTHONPATH", "")
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", statement],
+        capture_output=True,
+        text=True,
+        env=env,
+        check=True,
+    )
+    modules: dict[str, int] = {}
+    for line in result.stderr.splitlines():
+        if not line.startswith("import time:") or "|" not in line:
+            continue
+        _self_us, cumulative_us, name = line[len("import time:") :].split("|")
+        if cumulative_us.strip().isdigit():
+            modules[name.strip()] = int(cumulative_us)
+    return modules
+
+
+def test_package_import_loads_no_submodules() -> None:
+    modules = _imported_modules("import orca_focus")
+
+    assert "orca_focus" in modules
+    assert not [name for name in modules if name.startswith("orca_focus.")]
+
+
+def test_headless_cli_import_skips_gui_and_backend_modules() -> None:
+    modules = _imported_modules("import orca_focus.cli")
+
+    assert "orca_focus.cli" in modules
+    assert not _HEADLESS_FORBIDDEN & set(modules)
+
+
+def test_server_import_does_not_pull_in_multiprocessing() -> None:
+    modules = _imported_modules("import orca_focus.server")
+
+    assert "orca_focus.sample_ring" in modules
+    assert not {"orca_focus.isolated", "multiprocessing"} & set(modules)
+
+
+def test_lazy_exports_resolve_to_defining_modules() -> None:
+    from orca_focus.recorder import FrameRecorder
+
+    assert orca_focus.FrameRecorder is FrameRecorder
+    assert set(orca_focus.__all__) <= set(dir(orca_focus))
+    for name in orca_focus.__all__:
+        assert getattr(orca_focus, name) is not None
+
+
+def test_unknown_attribute_raises_attribute_error() -> None:
+    with pytest.raises(AttributeError, match="no attribute 'nope'"):
+        orca_focus.nope
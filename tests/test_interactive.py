@@ -133,3 +133,105 @@ def test_build_runtime_calibration_forces_zero_error_target() -> None:
     assert cal.error_to_um == pytest.approx(3.0)
     assert cal.error_at_focus == pytest.approx(0.0)
 
+
+
+def test_telemetry_dock_feeds_ring_window_to_curves(monkeypatch) -> None:
+    from orca_focus.autofocus import AutofocusSample
+    from orca_focus.telemetry import TelemetryRing
+
+    class _Curve:
+        def __init__(self):
+            self.data = None
+
+        def setData(self, x, y):
+            self.data = (list(x), list(y))
+
+    class _Plot:
+        def __init__(self):
+            self.curve = _Curve()
+
+        def setLabel(self, *_args):
+            return None
+
+        def showGrid(self, **_kwargs):
+            return None
+
+        def setXLink(self, _other):
+            return None
+
+        def plot(self, pen=None):
+            return self.curve
+
+    class _Layout:
+        def __init__(self):
+            self.plots = []
+
+        def addPlot(self, row, col):
+            self.plots.append(_Plot())
+            return self.plots[-1]
+
+    class _Timer:
+        def __init__(self):
+            self.callbacks = []
+            self.timeout = types.SimpleNamespace(connect=self.callbacks.append)
+
+        def start(self, interval):
+            self.interval = interval
+
+    layout = _Layout()
+    pg = types.ModuleType("pyqtgraph")
+    pg.GraphicsLayoutWidget = lambda: layout
+    pg.mkPen = lambda **_kwargs: None
+    qtcore = types.ModuleType("qtpy.QtCore")
+    qtcore.QTimer = _Timer
+    monkeypatch.setitem(sys.modules, "pyqtgraph", pg)
+    monkeypatch.setitem(sys.modules, "qtpy", types.ModuleType("qtpy"))
+    monkeypatch.setitem(sys.modules, "qtpy.QtCore", qtcore)
+
+    docks = []
+    viewer = types.SimpleNamespace(
+        window=types.SimpleNamespace(add_dock_widget=lambda w, area, name: docks.append((w, area, name)))
+    )
+    ring = TelemetryRing(capacity=16)
+    for i in range(3):
+        sample = AutofocusSample(float(i), 0.0, 0.5 * i, 1.0, 1.5, 10.0, True)
+        ring.append(sample, loop_latency_s=0.002)
+
+    timer = interactive._add_telemetry_dock(viewer, ring, window=2, interval_ms=50)
+    timer.callbacks[0]()
+
+    assert docks[0][2] == "Autofocus Telemetry"
+    assert timer.interval == 50
+    assert layout.plots[0].curve.data == ([1.0, 2.0], [0.5, 1.0])
+    assert layout.plots[4].curve.data == ([1.0, 2.0], [0.002, 0.002])
+
+
+def test_telemetry_dock_warns_without_pyqtgraph(monkeypatch, capsys) -> None:
+    from orca_focus.telemetry import TelemetryRing
+
+    monkeypatch.setitem(sys.modules, "pyqtgraph", None)
+    viewer = types.SimpleNamespace(window=types.SimpleNamespace(add_dock_widget=lambda *a, **k: None))
+
+    assert interactive._add_telemetry_dock(viewer, TelemetryRing(capacity=4), window=2, interval_ms=50) is None
+    assert "install pyqtgraph" in capsys.readouterr().err
+
+
+def test_sweep_record_is_stored_with_sweep_roi_and_listed_for_the_picker(tmp_path) -> None:
+    from orca_focus.calibration import CalibrationSample, fit_linear_calibration_with_report
+    from orca_focus.focus_metric import Roi
+    from orca_focus.registry import CalibrationKey, CalibrationRegistry
+
+    registry = CalibrationRegistry(tmp_path)
+    key = CalibrationKey(objective="100x", camera="orca", roi_width=24, roi_height=24)
+    samples = [CalibrationSample(z_um=z, error=0.5 * z) for z in (-1.0, 0.0, 1.0)]
+    report = fit_linear_calibration_with_report(samples, robust=True)
+
+    path = interactive._save_sweep_record(registry, key, Roi(x=3, y=4, width=16, height=12), samples, report)
+
+    assert path.exists()
+    [(label, stored_key, model)] = interactive._stored_calibration_choices(CalibrationRegistry(tmp_path))
+    assert (stored_key.roi_width, stored_key.roi_height, model) == (16, 12, "linear")
+    assert label == "linear: 100x / orca / ROI 16x12"
+    record = registry.select(stored_key, model)
+    assert record.runtime_calibration().error_at_focus == 0.0
+    assert record.runtime_calibration().error_to_um == pytest.approx(2.0)
@@ -0,0 +1,69 @@
+import struct
+import time
+
+import pytest
+
+from orca_focus.autofocus import AutofocusConfig
+from orca_focus.bench import _simulated_hardware
+from orca_focus.calibration import FocusCalibration
+from orca_focus.focus_metric import Roi
+from orca_focus.isolated import (
+    _CONTROL,
+    STATUS_RUNNING,
+    IsolatedAutofocus,
+    _ControlBlock,
+)
+
+
+def test_control_block_reads_none_while_write_in_progress() -> None:
+    buf = memoryview(bytearray(_CONTROL.size))
+    block = _ControlBlock(buf)
+    block.write(stop=False, enabled=True, roi=Roi(x=1, y=2, width=3, height=4), kp=0.5, ki=0.1, max_step_um=0.2, loop_hz=100.0)
+
+    snap = block.read()
+    assert snap[0] == 2 and snap[3:7] == (1, 2, 3, 4) and snap[7] == 0.5
+
+    struct.pack_into("<Q", buf, 0, 3)  # writer mid-update
+    assert block.read() is None
+
+
+def test_isolated_autofocus_runs_in_child_and_applies_updates() -> None:
+    config = AutofocusConfig(roi=Roi(x=20, y=20, width=24, height=24), loop_hz=200.0, kp=0.5, ki=0.0)
+    calibration = FocusCalibration(error_at_focus=0.0, error_to_um=2.8)
+
+    with IsolatedAutofocus(_simulated_hardware, config=config, calibration=calibration, ring_capacity=256) as iso:
+        assert iso.status()[0] == STATUS_RUNNING
+        deadline = time.monotonic() + 5.0
+        samples = []
+        while len(samples) < 10 and time.monotonic() < deadline:
+            samples += iso.read_samples()
+            time.sleep(0.01)
+        assert len(samples) >= 10
+        assert samples[-1].loop_latency_s > 0.0
+
+        iso.update(enabled=False)
+        time.sleep(0.05)
+        iso.read_samples()
+        time.sleep(0.05)
+        assert iso.read_samples() == []
+
+        iso.update(enabled=True, roi=Roi(x=16, y=16, width=32, height=32))
+        deadline = time.monotonic() + 5.0
+        resumed = []
+        while not resumed and time.monotonic() < deadline:
+            resumed = iso.read_samples()
+            time.sleep(0.01)
+        assert resumed
+        assert iso.status()[2] == 0
+
+
+def test_isolated_autofocus_reports_child_startup_failure() -> None:
+    config = AutofocusConfig(roi=Roi(x=0, y=0, width=4, height=4))
+    iso = IsolatedAutofocus(_failing_hardware, config=config, calibration=FocusCalibration(0.0, 1.0))
+
+    with pytest.raises(RuntimeError, match="no camera"):
+        iso.start()
+
+
+def _failing_hardware():
+    raise OSError("no camera")
@@ -1,4 +1,5 @@
 import sys
+import time
 from types import ModuleType, SimpleNamespace
 
 import pytest
@@ -290,3 +291,288 @@ def test_micromanager_stage_wait_for_device_is_optional():
     stage.move_z_um(2.5)
     assert stage.get_z_um() == pytest.approx(2.5)
     assert core.wait_calls == 0
+
+
+def test_micromanager_source_returns_tagged_ndarray_as_view_without_conversion():
+    np = pytest.importorskip("numpy")
+    pix = np.arange(6, dtype=np.uint16)
+
+    class _Core:
+        def getLastTaggedImage(self):
+            return {"pix": pix, "tags": {"Width": 3, "Height": 2, "ImageNumber": 7}}
+
+    image, _ts = MicroManagerFrameSource(_Core())()
+
+    assert isinstance(image, np.ndarray)
+    assert image.dtype == np.uint16
+    assert image.shape == (2, 3)
+    assert np.shares_memory(image, pix)
+
+
+def test_micromanager_source_reshapes_bare_ndarray_with_core_dimensions():
+    np = pytest.importorskip("numpy")
+    pix = np.arange(12, dtype=np.uint16)
+    pix2d = np.ones((2, 2), dtype=np.uint16)
+
+    class _Core:
+        def __init__(self):
+            self.buf = pix
+
+        def getLastImage(self):
+            return self.buf
+
+        def getImageHeight(self):
+            return 3
+
+        def getImageWidth(self):
+            return 4
+
+    core = _Core()
+    source = MicroManagerFrameSource(core)
+    image, _ts = source()
+    assert image.shape == (3, 4)
+    assert np.shares_memory(image, pix)
+
+    core.buf = pix2d
+    image2, _ts = source()
+    assert image2 is pix2d
+
+
+def test_micromanager_source_does_not_hold_lock_during_core_calls():
+    holder = {}
+
+    class _Core:
+        def getLastImageTimeStamp(self):
+            holder["token_locked"] = holder["source"]._lock.locked()
+            return 1
+
+        def getLastTaggedImage(self):
+            holder["image_locked"] = holder["source"]._lock.locked()
+            return {"pix": [[1, 2], [3, 4]], "tags": {"ElapsedTime-ms": 10.0}}
+
+    source = MicroManagerFrameSource(_Core())
+    holder["source"] = source
+
+    image, ts = source()
+
+    assert image == [[1.0, 2.0], [3.0, 4.0]]
+    assert holder == {"source": source, "token_locked": False, "image_locked": False}
+
+
+def test_micromanager_drain_pops_every_frame_and_returns_newest_with_index():
+    np = pytest.importorskip("numpy")
+    from orca_focus.fake_mmcore import FakeMMCore
+
+    core = FakeMMCore(width=4, height=3, buffer_capacity=16)
+    batches = []
+    source = MicroManagerFrameSource(core, mode="drain", on_frames=batches.append, max_batch=2)
+
+    core.produce(5)
+    image, _ts, index = source()
+
+    assert index == 4
+    assert image.shape == (3, 4) and int(image[0, 0]) == 4
+    assert [len(b) for b in batches] == [2, 2, 1]
+    assert [f[2] for b in batches for f in b] == [0, 1, 2, 3, 4]
+    assert source.frames_popped == 5 and source.frames_lost == 0
+    assert core.getRemainingImageCount() == 0
+
+    # Empty buffer: the last frame is returned again, so the controller sees it as stale.
+    assert source()[2] == 4
+
+
+def test_micromanager_drain_counts_overflow_and_lost_frames():
+    pytest.importorskip("numpy")
+    from orca_focus.fake_mmcore import FakeMMCore
+
+    core = FakeMMCore(width=2, height=2, buffer_capacity=4)
+    source = MicroManagerFrameSource(core, mode="drain")
+    core.produce(1)
+    source()
+    core.produce(7)  # frames 1..3 fall out of the circular buffer
+
+    _image, _ts, index = source()
+
+    assert index == 7
+    assert source.frames_lost == 3
+    assert source.overflows == 1
+    assert core.calls["popNextTaggedImage"] == 5
+
+
+def test_micromanager_drain_without_on_frames_converts_only_newest(monkeypatch):
+    pytest.importorskip("numpy")
+    import orca_focus.micromanager as mm
+    from orca_focus.fake_mmcore import FakeMMCore
+
+    converted = []
+    real = mm._frame_to_image
+    monkeypatch.setattr(mm, "_frame_to_image", lambda f, core=None: converted.append(f) or real(f, core))
+    core = FakeMMCore(width=2, height=2)
+    core.produce(6)
+
+    MicroManagerFrameSource(core, mode="drain")()
+
+    assert len(converted) == 1
+
+
+def test_micromanager_drain_start_stop_owns_only_the_sequence_it_started():
+    from orca_focus.fake_mmcore import FakeMMCore
+
+    core = FakeMMCore(width=2, height=2)
+    source = MicroManagerFrameSource(core, mode="drain")
+    source.start()
+    assert core.isSequenceRunning()
+    _image, _ts, index = source()
+    assert index >= 0
+    source.stop()
+    assert not core.isSequenceRunning()
+
+    core.startContinuousSequenceAcquisition(1.0)
+    source.start()
+    source.stop()
+    assert core.isSequenceRunning()
+    core.stopSequenceAcquisition()
+
+
+def test_micromanager_drain_frame_index_reaches_camera_frame():
+    pytest.importorskip("numpy")
+    from orca_focus.fake_mmcore import FakeMMCore
+    from orca_focus.hardware import HamamatsuOrcaCamera
+
+    core = FakeMMCore(width=2, height=2)
+    core.produce(3)
+    camera = HamamatsuOrcaCamera(frame_source=MicroManagerFrameSource(core, mode="drain"))
+    camera.start()
+
+    assert camera.get_frame().frame_index == 2
+
+
+def test_micromanager_source_rejects_unknown_mode():
+    with pytest.raises(ValueError):
+        MicroManagerFrameSource(_FakeCore(), mode="burst")
+
+
+def test_micromanager_source_skips_identity_probe_once_token_advances():
+    from orca_focus.fake_mmcore import FakeMMCore
+
+    core = FakeMMCore(width=2, height=2)
+    source = MicroManagerFrameSource(core)
+    core.produce(1)
+    source()
+    source()  # token unchanged and not yet trusted: image fetched to confirm
+    assert core.calls["getLastTaggedImage"] == 2
+
+    core.produce(1)
+    source()  # token advanced: trusted from now on
+    source()
+    source()
+    assert core.calls["getLastTaggedImage"] == 3
+    assert core.calls["getLastImageTimeStamp"] == 5
+
+
+def test_micromanager_source_combined_read_is_one_call_per_step():
+    from orca_focus.fake_mmcore import FakeMMCore
+
+    core = FakeMMCore(width=2, height=2)
+    source = create_micromanager_frame_source(core=core, combined_read=True)
+    core.produce(1)
+    _image, ts1 = source()
+    _image, ts2 = source()
+    core.produce(1)
+    _image, ts3 = source()
+
+    assert ts2 == ts1 and ts3 > ts1
+    assert dict(core.calls) == {"getLastTaggedImage": 3}
+
+
+def test_micromanager_stage_resolves_core_methods_once():
+    lookups = []
+
+    class _Core:
+        def __init__(self):
+            self.position = 0.0
+
+        def __getattribute__(self, name):
+            if not name.startswith("_") and name != "position":
+                lookups.append(name)
+            return object.__getattribute__(self, name)
+
+        def getFocusDevice(self):
+            return "Z"
+
+        def getPosition(self, _name):
+            return self.position
+
+        def setPosition(self, _name, z):
+            self.position = z
+
+        def waitForDevice(self, _name):
+            return None
+
+    stage = MicroManagerStage(core=_Core())
+    n_setup = len(lookups)
+    for i in range(5):
+        stage.move_z_um(float(i))
+        stage.get_z_um()
+
+    assert len(lookups) == n_setup
+    assert stage.get_z_um() == pytest.approx(4.0)
+
+
+def test_micromanager_stage_async_moves_return_before_settle():
+    from orca_focus.fake_mmcore import FakeMMCore
+
+    core = FakeMMCore(stage_settle_s=0.05)
+    stage = MicroManagerStage(core, async_moves=True)
+
+    t0 = time.monotonic()
+    stage.move_z_um(1.0)
+    assert time.monotonic() - t0 < 0.04
+    assert stage.is_moving and not stage.poll_settled()
+    assert core.calls["waitForDevice"] == 0
+
+    # Next move finds the stage still busy and finishes the previous one first.
+    stage.move_z_um(2.0)
+    assert stage.moves_waited == 1
+    assert stage.last_settle_s >= 0.05
+
+    time.sleep(0.06)
+    stage.move_z_um(3.0)  # previous move already idle: no wait
+    assert stage.moves_waited == 1
+    assert core.calls["waitForDevice"] == 1
+    assert len(stage.settle_times_s) == 2
+
+    stage.wait_until_settled()
+    assert not stage.is_moving
+    assert stage.get_z_um() == pytest.approx(3.0)
+
+
+def test_micromanager_stage_blocking_moves_record_settle_time():
+    from orca_focus.fake_mmcore import FakeMMCore
+
+    core = FakeMMCore(stage_settle_s=0.02)
+    stage = MicroManagerStage(core)
+    stage.move_z_um(1.0)
+
+    assert not stage.is_moving
+    assert stage.last_settle_s >= 0.02
+
+
+def test_auto_calibrate_waits_for_async_stage_to_settle():
+    from orca_focus.calibration import auto_calibrate
+    from orca_focus.fake_mmcore import FakeMMCore
+    from orca_focus.focus_metric import Roi
+    from orca_focus.interfaces import CameraFrame
+
+    core = FakeMMCore(stage_settle_s=0.005)
+    stage = MicroManagerStage(core, async_moves=True)
+    seen = []
+
+    class _Camera:
+        def get_frame(self):
+            seen.append(stage.is_moving)
+            return CameraFrame(image=[[1.0, 2.0], [3.0, 4.0]], timestamp_s=time.monotonic())
+
+    auto_calibrate(_Camera(), stage, Roi(x=0, y=0, width=2, height=2), z_min_um=0.0, z_max_um=1.0, n_steps=3)
+
+    assert len(seen) == 6 and not any(seen)
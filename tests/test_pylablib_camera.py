@@ -1,7 +1,9 @@
 import sys
 import types
 
-from orca_focus.pylablib_camera import PylablibFrameSource, _default_read_frame, create_pylablib_frame_source
+import pytest
+
+from orca_focus.pylablib_camera import PylablibFrameSource, _resolve_read_frame, create_pylablib_frame_source
 
 
 class _ArrayLike:
@@ -33,13 +35,13 @@ class _FakeAndorCam:
         return _ArrayLike([[9, 10], [11, 12]])
 
 
-def test_default_read_frame_uses_newest_method() -> None:
-    frame = _default_read_frame(_CameraWithNewest())
+def test_resolve_read_frame_uses_newest_method() -> None:
+    frame = _resolve_read_frame(_CameraWithNewest())()
     assert frame.tolist() == [[5, 6], [7, 8]]
 
 
 def test_pylablib_frame_source_callable() -> None:
-    source = PylablibFrameSource(camera=_FakeOrcaCam(), read_frame=_default_read_frame)
+    source = PylablibFrameSource(camera=_FakeOrcaCam())
     image, ts = source()
     assert image == [[1.0, 2.0], [3.0, 4.0]]
     assert isinstance(ts, float)
@@ -61,3 +63,89 @@ def test_create_pylablib_frame_source_with_injected_module(monkeypatch) -> None:
 
     assert image_orca == [[1.0, 2.0], [3.0, 4.0]]
     assert image_andor == [[9.0, 10.0], [11.0, 12.0]]
+
+
+class _BufferedCam:
+    """pylablib-style camera with a frame buffer and per-frame info."""
+
+    def __init__(self):
+        self.calls = []
+        self.next_index = 0
+        self.read_index = -1
+
+    def setup_acquisition(self, nframes=100):
+        self.calls.append(("setup_acquisition", nframes))
+
+    def start_acquisition(self):
+        self.calls.append(("start_acquisition",))
+
+    def acquire(self, n=1):
+        self.next_index += n
+
+    def wait_for_frame(self, since="lastread", nframes=1, timeout=20.0):
+        if self.next_index - 1 <= self.read_index:
+            raise _FakeTimeoutError()
+
+    def read_newest_image(self, peek=False, return_info=False):
+        self.read_index = self.next_index - 1
+        image = [[self.read_index, 0], [0, 0]]
+        info = types.SimpleNamespace(frame_index=self.read_index, timestamp_us=1000 * self.read_index)
+        return (image, info) if return_info else image
+
+    def get_frames_status(self):
+        return types.SimpleNamespace(acquired=self.next_index, unread=0, skipped=2, buffer_size=8)
+
+
+class _FakeTimeoutError(Exception):
+    pass
+
+
+def test_pylablib_buffered_source_returns_camera_index_and_timestamp() -> None:
+    cam = _BufferedCam()
+    source = PylablibFrameSource(camera=cam, nframes=8)
+    source.start()
+    assert cam.calls == [("setup_acquisition", 8), ("start_acquisition",)]
+
+    cam.acquire(3)
+    image, ts, index = source()
+    assert index == 2 and ts == 0.002
+    assert image == [[2.0, 0.0], [0.0, 0.0]]
+
+    # No new frame before the timeout: previous frame is returned as stale.
+    assert source() == (image, ts, index)
+
+    assert source.frames_status() == {"acquired": 3, "unread": 0, "skipped": 2, "buffer_size": 8}
+
+
+def test_pylablib_buffered_source_returns_ndarray_unconverted() -> None:
+    np = pytest.importorskip("numpy")
+    frame = np.arange(4, dtype=np.uint16).reshape(2, 2)
+
+    class _Cam(_BufferedCam):
+        def read_newest_image(self, peek=False, return_info=False):
+            return frame, (7,)
+
+    cam = _Cam()
+    cam.acquire()
+    image, _ts, index = PylablibFrameSource(camera=cam)()
+
+    assert image is frame and index == 7
+
+
+def test_pylablib_fallback_read_method_is_resolved_once() -> None:
+    lookups = []
+
+    class _Cam:
+        def __getattribute__(self, name):
+            lookups.append(name)
+            return object.__getattribute__(self, name)
+
+        def read_oldest_image(self):
+            return [[1, 2], [3, 4]]
+
+    source = PylablibFrameSource(camera=_Cam())
+    for _ in range(3):
+        image, _ts = source()
+
+    assert image == [[1.0, 2.0], [3.0, 4.0]]
+    assert lookups.count("read_oldest_image") == 1
@@ -0,0 +1,120 @@
+import json
+import threading
+
+import pytest
+
+np = pytest.importorskip("numpy")
+
+from orca_focus.autofocus import AutofocusSample
+from orca_focus.focus_metric import Roi
+from orca_focus.interfaces import CameraFrame
+from orca_focus.recorder import FrameRecorder, Recording
+
+
+def _step(i: int, size: int = 8):
+    image = np.full((size, size), i, dtype=np.uint16)
+    frame = CameraFrame(image=image, timestamp_s=0.01 * i, frame_index=i)
+    sample = AutofocusSample(0.01 * i, 0.1 * i, 0.2 * i, 1.0 + i, 1.5 + i, 64.0, True, frame_index=i)
+    return frame, sample
+
+
+def test_recorder_writes_memory_mappable_chunks_with_index(tmp_path) -> None:
+    roi = Roi(x=2, y=1, width=3, height=4)
+    with FrameRecorder(tmp_path, chunk_frames=4) as rec:
+        for i in range(10):
+            assert rec.record(*_step(i), roi)
+        rec.flush()
+        stats = rec.stats()
+
+    assert stats.frames_written == 10 and stats.frames_dropped == 0
+    assert stats.chunks_written == 3
+
+    index = json.loads((tmp_path / "index.json").read_text())
+    assert [c["n"] for c in index["chunks"]] == [4, 4, 2]
+    assert index["chunks"][0]["roi"] == [2, 1, 3, 4]
+
+    recording = Recording(tmp_path)
+    pixels = recording.pixels(1)
+    assert isinstance(pixels, np.memmap)
+    assert pixels.shape == (4, 4, 3) and pixels.dtype == np.uint16
+    assert int(pixels[0, 0, 0]) == 4
+    meta = recording.all_meta()
+    assert list(meta["frame_index"]) == list(range(10))
+    assert meta["commanded_z_um"][3] == pytest.approx(4.5)
+    assert len(recording) == 10
+
+
+def test_recorder_skips_repeated_frames_and_splits_chunks_on_roi_change(tmp_path) -> None:
+    rec = FrameRecorder(tmp_path, chunk_frames=8)
+    frame, sample = _step(0)
+    assert rec.record(frame, sample, Roi(x=0, y=0, width=2, height=2))
+    assert not rec.record(frame, sample, Roi(x=0, y=0, width=2, height=2))
+    rec.record(*_step(1), Roi(x=0, y=0, width=3, height=3))
+    # A tracking move keeps the crop shape but still starts a new chunk.
+    rec.record(*_step(2), Roi(x=1, y=0, width=3, height=3))
+    rec.close()
+
+    recording = Recording(tmp_path)
+    assert [c["n"] for c in recording.chunks] == [1, 1, 1]
+    assert recording.pixels(1).shape == (1, 3, 3)
+    assert recording.chunks[2]["roi"] == [1, 0, 3, 3]
+
+
+def test_recorder_drops_instead_of_blocking_when_writer_is_behind(tmp_path, monkeypatch) -> None:
+    rec = FrameRecorder(tmp_path, chunk_frames=2, max_queued=4)
+    gate = threading.Event()
+    original = rec._write_chunk
+
+    def _slow_write(batch):
+        gate.wait(2.0)
+        original(batch)
+
+    monkeypatch.setattr(rec, "_write_chunk", _slow_write)
+    roi = Roi(x=0, y=0, width=2, height=2)
+    accepted = [rec.record(*_step(i), roi) for i in range(20)]
+    stats = rec.stats()
+    gate.set()
+    rec.close()
+
+    assert accepted.count(True) <= 6
+    assert stats.frames_dropped == 20 - accepted.count(True)
+    assert stats.queue_high_water <= 4
+    assert rec.stats().frames_written == accepted.count(True)
+
+
+def test_recorder_crops_list_images_as_controller_on_step(tmp_path) -> None:
+    from orca_focus.autofocus import AstigmaticAutofocusController, AutofocusConfig
+    from orca_focus.calibration import FocusCalibration
+
+    class _Camera:
+        def __init__(self):
+            self.i = 0
+
+        def get_frame(self):
+            self.i += 1
+            return CameraFrame(image=[[1.0, 2.0, 3.0], [2.0, 9.0, 1.0]], timestamp_s=float(self.i))
+
+    class _Stage:
+        z = 0.0
+
+        def get_z_um(self):
+            return self.z
+
+        def move_z_um(self, z):
+            self.z = z
+
+    rec = FrameRecorder(tmp_path, chunk_frames=4)
+    controller = AstigmaticAutofocusController(
+        camera=_Camera(),
+        stage=_Stage(),
+        config=AutofocusConfig(roi=Roi(x=1, y=0, width=2, height=2)),
+        calibration=FocusCalibration(error_at_focus=0.0, error_to_um=1.0),
+        on_step=rec.record,
+    )
+    for _ in range(3):
+        controller.run_step(dt_s=0.01)
+    rec.close()
+
+    recording = Recording(tmp_path)
+    assert recording.pixels(0)[0].tolist() == [[2, 3], [9, 1]]
+    assert list(recording.all_meta()["frame_index"]) == [-1, -1, -1]
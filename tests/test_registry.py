@@ -0,0 +1,98 @@
+import pytest
+
+from orca_focus import registry as registry_mod
+from orca_focus.calibration import CalibrationSample, FocusCalibration
+from orca_focus.registry import (
+    CalibrationKey,
+    CalibrationRegistry,
+    decode_record,
+    encode_record,
+    fit_record,
+    samples_digest,
+)
+from orca_focus.zhuang import ZhuangFocusCalibration, zhuang_error
+
+_KEY = CalibrationKey(objective="100x/1.49", camera="orca", roi_width=24, roi_height=24, cylinder_lens="f1000")
+_SAMPLES = [
+    CalibrationSample(z_um=-1.0, error=-0.5, weight=2.0),
+    CalibrationSample(z_um=0.0, error=0.0, weight=3.0),
+    CalibrationSample(z_um=1.0, error=0.5, weight=2.0),
+]
+
+
+def test_linear_record_round_trip_preserves_model_stats_and_samples() -> None:
+    record = fit_record(_KEY, _SAMPLES)
+    decoded = decode_record(encode_record(record))
+
+    assert decoded.key == _KEY
+    assert decoded.model == "linear"
+    assert isinstance(decoded.calibration, FocusCalibration)
+    assert decoded.calibration.error_to_um == pytest.approx(2.0)
+    assert decoded.stats["r2"] == pytest.approx(1.0)
+    assert decoded.samples == _SAMPLES
+    assert decoded.samples_digest == samples_digest(_SAMPLES)
+
+
+def test_zhuang_record_round_trip_rebuilds_lookup_table() -> None:
+    q = (1.0, 0.0, 0.4, 0.0, 0.0, 0.5, 0.0, 0.0, 0.5)
+    samples = [CalibrationSample(z_um=z, error=zhuang_error(z, q)) for z in [-0.8 + 0.08 * i for i in range(21)]]
+    record = fit_record(_KEY, samples, model="zhuang")
+
+    decoded = decode_record(encode_record(record))
+
+    assert isinstance(decoded.calibration, ZhuangFocusCalibration)
+    assert decoded.calibration.error_to_z_offset_um(zhuang_error(0.3, q)) == pytest.approx(0.3, abs=1e-3)
+
+
+def test_decode_rejects_corrupted_record() -> None:
+    data = bytearray(encode_record(fit_record(_KEY, _SAMPLES)))
+    data[20] ^= 0xFF
+
+    with pytest.raises(ValueError, match="hash mismatch"):
+        decode_record(bytes(data))
+
+
+def test_fit_or_load_only_refits_when_samples_change(tmp_path, monkeypatch) -> None:
+    reg = CalibrationRegistry(tmp_path)
+    first, refitted = reg.fit_or_load(_KEY, _SAMPLES)
+    assert refitted is True
+
+    def _no_refit(*_args, **_kwargs):
+        raise AssertionError("unchanged samples must not be refitted")
+
+    monkeypatch.setattr(registry_mod, "fit_record", _no_refit)
+    fresh = CalibrationRegistry(tmp_path)
+    again, refitted = fresh.fit_or_load(_KEY, list(_SAMPLES))
+    assert refitted is False
+    assert again.calibration.error_to_um == pytest.approx(first.calibration.error_to_um)
+
+    monkeypatch.undo()
+    changed = _SAMPLES + [CalibrationSample(z_um=2.0, error=1.0)]
+    _, refitted = fresh.fit_or_load(_KEY, changed)
+    assert refitted is True
+
+
+def test_fit_or_load_does_not_save_when_fit_hook_rejects(tmp_path) -> None:
+    reg = CalibrationRegistry(tmp_path)
+
+    def _reject(*_args, **_kwargs):
+        raise ValueError("sweep rejected")
+
+    with pytest.raises(ValueError, match="rejected"):
+        reg.fit_or_load(_KEY, _SAMPLES, fit=_reject)
+    assert not reg.path_for(_KEY).exists()
+
+
+def test_registry_switches_between_setups_without_refitting(tmp_path) -> None:
+    reg = CalibrationRegistry(tmp_path)
+    other = CalibrationKey(objective="60x/1.4", camera="orca", roi_width=16, roi_height=16)
+    reg.save(fit_record(_KEY, _SAMPLES))
+    reg.save(fit_record(other, [CalibrationSample(z_um=s.z_um, error=2 * s.error) for s in _SAMPLES]))
+
+    fresh = CalibrationRegistry(tmp_path)
+    assert {r.key for r in fresh.records()} == {_KEY, other}
+    assert fresh.select(_KEY).calibration.error_to_um == pytest.approx(2.0)
+    assert fresh.select(other).calibration.error_to_um == pytest.approx(1.0)
+    assert fresh.active.key == other
+    with pytest.raises(KeyError):
+        fresh.select(CalibrationKey(objective="missing"))
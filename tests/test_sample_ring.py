@@ -0,0 +1,42 @@
+import struct
+
+from orca_focus.sample_ring import RECORD, RING_FIELDS, RingSample, SampleRing
+
+
+def test_sample_ring_drops_records_lapped_by_the_writer() -> None:
+    capacity = 4
+    ring = SampleRing(memoryview(bytearray(SampleRing.nbytes(capacity))), capacity)
+    for i in range(10):
+        ring.append(tuple(float(i) for _ in RING_FIELDS))
+
+    records, end = ring.read_since(0)
+
+    assert end == 10
+    # Record 6 shares its slot with record 10, which the writer fills next.
+    assert [r[0] for r in records] == [7.0, 8.0, 9.0]
+    assert len(records[0]) == len(RING_FIELDS) == len(RECORD.format) - 1
+
+
+def test_sample_ring_never_returns_the_slot_being_written() -> None:
+    capacity = 4
+    buf = memoryview(bytearray(SampleRing.nbytes(capacity)))
+    ring = SampleRing(buf, capacity)
+    for i in range(capacity):
+        ring.append(tuple(float(i) for _ in RING_FIELDS))
+    # The writer is half way through record 4 (lapping record 0 by exactly
+    # one) and has not published it yet.
+    struct.pack_into("<d", buf, struct.calcsize("<Q"), -1.0)
+
+    records, end = ring.read_since(0)
+
+    assert end == capacity
+    assert [r[0] for r in records] == [1.0, 2.0, 3.0]
+
+
+def test_ring_sample_round_trips_a_record() -> None:
+    record = (1.0, 2.0, 0.1, 0.2, 3.0, 3.1, 500.0, 1.0, -1.0, 0.004, 30.0)
+    sample = RingSample.from_record(RECORD.unpack(RECORD.pack(*record)))
+
+    assert sample.control_applied is True
+    assert sample.frame_index is None
+    assert sample.loop_hz == 30.0
@@ -0,0 +1,164 @@
+import socket
+import time
+
+import pytest
+
+from orca_focus.autofocus import AutofocusConfig
+from orca_focus.calibration import FocusCalibration
+from orca_focus.focus_metric import Roi
+from orca_focus.hardware import MclNanoZStage, SimulatedCamera
+from orca_focus.server import (
+    CALIBRATION_LINEAR,
+    CALIBRATION_ZHUANG,
+    MSG_STATUS,
+    FocusClient,
+    FocusServer,
+    _recv,
+    _send,
+    decode_calibration,
+    decode_calibration_selection,
+    encode_calibration,
+    encode_calibration_selection,
+    parse_address,
+)
+from orca_focus.zhuang import ZhuangFocusCalibration
+
+_Q = (1.05, 0.1, 0.4, 0.1, 0.05, 0.5, -0.1, 0.02, 0.55)
+
+
+def _server(address: str, registry=None) -> FocusServer:
+    stage = MclNanoZStage()
+    stage.move_z_um(1.0)
+    camera = SimulatedCamera(stage=stage)
+    camera.start()
+    return FocusServer(
+        camera,
+        stage,
+        config=AutofocusConfig(roi=Roi(x=20, y=20, width=24, height=24), loop_hz=200.0),
+        calibration=FocusCalibration(error_at_focus=0.0, error_to_um=2.8),
+        address=address,
+        publish_interval_s=0.005,
+        registry=registry,
+    )
+
+
+def _read_until(stream, n: int, timeout_s: float = 5.0) -> list:
+    out = []
+    deadline = time.monotonic() + timeout_s
+    while len(out) < n and time.monotonic() < deadline:
+        batch = stream.read()
+        if batch is None:
+            break
+        out += batch
+    return out
+
+
+def test_parse_address_accepts_unix_and_loopback_only() -> None:
+    assert parse_address("unix:/tmp/af.sock") == (socket.AF_UNIX, "/tmp/af.sock")
+    assert parse_address("/tmp/af.sock") == (socket.AF_UNIX, "/tmp/af.sock")
+    assert parse_address("127.0.0.1:5557") == (socket.AF_INET, ("127.0.0.1", 5557))
+    assert parse_address(":0") == (socket.AF_INET, ("127.0.0.1", 0))
+    with pytest.raises(ValueError, match="non-loopback"):
+        parse_address("0.0.0.0:5557")
+    with pytest.raises(ValueError, match="host:port"):
+        parse_address("localhost")
+
+
+def test_calibration_round_trips_through_wire_encoding() -> None:
+    linear = decode_calibration(encode_calibration(FocusCalibration(error_at_focus=0.1, error_to_um=-2.5)))
+    zhuang = decode_calibration(encode_calibration(ZhuangFocusCalibration(params=_Q)))
+
+    assert (linear.error_at_focus, linear.error_to_um) == (0.1, -2.5)
+    assert zhuang.params == pytest.approx(_Q)
+    with pytest.raises(ValueError, match="Malformed"):
+        decode_calibration(bytes([CALIBRATION_LINEAR]) + b"\0" * 3)
+
+
+def test_server_runs_lock_and_streams_to_several_observers(tmp_path) -> None:
+    with _server(f"unix:{tmp_path / 'af.sock'}") as server, FocusClient(server.address) as client:
+        assert not client.status().running
+
+        client.set_roi(Roi(x=16, y=16, width=32, height=32))
+        first = client.subscribe()
+        second = client.subscribe()
+        client.start()
+
+        assert len(_read_until(first, 10)) >= 10
+        assert len(_read_until(second, 10)) >= 10
+        status = client.status()
+        assert status.running and status.subscribers == 2
+        assert status.roi == Roi(x=16, y=16, width=32, height=32)
+        assert status.steps >= 10
+
+        client.set_calibration(ZhuangFocusCalibration(params=_Q))
+        assert client.status().calibration_kind == CALIBRATION_ZHUANG
+
+        client.stop()
+        assert not client.status().running
+        first.close()
+        second.close()
+
+
+def test_server_reports_errors_and_keeps_connection_usable() -> None:
+    with _server("127.0.0.1:0") as server, FocusClient(server.address) as client:
+        with pytest.raises(RuntimeError, match="width and height"):
+            client.set_roi(Roi(x=0, y=0, width=0, height=4))
+        with pytest.raises(RuntimeError, match="Unknown message type"):
+            client._request(99)
+        assert client.status().calibration_kind == CALIBRATION_LINEAR
+
+
+def test_select_calibration_swaps_in_stored_registry_record(tmp_path) -> None:
+    from orca_focus.calibration import CalibrationSample
+    from orca_focus.registry import CalibrationKey, CalibrationRegistry, fit_record
+    from orca_focus.zhuang import zhuang_error
+
+    key = CalibrationKey(objective="100x", camera="simulate", roi_width=24, roi_height=24, cylinder_lens="f1000")
+    assert decode_calibration_selection(encode_calibration_selection(key, "zhuang")) == (key, "zhuang")
+
+    registry = CalibrationRegistry(tmp_path / "reg")
+    samples = [CalibrationSample(z_um=z, error=zhuang_error(z, _Q)) for z in [-0.8 + 0.08 * i for i in range(21)]]
+    registry.save(fit_record(key, samples, model="zhuang"))
+
+    with _server("127.0.0.1:0", registry=registry) as server, FocusClient(server.address) as client:
+        client.select_calibration(key, "zhuang")
+        assert client.status().calibration_kind == CALIBRATION_ZHUANG
+        assert registry.active.key == key
+        with pytest.raises(RuntimeError, match="No linear calibration stored"):
+            client.select_calibration(key, "linear")
+
+    with _server("127.0.0.1:0") as server, FocusClient(server.address) as client:
+        with pytest.raises(RuntimeError, match="No calibration registry"):
+            client.select_calibration(key, "zhuang")
+
+
+def test_shutdown_message_stops_the_server(tmp_path) -> None:
+    server = _server(f"unix:{tmp_path / 'af.sock'}")
+    assert (tmp_path / "af.sock").stat().st_mode & 0o777 == 0o600  # owner-only
+    server.start()
+    with FocusClient(server.address) as client:
+        client.start()
+        stream = client.subscribe()
+        deadline = time.monotonic() + 5.0
+        while client.status().subscribers < 1 and time.monotonic() < deadline:
+            time.sleep(0.01)
+        client.shutdown()
+
+    _read_until(stream, 10**9, timeout_s=5.0)
+    assert stream.read() is None  # stream ends once the server shuts down
+    server._thread.join(timeout=2.0)
+    assert not server._thread.is_alive()
+    assert not server.running
+    server.close()
+
+
+def test_raw_status_message_uses_compact_binary_frames(tmp_path) -> None:
+    with _server(f"unix:{tmp_path / 'af.sock'}") as server:
+        sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        sock.connect(str(tmp_path / "af.sock"))
+        _send(sock, MSG_STATUS)
+        kind, payload = _recv(sock)
+        sock.close()
+
+    assert kind == 0x82
+    assert len(payload) == 2 + 16 + 8 + 4
@@ -0,0 +1,98 @@
+import time
+
+import pytest
+
+from orca_focus.autofocus import AstigmaticAutofocusController, AutofocusConfig
+from orca_focus.calibration import FocusCalibration
+from orca_focus.focus_metric import Roi, astigmatic_error_signal
+from orca_focus.hardware import MclNanoZStage, NotConnectedError, SimulatedScene, StreamingSimulatedCamera
+from orca_focus.interfaces import CameraFrame
+
+
+def test_streaming_camera_requires_start() -> None:
+    camera = StreamingSimulatedCamera(stage=MclNanoZStage())
+    with pytest.raises(NotConnectedError):
+        camera.get_frame()
+
+
+def test_streaming_camera_oldest_mode_returns_consecutive_indices() -> None:
+    with StreamingSimulatedCamera(
+        stage=MclNanoZStage(), exposure_s=0.002, readout_s=0.001, read_mode="oldest", buffer_size=64
+    ) as camera:
+        frames = [camera.get_frame() for _ in range(5)]
+
+    assert [f.frame_index for f in frames] == [0, 1, 2, 3, 4]
+    assert all(b.timestamp_s > a.timestamp_s for a, b in zip(frames, frames[1:]))
+
+
+def test_streaming_camera_newest_mode_skips_and_buffer_drops() -> None:
+    with StreamingSimulatedCamera(
+        stage=MclNanoZStage(), exposure_s=0.002, readout_s=0.0, buffer_size=2, read_mode="newest"
+    ) as camera:
+        time.sleep(0.05)
+        first = camera.get_frame()
+        second = camera.get_frame()
+
+    assert first.frame_index >= 3
+    assert second.frame_index > first.frame_index
+    assert camera.frames_dropped > 0
+    assert camera.frames_skipped >= 1
+
+
+def test_streaming_camera_integrates_stage_motion_during_exposure() -> None:
+    class _RampStage:
+        def __init__(self) -> None:
+            self.t0 = time.monotonic()
+
+        def get_z_um(self) -> float:
+            return 100.0 * (time.monotonic() - self.t0)  # 100 um/s
+
+        def move_z_um(self, target_z_um: float) -> None:
+            pass
+
+    scene = SimulatedScene()
+    roi = Roi(x=20, y=20, width=24, height=24)
+    with StreamingSimulatedCamera(
+        stage=_RampStage(), scene=scene, exposure_s=0.02, readout_s=0.0, exposure_samples=5, read_mode="oldest"
+    ) as camera:
+        frame = camera.get_frame()
+
+    # Blurred over ~0..2 um: the measured error sits between the end points.
+    err = astigmatic_error_signal(frame.image, roi)
+    assert astigmatic_error_signal(scene.render_frame(0.0), roi) < err < astigmatic_error_signal(
+        scene.render_frame(2.0), roi
+    )
+
+
+def test_streaming_camera_times_out_without_frames() -> None:
+    camera = StreamingSimulatedCamera(stage=MclNanoZStage(), exposure_s=0.5, timeout_s=0.02)
+    camera.start()
+    try:
+        with pytest.raises(TimeoutError):
+            camera.get_frame()
+    finally:
+        camera.stop()
+
+
+def test_controller_uses_frame_index_for_staleness_and_drops() -> None:
+    class _IndexedCamera:
+        def __init__(self) -> None:
+            self.frames = [0, 0, 1, 4]
+            self.image = SimulatedScene().render_frame(0.5)
+
+        def get_frame(self) -> CameraFrame:
+            return CameraFrame(image=self.image, timestamp_s=time.time(), frame_index=self.frames.pop(0))
+
+    stage = MclNanoZStage()
+    controller = AstigmaticAutofocusController(
+        camera=_IndexedCamera(),
+        stage=stage,
+        config=AutofocusConfig(roi=Roi(x=20, y=20, width=24, height=24), kp=0.5, ki=0.0),
+        calibration=FocusCalibration(error_at_focus=0.0, error_to_um=2.8),
+    )
+
+    samples = [controller.run_step() for _ in range(4)]
+
+    assert [s.control_applied for s in samples] == [True, False, True, True]
+    assert [s.frame_index for s in samples] == [0, 0, 1, 4]
+    assert controller.frames_dropped == 2
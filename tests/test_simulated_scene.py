@@ -0,0 +1,77 @@
+import pytest
+
+from orca_focus.focus_metric import Roi, astigmatic_error_signal
+from orca_focus.hardware import MclNanoZStage, SimulatedBead, SimulatedCamera, SimulatedScene
+
+np = pytest.importorskip("numpy")
+
+
+def test_render_dot_matches_direct_gaussian() -> None:
+    scene = SimulatedScene(focal_plane_um=0.0, alpha_px_per_um=0.25)
+    image = scene.render_dot(z_um=0.8, size=32)
+
+    cx = cy = 15.5
+    sx, sy = 1.2 + 0.2, 1.2 - 0.2
+    expected = [
+        [4095.0 * np.exp(-((x - cx) ** 2) / (2 * sx**2) - ((y - cy) ** 2) / (2 * sy**2)) for x in range(32)]
+        for y in range(32)
+    ]
+    assert isinstance(image, list)
+    assert np.allclose(image, expected)
+
+
+def test_render_frame_is_uint16_and_deterministic_with_seed() -> None:
+    kwargs = dict(poisson_noise=True, read_noise_counts=2.0, background_counts=100.0, seed=7, size=48)
+    a = SimulatedScene(**kwargs).render_frame(0.5)
+    b = SimulatedScene(**kwargs).render_frame(0.5)
+
+    assert a.dtype == np.uint16
+    assert a.shape == (48, 48)
+    assert np.array_equal(a, b)
+    assert not np.array_equal(a, SimulatedScene(**{**kwargs, "seed": 8}).render_frame(0.5))
+
+
+def test_render_frame_noise_statistics() -> None:
+    scene = SimulatedScene(peak_counts=0.0, background_counts=400.0, poisson_noise=True, seed=1)
+    frame = scene.render_frame(0.0).astype(float)
+
+    assert frame.mean() == pytest.approx(400.0, rel=0.02)
+    assert frame.var() == pytest.approx(400.0, rel=0.15)
+
+
+def test_multiple_beads_and_drift() -> None:
+    scene = SimulatedScene(
+        size=64,
+        beads=[SimulatedBead(x_px=16.0, y_px=16.0), SimulatedBead(x_px=48.0, y_px=40.0, brightness=0.5)],
+        drift_px_per_s=(2.0, -1.0),
+    )
+    frame = scene.render_frame(0.0, t_s=2.0).astype(float)
+
+    assert np.unravel_index(frame.argmax(), frame.shape) == (14, 20)
+    assert frame[38, 52] == pytest.approx(0.5 * 4095.0, abs=1.0)
+
+
+def test_render_stack_matches_individual_frames() -> None:
+    scene = SimulatedScene(size=32, beads=[SimulatedBead(), SimulatedBead(x_px=5.0, y_px=5.0, z_offset_um=1.0)])
+    zs = [-1.0, 0.0, 0.5, 2.0]
+
+    stack = scene.render_stack(zs, t_s=[0.0, 0.1, 0.2, 0.3])
+
+    assert stack.shape == (4, 32, 32)
+    assert stack.dtype == np.uint16
+    for frame, z in zip(stack, zs):
+        assert np.array_equal(frame, scene.render_frame(z))
+    with pytest.raises(ValueError):
+        scene.render_stack(zs, t_s=[0.0])
+
+
+def test_simulated_camera_streams_uint16_frames_for_the_metric() -> None:
+    stage = MclNanoZStage()
+    stage.move_z_um(1.0)
+    camera = SimulatedCamera(stage=stage, scene=SimulatedScene(seed=0, read_noise_counts=1.0))
+    camera.start()
+
+    frame = camera.get_frame()
+
+    assert frame.image.dtype == np.uint16
+    assert astigmatic_error_signal(frame.image, Roi(x=20, y=20, width=24, height=24)) > 0
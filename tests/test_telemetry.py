@@ -0,0 +1,86 @@
+import time
+
+import pytest
+
+from orca_focus.autofocus import AutofocusSample
+from orca_focus.telemetry import TELEMETRY_CHANNELS, TelemetryRing
+
+
+def _sample(i: int) -> AutofocusSample:
+    return AutofocusSample(
+        timestamp_s=float(i),
+        error=0.0,
+        error_um=0.1 * i,
+        stage_z_um=1.0 + i,
+        commanded_z_um=2.0 + i,
+        roi_total_intensity=100.0,
+        control_applied=i % 2 == 0,
+    )
+
+
+def test_telemetry_ring_window_is_newest_first_to_last_across_wraparound() -> None:
+    ring = TelemetryRing(capacity=4)
+    for i in range(6):
+        ring.append(_sample(i), loop_latency_s=0.001 * i)
+
+    cols = ring.window()
+    assert set(cols) == set(TELEMETRY_CHANNELS)
+    assert list(cols["timestamp_s"]) == [2.0, 3.0, 4.0, 5.0]
+    assert list(cols["stage_z_um"]) == [3.0, 4.0, 5.0, 6.0]
+    assert list(cols["control_applied"]) == [1.0, 0.0, 1.0, 0.0]
+    assert list(ring.window(2)["loop_latency_s"]) == pytest.approx([0.004, 0.005])
+    assert len(ring) == 4 and ring.n_appended == 6
+
+
+def test_telemetry_ring_window_is_a_view_without_copy() -> None:
+    np = pytest.importorskip("numpy")
+    ring = TelemetryRing(capacity=8)
+    for i in range(11):
+        ring.append(_sample(i), loop_latency_s=0.0)
+
+    t = ring.window(5)["timestamp_s"]
+
+    assert isinstance(t, np.ndarray) and t.base is not None
+    assert list(t) == [6.0, 7.0, 8.0, 9.0, 10.0]
+
+
+def test_autofocus_worker_records_telemetry_with_loop_latency() -> None:
+    from orca_focus.autofocus import AstigmaticAutofocusController, AutofocusConfig, AutofocusWorker
+    from orca_focus.calibration import FocusCalibration
+    from orca_focus.focus_metric import Roi
+    from orca_focus.interfaces import CameraFrame
+
+    class _Camera:
+        def __init__(self):
+            self.i = 0
+
+        def get_frame(self):
+            self.i += 1
+            return CameraFrame(image=[[1.0, 2.0], [2.0, 1.0]], timestamp_s=float(self.i))
+
+    class _Stage:
+        z = 0.0
+
+        def get_z_um(self):
+            return self.z
+
+        def move_z_um(self, z):
+            self.z = z
+
+    controller = AstigmaticAutofocusController(
+        camera=_Camera(),
+        stage=_Stage(),
+        config=AutofocusConfig(roi=Roi(x=0, y=0, width=2, height=2), loop_hz=500.0),
+        calibration=FocusCalibration(error_at_focus=0.0, error_to_um=1.0),
+    )
+    ring = TelemetryRing(capacity=64)
+    worker = AutofocusWorker(controller, telemetry=ring)
+    worker.start()
+    deadline = time.monotonic() + 1.0
+    while ring.n_appended < 5 and time.monotonic() < deadline:
+        time.sleep(0.005)
+    worker.stop()
+
+    cols = ring.window()
+    assert len(cols["timestamp_s"]) >= 5
+    assert all(lat > 0.0 for lat in cols["loop_latency_s"])
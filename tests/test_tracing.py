@@ -0,0 +1,138 @@
+import json
+import threading
+from pathlib import Path
+
+import pytest
+
+from orca_focus import tracing
+from orca_focus.autofocus import AstigmaticAutofocusController, AutofocusConfig
+from orca_focus.calibration import FocusCalibration
+from orca_focus.focus_metric import Roi
+from orca_focus.hardware import MclNanoZStage, SimulatedCamera
+
+
+@pytest.fixture(autouse=True)
+def _clean_tracer():
+    tracing.disable()
+    tracing.reset()
+    yield
+    tracing.disable()
+    tracing.reset()
+
+
+def _names() -> list[str]:
+    return [s[0] for items in tracing.spans().values() for s in items]
+
+
+def test_disabled_tracer_records_nothing() -> None:
+    @tracing.traced("fn")
+    def fn() -> int:
+        return 3
+
+    with tracing.span("block"):
+        assert fn() == 3
+
+    assert tracing.spans() == {}
+
+
+def test_spans_nest_and_export_as_chrome_complete_events() -> None:
+    tracing.enable()
+
+    @tracing.traced("inner", "cat")
+    def inner() -> None:
+        return None
+
+    with tracing.span("outer"):
+        inner()
+        inner()
+
+    doc = tracing.chrome_trace()
+    events = [e for e in doc["traceEvents"] if e["ph"] == "X"]
+    assert [e["name"] for e in events] == ["outer", "inner", "inner"]
+    outer, first, second = events
+    assert outer["ts"] <= first["ts"] and second["ts"] + second["dur"] <= outer["ts"] + outer["dur"]
+    assert first["cat"] == "cat" and outer["cat"] == "orca_focus"
+    assert any(e["ph"] == "M" and e["name"] == "thread_name" for e in doc["traceEvents"])
+
+
+def test_each_thread_gets_its_own_track() -> None:
+    tracing.enable()
+
+    def work() -> None:
+        with tracing.span("worker"):
+            pass
+
+    thread = threading.Thread(target=work, name="af-worker")
+    thread.start()
+    thread.join()
+    with tracing.span("main"):
+        pass
+
+    by_thread = {name: [s[0] for s in items] for (_tid, name), items in tracing.spans().items()}
+    assert by_thread["af-worker"] == ["worker"]
+    assert "main" in by_thread[threading.current_thread().name]
+
+
+def test_speedscope_events_are_balanced_per_thread() -> None:
+    tracing.enable()
+    with tracing.span("a"):
+        with tracing.span("b"):
+            pass
+    with tracing.span("c"):
+        pass
+
+    doc = tracing.speedscope()
+    (profile,) = doc["profiles"]
+    frames = [f["name"] for f in doc["shared"]["frames"]]
+    opened = []
+    order = []
+    for event in profile["events"]:
+        if event["type"] == "O":
+            opened.append(event["frame"])
+            order.append(frames[event["frame"]])
+        else:
+            assert opened.pop() == event["frame"]
+    assert not opened
+    assert order == ["a", "b", "c"]
+    assert profile["unit"] == "nanoseconds"
+
+
+def test_traced_lock_records_acquire_wait() -> None:
+    tracing.enable()
+    lock = threading.Lock()
+    with tracing.traced_lock(lock, "lock_wait"):
+        assert lock.locked()
+    assert not lock.locked()
+    assert _names() == ["lock_wait"]
+
+
+def test_export_picks_format_from_suffix(tmp_path: Path) -> None:
+    tracing.enable()
+    with tracing.span("x"):
+        pass
+
+    chrome = json.loads(tracing.export(tmp_path / "trace.json").read_text())
+    scope = json.loads(tracing.export(tmp_path / "trace.speedscope.json").read_text())
+
+    assert "traceEvents" in chrome
+    assert scope["$schema"].startswith("https://www.speedscope.app/")
+
+
+def test_controller_step_records_acquisition_metric_and_stage_spans() -> None:
+    stage = MclNanoZStage()
+    stage.move_z_um(1.0)
+    camera = SimulatedCamera(stage=stage)
+    camera.start()
+    controller = AstigmaticAutofocusController(
+        camera=camera,
+        stage=stage,
+        config=AutofocusConfig(roi=Roi(x=20, y=20, width=24, height=24), command_deadband_um=0.0),
+        calibration=FocusCalibration(error_at_focus=0.0, error_to_um=2.8),
+    )
+
+    tracing.enable()
+    controller.run_step()
+    tracing.disable()
+
+    names = set(_names())
+    assert {"autofocus.step", "camera.get_frame", "metric.error", "mcl.monitor_z"} <= names
@@ -19,3 +19,87 @@ def test_roi_selector_finalize_clamps_to_image() -> None:
     roi = selector.finalize([[0.0] * 6 for _ in range(8)])
 
     assert roi == Roi(x=2, y=3, width=4, height=5)
+
+
+def _frame(image, index, ts=0.0):
+    from orca_focus.interfaces import CameraFrame
+
+    return CameraFrame(image=image, timestamp_s=ts, frame_index=index)
+
+
+def test_display_throttle_skips_repeats_and_caps_rate() -> None:
+    np = pytest.importorskip("numpy")
+    from orca_focus.viewer import DisplayThrottle
+
+    now = [0.0]
+    display = DisplayThrottle(max_fps=10.0, clock=lambda: now[0], auto_downsample=False)
+    image = np.arange(16.0).reshape(4, 4)
+
+    first = display.prepare(_frame(image, 0))
+    assert first is not None
+    assert display.prepare(_frame(image, 0)) is None  # same frame: nothing to draw
+
+    now[0] = 0.05
+    assert display.prepare(_frame(image, 1)) is None  # too soon for 10 fps
+    now[0] = 0.1
+    second = display.prepare(_frame(image + 1, 1))
+
+    assert second[0] is first[0]  # buffer reused in place
+    assert second[0][0, 0] == 1.0
+    assert (display.frames_shown, display.frames_skipped) == (2, 1)
+
+
+def test_display_throttle_zooms_and_downsamples_with_sensor_offsets() -> None:
+    np = pytest.importorskip("numpy")
+    from orca_focus.viewer import DisplayThrottle
+
+    display = DisplayThrottle(downsample=2, zoom_roi=Roi(x=2, y=4, width=4, height=4), auto_downsample=False)
+    image = np.arange(64).reshape(8, 8)
+
+    data, offset, step = display.prepare(_frame(image, 0))
+
+    assert offset == (4, 2) and step == 2
+    assert data.tolist() == [[34, 36], [50, 52]]
+
+    lists = DisplayThrottle(downsample=2, auto_downsample=False).prepare(_frame(image.tolist(), 0))
+    assert lists[0].shape == (4, 4)
+
+
+def test_display_throttle_raises_downsample_when_over_budget() -> None:
+    pytest.importorskip("numpy")
+    from orca_focus.viewer import DisplayThrottle
+
+    display = DisplayThrottle(budget_s=0.0, max_downsample=4, max_fps=1e9, overrun_frames=2)
+    image = [[1.0] * 8 for _ in range(8)]
+    # The first frame allocates the buffer and is not judged.
+    display.prepare(_frame(image, 0))
+    display.prepare(_frame(image, 1))
+    assert display.downsample == 1
+    for i in range(2, 12):
+        display.prepare(_frame(image, i))
+
+    assert display.downsample == 4
+
+
+def test_display_throttle_ignores_single_overrun_and_recovers_downsample() -> None:
+    pytest.importorskip("numpy")
+    from orca_focus.viewer import DisplayThrottle
+
+    display = DisplayThrottle(budget_s=10.0, max_fps=1e9, max_downsample=8, overrun_frames=3, recover_frames=4)
+    image = [[1.0] * 8 for _ in range(8)]
+    display.prepare(_frame(image, 0))
+    display.budget_s = 0.0  # one slow frame (a GC pause, say)
+    display.prepare(_frame(image, 1))
+    display.budget_s = 10.0
+    display.prepare(_frame(image, 2))
+    assert display.downsample == 1
+
+    display.budget_s = 0.0  # sustained overrun
+    for i in range(3, 20):
+        display.prepare(_frame(image, i))
+    assert display.downsample == 8
+
+    display.budget_s = 10.0  # prepare now far under budget
+    for i in range(20, 60):
+        display.prepare(_frame(image, i))
+    assert display.downsample == 1
@@ -0,0 +1,89 @@
+import pytest
+
+from orca_focus.calibration import CalibrationSample, fit_linear_calibration
+from orca_focus.focus_metric import Roi, astigmatic_error_signal
+from orca_focus.hardware import SimulatedScene
+from orca_focus.zhuang import (
+    ZhuangFocusCalibration,
+    fit_zhuang_calibration,
+    fit_zhuang_calibration_with_report,
+    zhuang_error,
+    zhuang_quality_issues,
+)
+
+_Q = (1.05, 0.1, 0.4, 0.1, 0.05, 0.5, -0.1, 0.02, 0.55)
+
+
+def test_zhuang_table_inverts_model_within_capture_range() -> None:
+    cal = ZhuangFocusCalibration(params=_Q)
+    z_lo, z_hi = cal.z_range_um
+
+    assert z_lo < cal.z_focus_um < z_hi
+    assert zhuang_error(cal.z_focus_um, _Q) == pytest.approx(0.0, abs=1e-6)
+    for frac in (0.1, 0.3, 0.5, 0.7, 0.9):
+        z = z_lo + frac * (z_hi - z_lo)
+        assert cal.error_to_z_offset_um(zhuang_error(z, _Q)) == pytest.approx(z - cal.z_focus_um, abs=1e-3)
+
+
+def test_zhuang_table_saturates_outside_capture_range() -> None:
+    cal = ZhuangFocusCalibration(params=_Q)
+    e_lo, e_hi = cal.error_range
+    z_lo, z_hi = cal.z_range_um
+
+    ends = {cal.error_to_z(e_lo - 1.0), cal.error_to_z(e_hi + 1.0)}
+    assert ends == {z_lo, z_hi}
+
+
+def test_fit_zhuang_recovers_synthetic_model() -> None:
+    samples = [CalibrationSample(z_um=25.0 + z, error=zhuang_error(z, _Q)) for z in [-1.0 + 0.05 * i for i in range(41)]]
+
+    report = fit_zhuang_calibration_with_report(samples)
+
+    assert report.r2 == pytest.approx(1.0, abs=1e-6)
+    truth = ZhuangFocusCalibration(params=_Q)
+    for z in (-0.5, -0.2, 0.2, 0.5):
+        e = zhuang_error(z, _Q)
+        assert report.calibration.error_to_z_offset_um(e) == pytest.approx(truth.error_to_z_offset_um(e), abs=1e-3)
+
+
+def test_fit_zhuang_extends_capture_range_beyond_linear_model() -> None:
+    scene = SimulatedScene()
+    roi = Roi(x=20, y=20, width=24, height=24)
+    samples = [
+        CalibrationSample(z_um=z, error=astigmatic_error_signal(scene.render_dot(z), roi))
+        for z in [-3.0 + 0.15 * i for i in range(41)]
+    ]
+
+    zhuang = fit_zhuang_calibration(samples)
+    linear = fit_linear_calibration(samples, robust=True)
+
+    e_far = astigmatic_error_signal(scene.render_dot(2.5), roi)
+    assert zhuang.error_to_z_offset_um(e_far) == pytest.approx(2.5, abs=0.05)
+    assert abs(linear.error_to_z_offset_um(e_far) - 2.5) > 0.2
+    assert zhuang.error_to_um > 0
+
+
+def test_zhuang_calibration_rejects_wrong_parameter_count() -> None:
+    with pytest.raises(ValueError, match="parameters"):
+        ZhuangFocusCalibration(params=(1.0, 0.0, 0.3))
+
+
+def test_zhuang_quality_issues_accepts_clean_sweep() -> None:
+    samples = [CalibrationSample(z_um=25.0 + z, error=zhuang_error(z, _Q)) for z in [-1.0 + 0.05 * i for i in range(41)]]
+
+    report = fit_zhuang_calibration_with_report(samples)
+
+    assert zhuang_quality_issues(samples, report) == []
+
+
+def test_zhuang_quality_issues_flags_poor_fit() -> None:
+    noise = [0.8 * (-1) ** i * (1 + (i % 5)) for i in range(41)]
+    samples = [
+        CalibrationSample(z_um=25.0 + z, error=zhuang_error(z, _Q) + n)
+        for z, n in zip([-1.0 + 0.05 * i for i in range(41)], noise)
+    ]
+
+    report = fit_zhuang_calibration_with_report(samples)
+    issues = zhuang_quality_issues(samples, report)
+
+    assert any("R²" in issue for issue in issues)
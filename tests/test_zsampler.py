@@ -0,0 +1,159 @@
+import random
+import time
+
+import pytest
+
+from orca_focus.hardware import MclNanoZStage
+from orca_focus.zsampler import SampledStage, StageZSampler
+
+
+class _ScriptedSensor:
+    def __init__(self, values: list[float]) -> None:
+        self._values = list(values)
+        self.calls = 0
+
+    def __call__(self) -> float:
+        value = self._values[min(self.calls, len(self._values) - 1)]
+        self.calls += 1
+        return value
+
+
+def test_sampler_snapshot_is_none_before_first_read() -> None:
+    sampler = StageZSampler(read_z=lambda: 1.0)
+    assert sampler.snapshot() is None
+
+
+def test_sampler_filters_noise_around_constant_position() -> None:
+    rng = random.Random(3)
+    sensor = _ScriptedSensor([5.0 + rng.gauss(0.0, 0.01) for _ in range(200)])
+    sampler = StageZSampler(read_z=sensor, window=100, capacity=256)
+
+    for _ in range(200):
+        snap = sampler.sample_once()
+
+    assert snap.n_samples == 100
+    assert snap.z_um == pytest.approx(5.0, abs=0.005)
+    assert snap.noise_um == pytest.approx(0.01, rel=0.3)
+
+
+def test_sampler_estimates_velocity_of_a_ramp(monkeypatch) -> None:
+    clock = {"t": 100.0}
+    monkeypatch.setattr("orca_focus.zsampler.time.monotonic", lambda: clock["t"])
+
+    def _ramp() -> float:
+        clock["t"] += 0.001
+        return 2.0 * (clock["t"] - 100.0)
+
+    sampler = StageZSampler(read_z=_ramp, window=20)
+    for _ in range(50):
+        snap = sampler.sample_once()
+
+    assert snap.velocity_um_s == pytest.approx(2.0)
+    assert snap.z_um == pytest.approx(snap.raw_z_um)
+    assert snap.noise_um == pytest.approx(0.0, abs=1e-9)
+
+
+def test_sampler_ring_buffer_keeps_newest_samples() -> None:
+    sensor = _ScriptedSensor([float(i) for i in range(20)])
+    sampler = StageZSampler(read_z=sensor, window=4, capacity=8)
+    for _ in range(20):
+        sampler.sample_once()
+
+    history = sampler.history()
+    assert [z for _t, z in history] == [float(i) for i in range(12, 20)]
+    assert [z for _t, z in sampler.history(3)] == [17.0, 18.0, 19.0]
+
+
+def test_sampler_thread_polls_stage_sensor_and_survives_errors() -> None:
+    stage = MclNanoZStage()
+    stage.move_z_um(3.0)
+    failures = {"n": 0}
+
+    def _flaky() -> float:
+        if failures["n"] < 2:
+            failures["n"] += 1
+            raise RuntimeError("transient")
+        return stage.read_sensor_z_um()
+
+    with StageZSampler(read_z=_flaky, rate_hz=1000.0, window=10) as sampler:
+        deadline = time.monotonic() + 2.0
+        while sampler.n_samples < 10 and time.monotonic() < deadline:
+            time.sleep(0.005)
+
+    assert sampler.n_errors == 2
+    assert sampler.snapshot().z_um == pytest.approx(3.0)
+
+
+def test_sampler_prefers_stage_sensor_readback() -> None:
+    class _Stage:
+        def get_z_um(self) -> float:
+            return 1.0
+
+        def read_sensor_z_um(self) -> float:
+            return 2.0
+
+        def move_z_um(self, target_z_um: float) -> None:
+            pass
+
+    sampler = StageZSampler(_Stage())
+    assert sampler.sample_once().raw_z_um == 2.0
+
+
+def test_sampled_stage_reads_snapshot_and_forwards_moves() -> None:
+    stage = MclNanoZStage()
+    sampler = StageZSampler(stage, window=4)
+    sampled = SampledStage(stage, sampler)
+
+    stage.move_z_um(1.0)
+    assert sampled.get_z_um() == 1.0  # no snapshot yet: falls through to the stage
+    sampler.sample_once()
+    sampled.move_z_um(2.0)
+
+    assert stage.get_z_um() == 2.0
+    assert sampled.get_z_um() == pytest.approx(1.0)  # snapshot predates the move
+
+
+def test_sampled_stage_forwards_move_and_read_and_records_readback() -> None:
+    from orca_focus.autofocus import AstigmaticAutofocusController, AutofocusConfig
+    from orca_focus.calibration import FocusCalibration
+    from orca_focus.focus_metric import Roi
+    from orca_focus.hardware import SimulatedCamera
+
+    stage = MclNanoZStage()
+    sampler = StageZSampler(stage, window=4)
+    sampled = SampledStage(stage, sampler)
+    stage.move_z_um(1.0)
+
+    assert sampled.move_and_read_z_um(2.0) == 1.0
+    assert stage.get_z_um() == 2.0
+    assert sampler.snapshot().raw_z_um == 1.0
+    assert sampler.n_samples == 1
+
+    controller = AstigmaticAutofocusController(
+        camera=SimulatedCamera(stage),
+        stage=sampled,
+        config=AutofocusConfig(roi=Roi(x=0, y=0, width=8, height=8)),
+        calibration=FocusCalibration(error_at_focus=0.0, error_to_um=1.0),
+    )
+    assert controller._move_and_read is not None
+
+
+def test_sampled_stage_hides_move_and_read_when_stage_lacks_it() -> None:
+    class _Stage:
+        def get_z_um(self) -> float:
+            return 0.0
+
+        def move_z_um(self, target_z_um: float) -> None:
+            pass
+
+    sampled = SampledStage(_Stage(), StageZSampler(_Stage()))
+    assert getattr(sampled, "move_and_read_z_um", None) is None
+
+
+def test_sampler_rejects_bad_arguments() -> None:
+    with pytest.raises(ValueError):
+        StageZSampler()
+    with pytest.raises(ValueError):
+        StageZSampler(read_z=lambda: 0.0, rate_hz=0.0)
+    with pytest.raises(ValueError):
+        StageZSampler(read_z=lambda: 0.0, window=8, capacity=4)